@@ -3,6 +3,7 @@ import logging
 import os
 import shutil
 import socket
+import time
 import base64
 from concurrent.futures import ThreadPoolExecutor
 import redis
@@ -24,6 +25,7 @@ from open_webui.env import (
     ENABLE_DB_MIGRATIONS,
     ENV,
     REDIS_URL,
+    REDIS_CONFIG_SYNC_INTERVAL,
     REDIS_KEY_PREFIX,
     REDIS_SENTINEL_HOSTS,
     REDIS_SENTINEL_PORT,
@@ -226,10 +228,21 @@ class PersistentConfig(Generic[T]):
 
 
 class AppConfig:
+    """
+    Config values, shared between nodes through Redis when it is configured.
+
+    Reads are served from the local `_state` snapshot. Every write bumps a
+    version counter in Redis; at most every REDIS_CONFIG_SYNC_INTERVAL ms a
+    read checks that counter and, when another node changed it, reloads all
+    keys in one pipelined round trip.
+    """
+
     _redis: Union[redis.Redis, redis.cluster.RedisCluster] = None
     _redis_key_prefix: str
 
     _state: dict[str, PersistentConfig]
+    _version: Optional[str] = None
+    _synced_at: float = 0.0
 
     def __init__(
         self,
@@ -237,6 +250,7 @@ class AppConfig:
         redis_sentinels: Optional[list] = [],
         redis_cluster: Optional[bool] = False,
         redis_key_prefix: str = "open-webui",
+        sync_interval: int = REDIS_CONFIG_SYNC_INTERVAL,
     ):
         if redis_url:
             super().__setattr__("_redis_key_prefix", redis_key_prefix)
@@ -251,6 +265,7 @@ class AppConfig:
             )
 
         super().__setattr__("_state", {})
+        super().__setattr__("_sync_interval", sync_interval / 1000)
 
     def __setattr__(self, key, value):
         if isinstance(value, PersistentConfig):
@@ -262,29 +277,61 @@ class AppConfig:
             if self._redis and ENABLE_PERSISTENT_CONFIG:
                 redis_key = f"{self._redis_key_prefix}:config:{key}"
                 self._redis.set(redis_key, json.dumps(self._state[key].value))
+                version = self._redis.incr(self._get_version_key())
+
+                # Only skip the next reload if no other node wrote in between
+                if self._version is not None and version == int(self._version) + 1:
+                    super().__setattr__("_version", str(version))
 
     def __getattr__(self, key):
         if key not in self._state:
             raise AttributeError(f"Config key '{key}' not found")
 
-        # If Redis is available and persistent config is enabled, check for an updated value
+        # If Redis is available and persistent config is enabled, check for updated values
         if self._redis and ENABLE_PERSISTENT_CONFIG:
-            redis_key = f"{self._redis_key_prefix}:config:{key}"
-            redis_value = self._redis.get(redis_key)
+            now = time.monotonic()
+            if now - self._synced_at >= self._sync_interval:
+                super().__setattr__("_synced_at", now)
+                self._sync()
 
-            if redis_value is not None:
-                try:
-                    decoded_value = json.loads(redis_value)
+        return self._state[key].value
 
-                    # Update the in-memory value if different
-                    if self._state[key].value != decoded_value:
-                        self._state[key].value = decoded_value
-                        log.info(f"Updated {key} from Redis: {decoded_value}")
+    def _get_version_key(self) -> str:
+        return f"{self._redis_key_prefix}:config:__version__"
 
-                except json.JSONDecodeError:
-                    log.error(f"Invalid JSON format in Redis for {key}: {redis_value}")
+    def _sync(self):
+        try:
+            # "0" until the first write, so unchanged config isn't reloaded
+            version = self._redis.get(self._get_version_key()) or "0"
+            if version == self._version:
+                return
+
+            keys = list(self._state.keys())
+            # A pipeline of GETs rather than MGET, which fails across cluster slots
+            pipe = self._redis.pipeline(transaction=False)
+            for key in keys:
+                pipe.get(f"{self._redis_key_prefix}:config:{key}")
+            values = pipe.execute()
+        except Exception as e:
+            log.warning(f"Failed to sync config from Redis: {e}")
+            return
 
-        return self._state[key].value
+        for key, redis_value in zip(keys, values):
+            if redis_value is None:
+                continue
+
+            try:
+                decoded_value = json.loads(redis_value)
+
+                # Update the in-memory value if different
+                if self._state[key].value != decoded_value:
+                    self._state[key].value = decoded_value
+                    log.info(f"Updated {key} from Redis: {decoded_value}")
+
+            except json.JSONDecodeError:
+                log.error(f"Invalid JSON format in Redis for {key}: {redis_value}")
+
+        super().__setattr__("_version", version)
 
 
 ####################################
@@ -2345,6 +2392,14 @@ CODE_INTERPRETER_PYODIDE_PROMPT = """
 
 VECTOR_DB = os.environ.get("VECTOR_DB", "chroma")
 
+# Persistent BM25 index (SQLite FTS5, one file per collection) for hybrid search.
+# Kept in sync on every vector DB write; point the directory at shared storage
+# when running several nodes.
+ENABLE_RAG_BM25_INDEX = (
+    os.environ.get("ENABLE_RAG_BM25_INDEX", "False").lower() == "true"
+)
+RAG_BM25_INDEX_DIR = os.environ.get("RAG_BM25_INDEX_DIR", f"{CACHE_DIR}/bm25")
+
 # Chroma
 CHROMA_DATA_PATH = f"{DATA_DIR}/vector_db"
 
@@ -3094,6 +3149,26 @@ RAG_EMBEDDING_PREFIX_FIELD_NAME = os.environ.get(
     "RAG_EMBEDDING_PREFIX_FIELD_NAME", None
 )
 
+# Content-addressed embedding cache, keyed by engine, model, prefix and text.
+# The in-memory LRU tier can be backed by a shared "redis" or local "disk" tier.
+ENABLE_RAG_EMBEDDING_CACHE = (
+    os.environ.get("ENABLE_RAG_EMBEDDING_CACHE", "False").lower() == "true"
+)
+RAG_EMBEDDING_CACHE_SIZE = int(os.environ.get("RAG_EMBEDDING_CACHE_SIZE", "10000"))
+RAG_EMBEDDING_CACHE_BACKEND = os.environ.get("RAG_EMBEDDING_CACHE_BACKEND", "").lower()
+RAG_EMBEDDING_CACHE_DTYPE = os.environ.get(
+    "RAG_EMBEDDING_CACHE_DTYPE", "float32"
+).lower()
+RAG_EMBEDDING_CACHE_TTL = int(os.environ.get("RAG_EMBEDDING_CACHE_TTL", "0"))
+RAG_EMBEDDING_CACHE_DIR = os.environ.get(
+    "RAG_EMBEDDING_CACHE_DIR", f"{CACHE_DIR}/embeddings"
+)
+
+# Number of files processed in parallel by the background knowledge reindex
+KNOWLEDGE_REINDEX_CONCURRENCY = int(
+    os.environ.get("KNOWLEDGE_REINDEX_CONCURRENCY", "4")
+)
+
 RAG_RERANKING_ENGINE = PersistentConfig(
     "RAG_RERANKING_ENGINE",
     "rag.reranking_engine",
@@ -3174,6 +3249,13 @@ CHUNK_OVERLAP = PersistentConfig(
     int(os.environ.get("CHUNK_OVERLAP", "100")),
 )
 
+# Split documents larger than RAG_SPLIT_PROCESS_POOL_MIN_CHARS on a pool of
+# worker processes instead of the request thread (0 disables the pool)
+RAG_SPLIT_PROCESS_POOL_SIZE = int(os.environ.get("RAG_SPLIT_PROCESS_POOL_SIZE", "0"))
+RAG_SPLIT_PROCESS_POOL_MIN_CHARS = int(
+    os.environ.get("RAG_SPLIT_PROCESS_POOL_MIN_CHARS", "1000000")
+)
+
 DEFAULT_RAG_TEMPLATE = """### Task:
 Respond to the user query using the provided context, incorporating inline citations in the format [id] **only when the <source> tag includes an explicit id attribute** (e.g., <source id="1">).
 
@@ -410,6 +410,23 @@ if DATABASE_USER_ACTIVE_STATUS_UPDATE_INTERVAL is not None:
     except Exception:
         DATABASE_USER_ACTIVE_STATUS_UPDATE_INTERVAL = 0.0
 
+# Seconds an authenticated user (and their API key permission) is served from
+# memory; changes to users and groups invalidate it early (0 disables)
+AUTH_USER_CACHE_TTL = os.environ.get("AUTH_USER_CACHE_TTL", "10")
+try:
+    AUTH_USER_CACHE_TTL = max(float(AUTH_USER_CACHE_TTL), 0.0)
+except ValueError:
+    AUTH_USER_CACHE_TTL = 10.0
+
+# Seconds between bulk writes of users' last active timestamps
+USER_LAST_ACTIVE_FLUSH_INTERVAL = os.environ.get(
+    "USER_LAST_ACTIVE_FLUSH_INTERVAL", "15"
+)
+try:
+    USER_LAST_ACTIVE_FLUSH_INTERVAL = max(float(USER_LAST_ACTIVE_FLUSH_INTERVAL), 1.0)
+except ValueError:
+    USER_LAST_ACTIVE_FLUSH_INTERVAL = 15.0
+
 # When enabled, get_db_context reuses existing sessions; set to False to always create new sessions
 DATABASE_ENABLE_SESSION_SHARING = (
     os.environ.get("DATABASE_ENABLE_SESSION_SHARING", "False").lower() == "true"
@@ -428,6 +445,24 @@ ENABLE_REALTIME_CHAT_SAVE = (
     os.environ.get("ENABLE_REALTIME_CHAT_SAVE", "False").lower() == "true"
 )
 
+# Realtime saves are buffered per chat and written at most once per interval
+# (seconds), or sooner once this many bytes of new content are pending.
+REALTIME_CHAT_SAVE_FLUSH_INTERVAL = os.environ.get(
+    "REALTIME_CHAT_SAVE_FLUSH_INTERVAL", "1"
+)
+try:
+    REALTIME_CHAT_SAVE_FLUSH_INTERVAL = float(REALTIME_CHAT_SAVE_FLUSH_INTERVAL)
+except ValueError:
+    REALTIME_CHAT_SAVE_FLUSH_INTERVAL = 1.0
+
+REALTIME_CHAT_SAVE_FLUSH_THRESHOLD = os.environ.get(
+    "REALTIME_CHAT_SAVE_FLUSH_THRESHOLD", "16384"
+)
+try:
+    REALTIME_CHAT_SAVE_FLUSH_THRESHOLD = int(REALTIME_CHAT_SAVE_FLUSH_THRESHOLD)
+except ValueError:
+    REALTIME_CHAT_SAVE_FLUSH_THRESHOLD = 16384
+
 ENABLE_QUERIES_CACHE = os.environ.get("ENABLE_QUERIES_CACHE", "False").lower() == "true"
 
 RAG_SYSTEM_CONTEXT = os.environ.get("RAG_SYSTEM_CONTEXT", "False").lower() == "true"
@@ -472,6 +507,14 @@ else:
     except Exception:
         REDIS_RECONNECT_DELAY = None
 
+# How often (in milliseconds) a node checks Redis for config changes made by
+# other nodes; reads in between are served from the local snapshot
+REDIS_CONFIG_SYNC_INTERVAL = os.environ.get("REDIS_CONFIG_SYNC_INTERVAL", "1000")
+try:
+    REDIS_CONFIG_SYNC_INTERVAL = max(int(REDIS_CONFIG_SYNC_INTERVAL), 0)
+except ValueError:
+    REDIS_CONFIG_SYNC_INTERVAL = 1000
+
 ####################################
 # UVICORN WORKERS
 ####################################
@@ -816,6 +859,81 @@ AIOHTTP_CLIENT_SESSION_SSL = (
     os.environ.get("AIOHTTP_CLIENT_SESSION_SSL", "True").lower() == "true"
 )
 
+# App-lifetime connection pools (one connector per upstream origin)
+AIOHTTP_CLIENT_POOL_LIMIT = os.environ.get("AIOHTTP_CLIENT_POOL_LIMIT", "100")
+try:
+    AIOHTTP_CLIENT_POOL_LIMIT = int(AIOHTTP_CLIENT_POOL_LIMIT)
+except ValueError:
+    AIOHTTP_CLIENT_POOL_LIMIT = 100
+
+# Connection limit per origin of the pool used for Ollama/OpenAI chat
+# completion and proxy requests. Streamed responses hold their connection
+# for the whole generation, so any limit caps the number of concurrent chats
+# per provider (further requests wait for a free connection). 0 means no
+# limit.
+AIOHTTP_CLIENT_LLM_POOL_LIMIT = os.environ.get("AIOHTTP_CLIENT_LLM_POOL_LIMIT", "0")
+try:
+    AIOHTTP_CLIENT_LLM_POOL_LIMIT = int(AIOHTTP_CLIENT_LLM_POOL_LIMIT)
+except ValueError:
+    AIOHTTP_CLIENT_LLM_POOL_LIMIT = 0
+
+# 0 means no per-host limit
+AIOHTTP_CLIENT_POOL_LIMIT_PER_HOST = os.environ.get(
+    "AIOHTTP_CLIENT_POOL_LIMIT_PER_HOST", "0"
+)
+try:
+    AIOHTTP_CLIENT_POOL_LIMIT_PER_HOST = int(AIOHTTP_CLIENT_POOL_LIMIT_PER_HOST)
+except ValueError:
+    AIOHTTP_CLIENT_POOL_LIMIT_PER_HOST = 0
+
+AIOHTTP_CLIENT_POOL_KEEPALIVE_TIMEOUT = os.environ.get(
+    "AIOHTTP_CLIENT_POOL_KEEPALIVE_TIMEOUT", "30"
+)
+try:
+    AIOHTTP_CLIENT_POOL_KEEPALIVE_TIMEOUT = float(AIOHTTP_CLIENT_POOL_KEEPALIVE_TIMEOUT)
+except ValueError:
+    AIOHTTP_CLIENT_POOL_KEEPALIVE_TIMEOUT = 30.0
+
+AIOHTTP_CLIENT_POOL_DNS_CACHE_TTL = os.environ.get(
+    "AIOHTTP_CLIENT_POOL_DNS_CACHE_TTL", "300"
+)
+try:
+    AIOHTTP_CLIENT_POOL_DNS_CACHE_TTL = int(AIOHTTP_CLIENT_POOL_DNS_CACHE_TTL)
+except ValueError:
+    AIOHTTP_CLIENT_POOL_DNS_CACHE_TTL = 300
+
+# Retries (with exponential backoff, honoring Retry-After) for 429/5xx
+# responses from embedding engines
+RAG_EMBEDDING_MAX_RETRIES = os.environ.get("RAG_EMBEDDING_MAX_RETRIES", "3")
+try:
+    RAG_EMBEDDING_MAX_RETRIES = int(RAG_EMBEDDING_MAX_RETRIES)
+except ValueError:
+    RAG_EMBEDDING_MAX_RETRIES = 3
+
+# How requests for a model served by several Ollama/OpenAI connections are
+# spread: "least_outstanding", "weighted" or "random"
+UPSTREAM_BALANCER_STRATEGY = os.environ.get(
+    "UPSTREAM_BALANCER_STRATEGY", "least_outstanding"
+).lower()
+if UPSTREAM_BALANCER_STRATEGY not in ["least_outstanding", "weighted", "random"]:
+    UPSTREAM_BALANCER_STRATEGY = "least_outstanding"
+
+# Consecutive failures after which a connection is skipped for
+# UPSTREAM_BALANCER_COOLDOWN seconds (0 disables ejection)
+UPSTREAM_BALANCER_FAILURE_THRESHOLD = os.environ.get(
+    "UPSTREAM_BALANCER_FAILURE_THRESHOLD", "3"
+)
+try:
+    UPSTREAM_BALANCER_FAILURE_THRESHOLD = int(UPSTREAM_BALANCER_FAILURE_THRESHOLD)
+except ValueError:
+    UPSTREAM_BALANCER_FAILURE_THRESHOLD = 3
+
+UPSTREAM_BALANCER_COOLDOWN = os.environ.get("UPSTREAM_BALANCER_COOLDOWN", "30")
+try:
+    UPSTREAM_BALANCER_COOLDOWN = float(UPSTREAM_BALANCER_COOLDOWN)
+except ValueError:
+    UPSTREAM_BALANCER_COOLDOWN = 30.0
+
 AIOHTTP_CLIENT_TIMEOUT_MODEL_LIST = os.environ.get(
     "AIOHTTP_CLIENT_TIMEOUT_MODEL_LIST",
     os.environ.get("AIOHTTP_CLIENT_TIMEOUT_OPENAI_MODEL_LIST", "10"),
@@ -849,6 +967,31 @@ AIOHTTP_CLIENT_SESSION_TOOL_SERVER_SSL = (
     os.environ.get("AIOHTTP_CLIENT_SESSION_TOOL_SERVER_SSL", "True").lower() == "true"
 )
 
+# Seconds an unused MCP session stays open for the next chat (0 disables pooling)
+MCP_SESSION_POOL_IDLE_TIMEOUT = os.environ.get("MCP_SESSION_POOL_IDLE_TIMEOUT", "300")
+try:
+    MCP_SESSION_POOL_IDLE_TIMEOUT = max(float(MCP_SESSION_POOL_IDLE_TIMEOUT), 0.0)
+except ValueError:
+    MCP_SESSION_POOL_IDLE_TIMEOUT = 300.0
+
+# Seconds a pooled MCP session may sit idle before it is pinged on reuse
+MCP_SESSION_POOL_HEALTH_CHECK_INTERVAL = os.environ.get(
+    "MCP_SESSION_POOL_HEALTH_CHECK_INTERVAL", "30"
+)
+try:
+    MCP_SESSION_POOL_HEALTH_CHECK_INTERVAL = max(
+        float(MCP_SESSION_POOL_HEALTH_CHECK_INTERVAL), 0.0
+    )
+except ValueError:
+    MCP_SESSION_POOL_HEALTH_CHECK_INTERVAL = 30.0
+
+# Seconds MCP tool specs are reused; tools/list_changed notifications expire them early
+MCP_TOOL_SPECS_CACHE_TTL = os.environ.get("MCP_TOOL_SPECS_CACHE_TTL", "300")
+try:
+    MCP_TOOL_SPECS_CACHE_TTL = max(float(MCP_TOOL_SPECS_CACHE_TTL), 0.0)
+except ValueError:
+    MCP_TOOL_SPECS_CACHE_TTL = 300.0
+
 
 RAG_EMBEDDING_TIMEOUT = os.environ.get("RAG_EMBEDDING_TIMEOUT", "")
 
@@ -68,6 +68,7 @@ from open_webui.socket.main import (
     get_event_emitter,
     get_models_in_use,
 )
+from open_webui.socket.utils import RedisReplicaDict
 from open_webui.routers import (
     analytics,
     audio,
@@ -519,6 +520,7 @@ from open_webui.env import (
 
 
 from open_webui.utils.models import (
+    copy_model,
     get_all_models,
     get_all_base_models,
     check_model_access,
@@ -536,6 +538,13 @@ from open_webui.utils.middleware import (
     process_chat_response,
 )
 from open_webui.utils.tools import set_tool_servers, set_terminal_servers
+from open_webui.utils.chat_save import CHAT_SAVE_BUFFER
+from open_webui.utils.knowledge_reindex import KNOWLEDGE_REINDEX_JOB
+from open_webui.utils.session_pool import EMBEDDING_SESSION_POOL, LLM_SESSION_POOL
+from open_webui.utils.mcp.pool import MCP_SESSION_POOL
+from open_webui.utils.auth_cache import AUTH_CACHE
+from open_webui.utils.last_active import LAST_ACTIVE_BUFFER
+from open_webui.retrieval.splitters import shutdown_split_executor
 
 from open_webui.utils.auth import (
     get_license_data,
@@ -648,6 +657,9 @@ async def lifespan(app: FastAPI):
         app.state.redis_task_command_listener = asyncio.create_task(
             redis_task_command_listener(app)
         )
+        app.state.auth_cache_listener = asyncio.create_task(
+            AUTH_CACHE.listen(app.state.redis)
+        )
 
     if THREAD_POOL_SIZE and THREAD_POOL_SIZE > 0:
         limiter = anyio.to_thread.current_default_thread_limiter()
@@ -656,6 +668,9 @@ async def lifespan(app: FastAPI):
     asyncio.create_task(periodic_usage_pool_cleanup())
     asyncio.create_task(periodic_session_pool_cleanup())
 
+    if isinstance(MODELS, RedisReplicaDict):
+        app.state.models_replica_listener = asyncio.create_task(MODELS.listen())
+
     if app.state.config.ENABLE_BASE_MODELS_CACHE:
         try:
             await get_all_models(
@@ -709,11 +724,47 @@ async def lifespan(app: FastAPI):
         except Exception as e:
             log.warning(f"Failed to initialize tool/terminal servers at startup: {e}")
 
+    # Continue a knowledge reindex interrupted by a crash or restart
+    asyncio.create_task(
+        KNOWLEDGE_REINDEX_JOB.resume(
+            Request(
+                {
+                    "type": "http",
+                    "asgi.version": "3.0",
+                    "asgi.spec_version": "2.0",
+                    "method": "POST",
+                    "path": "/internal",
+                    "query_string": b"",
+                    "headers": Headers({}).raw,
+                    "client": ("127.0.0.1", 12345),
+                    "server": ("127.0.0.1", 80),
+                    "scheme": "http",
+                    "app": app,
+                }
+            )
+        )
+    )
+
     yield
 
+    # Persist realtime chat saves still sitting in the write-behind buffer
+    await CHAT_SAVE_BUFFER.flush_all()
+
+    await LAST_ACTIVE_BUFFER.close()
+    await EMBEDDING_SESSION_POOL.close()
+    await LLM_SESSION_POOL.close()
+    await MCP_SESSION_POOL.close()
+    shutdown_split_executor()
+
     if hasattr(app.state, "redis_task_command_listener"):
         app.state.redis_task_command_listener.cancel()
 
+    if hasattr(app.state, "auth_cache_listener"):
+        app.state.auth_cache_listener.cancel()
+
+    if hasattr(app.state, "models_replica_listener"):
+        app.state.models_replica_listener.cancel()
+
 
 app = FastAPI(
     title="Open WebUI",
@@ -935,9 +986,11 @@ app.state.USER_COUNT = None
 
 app.state.TOOLS = {}
 app.state.TOOL_CONTENTS = {}
+app.state.TOOL_VERSIONS = {}
 
 app.state.FUNCTIONS = {}
 app.state.FUNCTION_CONTENTS = {}
+app.state.FUNCTION_VERSIONS = {}
 
 ########################################
 #
@@ -1625,6 +1678,9 @@ async def get_models(
         if "pipeline" in model and model["pipeline"].get("type", None) == "filter":
             continue
 
+        # The returned models are also the entries of the model registry
+        model = copy_model(model)
+
         # Remove profile image URL to reduce payload size
         if model.get("info", {}).get("meta", {}).get("profile_image_url"):
             model["info"]["meta"].pop("profile_image_url", None)
@@ -1878,7 +1934,9 @@ async def chat_completion(
             if metadata.get("chat_id") and metadata.get("message_id"):
                 try:
                     if not metadata["chat_id"].startswith("local:"):
-                        Chats.upsert_message_to_chat_by_id_and_message_id(
+                        await CHAT_SAVE_BUFFER.write_through(
+                            metadata["chat_id"],
+                            Chats.upsert_message_to_chat_by_id_and_message_id,
                             metadata["chat_id"],
                             metadata["message_id"],
                             {
@@ -1913,7 +1971,9 @@ async def chat_completion(
                 # Update the chat message with the error
                 try:
                     if not metadata["chat_id"].startswith("local:"):
-                        Chats.upsert_message_to_chat_by_id_and_message_id(
+                        await CHAT_SAVE_BUFFER.write_through(
+                            metadata["chat_id"],
+                            Chats.upsert_message_to_chat_by_id_and_message_id,
                             metadata["chat_id"],
                             metadata["message_id"],
                             {
@@ -2361,7 +2421,7 @@ async def get_current_usage(user=Depends(get_verified_user)):
             )
 
         return {
-            "model_ids": get_models_in_use(),
+            "model_ids": await get_models_in_use(),
             "user_count": Users.get_active_user_count(),
         }
     except HTTPException:
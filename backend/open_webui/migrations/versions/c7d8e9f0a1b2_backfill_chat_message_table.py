@@ -0,0 +1,212 @@
+"""Backfill chat_message table
+
+Revision ID: c7d8e9f0a1b2
+Revises: b2c3d4e5f6a7
+Create Date: 2026-10-17 09:00:00.000000
+
+"""
+
+import time
+import json
+import logging
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+log = logging.getLogger(__name__)
+
+revision: str = "c7d8e9f0a1b2"
+down_revision: Union[str, None] = "b2c3d4e5f6a7"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+CHAT_BATCH_SIZE = 500
+BATCH_SIZE = 5000
+
+
+def _flush_batch(conn, table, batch):
+    """
+    Insert a batch of messages, falling back to row-by-row on error.
+    """
+    savepoint = conn.begin_nested()
+    try:
+        conn.execute(sa.insert(table), batch)
+        savepoint.commit()
+        return len(batch), 0
+    except Exception:
+        savepoint.rollback()
+        inserted = 0
+        failed = 0
+        for msg in batch:
+            sp = conn.begin_nested()
+            try:
+                conn.execute(sa.insert(table).values(**msg))
+                sp.commit()
+                inserted += 1
+            except Exception as e:
+                sp.rollback()
+                failed += 1
+                log.warning(f"Failed to insert message {msg['id']}: {e}")
+        return inserted, failed
+
+
+def _normalize_timestamp(timestamp, now: int) -> int:
+    try:
+        timestamp = int(float(timestamp))
+    except Exception:
+        return now
+
+    if timestamp > 10_000_000_000:
+        timestamp = timestamp // 1000
+    if timestamp < 1577836800 or timestamp > now + 86400:
+        return now
+    return timestamp
+
+
+def upgrade() -> None:
+    # chat_message becomes the primary read path for chat history, but until
+    # now messages written through full chat updates (e.g. new user messages
+    # saved by the frontend) were only stored in chat.chat. Insert every
+    # message that has no row yet and repair parent links, so branches can be
+    # loaded from chat_message alone.
+    conn = op.get_bind()
+
+    chat_table = sa.table(
+        "chat",
+        sa.column("id", sa.Text()),
+        sa.column("user_id", sa.Text()),
+        sa.column("chat", sa.JSON()),
+    )
+
+    chat_message_table = sa.table(
+        "chat_message",
+        sa.column("id", sa.Text()),
+        sa.column("chat_id", sa.Text()),
+        sa.column("user_id", sa.Text()),
+        sa.column("role", sa.Text()),
+        sa.column("parent_id", sa.Text()),
+        sa.column("content", sa.JSON()),
+        sa.column("output", sa.JSON()),
+        sa.column("model_id", sa.Text()),
+        sa.column("files", sa.JSON()),
+        sa.column("sources", sa.JSON()),
+        sa.column("embeds", sa.JSON()),
+        sa.column("done", sa.Boolean()),
+        sa.column("status_history", sa.JSON()),
+        sa.column("error", sa.JSON()),
+        sa.column("usage", sa.JSON()),
+        sa.column("created_at", sa.BigInteger()),
+        sa.column("updated_at", sa.BigInteger()),
+    )
+
+    result = conn.execute(
+        sa.select(chat_table.c.id, chat_table.c.user_id, chat_table.c.chat)
+        .where(~chat_table.c.user_id.like("shared-%"))
+        .execution_options(yield_per=CHAT_BATCH_SIZE, stream_results=True)
+    )
+
+    now = int(time.time())
+    messages_batch = []
+    total_inserted = 0
+    total_failed = 0
+    total_relinked = 0
+
+    def backfill_chats(chats):
+        nonlocal total_inserted, total_failed, total_relinked
+
+        stored = {
+            row[0]: row[1]
+            for row in conn.execute(
+                sa.select(
+                    chat_message_table.c.id, chat_message_table.c.parent_id
+                ).where(chat_message_table.c.chat_id.in_([c[0] for c in chats]))
+            )
+        }
+
+        for chat_id, user_id, messages in chats:
+            for message_id, message in messages.items():
+                if not isinstance(message, dict) or not message.get("role"):
+                    continue
+
+                composite_id = f"{chat_id}-{message_id}"
+                parent_id = message.get("parentId")
+
+                if composite_id in stored:
+                    if stored[composite_id] != parent_id:
+                        conn.execute(
+                            sa.update(chat_message_table)
+                            .where(chat_message_table.c.id == composite_id)
+                            .values(parent_id=parent_id)
+                        )
+                        total_relinked += 1
+                    continue
+
+                timestamp = _normalize_timestamp(message.get("timestamp", now), now)
+                messages_batch.append(
+                    {
+                        "id": composite_id,
+                        "chat_id": chat_id,
+                        "user_id": user_id,
+                        "role": message.get("role"),
+                        "parent_id": parent_id,
+                        "content": message.get("content"),
+                        "output": message.get("output"),
+                        "model_id": message.get("model"),
+                        "files": message.get("files"),
+                        "sources": message.get("sources"),
+                        "embeds": message.get("embeds"),
+                        "done": message.get("done", True),
+                        "status_history": message.get("statusHistory"),
+                        "error": message.get("error"),
+                        "usage": message.get("usage"),
+                        "created_at": timestamp,
+                        "updated_at": timestamp,
+                    }
+                )
+
+                if len(messages_batch) >= BATCH_SIZE:
+                    inserted, failed = _flush_batch(
+                        conn, chat_message_table, messages_batch
+                    )
+                    total_inserted += inserted
+                    total_failed += failed
+                    messages_batch.clear()
+
+    chats = []
+    for chat_row in result:
+        chat_data = chat_row[2]
+        if not chat_data:
+            continue
+
+        if isinstance(chat_data, str):
+            try:
+                chat_data = json.loads(chat_data)
+            except Exception:
+                continue
+
+        messages = (chat_data.get("history") or {}).get("messages") or {}
+        if messages:
+            chats.append((chat_row[0], chat_row[1], messages))
+
+        if len(chats) >= CHAT_BATCH_SIZE:
+            backfill_chats(chats)
+            chats = []
+
+    if chats:
+        backfill_chats(chats)
+
+    if messages_batch:
+        inserted, failed = _flush_batch(conn, chat_message_table, messages_batch)
+        total_inserted += inserted
+        total_failed += failed
+
+    log.info(
+        f"Backfilled {total_inserted} messages into chat_message table "
+        f"({total_failed} failed, {total_relinked} parent links repaired)"
+    )
+
+
+def downgrade() -> None:
+    # Backfilled rows mirror chat.chat and are kept in sync from now on
+    pass
@@ -0,0 +1,197 @@
+"""Add full-text search index for chats
+
+Revision ID: d8e9f0a1b2c3
+Revises: c7d8e9f0a1b2
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+
+import logging
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+log = logging.getLogger(__name__)
+
+revision: str = "d8e9f0a1b2c3"
+down_revision: Union[str, None] = "c7d8e9f0a1b2"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Searchable text of a chat_message.content JSON value: the string itself, or
+# the text blocks of a list of content blocks
+def _sqlite_message_text(column: str) -> str:
+    return f"""
+        CASE
+            WHEN NOT json_valid({column}) THEN ''
+            WHEN json_type({column}) = 'text' THEN json_extract({column}, '$')
+            WHEN json_type({column}) = 'array' THEN coalesce((
+                SELECT group_concat(json_extract(block.value, '$.text'), ' ')
+                FROM json_each({column}) AS block
+                WHERE json_extract(block.value, '$.type') = 'text'
+            ), '')
+            ELSE ''
+        END
+    """
+
+
+# Deletes the index row of `old`. UNINDEXED columns can only be scanned, so
+# the row is first narrowed down to the user's rows through the user_id index.
+def _sqlite_delete(table: str, id_column: str) -> str:
+    return f"""
+        DELETE FROM {table}
+        WHERE {table} MATCH '{{user_id}} : "' || replace(coalesce(old.user_id, ''), '"', '""') || '"'
+        AND {id_column} = old.id;
+    """
+
+
+def _upgrade_sqlite(conn):
+    # Rows carry the id of the indexed chat_message / chat row and are kept in
+    # sync by triggers, so every message upsert updates the index. (Both
+    # tables have TEXT primary keys, whose implicit rowids VACUUM may
+    # renumber, so rowids can't link them.) user_id is indexed too so a
+    # search only matches the searching user's rows inside FTS instead of
+    # filtering every match afterwards.
+    try:
+        conn.execute(sa.text("""
+            CREATE VIRTUAL TABLE chat_message_fts USING fts5(
+                content, id UNINDEXED, chat_id UNINDEXED, user_id,
+                tokenize = 'unicode61 remove_diacritics 2'
+            )
+            """))
+    except Exception as e:
+        log.warning(f"SQLite FTS5 is unavailable, chat search stays unindexed: {e}")
+        return
+
+    conn.execute(sa.text("""
+        CREATE VIRTUAL TABLE chat_title_fts USING fts5(
+            title, chat_id UNINDEXED, user_id,
+            tokenize = 'unicode61 remove_diacritics 2'
+        )
+        """))
+
+    message_insert = f"""
+        INSERT INTO chat_message_fts (content, id, chat_id, user_id)
+        VALUES ({_sqlite_message_text("new.content")}, new.id, new.chat_id, new.user_id);
+    """
+    conn.execute(sa.text(f"""
+        CREATE TRIGGER chat_message_fts_insert AFTER INSERT ON chat_message BEGIN
+            {message_insert}
+        END
+        """))
+    conn.execute(sa.text(f"""
+        CREATE TRIGGER chat_message_fts_update AFTER UPDATE OF content, user_id ON chat_message BEGIN
+            {_sqlite_delete("chat_message_fts", "id")}
+            {message_insert}
+        END
+        """))
+    conn.execute(sa.text(f"""
+        CREATE TRIGGER chat_message_fts_delete AFTER DELETE ON chat_message BEGIN
+            {_sqlite_delete("chat_message_fts", "id")}
+        END
+        """))
+
+    title_insert = """
+        INSERT INTO chat_title_fts (title, chat_id, user_id)
+        VALUES (coalesce(new.title, ''), new.id, new.user_id);
+    """
+    conn.execute(sa.text(f"""
+        CREATE TRIGGER chat_title_fts_insert AFTER INSERT ON chat BEGIN
+            {title_insert}
+        END
+        """))
+    conn.execute(sa.text(f"""
+        CREATE TRIGGER chat_title_fts_update AFTER UPDATE OF title, user_id ON chat BEGIN
+            {_sqlite_delete("chat_title_fts", "chat_id")}
+            {title_insert}
+        END
+        """))
+    conn.execute(sa.text(f"""
+        CREATE TRIGGER chat_title_fts_delete AFTER DELETE ON chat BEGIN
+            {_sqlite_delete("chat_title_fts", "chat_id")}
+        END
+        """))
+
+    conn.execute(sa.text(f"""
+        INSERT INTO chat_message_fts (content, id, chat_id, user_id)
+        SELECT {_sqlite_message_text("content")}, id, chat_id, user_id
+        FROM chat_message
+        """))
+    conn.execute(sa.text("""
+        INSERT INTO chat_title_fts (title, chat_id, user_id)
+        SELECT coalesce(title, ''), id, user_id FROM chat
+        """))
+
+
+def _upgrade_postgresql(conn):
+    # content is a json column whose text form is escaped JSON, so index the
+    # extracted message text (same rules as SQLite) through an immutable
+    # function. Values PostgreSQL can't extract as text (escaped NULs) fall
+    # back to the raw JSON. Text is truncated so huge messages stay under the
+    # 1MB tsvector limit.
+    conn.execute(sa.text("""
+        CREATE OR REPLACE FUNCTION chat_message_search_text(content json)
+        RETURNS text
+        LANGUAGE plpgsql IMMUTABLE PARALLEL SAFE
+        AS $$
+        BEGIN
+            RETURN left(CASE json_typeof(content)
+                WHEN 'string' THEN content #>> '{}'
+                WHEN 'array' THEN coalesce((
+                    SELECT string_agg(block ->> 'text', ' ')
+                    FROM json_array_elements(content) AS block
+                    WHERE json_typeof(block) = 'object'
+                    AND block ->> 'type' = 'text'
+                ), '')
+                ELSE ''
+            END, 100000);
+        EXCEPTION WHEN others THEN
+            RETURN left(content::text, 100000);
+        END;
+        $$
+        """))
+
+    # Expression indexes: maintained by PostgreSQL on every write, and used by
+    # queries that repeat the exact same expressions
+    conn.execute(sa.text("""
+        CREATE INDEX IF NOT EXISTS chat_message_content_fts_idx ON chat_message
+        USING GIN (to_tsvector('simple', chat_message_search_text(content)))
+        """))
+    conn.execute(sa.text("""
+        CREATE INDEX IF NOT EXISTS chat_title_fts_idx ON chat
+        USING GIN (to_tsvector('simple', coalesce(title, '')))
+        """))
+
+
+def upgrade() -> None:
+    conn = op.get_bind()
+    dialect = conn.dialect.name
+
+    if dialect == "sqlite":
+        _upgrade_sqlite(conn)
+    elif dialect == "postgresql":
+        _upgrade_postgresql(conn)
+
+
+def downgrade() -> None:
+    conn = op.get_bind()
+    dialect = conn.dialect.name
+
+    if dialect == "sqlite":
+        for trigger in (
+            "chat_message_fts_insert",
+            "chat_message_fts_update",
+            "chat_message_fts_delete",
+            "chat_title_fts_insert",
+            "chat_title_fts_update",
+            "chat_title_fts_delete",
+        ):
+            conn.execute(sa.text(f"DROP TRIGGER IF EXISTS {trigger}"))
+        conn.execute(sa.text("DROP TABLE IF EXISTS chat_message_fts"))
+        conn.execute(sa.text("DROP TABLE IF EXISTS chat_title_fts"))
+    elif dialect == "postgresql":
+        op.drop_index("chat_message_content_fts_idx", table_name="chat_message")
+        op.drop_index("chat_title_fts_idx", table_name="chat")
+        conn.execute(sa.text("DROP FUNCTION IF EXISTS chat_message_search_text(json)"))
@@ -0,0 +1,63 @@
+"""Add content_hash to tool and function tables
+
+Revision ID: e9f0a1b2c3d4
+Revises: d8e9f0a1b2c3
+Create Date: 2026-10-17 15:00:00.000000
+
+"""
+
+import hashlib
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "e9f0a1b2c3d4"
+down_revision: Union[str, None] = "d8e9f0a1b2c3"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 100
+
+
+def _backfill(conn, table_name: str):
+    table = sa.table(
+        table_name,
+        sa.column("id", sa.String()),
+        sa.column("content", sa.Text()),
+        sa.column("content_hash", sa.Text()),
+    )
+
+    ids = [row[0] for row in conn.execute(sa.select(table.c.id))]
+    for i in range(0, len(ids), BATCH_SIZE):
+        rows = conn.execute(
+            sa.select(table.c.id, table.c.content).where(
+                table.c.id.in_(ids[i : i + BATCH_SIZE])
+            )
+        ).fetchall()
+        for id, content in rows:
+            conn.execute(
+                sa.update(table)
+                .where(table.c.id == id)
+                .values(
+                    content_hash=hashlib.sha256(
+                        (content or "").encode("utf-8")
+                    ).hexdigest()
+                )
+            )
+
+
+def upgrade() -> None:
+    # The plugin module cache compares (updated_at, content_hash) to decide
+    # whether a tool or function must be reloaded, without fetching content
+    op.add_column("tool", sa.Column("content_hash", sa.Text(), nullable=True))
+    op.add_column("function", sa.Column("content_hash", sa.Text(), nullable=True))
+
+    conn = op.get_bind()
+    _backfill(conn, "tool")
+    _backfill(conn, "function")
+
+
+def downgrade() -> None:
+    op.drop_column("function", "content_hash")
+    op.drop_column("tool", "content_hash")
@@ -3,7 +3,7 @@ import time
 import uuid
 from typing import Any, Optional
 
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, aliased
 from open_webui.internal.db import Base, get_db_context
 
 from pydantic import BaseModel, ConfigDict
@@ -16,6 +16,8 @@ from sqlalchemy import (
     JSON,
     Index,
     func,
+    literal,
+    select,
 )
 
 ####################
@@ -118,6 +120,101 @@ class ChatMessageModel(BaseModel):
     updated_at: int
 
 
+####################
+# Row Conversion
+####################
+
+
+def _extract_usage(data: dict) -> Optional[dict]:
+    # Check direct field first, then info.usage
+    usage = data.get("usage")
+    if not usage:
+        info = data.get("info", {})
+        usage = info.get("usage") if info else None
+    return usage
+
+
+def _apply_message_data(existing: ChatMessage, data: dict, now: int):
+    if "role" in data:
+        existing.role = data["role"]
+    if "parent_id" in data or "parentId" in data:
+        existing.parent_id = data.get("parent_id") or data.get("parentId")
+    if "content" in data:
+        existing.content = data.get("content")
+    if "output" in data:
+        existing.output = data.get("output")
+    if "model_id" in data or "model" in data:
+        existing.model_id = data.get("model_id") or data.get("model")
+    if "files" in data:
+        existing.files = data.get("files")
+    if "sources" in data:
+        existing.sources = data.get("sources")
+    if "embeds" in data:
+        existing.embeds = data.get("embeds")
+    if "done" in data:
+        existing.done = data.get("done", True)
+    if "status_history" in data or "statusHistory" in data:
+        existing.status_history = data.get("status_history") or data.get(
+            "statusHistory"
+        )
+    if "error" in data:
+        existing.error = data.get("error")
+    usage = _extract_usage(data)
+    if usage:
+        existing.usage = usage
+    existing.updated_at = now
+
+
+def _new_message(
+    composite_id: str, chat_id: str, user_id: str, data: dict, now: int
+) -> ChatMessage:
+    return ChatMessage(
+        id=composite_id,
+        chat_id=chat_id,
+        user_id=user_id,
+        role=data.get("role", "user"),
+        parent_id=data.get("parent_id") or data.get("parentId"),
+        content=data.get("content"),
+        output=data.get("output"),
+        model_id=data.get("model_id") or data.get("model"),
+        files=data.get("files"),
+        sources=data.get("sources"),
+        embeds=data.get("embeds"),
+        done=data.get("done", True),
+        status_history=data.get("status_history") or data.get("statusHistory"),
+        error=data.get("error"),
+        usage=_extract_usage(data),
+        created_at=data.get("timestamp", now),
+        updated_at=now,
+    )
+
+
+def _to_message_dict(message: ChatMessage) -> dict:
+    """Convert a row back to the `history.messages` shape of the chat JSON."""
+    fields = {
+        # Rows use a composite id: {chat_id}-{message_id}
+        "id": message.id[len(message.chat_id) + 1 :],
+        "parentId": message.parent_id,
+        "role": message.role,
+        "content": message.content,
+        "output": message.output,
+        "model": message.model_id,
+        "files": message.files,
+        "sources": message.sources,
+        "embeds": message.embeds,
+        "done": message.done,
+        "statusHistory": message.status_history,
+        "error": message.error,
+        "usage": message.usage,
+        "timestamp": message.created_at,
+    }
+    return {
+        key: value
+        for key, value in fields.items()
+        if value is not None or key == "parentId"
+    }
+
+
 ####################
 # Table Operations
 ####################
@@ -135,80 +232,158 @@ class ChatMessageTable:
         """Insert or update a chat message."""
         with get_db_context(db) as db:
             now = int(time.time())
-            timestamp = data.get("timestamp", now)
 
             # Use composite ID: {chat_id}-{message_id}
             composite_id = f"{chat_id}-{message_id}"
 
-            existing = db.get(ChatMessage, composite_id)
-            if existing:
-                # Update existing
-                if "role" in data:
-                    existing.role = data["role"]
-                if "parent_id" in data:
-                    existing.parent_id = data.get("parent_id") or data.get("parentId")
-                if "content" in data:
-                    existing.content = data.get("content")
-                if "output" in data:
-                    existing.output = data.get("output")
-                if "model_id" in data or "model" in data:
-                    existing.model_id = data.get("model_id") or data.get("model")
-                if "files" in data:
-                    existing.files = data.get("files")
-                if "sources" in data:
-                    existing.sources = data.get("sources")
-                if "embeds" in data:
-                    existing.embeds = data.get("embeds")
-                if "done" in data:
-                    existing.done = data.get("done", True)
-                if "status_history" in data or "statusHistory" in data:
-                    existing.status_history = data.get("status_history") or data.get(
-                        "statusHistory"
-                    )
-                if "error" in data:
-                    existing.error = data.get("error")
-                # Extract usage - check direct field first, then info.usage
-                usage = data.get("usage")
-                if not usage:
-                    info = data.get("info", {})
-                    usage = info.get("usage") if info else None
-                if usage:
-                    existing.usage = usage
-                existing.updated_at = now
-                db.commit()
-                db.refresh(existing)
-                return ChatMessageModel.model_validate(existing)
+            message = db.get(ChatMessage, composite_id)
+            if message:
+                _apply_message_data(message, data, now)
             else:
-                # Insert new
-                # Extract usage - check direct field first, then info.usage
-                usage = data.get("usage")
-                if not usage:
-                    info = data.get("info", {})
-                    usage = info.get("usage") if info else None
-                message = ChatMessage(
-                    id=composite_id,
-                    chat_id=chat_id,
-                    user_id=user_id,
-                    role=data.get("role", "user"),
-                    parent_id=data.get("parent_id") or data.get("parentId"),
-                    content=data.get("content"),
-                    output=data.get("output"),
-                    model_id=data.get("model_id") or data.get("model"),
-                    files=data.get("files"),
-                    sources=data.get("sources"),
-                    embeds=data.get("embeds"),
-                    done=data.get("done", True),
-                    status_history=data.get("status_history")
-                    or data.get("statusHistory"),
-                    error=data.get("error"),
-                    usage=usage,
-                    created_at=timestamp,
-                    updated_at=now,
-                )
+                message = _new_message(composite_id, chat_id, user_id, data, now)
                 db.add(message)
-                db.commit()
-                db.refresh(message)
-                return ChatMessageModel.model_validate(message)
+
+            db.commit()
+            db.refresh(message)
+            return ChatMessageModel.model_validate(message)
+
+    def upsert_messages(
+        self,
+        chat_id: str,
+        user_id: str,
+        messages: dict[str, dict],
+        db: Optional[Session] = None,
+    ) -> int:
+        """Insert or update several messages of a chat in one transaction."""
+        messages = {
+            message_id: message
+            for message_id, message in messages.items()
+            if isinstance(message, dict) and message.get("role")
+        }
+        if not messages:
+            return 0
+
+        with get_db_context(db) as db:
+            now = int(time.time())
+            ids = [f"{chat_id}-{message_id}" for message_id in messages]
+            existing = {
+                message.id: message
+                for message in db.query(ChatMessage)
+                .filter(ChatMessage.id.in_(ids))
+                .all()
+            }
+
+            for composite_id, data in zip(ids, messages.values()):
+                if composite_id in existing:
+                    _apply_message_data(existing[composite_id], data, now)
+                else:
+                    db.add(_new_message(composite_id, chat_id, user_id, data, now))
+
+            db.commit()
+            return len(messages)
+
+    def delete_messages_by_ids(
+        self, chat_id: str, message_ids: list[str], db: Optional[Session] = None
+    ) -> bool:
+        if not message_ids:
+            return True
+
+        with get_db_context(db) as db:
+            db.query(ChatMessage).filter(
+                ChatMessage.id.in_(
+                    [f"{chat_id}-{message_id}" for message_id in message_ids]
+                )
+            ).delete(synchronize_session=False)
+            db.commit()
+            return True
+
+    def sync_chat_messages(
+        self,
+        chat_id: str,
+        user_id: str,
+        messages: dict[str, dict],
+        db: Optional[Session] = None,
+    ) -> int:
+        """Make the rows of a chat mirror `history.messages` of its chat JSON."""
+        with get_db_context(db) as db:
+            stored_ids = {
+                id
+                for (id,) in db.query(ChatMessage.id).filter_by(chat_id=chat_id).all()
+            }
+            stale_ids = [
+                id[len(chat_id) + 1 :]
+                for id in stored_ids
+                - {f"{chat_id}-{message_id}" for message_id in messages}
+            ]
+            self.delete_messages_by_ids(chat_id, stale_ids, db=db)
+            return self.upsert_messages(chat_id, user_id, messages, db=db)
+
+    def get_message(
+        self, chat_id: str, message_id: str, db: Optional[Session] = None
+    ) -> Optional[dict]:
+        with get_db_context(db) as db:
+            message = db.get(ChatMessage, f"{chat_id}-{message_id}")
+            return _to_message_dict(message) if message else None
+
+    def get_messages_map_by_chat_id(
+        self, chat_id: str, db: Optional[Session] = None
+    ) -> dict[str, dict]:
+        with get_db_context(db) as db:
+            messages = db.query(ChatMessage).filter_by(chat_id=chat_id).all()
+            return {
+                message["id"]: message
+                for message in (_to_message_dict(message) for message in messages)
+            }
+
+    def get_message_list(
+        self,
+        chat_id: str,
+        message_id: str,
+        max_depth: int = 10_000,
+        db: Optional[Session] = None,
+    ) -> Optional[list[dict]]:
+        """
+        Load the branch ending at `message_id`, root first, with a recursive
+        query over `parent_id` instead of reading the whole chat.
+
+        Returns None when the branch is not fully stored (the message or one
+        of its ancestors has no row), so callers can fall back to the chat
+        JSON.
+        """
+        with get_db_context(db) as db:
+            branch = (
+                select(
+                    ChatMessage.id,
+                    ChatMessage.parent_id,
+                    literal(0).label("depth"),
+                )
+                .where(ChatMessage.id == f"{chat_id}-{message_id}")
+                .cte("branch", recursive=True)
+            )
+            parent = aliased(ChatMessage)
+            branch = branch.union_all(
+                select(parent.id, parent.parent_id, branch.c.depth + 1).where(
+                    parent.id == literal(f"{chat_id}-") + branch.c.parent_id,
+                    branch.c.depth < max_depth,
+                )
+            )
+
+            rows = (
+                db.query(ChatMessage, branch.c.depth)
+                .join(branch, ChatMessage.id == branch.c.id)
+                .order_by(branch.c.depth.desc())
+                .all()
+            )
+            if not rows:
+                return None
+
+            messages = [_to_message_dict(message) for message, _ in rows]
+            # The oldest message found must be a root, or an ancestor is missing
+            if messages[0].get("parentId") or len(
+                {message["id"] for message in messages}
+            ) != len(messages):
+                return None
+            return messages
 
     def get_message_by_id(
         self, id: str, db: Optional[Session] = None
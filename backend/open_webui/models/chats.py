@@ -1,5 +1,6 @@
 import logging
 import json
+import re
 import time
 import uuid
 from typing import Optional
@@ -9,7 +10,11 @@ from open_webui.internal.db import Base, JSONField, get_db, get_db_context
 from open_webui.models.tags import TagModel, Tag, Tags
 from open_webui.models.folders import Folders
 from open_webui.models.chat_messages import ChatMessage, ChatMessages
-from open_webui.utils.misc import sanitize_data_for_db, sanitize_text_for_db
+from open_webui.utils.misc import (
+    get_message_list,
+    sanitize_data_for_db,
+    sanitize_text_for_db,
+)
 
 from pydantic import BaseModel, ConfigDict
 from sqlalchemy import (
@@ -23,7 +28,7 @@ from sqlalchemy import (
     Index,
     UniqueConstraint,
 )
-from sqlalchemy import or_, func, select, and_, text
+from sqlalchemy import or_, func, select, and_, text, cast, Float
 from sqlalchemy.sql import exists
 from sqlalchemy.sql.expression import bindparam
 
@@ -402,6 +407,8 @@ class ChatTable:
         try:
             with get_db_context(db) as db:
                 chat_item = db.get(Chat, id)
+                previous_messages = self._get_history_messages(chat_item.chat)
+
                 chat_item.chat = self._clean_null_bytes(chat)
                 chat_item.title = (
                     self._clean_null_bytes(chat["title"])
@@ -414,10 +421,51 @@ class ChatTable:
                 db.commit()
                 db.refresh(chat_item)
 
+                self._sync_message_rows(
+                    id,
+                    chat_item.user_id,
+                    previous_messages,
+                    self._get_history_messages(chat_item.chat),
+                    db=db,
+                )
+
                 return ChatModel.model_validate(chat_item)
         except Exception:
             return None
 
+    def _get_history_messages(self, chat: Optional[dict]) -> dict:
+        return ((chat or {}).get("history") or {}).get("messages") or {}
+
+    def _sync_message_rows(
+        self,
+        id: str,
+        user_id: str,
+        previous_messages: dict,
+        messages: dict,
+        db: Optional[Session] = None,
+    ):
+        """
+        Mirror messages added, changed or removed by a chat update into the
+        chat_message table. Updates that mutate the loaded chat in place share
+        `previous_messages` with the new chat and write their rows themselves.
+        """
+        changed = {
+            message_id: message
+            for message_id, message in messages.items()
+            if previous_messages.get(message_id) != message
+        }
+        removed = [
+            message_id for message_id in previous_messages if message_id not in messages
+        ]
+        if not changed and not removed:
+            return
+
+        try:
+            ChatMessages.upsert_messages(id, user_id, changed, db=db)
+            ChatMessages.delete_messages_by_ids(id, removed, db=db)
+        except Exception as e:
+            log.warning(f"Failed to sync chat_message table for chat {id}: {e}")
+
     def update_chat_title_by_id(self, id: str, title: str) -> Optional[ChatModel]:
         chat = self.get_chat_by_id(id)
         if chat is None:
@@ -463,6 +511,13 @@ class ChatTable:
             return result[0] or "New Chat"
 
     def get_messages_map_by_chat_id(self, id: str) -> Optional[dict]:
+        try:
+            messages_map = ChatMessages.get_messages_map_by_chat_id(id)
+            if messages_map:
+                return messages_map
+        except Exception as e:
+            log.warning(f"Failed to read chat_message table for chat {id}: {e}")
+
         chat = self.get_chat_by_id(id)
         if chat is None:
             return None
@@ -472,51 +527,101 @@ class ChatTable:
     def get_message_by_id_and_message_id(
         self, id: str, message_id: str
     ) -> Optional[dict]:
+        try:
+            message = ChatMessages.get_message(id, message_id)
+            if message is not None:
+                return message
+        except Exception as e:
+            log.warning(f"Failed to read chat_message table for chat {id}: {e}")
+
         chat = self.get_chat_by_id(id)
         if chat is None:
             return None
 
         return chat.chat.get("history", {}).get("messages", {}).get(message_id, {})
 
+    def get_message_list_by_id_and_message_id(
+        self, id: str, message_id: str
+    ) -> list[dict]:
+        """
+        The branch of a chat ending at `message_id`, root first.
+
+        Read from the chat_message table; chats whose rows are incomplete are
+        read from the chat JSON once and their rows rebuilt from it.
+        """
+        try:
+            message_list = ChatMessages.get_message_list(id, message_id)
+            if message_list is not None:
+                return message_list
+        except Exception as e:
+            log.warning(f"Failed to read chat_message table for chat {id}: {e}")
+
+        chat = self.get_chat_by_id(id)
+        if chat is None:
+            return []
+
+        messages_map = self._get_history_messages(chat.chat)
+        if message_id in messages_map:
+            try:
+                ChatMessages.sync_chat_messages(id, chat.user_id, messages_map)
+            except Exception as e:
+                log.warning(f"Failed to backfill chat_message table for chat {id}: {e}")
+
+        return get_message_list(messages_map, message_id)
+
     def upsert_message_to_chat_by_id_and_message_id(
         self, id: str, message_id: str, message: dict
     ) -> Optional[ChatModel]:
-        chat = self.get_chat_by_id(id)
-        if chat is None:
-            return None
+        return self.upsert_messages_to_chat_by_id(id, {message_id: message})
 
-        # Sanitize message content for null characters before upserting
-        if isinstance(message.get("content"), str):
-            message["content"] = sanitize_text_for_db(message["content"])
+    def upsert_messages_to_chat_by_id(
+        self, id: str, messages: dict[str, dict], db: Optional[Session] = None
+    ) -> Optional[ChatModel]:
+        """
+        Merge several message updates (message_id -> fields) into a chat,
+        rewriting the chat JSON once for the whole batch.
+        """
+        with get_db_context(db) as db:
+            chat = self.get_chat_by_id(id, db=db)
+            if chat is None:
+                return None
 
-        user_id = chat.user_id
-        chat = chat.chat
-        history = chat.get("history", {})
+            user_id = chat.user_id
+            chat = chat.chat
+            history = chat.get("history", {})
+            history.setdefault("messages", {})
 
-        if message_id in history.get("messages", {}):
-            history["messages"][message_id] = {
-                **history["messages"][message_id],
-                **message,
-            }
-        else:
-            history["messages"][message_id] = message
+            for message_id, message in messages.items():
+                # Sanitize message content for null characters before upserting
+                if isinstance(message.get("content"), str):
+                    message["content"] = sanitize_text_for_db(message["content"])
 
-        history["currentId"] = message_id
+                if message_id in history["messages"]:
+                    history["messages"][message_id] = {
+                        **history["messages"][message_id],
+                        **message,
+                    }
+                else:
+                    history["messages"][message_id] = message
 
-        chat["history"] = history
+                history["currentId"] = message_id
 
-        # Dual-write to chat_message table
-        try:
-            ChatMessages.upsert_message(
-                message_id=message_id,
-                chat_id=id,
-                user_id=user_id,
-                data=history["messages"][message_id],
-            )
-        except Exception as e:
-            log.warning(f"Failed to write to chat_message table: {e}")
+            # Dual-write to chat_message table
+            try:
+                ChatMessages.upsert_messages(
+                    id,
+                    user_id,
+                    {
+                        message_id: history["messages"][message_id]
+                        for message_id in messages
+                    },
+                    db=db,
+                )
+            except Exception as e:
+                log.warning(f"Failed to write to chat_message table: {e}")
 
-        return self.update_chat_by_id(id, chat)
+            chat["history"] = history
+            return self.update_chat_by_id(id, chat, db=db)
 
     def add_message_status_to_chat_by_id_and_message_id(
         self, id: str, message_id: str, status: dict
@@ -544,6 +649,7 @@ class ChatTable:
             if chat is None:
                 return None
 
+            user_id = chat.user_id
             chat = chat.chat
             history = chat.get("history", {})
 
@@ -554,6 +660,17 @@ class ChatTable:
                 message_files = message_files + files
                 history["messages"][message_id]["files"] = message_files
 
+                try:
+                    ChatMessages.upsert_message(
+                        message_id=message_id,
+                        chat_id=id,
+                        user_id=user_id,
+                        data={"files": message_files},
+                        db=db,
+                    )
+                except Exception as e:
+                    log.warning(f"Failed to write to chat_message table: {e}")
+
             chat["history"] = history
             self.update_chat_by_id(id, chat, db=db)
             return message_files
@@ -1101,6 +1218,68 @@ class ChatTable:
             )
             return [ChatModel.model_validate(chat) for chat in all_chats]
 
+    def _has_search_index(self, db: Session) -> bool:
+        if db.bind.dialect.name == "sqlite":
+            # Missing when the SQLite build lacks FTS5 (see the migration)
+            return (
+                db.execute(
+                    text(
+                        "SELECT 1 FROM sqlite_master "
+                        "WHERE type = 'table' AND name = 'chat_message_fts'"
+                    )
+                ).first()
+                is not None
+            )
+        return True
+
+    def _get_search_matches(self, db: Session, user_id: str, terms: list[str]):
+        """
+        Subquery of (chat_id, score) for the user's chats whose title or any
+        message contains every term (as a prefix); higher scores rank first.
+        Titles count double.
+        """
+        if db.bind.dialect.name == "sqlite":
+            # Quote every token so user input can't be parsed as FTS5 syntax
+            terms = " ".join(f'"{term}"*' for term in terms)
+            user = '"' + user_id.replace('"', '""') + '"'
+
+            sql = text("""
+                SELECT chat_id, MAX(score) AS score FROM (
+                    SELECT chat_id, -bm25(chat_message_fts, 1.0, 0.0, 0.0, 0.0) AS score
+                    FROM chat_message_fts
+                    WHERE chat_message_fts MATCH :message_query
+                    UNION ALL
+                    SELECT chat_id, -2 * bm25(chat_title_fts, 1.0, 0.0, 0.0) AS score
+                    FROM chat_title_fts
+                    WHERE chat_title_fts MATCH :title_query
+                ) GROUP BY chat_id
+                """).bindparams(
+                message_query=f"{{content}} : ({terms}) AND {{user_id}} : {user}",
+                title_query=f"{{title}} : ({terms}) AND {{user_id}} : {user}",
+            )
+        else:
+            # Expressions must match the GIN indexes created by the migration
+            sql = text("""
+                SELECT chat_id, MAX(score) AS score FROM (
+                    SELECT chat_message.chat_id AS chat_id,
+                        ts_rank(to_tsvector('simple', chat_message_search_text(chat_message.content)), query) AS score
+                    FROM chat_message, to_tsquery('simple', :search_query) AS query
+                    WHERE chat_message.user_id = :user_id
+                    AND to_tsvector('simple', chat_message_search_text(chat_message.content)) @@ query
+                    UNION ALL
+                    SELECT chat.id AS chat_id,
+                        2 * ts_rank(to_tsvector('simple', coalesce(chat.title, '')), query) AS score
+                    FROM chat, to_tsquery('simple', :search_query) AS query
+                    WHERE chat.user_id = :user_id
+                    AND to_tsvector('simple', coalesce(chat.title, '')) @@ query
+                ) AS matches GROUP BY chat_id
+                """).bindparams(
+                search_query=" & ".join(f"{term}:*" for term in terms),
+                user_id=user_id,
+            )
+
+        return sql.columns(chat_id=Text, score=Float).subquery("matches")
+
     def get_chats_by_user_id_and_search_text(
         self,
         user_id: str,
@@ -1111,7 +1290,11 @@ class ChatTable:
         db: Optional[Session] = None,
     ) -> list[ChatModel]:
         """
-        Filters chats based on a search query using Python, allowing pagination using skip and limit.
+        Filters chats by a search query, allowing pagination using skip and limit.
+
+        Free text is matched against the full-text index over chat titles and
+        chat_message content and results are ranked by relevance; `tag:`,
+        `folder:`, `pinned:`, `archived:` and `shared:` filters narrow them.
         """
         search_text = sanitize_text_for_db(search_text).lower().strip()
 
@@ -1192,26 +1375,9 @@ class ChatTable:
             if folder_ids:
                 query = query.filter(Chat.folder_id.in_(folder_ids))
 
-            query = query.order_by(Chat.updated_at.desc(), Chat.id)
-
             # Check if the database dialect is either 'sqlite' or 'postgresql'
             dialect_name = db.bind.dialect.name
             if dialect_name == "sqlite":
-                # SQLite case: using JSON1 extension for JSON searching
-                sqlite_content_sql = (
-                    "EXISTS ("
-                    "    SELECT 1 "
-                    "    FROM json_each(Chat.chat, '$.messages') AS message "
-                    "    WHERE LOWER(message.value->>'content') LIKE '%' || :content_key || '%'"
-                    ")"
-                )
-                sqlite_content_clause = text(sqlite_content_sql)
-                query = query.filter(
-                    or_(
-                        Chat.title.ilike(bindparam("title_key")), sqlite_content_clause
-                    ).params(title_key=f"%{search_text}%", content_key=search_text)
-                )
-
                 # Check if there are any tags to filter, it should have all the tags
                 if "none" in tag_ids:
                     query = query.filter(text("""
@@ -1237,33 +1403,6 @@ class ChatTable:
                     )
 
             elif dialect_name == "postgresql":
-                # PostgreSQL doesn't allow null bytes in text. We filter those out by checking
-                # the JSON representation for \u0000 before attempting text extraction
-
-                # Safety filter: JSON field must not contain \u0000
-                query = query.filter(text("Chat.chat::text NOT LIKE '%\\\\u0000%'"))
-
-                # Safety filter: title must not contain actual null bytes
-                query = query.filter(text("Chat.title::text NOT LIKE '%\\x00%'"))
-
-                postgres_content_sql = """
-                EXISTS (
-                    SELECT 1
-                    FROM json_array_elements(Chat.chat->'messages') AS message
-                    WHERE json_typeof(message->'content') = 'string'
-                    AND LOWER(message->>'content') LIKE '%' || :content_key || '%'
-                )
-                """
-
-                postgres_content_clause = text(postgres_content_sql)
-
-                query = query.filter(
-                    or_(
-                        Chat.title.ilike(bindparam("title_key")),
-                        postgres_content_clause,
-                    )
-                ).params(title_key=f"%{search_text}%", content_key=search_text.lower())
-
                 # Check if there are any tags to filter, it should have all the tags
                 if "none" in tag_ids:
                     query = query.filter(text("""
@@ -1292,6 +1431,29 @@ class ChatTable:
                     f"Unsupported dialect: {db.bind.dialect.name}"
                 )
 
+            terms = list(dict.fromkeys(re.findall(r"\w+", search_text)))
+            if terms and self._has_search_index(db):
+                # Ranked matches from the full-text index over titles and
+                # chat_message content, best first
+                matches = self._get_search_matches(db, user_id, terms)
+                query = query.join(matches, matches.c.chat_id == Chat.id).order_by(
+                    matches.c.score.desc()
+                )
+            elif search_text:
+                query = query.filter(
+                    or_(
+                        Chat.title.ilike(f"%{search_text}%"),
+                        exists().where(
+                            ChatMessage.chat_id == Chat.id,
+                            func.lower(cast(ChatMessage.content, Text)).like(
+                                f"%{search_text}%"
+                            ),
+                        ),
+                    )
+                )
+
+            query = query.order_by(Chat.updated_at.desc(), Chat.id)
+
             # Perform pagination at the SQL level
             all_chats = query.offset(skip).limit(limit).all()
 
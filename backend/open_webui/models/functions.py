@@ -5,6 +5,7 @@ from typing import Optional
 from sqlalchemy.orm import Session
 from open_webui.internal.db import Base, JSONField, get_db, get_db_context
 from open_webui.models.users import Users, UserModel
+from open_webui.utils.misc import calculate_sha256_string
 from pydantic import BaseModel, ConfigDict
 from sqlalchemy import BigInteger, Boolean, Column, String, Text, Index
 
@@ -23,6 +24,8 @@ class Function(Base):
     name = Column(Text)
     type = Column(Text)
     content = Column(Text)
+    # Identifies the content for the plugin module cache
+    content_hash = Column(Text, nullable=True)
     meta = Column(JSONField)
     valves = Column(JSONField)
     is_active = Column(Boolean)
@@ -122,7 +125,10 @@ class FunctionsTable:
 
         try:
             with get_db_context(db) as db:
-                result = Function(**function.model_dump())
+                result = Function(
+                    **function.model_dump(),
+                    content_hash=calculate_sha256_string(function.content),
+                )
                 db.add(result)
                 db.commit()
                 db.refresh(result)
@@ -156,6 +162,7 @@ class FunctionsTable:
                         db.query(Function).filter_by(id=func.id).update(
                             {
                                 **func.model_dump(),
+                                "content_hash": calculate_sha256_string(func.content),
                                 "user_id": user_id,
                                 "updated_at": int(time.time()),
                             }
@@ -164,6 +171,7 @@ class FunctionsTable:
                         new_func = Function(
                             **{
                                 **func.model_dump(),
+                                "content_hash": calculate_sha256_string(func.content),
                                 "user_id": user_id,
                                 "updated_at": int(time.time()),
                             }
@@ -195,6 +203,21 @@ class FunctionsTable:
         except Exception:
             return None
 
+    def get_function_version_by_id(
+        self, id: str, db: Optional[Session] = None
+    ) -> Optional[tuple[int, Optional[str]]]:
+        """Cheap change check for the module cache: updated_at and content hash."""
+        try:
+            with get_db_context(db) as db:
+                row = (
+                    db.query(Function.updated_at, Function.content_hash)
+                    .filter(Function.id == id)
+                    .first()
+                )
+                return tuple(row) if row else None
+        except Exception:
+            return None
+
     def get_functions_by_ids(
         self, ids: list[str], db: Optional[Session] = None
     ) -> list[FunctionModel]:
@@ -415,6 +438,11 @@ class FunctionsTable:
     ) -> Optional[FunctionModel]:
         with get_db_context(db) as db:
             try:
+                if "content" in updated:
+                    updated = {
+                        **updated,
+                        "content_hash": calculate_sha256_string(updated["content"]),
+                    }
                 db.query(Function).filter_by(id=id).update(
                     {
                         **updated,
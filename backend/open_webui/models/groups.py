@@ -7,6 +7,7 @@ import uuid
 from sqlalchemy.orm import Session
 from open_webui.internal.db import Base, JSONField, get_db, get_db_context
 from open_webui.env import DEFAULT_GROUP_SHARE_PERMISSION
+from open_webui.utils.auth_cache import invalidates_users
 
 from open_webui.models.files import FileMetadataResponse
 
@@ -141,6 +142,7 @@ class GroupTable:
             group_data["data"]["config"]["share"] = DEFAULT_GROUP_SHARE_PERMISSION
         return group_data
 
+    @invalidates_users
     def insert_new_group(
         self, user_id: str, form_data: GroupForm, db: Optional[Session] = None
     ) -> Optional[GroupModel]:
@@ -382,6 +384,7 @@ class GroupTable:
 
             return group_user_ids
 
+    @invalidates_users
     def set_group_user_ids_by_id(
         self, group_id: str, user_ids: list[str], db: Optional[Session] = None
     ) -> None:
@@ -430,6 +433,7 @@ class GroupTable:
             )
             return {group_id: count for group_id, count in rows}
 
+    @invalidates_users
     def update_group_by_id(
         self,
         id: str,
@@ -451,6 +455,7 @@ class GroupTable:
             log.exception(e)
             return None
 
+    @invalidates_users
     def delete_group_by_id(self, id: str, db: Optional[Session] = None) -> bool:
         try:
             with get_db_context(db) as db:
@@ -460,6 +465,7 @@ class GroupTable:
         except Exception:
             return False
 
+    @invalidates_users
     def delete_all_groups(self, db: Optional[Session] = None) -> bool:
         with get_db_context(db) as db:
             try:
@@ -470,6 +476,7 @@ class GroupTable:
             except Exception:
                 return False
 
+    @invalidates_users
     def remove_user_from_all_groups(
         self, user_id: str, db: Optional[Session] = None
     ) -> bool:
@@ -500,6 +507,7 @@ class GroupTable:
                 db.rollback()
                 return False
 
+    @invalidates_users
     def create_groups_by_group_names(
         self, user_id: str, group_names: list[str], db: Optional[Session] = None
     ) -> list[GroupModel]:
@@ -537,6 +545,7 @@ class GroupTable:
                         continue
             return new_groups
 
+    @invalidates_users
     def sync_groups_by_group_names(
         self, user_id: str, group_names: list[str], db: Optional[Session] = None
     ) -> bool:
@@ -599,6 +608,7 @@ class GroupTable:
                 db.rollback()
                 return False
 
+    @invalidates_users
     def add_users_to_group(
         self,
         id: str,
@@ -640,6 +650,7 @@ class GroupTable:
             log.exception(e)
             return None
 
+    @invalidates_users
     def remove_users_from_group(
         self,
         id: str,
@@ -7,6 +7,7 @@ from open_webui.internal.db import Base, JSONField, get_db, get_db_context
 from open_webui.models.users import Users, UserResponse
 from open_webui.models.groups import Groups
 from open_webui.models.access_grants import AccessGrantModel, AccessGrants
+from open_webui.utils.misc import calculate_sha256_string
 
 from pydantic import BaseModel, ConfigDict, Field
 from sqlalchemy import BigInteger, Column, String, Text
@@ -25,6 +26,8 @@ class Tool(Base):
     user_id = Column(String)
     name = Column(Text)
     content = Column(Text)
+    # Identifies the content for the plugin module cache
+    content_hash = Column(Text, nullable=True)
     specs = Column(JSONField)
     meta = Column(JSONField)
     valves = Column(JSONField)
@@ -126,6 +129,7 @@ class ToolsTable:
                 result = Tool(
                     **{
                         **form_data.model_dump(exclude={"access_grants"}),
+                        "content_hash": calculate_sha256_string(form_data.content),
                         "specs": specs,
                         "user_id": user_id,
                         "updated_at": int(time.time()),
@@ -156,6 +160,21 @@ class ToolsTable:
         except Exception:
             return None
 
+    def get_tool_version_by_id(
+        self, id: str, db: Optional[Session] = None
+    ) -> Optional[tuple[int, Optional[str]]]:
+        """Cheap change check for the module cache: updated_at and content hash."""
+        try:
+            with get_db_context(db) as db:
+                row = (
+                    db.query(Tool.updated_at, Tool.content_hash)
+                    .filter(Tool.id == id)
+                    .first()
+                )
+                return tuple(row) if row else None
+        except Exception:
+            return None
+
     def get_tools(
         self, defer_content: bool = False, db: Optional[Session] = None
     ) -> list[ToolUserModel]:
@@ -290,6 +309,10 @@ class ToolsTable:
         try:
             with get_db_context(db) as db:
                 access_grants = updated.pop("access_grants", None)
+                if "content" in updated:
+                    updated["content_hash"] = calculate_sha256_string(
+                        updated["content"]
+                    )
                 db.query(Tool).filter_by(id=id).update(
                     {**updated, "updated_at": int(time.time())}
                 )
@@ -12,6 +12,7 @@ from open_webui.models.groups import Groups, GroupMember
 from open_webui.models.channels import ChannelMember
 
 from open_webui.utils.misc import throttle
+from open_webui.utils.auth_cache import invalidates_user
 from open_webui.utils.validate import validate_profile_image_url
 
 
@@ -582,6 +583,7 @@ class UsersTable:
             )
             return query.count()
 
+    @invalidates_user
     def update_user_role_by_id(
         self, id: str, role: str, db: Optional[Session] = None
     ) -> Optional[UserModel]:
@@ -597,6 +599,7 @@ class UsersTable:
         except Exception:
             return None
 
+    @invalidates_user
     def update_user_status_by_id(
         self, id: str, form_data: UserStatus, db: Optional[Session] = None
     ) -> Optional[UserModel]:
@@ -613,6 +616,7 @@ class UsersTable:
         except Exception:
             return None
 
+    @invalidates_user
     def update_user_profile_image_url_by_id(
         self, id: str, profile_image_url: str, db: Optional[Session] = None
     ) -> Optional[UserModel]:
@@ -644,6 +648,17 @@ class UsersTable:
         except Exception:
             return None
 
+    def update_last_active_by_ids(
+        self, ids: list[str], last_active_at: int, db: Optional[Session] = None
+    ) -> None:
+        with get_db_context(db) as db:
+            for i in range(0, len(ids), 500):
+                db.query(User).filter(User.id.in_(ids[i : i + 500])).update(
+                    {"last_active_at": last_active_at}, synchronize_session=False
+                )
+            db.commit()
+
+    @invalidates_user
     def update_user_oauth_by_id(
         self, id: str, provider: str, sub: str, db: Optional[Session] = None
     ) -> Optional[UserModel]:
@@ -676,6 +691,7 @@ class UsersTable:
         except Exception:
             return None
 
+    @invalidates_user
     def update_user_scim_by_id(
         self,
         id: str,
@@ -708,6 +724,7 @@ class UsersTable:
         except Exception:
             return None
 
+    @invalidates_user
     def update_user_by_id(
         self, id: str, updated: dict, db: Optional[Session] = None
     ) -> Optional[UserModel]:
@@ -725,6 +742,7 @@ class UsersTable:
             print(e)
             return None
 
+    @invalidates_user
     def update_user_settings_by_id(
         self, id: str, updated: dict, db: Optional[Session] = None
     ) -> Optional[UserModel]:
@@ -749,6 +767,7 @@ class UsersTable:
         except Exception:
             return None
 
+    @invalidates_user
     def delete_user_by_id(self, id: str, db: Optional[Session] = None) -> bool:
         try:
             # Remove User from Groups
@@ -778,6 +797,7 @@ class UsersTable:
         except Exception:
             return None
 
+    @invalidates_user
     def update_user_api_key_by_id(
         self, id: str, api_key: str, db: Optional[Session] = None
     ) -> bool:
@@ -802,6 +822,7 @@ class UsersTable:
         except Exception:
             return False
 
+    @invalidates_user
     def delete_user_api_key_by_id(self, id: str, db: Optional[Session] = None) -> bool:
         try:
             with get_db_context(db) as db:
@@ -0,0 +1,548 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import asynccontextmanager, closing
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Union
+
+from open_webui.retrieval.vector.main import (
+    GetResult,
+    SearchResult,
+    VectorDBBase,
+    VectorGetResult,
+    VectorItem,
+)
+
+log = logging.getLogger(__name__)
+
+
+def get_content_hash(text: str) -> str:
+    """SHA-256 hash of text, used as a stable chunk identifier for RRF dedup."""
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+def get_enriched_text(text: str, metadata: dict) -> str:
+    metadata_parts = [text]
+
+    # Add filename (repeat twice for extra weight in BM25 scoring)
+    if metadata.get("name"):
+        filename = metadata["name"]
+        filename_tokens = filename.replace("_", " ").replace("-", " ").replace(".", " ")
+        metadata_parts.append(
+            f"Filename: {filename} {filename_tokens} {filename_tokens}"
+        )
+
+    # Add title if available
+    if metadata.get("title"):
+        metadata_parts.append(f"Title: {metadata['title']}")
+
+    # Add document section headings if available (from markdown splitter)
+    if metadata.get("headings") and isinstance(metadata["headings"], list):
+        headings = " > ".join(str(h) for h in metadata["headings"])
+        metadata_parts.append(f"Section: {headings}")
+
+    # Add source URL/path if available
+    if metadata.get("source"):
+        metadata_parts.append(f"Source: {metadata['source']}")
+
+    # Add snippet for web search results
+    if metadata.get("snippet"):
+        metadata_parts.append(f"Snippet: {metadata['snippet']}")
+
+    return " ".join(metadata_parts)
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS chunk (
+    pk INTEGER PRIMARY KEY,
+    id TEXT NOT NULL UNIQUE,
+    text TEXT NOT NULL,
+    metadata TEXT NOT NULL,
+    hash TEXT NOT NULL
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS chunk_fts USING fts5(
+    text, enriched, tokenize = 'unicode61 remove_diacritics 2'
+);
+"""
+
+# A staging file untouched for this long was left behind by a crashed build
+BUILD_TIMEOUT = 600
+
+
+class BM25Index:
+    """
+    Persistent BM25 index over the chunks of vector DB collections.
+
+    Each collection is stored in its own SQLite FTS5 database under
+    `directory`, so every worker process (and every node sharing the data
+    directory) queries the same index without fetching the corpus from the
+    vector DB. Both the raw chunk text and its metadata-enriched variant are
+    indexed; ranking uses FTS5's built-in bm25().
+
+    Indexes of existing collections are built from a snapshot of the vector
+    DB in a staging file. Writes from any process apply to the staging file
+    while the build runs, and the snapshot never replaces the chunks they
+    wrote, so nothing written during a build is lost.
+    """
+
+    def __init__(self, directory: Union[str, Path]):
+        self.directory = Path(directory)
+
+    def _get_path(self, collection_name: str) -> Path:
+        name = hashlib.sha256(collection_name.encode()).hexdigest()
+        return self.directory / f"{name}.db"
+
+    def _get_building_path(self, collection_name: str) -> Path:
+        path = self._get_path(collection_name)
+        return path.with_name(f"{path.stem}.building.db")
+
+    def _connect(self, path: Path) -> sqlite3.Connection:
+        # Never create the file: a path that was just dropped or published
+        # must not come back as an empty database
+        return sqlite3.connect(
+            f"{path.resolve().as_uri()}?mode=rw", uri=True, timeout=30
+        )
+
+    @staticmethod
+    def _insert(
+        conn: sqlite3.Connection,
+        items: List[Union[VectorItem, dict]],
+        replace: bool = True,
+    ):
+        for item in items:
+            item = dict(item)
+            text = item["text"]
+            metadata = item.get("metadata") or {}
+
+            existing = conn.execute(
+                "SELECT pk FROM chunk WHERE id = ?", (item["id"],)
+            ).fetchone()
+            if existing:
+                if not replace:
+                    continue
+                conn.execute("DELETE FROM chunk WHERE pk = ?", existing)
+                conn.execute("DELETE FROM chunk_fts WHERE rowid = ?", existing)
+
+            pk = conn.execute(
+                "INSERT INTO chunk (id, text, metadata, hash) VALUES (?, ?, ?, ?)",
+                (
+                    item["id"],
+                    text,
+                    json.dumps(metadata, default=str),
+                    get_content_hash(text),
+                ),
+            ).lastrowid
+            conn.execute(
+                "INSERT INTO chunk_fts (rowid, text, enriched) VALUES (?, ?, ?)",
+                (pk, text, get_enriched_text(text, metadata)),
+            )
+
+    def exists(self, collection_name: str) -> bool:
+        return self._get_path(collection_name).exists()
+
+    def _start_build(self, collection_name: str) -> Optional[int]:
+        """
+        Create the staging file of a build, unless another one is running.
+        Returns its inode, which identifies this build.
+        """
+        building_path = self._get_building_path(collection_name)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+        try:
+            if time.time() - building_path.stat().st_mtime < BUILD_TIMEOUT:
+                return None
+            building_path.unlink(missing_ok=True)
+        except FileNotFoundError:
+            pass
+
+        # Writers open the staging file as soon as it exists, so it only
+        # appears (atomically) once its schema does
+        tmp_path = building_path.with_name(f"{uuid.uuid4().hex}.tmp")
+        try:
+            with closing(sqlite3.connect(tmp_path)) as conn:
+                conn.executescript(SCHEMA)
+                conn.commit()
+            os.link(tmp_path, building_path)
+            return tmp_path.stat().st_ino
+        except FileExistsError:
+            return None
+        finally:
+            tmp_path.unlink(missing_ok=True)
+
+    def build(
+        self,
+        collection_name: str,
+        fetch: Callable[[], Optional[List[Union[VectorItem, dict]]]],
+    ) -> bool:
+        """
+        Build the index of a collection from `fetch()`, a full read of the
+        collection taken after the build started, unless it exists or another
+        process is building it. Returns whether this call published it.
+        """
+        path = self._get_path(collection_name)
+        if path.exists():
+            return False
+
+        inode = self._start_build(collection_name)
+        if inode is None:
+            return False
+
+        building_path = self._get_building_path(collection_name)
+        try:
+            items = fetch()
+            if items is None:
+                # Missing collection or failed fetch; try again on the next query
+                return False
+
+            with closing(self._connect(building_path)) as conn:
+                # Chunks written during the build are newer than the snapshot
+                self._insert(conn, items, replace=False)
+                conn.commit()
+
+            if building_path.stat().st_ino != inode:
+                # Dropped (and possibly restarted) while building
+                return False
+            try:
+                # Publish atomically; readers never see a half-built index.
+                # The staging file is removed only after this, so writers
+                # always find one of the two.
+                os.link(building_path, path)
+            except FileExistsError:
+                return False
+            return True
+        finally:
+            try:
+                if building_path.stat().st_ino == inode:
+                    building_path.unlink(missing_ok=True)
+            except FileNotFoundError:
+                pass
+
+    @staticmethod
+    def get_items(result: Optional[GetResult]) -> Optional[list[dict]]:
+        if result is None:
+            return None
+
+        if not result.ids:
+            return []
+        return [
+            {"id": id, "text": text, "metadata": metadata}
+            for id, text, metadata in zip(
+                result.ids[0], result.documents[0], result.metadatas[0]
+            )
+        ]
+
+    def create(self, collection_name: str, items: List[Union[VectorItem, dict]]):
+        """Index the first chunks of a new collection."""
+        if not self.build(collection_name, lambda: items):
+            # Another writer created it first
+            self.add(collection_name, items)
+
+    def add(self, collection_name: str, items: List[Union[VectorItem, dict]]):
+        """Insert or replace chunks in an existing index, or the one being built."""
+        path = self._get_path(collection_name)
+        # A build publishes its staging file before removing it, so checking
+        # the index again after the staging file can't miss both. A write
+        # that finds neither is in the snapshot of any later build.
+        for target in (path, self._get_building_path(collection_name), path):
+            if not target.exists():
+                continue
+            try:
+                conn = self._connect(target)
+            except sqlite3.OperationalError:
+                continue
+            with closing(conn):
+                self._insert(conn, items)
+                conn.commit()
+            return
+
+    def delete(
+        self,
+        collection_name: str,
+        ids: Optional[List[str]] = None,
+        filter: Optional[Dict] = None,
+    ):
+        path = self._get_path(collection_name)
+        if not path.exists():
+            # The build's snapshot may hold the deleted chunks; start over
+            self._get_building_path(collection_name).unlink(missing_ok=True)
+            if not path.exists():
+                return
+
+        where, params = None, []
+        if ids:
+            where = f"id IN ({', '.join('?' for _ in ids)})"
+            params = list(ids)
+        elif filter:
+            conditions = []
+            for key, value in filter.items():
+                if not isinstance(value, (str, int, float, bool)) or '"' in key:
+                    # Operators ($in, $and, ...) are backend specific; rebuild
+                    # the index lazily instead of guessing their semantics.
+                    self.drop(collection_name)
+                    return
+                conditions.append("json_extract(metadata, ?) = ?")
+                params.extend([f'$."{key}"', value])
+            where = " AND ".join(conditions)
+
+        if where is None:
+            # Backends disagree on what an unfiltered delete removes
+            self.drop(collection_name)
+            return
+
+        with closing(self._connect(path)) as conn:
+            pks = conn.execute(f"SELECT pk FROM chunk WHERE {where}", params).fetchall()
+            conn.executemany("DELETE FROM chunk WHERE pk = ?", pks)
+            conn.executemany("DELETE FROM chunk_fts WHERE rowid = ?", pks)
+            conn.commit()
+
+    def drop(self, collection_name: str):
+        path = self._get_path(collection_name)
+        path.unlink(missing_ok=True)
+        path.with_name(f"{path.name}-journal").unlink(missing_ok=True)
+        self._get_building_path(collection_name).unlink(missing_ok=True)
+
+    def reset(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def count(self, collection_name: str) -> int:
+        path = self._get_path(collection_name)
+        if not path.exists():
+            return 0
+
+        with closing(self._connect(path)) as conn:
+            return conn.execute("SELECT COUNT(*) FROM chunk").fetchone()[0]
+
+    def search(
+        self, collection_name: str, query: str, k: int, enriched: bool = False
+    ) -> list[tuple[str, dict, str]]:
+        """Return the top `k` chunks as (text, metadata, hash) tuples."""
+        path = self._get_path(collection_name)
+        tokens = list(dict.fromkeys(re.findall(r"\w+", query)))
+        if not path.exists() or not tokens:
+            return []
+
+        # Quote every token so user input can't be parsed as FTS5 syntax
+        terms = " OR ".join(f'"{token}"' for token in tokens)
+        column = "enriched" if enriched else "text"
+        match = f"{{{column}}} : ({terms})"
+        weights = (0.0, 1.0) if enriched else (1.0, 0.0)
+
+        with closing(self._connect(path)) as conn:
+            rows = conn.execute(
+                "SELECT chunk.text, chunk.metadata, chunk.hash FROM chunk_fts "
+                "JOIN chunk ON chunk.pk = chunk_fts.rowid "
+                "WHERE chunk_fts MATCH ? ORDER BY bm25(chunk_fts, ?, ?) LIMIT ?",
+                (match, *weights, k),
+            ).fetchall()
+
+        return [(text, json.loads(metadata), hash) for text, metadata, hash in rows]
+
+
+class BM25IndexedVectorDB(VectorDBBase):
+    """
+    Vector DB client wrapper that keeps a BM25Index in sync with every write.
+
+    New collections are indexed as they are written. Chunks added to
+    collections whose index does not exist yet are skipped; such indexes are
+    built from the full collection on first use (`ensure_index`). Index
+    failures never fail the vector DB operation, they drop the index so it
+    gets rebuilt.
+    """
+
+    def __init__(self, client: VectorDBBase, index: BM25Index):
+        self.client = client
+        self.index = index
+
+        # Writes to (and index builds of) the same collection are serialized
+        # so that the index sees them in the order the vector DB did.
+        self._locks: dict[str, threading.Lock] = {}
+        self._locks_lock = threading.Lock()
+
+    def _get_lock(self, collection_name: str) -> threading.Lock:
+        with self._locks_lock:
+            return self._locks.setdefault(collection_name, threading.Lock())
+
+    @asynccontextmanager
+    async def _alock(self, collection_name: str):
+        # Polled rather than acquired in a thread, so a cancelled write can't
+        # leave the lock taken by a thread nobody waits for
+        lock = self._get_lock(collection_name)
+        while not lock.acquire(blocking=False):
+            await asyncio.sleep(0.01)
+        try:
+            yield
+        finally:
+            lock.release()
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.client, name)
+
+    def _maintain(self, collection_name: str, operation, *args, **kwargs):
+        try:
+            operation(collection_name, *args, **kwargs)
+        except Exception as e:
+            log.warning(f"Dropping BM25 index of {collection_name}: {e}")
+            try:
+                self.index.drop(collection_name)
+            except Exception:
+                pass
+
+    def has_collection(self, collection_name: str) -> bool:
+        return self.client.has_collection(collection_name)
+
+    def delete_collection(self, collection_name: str) -> None:
+        try:
+            return self.client.delete_collection(collection_name)
+        finally:
+            self._maintain(collection_name, self.index.drop)
+
+    def _is_new(self, collection_name: str) -> bool:
+        return not self.index.exists(collection_name) and (
+            not self.client.has_collection(collection_name)
+        )
+
+    def _index_items(self, collection_name: str, items: List[VectorItem], is_new):
+        if is_new:
+            self._maintain(collection_name, self.index.create, items)
+        else:
+            self._maintain(collection_name, self.index.add, items)
+
+    def _write(self, write, collection_name: str, items: List[VectorItem]) -> None:
+        with self._get_lock(collection_name):
+            is_new = self._is_new(collection_name)
+            write(collection_name, items)
+            self._index_items(collection_name, items, is_new)
+
+    async def _awrite(self, write, collection_name: str, items: List[VectorItem]):
+        async with self._alock(collection_name):
+            is_new = await asyncio.to_thread(self._is_new, collection_name)
+            await write(collection_name, items)
+            await asyncio.to_thread(self._index_items, collection_name, items, is_new)
+
+    def ensure_index(self, collection_name: str):
+        """Build the index of a collection from the vector DB if it has none."""
+        with self._get_lock(collection_name):
+            if self.index.exists(collection_name):
+                return
+
+            log.info(f"Building BM25 index for collection {collection_name}")
+            self._maintain(
+                collection_name,
+                self.index.build,
+                lambda: self.index.get_items(
+                    self.client.get(collection_name=collection_name)
+                ),
+            )
+
+    def insert(self, collection_name: str, items: List[VectorItem]) -> None:
+        self._write(self.client.insert, collection_name, items)
+
+    def upsert(self, collection_name: str, items: List[VectorItem]) -> None:
+        self._write(self.client.upsert, collection_name, items)
+
+    async def ainsert(self, collection_name: str, items: List[VectorItem]) -> None:
+        await self._awrite(self.client.ainsert, collection_name, items)
+
+    async def aupsert(self, collection_name: str, items: List[VectorItem]) -> None:
+        await self._awrite(self.client.aupsert, collection_name, items)
+
+    def search(
+        self,
+        collection_name: str,
+        vectors: List[List[Union[float, int]]],
+        filter: Optional[Dict] = None,
+        limit: int = 10,
+    ) -> Optional[SearchResult]:
+        return self.client.search(
+            collection_name=collection_name,
+            vectors=vectors,
+            filter=filter,
+            limit=limit,
+        )
+
+    def query(
+        self, collection_name: str, filter: Dict, limit: Optional[int] = None
+    ) -> Optional[GetResult]:
+        return self.client.query(
+            collection_name=collection_name, filter=filter, limit=limit
+        )
+
+    def get(self, collection_name: str) -> Optional[GetResult]:
+        return self.client.get(collection_name=collection_name)
+
+    def query_vectors(
+        self, collection_name: str, filter: Dict, limit: Optional[int] = None
+    ) -> Optional[VectorGetResult]:
+        return self.client.query_vectors(
+            collection_name=collection_name, filter=filter, limit=limit
+        )
+
+    async def asearch(
+        self,
+        collection_name: str,
+        vectors: List[List[Union[float, int]]],
+        filter: Optional[Dict] = None,
+        limit: int = 10,
+    ) -> Optional[SearchResult]:
+        return await self.client.asearch(
+            collection_name=collection_name,
+            vectors=vectors,
+            filter=filter,
+            limit=limit,
+        )
+
+    async def aquery(
+        self, collection_name: str, filter: Dict, limit: Optional[int] = None
+    ) -> Optional[GetResult]:
+        return await self.client.aquery(
+            collection_name=collection_name, filter=filter, limit=limit
+        )
+
+    async def aget(self, collection_name: str) -> Optional[GetResult]:
+        return await self.client.aget(collection_name=collection_name)
+
+    def delete(
+        self,
+        collection_name: str,
+        ids: Optional[List[str]] = None,
+        filter: Optional[Dict] = None,
+    ) -> None:
+        try:
+            return self.client.delete(
+                collection_name=collection_name, ids=ids, filter=filter
+            )
+        finally:
+            self._maintain(collection_name, self.index.delete, ids=ids, filter=filter)
+
+    async def adelete(
+        self,
+        collection_name: str,
+        ids: Optional[List[str]] = None,
+        filter: Optional[Dict] = None,
+    ) -> None:
+        try:
+            return await self.client.adelete(
+                collection_name=collection_name, ids=ids, filter=filter
+            )
+        finally:
+            await asyncio.to_thread(
+                self._maintain,
+                collection_name,
+                self.index.delete,
+                ids=ids,
+                filter=filter,
+            )
+
+    def reset(self) -> None:
+        try:
+            return self.client.reset()
+        finally:
+            self.index.reset()
@@ -0,0 +1,390 @@
+import asyncio
+import hashlib
+import logging
+import sqlite3
+import struct
+from collections import OrderedDict
+from contextlib import closing
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Optional, Union
+
+from open_webui.config import (
+    ENABLE_RAG_EMBEDDING_CACHE,
+    RAG_EMBEDDING_CACHE_BACKEND,
+    RAG_EMBEDDING_CACHE_DIR,
+    RAG_EMBEDDING_CACHE_DTYPE,
+    RAG_EMBEDDING_CACHE_SIZE,
+    RAG_EMBEDDING_CACHE_TTL,
+)
+from open_webui.env import (
+    REDIS_CLUSTER,
+    REDIS_KEY_PREFIX,
+    REDIS_SENTINEL_HOSTS,
+    REDIS_SENTINEL_PORT,
+    REDIS_URL,
+)
+
+log = logging.getLogger(__name__)
+
+
+# struct format characters; vectors are stored little-endian so entries in a
+# shared tier decode the same on every node.
+DTYPES = {"float32": "f", "float16": "e"}
+
+# Calls embedding at most this many texts are memoized per request as
+# queries; larger batches are document ingestion and are not kept.
+QUERY_MEMO_MAX_TEXTS = 32
+
+QUERY_EMBEDDING_MEMO: ContextVar[Optional[dict]] = ContextVar(
+    "query_embedding_memo", default=None
+)
+
+
+class RedisEmbeddingStore:
+    def __init__(self, ttl: int = 0):
+        self.ttl = ttl
+        self.prefix = f"{REDIS_KEY_PREFIX}:embedding"
+
+    def _get_client(self):
+        from open_webui.utils.redis import (
+            get_redis_connection,
+            get_sentinels_from_env,
+        )
+
+        return get_redis_connection(
+            redis_url=REDIS_URL,
+            redis_sentinels=get_sentinels_from_env(
+                REDIS_SENTINEL_HOSTS, REDIS_SENTINEL_PORT
+            ),
+            redis_cluster=REDIS_CLUSTER,
+            async_mode=True,
+            decode_responses=False,
+        )
+
+    async def get_many(self, keys: list[str]) -> dict[str, bytes]:
+        # A pipeline of GETs rather than MGET, which fails across cluster slots
+        pipe = self._get_client().pipeline(transaction=False)
+        for key in keys:
+            pipe.get(f"{self.prefix}:{key}")
+        values = await pipe.execute()
+        return {key: value for key, value in zip(keys, values) if value is not None}
+
+    async def set_many(self, items: dict[str, bytes]):
+        pipe = self._get_client().pipeline(transaction=False)
+        for key, value in items.items():
+            pipe.set(f"{self.prefix}:{key}", value, ex=self.ttl or None)
+        await pipe.execute()
+
+
+class DiskEmbeddingStore:
+    # Stay well below SQLite's bound parameter limit
+    BATCH_SIZE = 500
+
+    def __init__(self, directory: Union[str, Path]):
+        self.path = Path(directory) / "embeddings.db"
+
+    def _connect(self) -> sqlite3.Connection:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS embedding (key TEXT PRIMARY KEY, vector BLOB NOT NULL)"
+        )
+        return conn
+
+    def _get_many(self, keys: list[str]) -> dict[str, bytes]:
+        result = {}
+        with closing(self._connect()) as conn:
+            for i in range(0, len(keys), self.BATCH_SIZE):
+                batch = keys[i : i + self.BATCH_SIZE]
+                result.update(
+                    conn.execute(
+                        "SELECT key, vector FROM embedding "
+                        f"WHERE key IN ({', '.join('?' for _ in batch)})",
+                        batch,
+                    ).fetchall()
+                )
+        return result
+
+    def _set_many(self, items: dict[str, bytes]):
+        with closing(self._connect()) as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO embedding (key, vector) VALUES (?, ?)",
+                items.items(),
+            )
+            conn.commit()
+
+    async def get_many(self, keys: list[str]) -> dict[str, bytes]:
+        return await asyncio.to_thread(self._get_many, keys)
+
+    async def set_many(self, items: dict[str, bytes]):
+        await asyncio.to_thread(self._set_many, items)
+
+
+class EmbeddingCache:
+    """
+    Content-addressed cache of embedding vectors.
+
+    Entries are keyed by engine, model, prefix and the hash of the embedded
+    text, so identical chunks are embedded once no matter which file,
+    knowledge base or web page they come from. Vectors are kept as packed
+    float32 (or float16) bytes in an in-memory LRU tier, optionally backed by
+    a larger shared store. Store errors are treated as misses.
+    """
+
+    def __init__(
+        self,
+        size: int,
+        dtype: str = "float32",
+        store: Optional[Union[RedisEmbeddingStore, DiskEmbeddingStore]] = None,
+    ):
+        if dtype not in DTYPES:
+            raise ValueError(f"Unsupported embedding cache dtype: {dtype}")
+
+        self.size = size
+        self.dtype = dtype
+        self.store = store
+
+        self._memory: OrderedDict[str, bytes] = OrderedDict()
+        self._stats = {
+            "memory_hits": 0,
+            "store_hits": 0,
+            "misses": 0,
+            "errors": 0,
+        }
+
+    def get_key(self, engine: str, model: str, prefix: Optional[str], text: str) -> str:
+        # The dtype is part of the key so a changed setting never decodes
+        # entries packed with another width.
+        return hashlib.sha256(
+            "\0".join([self.dtype, engine, model, prefix or "", text]).encode()
+        ).hexdigest()
+
+    def encode(self, vector: list[float]) -> bytes:
+        return struct.pack(f"<{len(vector)}{DTYPES[self.dtype]}", *vector)
+
+    def decode(self, data: bytes) -> list[float]:
+        fmt = DTYPES[self.dtype]
+        return list(struct.unpack(f"<{len(data) // struct.calcsize(fmt)}{fmt}", data))
+
+    def _remember(self, key: str, value: bytes):
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.size:
+            self._memory.popitem(last=False)
+
+    async def get_many(self, keys: list[str]) -> dict[str, list[float]]:
+        found = {}
+        for key in keys:
+            value = self._memory.get(key)
+            if value is not None:
+                self._memory.move_to_end(key)
+                found[key] = value
+        self._stats["memory_hits"] += len(found)
+
+        missing = [key for key in keys if key not in found]
+        if missing and self.store is not None:
+            try:
+                stored = await self.store.get_many(missing)
+            except Exception as e:
+                self._stats["errors"] += 1
+                log.warning(f"Embedding cache lookup failed: {e}")
+                stored = {}
+
+            for key, value in stored.items():
+                self._remember(key, value)
+            found.update(stored)
+            self._stats["store_hits"] += len(stored)
+
+        self._stats["misses"] += len(keys) - len(found)
+        return {key: self.decode(value) for key, value in found.items()}
+
+    async def set_many(self, vectors: dict[str, list[float]]):
+        items = {key: self.encode(vector) for key, vector in vectors.items()}
+        for key, value in items.items():
+            self._remember(key, value)
+
+        if items and self.store is not None:
+            try:
+                await self.store.set_many(items)
+            except Exception as e:
+                self._stats["errors"] += 1
+                log.warning(f"Embedding cache update failed: {e}")
+
+    def wrap(self, embedding_function, engine: str, model: str):
+        """
+        Return `embedding_function` with cache lookups in front of it.
+
+        Only texts missing from the cache (deduplicated) are embedded, in a
+        single call so the wrapped function still batches them.
+        """
+
+        async def cached_embedding_function(query, prefix=None, user=None):
+            if isinstance(query, str):
+                texts = [query]
+            elif isinstance(query, list) and all(isinstance(t, str) for t in query):
+                texts = query
+            else:
+                return await embedding_function(query, prefix=prefix, user=user)
+
+            keys = [self.get_key(engine, model, prefix, text) for text in texts]
+            vectors = await self.get_many(keys)
+
+            missing = list(dict.fromkeys(key for key in keys if key not in vectors))
+            if missing:
+                texts_by_key = dict(zip(keys, texts))
+                missing_texts = [texts_by_key[key] for key in missing]
+                embeddings = await embedding_function(
+                    missing_texts if isinstance(query, list) else missing_texts[0],
+                    prefix=prefix,
+                    user=user,
+                )
+
+                if not embeddings:
+                    return embeddings
+                if isinstance(query, str):
+                    embeddings = [embeddings]
+                elif len(embeddings) != len(missing):
+                    # Some batches failed; the vectors can't be matched to
+                    # their texts, so surface the failure as before.
+                    return embeddings
+
+                embeddings = dict(zip(missing, embeddings))
+                await self.set_many(embeddings)
+                vectors.update(embeddings)
+
+            log.debug(
+                f"Embedding cache: {len(keys) - len(missing)}/{len(keys)} hits for {model}"
+            )
+            result = [vectors[key] for key in keys]
+            return result[0] if isinstance(query, str) else result
+
+        return cached_embedding_function
+
+    def get_stats(self) -> dict:
+        hits = self._stats["memory_hits"] + self._stats["store_hits"]
+        lookups = hits + self._stats["misses"]
+        return {
+            "dtype": self.dtype,
+            "store": type(self.store).__name__ if self.store else None,
+            "size": len(self._memory),
+            "max_size": self.size,
+            "hits": hits,
+            **self._stats,
+            "hit_ratio": hits / lookups if lookups else 0.0,
+        }
+
+    def clear(self):
+        self._memory.clear()
+
+
+def get_embedding_cache() -> Optional[EmbeddingCache]:
+    if not ENABLE_RAG_EMBEDDING_CACHE:
+        return None
+
+    store = None
+    if RAG_EMBEDDING_CACHE_BACKEND == "redis":
+        if REDIS_URL:
+            store = RedisEmbeddingStore(ttl=RAG_EMBEDDING_CACHE_TTL)
+        else:
+            log.warning("RAG_EMBEDDING_CACHE_BACKEND is redis but REDIS_URL is unset")
+    elif RAG_EMBEDDING_CACHE_BACKEND == "disk":
+        store = DiskEmbeddingStore(RAG_EMBEDDING_CACHE_DIR)
+    elif RAG_EMBEDDING_CACHE_BACKEND:
+        log.warning(
+            f"Unknown RAG_EMBEDDING_CACHE_BACKEND: {RAG_EMBEDDING_CACHE_BACKEND}"
+        )
+
+    return EmbeddingCache(
+        size=RAG_EMBEDDING_CACHE_SIZE, dtype=RAG_EMBEDDING_CACHE_DTYPE, store=store
+    )
+
+
+EMBEDDING_CACHE = get_embedding_cache()
+
+
+def start_query_embedding_memo():
+    """
+    Memoize query embeddings for the rest of the current task, i.e. one chat
+    turn. Tasks started afterwards (tool calls, the response handler) share it.
+    """
+    QUERY_EMBEDDING_MEMO.set({})
+
+
+def memoize_query_embeddings(embedding_function, engine: str, model: str):
+    """
+    Return `embedding_function` with the per-request query memo in front.
+
+    Memory, web search and file retrieval all embed the same few queries
+    within a turn, once per collection; with a memo started, each distinct
+    (prefix, text) is embedded once. Concurrent stages asking for the same
+    text wait on the first call rather than embedding it again.
+    """
+
+    async def memoized_embedding_function(query, prefix=None, user=None):
+        memo = QUERY_EMBEDDING_MEMO.get()
+        if memo is None:
+            return await embedding_function(query, prefix=prefix, user=user)
+
+        if isinstance(query, str):
+            texts = [query]
+        elif (
+            isinstance(query, list)
+            and len(query) <= QUERY_MEMO_MAX_TEXTS
+            and all(isinstance(t, str) for t in query)
+        ):
+            texts = query
+        else:
+            return await embedding_function(query, prefix=prefix, user=user)
+
+        keys = [(engine, model, prefix or "", text) for text in texts]
+
+        loop = asyncio.get_running_loop()
+        futures = {}
+        pending = {}
+        for key in keys:
+            if key in futures:
+                continue
+            future = memo.get(key)
+            if future is None:
+                future = pending[key] = memo[key] = loop.create_future()
+            futures[key] = future
+
+        if pending:
+            embeddings = None
+            try:
+                embeddings = await embedding_function(
+                    (
+                        [key[-1] for key in pending]
+                        if isinstance(query, list)
+                        else query
+                    ),
+                    prefix=prefix,
+                    user=user,
+                )
+            finally:
+                vectors = [embeddings] if isinstance(query, str) else embeddings
+                if not embeddings or len(vectors) != len(pending):
+                    # Failed, fully or in some batches; waiters embed on
+                    # their own and the result is surfaced as before
+                    vectors = [None] * len(pending)
+                for (key, future), vector in zip(pending.items(), vectors):
+                    if vector is None:
+                        memo.pop(key, None)
+                    future.set_result(vector)
+
+            if any(vector is None for vector in vectors):
+                return embeddings
+
+        vectors = {key: await future for key, future in futures.items()}
+        if any(vector is None for vector in vectors.values()):
+            # Another stage's call for one of these texts failed
+            return await embedding_function(query, prefix=prefix, user=user)
+
+        log.debug(
+            f"Query embedding memo: {len(futures) - len(pending)}/{len(futures)} hits for {model}"
+        )
+        result = [vectors[key] for key in keys]
+        return result[0] if isinstance(query, str) else result
+
+    return memoized_embedding_function
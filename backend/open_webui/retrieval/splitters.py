@@ -0,0 +1,217 @@
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional
+
+import tiktoken
+from langchain_core.documents import Document
+from langchain_text_splitters import (
+    MarkdownHeaderTextSplitter,
+    RecursiveCharacterTextSplitter,
+    TokenTextSplitter,
+)
+
+# Kept free of app config and database imports: this module is what the
+# splitting worker processes import.
+
+log = logging.getLogger(__name__)
+
+
+MARKDOWN_HEADERS_TO_SPLIT_ON = [
+    ("#", "Header 1"),
+    ("##", "Header 2"),
+    ("###", "Header 3"),
+    ("####", "Header 4"),
+    ("#####", "Header 5"),
+    ("######", "Header 6"),
+]
+
+CHUNK_SEPARATOR = "\n\n"
+
+
+def can_merge_chunks(a: Document, b: Document) -> bool:
+    if a.metadata.get("source") != b.metadata.get("source"):
+        return False
+
+    a_file_id = a.metadata.get("file_id")
+    b_file_id = b.metadata.get("file_id")
+
+    if a_file_id is not None and b_file_id is not None:
+        return a_file_id == b_file_id
+
+    return True
+
+
+def merge_docs_to_target_size(
+    chunks: list[Document],
+    min_chunk_size_target: int,
+    max_chunk_size: int,
+    text_splitter: str = "",
+    tiktoken_encoding_name: str = "cl100k_base",
+) -> list[Document]:
+    """
+    Best-effort normalization of chunk sizes.
+
+    Attempts to grow small chunks up to a desired minimum size,
+    without exceeding the maximum size or crossing source/file
+    boundaries.
+
+    Each chunk is measured once and the size of the merged chunk is tracked
+    as a running total. For the token splitter that total is the sum of the
+    parts' token counts, which can be off by a token or two at the seams;
+    the splitter that runs afterwards still enforces the hard limit.
+    """
+    if min_chunk_size_target <= 0:
+        return chunks
+
+    measure_chunk_size = len
+    if text_splitter == "token":
+        encoding = tiktoken.get_encoding(str(tiktoken_encoding_name))
+        measure_chunk_size = lambda text: len(encoding.encode(text))
+
+    separator_size = measure_chunk_size(CHUNK_SEPARATOR)
+
+    processed_chunks: list[Document] = []
+
+    current_chunk: Document | None = None
+    current_parts: list[str] = []
+    current_size = 0
+
+    def flush():
+        processed_chunks.append(
+            Document(
+                page_content=CHUNK_SEPARATOR.join(current_parts),
+                metadata={**current_chunk.metadata},
+            )
+        )
+
+    for next_chunk in chunks:
+        next_size = measure_chunk_size(next_chunk.page_content)
+
+        if current_chunk is None:
+            current_chunk = next_chunk
+            current_parts = [next_chunk.page_content]
+            current_size = next_size
+            continue  # First chunk initialization
+
+        can_merge = (
+            can_merge_chunks(current_chunk, next_chunk)
+            and current_size < min_chunk_size_target
+            and current_size + separator_size + next_size <= max_chunk_size
+        )
+
+        if can_merge:
+            current_parts.append(next_chunk.page_content)
+            current_size += separator_size + next_size
+        else:
+            flush()
+            current_chunk = next_chunk
+            current_parts = [next_chunk.page_content]
+            current_size = next_size
+
+    if current_chunk is not None:
+        flush()
+
+    return processed_chunks
+
+
+def split_docs(
+    docs: list[Document],
+    text_splitter: str,
+    chunk_size: int,
+    chunk_overlap: int,
+    chunk_min_size_target: int = 0,
+    tiktoken_encoding_name: str = "cl100k_base",
+    enable_markdown_header_text_splitter: bool = False,
+) -> list[Document]:
+    """
+    Split documents into chunks for embedding.
+
+    Takes plain settings rather than the request so it can run in a worker
+    process.
+    """
+    if enable_markdown_header_text_splitter:
+        log.info("Using markdown header text splitter")
+        markdown_splitter = MarkdownHeaderTextSplitter(
+            headers_to_split_on=MARKDOWN_HEADERS_TO_SPLIT_ON,
+            strip_headers=False,  # Keep headers in content for context
+        )
+
+        markdown_docs = []
+        for doc in docs:
+            markdown_docs.extend(
+                [
+                    Document(
+                        page_content=split_chunk.page_content,
+                        metadata={**doc.metadata},
+                    )
+                    for split_chunk in markdown_splitter.split_text(doc.page_content)
+                ]
+            )
+
+        docs = markdown_docs
+        if chunk_min_size_target > 0:
+            docs = merge_docs_to_target_size(
+                docs,
+                min_chunk_size_target=chunk_min_size_target,
+                max_chunk_size=chunk_size,
+                text_splitter=text_splitter,
+                tiktoken_encoding_name=tiktoken_encoding_name,
+            )
+
+    if text_splitter in ["", "character"]:
+        splitter = RecursiveCharacterTextSplitter(
+            chunk_size=chunk_size,
+            chunk_overlap=chunk_overlap,
+            add_start_index=True,
+        )
+    elif text_splitter == "token":
+        log.info(f"Using token text splitter: {tiktoken_encoding_name}")
+
+        tiktoken.get_encoding(str(tiktoken_encoding_name))
+        splitter = TokenTextSplitter(
+            encoding_name=str(tiktoken_encoding_name),
+            chunk_size=chunk_size,
+            chunk_overlap=chunk_overlap,
+            add_start_index=True,
+        )
+    else:
+        raise ValueError("Invalid text splitter")
+
+    return splitter.split_documents(docs)
+
+
+_executor: Optional[ProcessPoolExecutor] = None
+
+
+def get_split_executor(max_workers: int) -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        # Spawned rather than forked: the app process runs threads and an
+        # event loop that must not be copied into the workers.
+        _executor = ProcessPoolExecutor(
+            max_workers=max_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _executor
+
+
+def split_docs_in_pool(docs: list[Document], max_workers: int, **kwargs):
+    """Run `split_docs` on the shared worker pool, inline if the pool is broken."""
+    global _executor
+    try:
+        return (
+            get_split_executor(max_workers).submit(split_docs, docs, **kwargs).result()
+        )
+    except BrokenProcessPool as e:
+        log.warning(f"Split worker pool is broken, splitting inline: {e}")
+        _executor = None
+        return split_docs(docs, **kwargs)
+
+
+def shutdown_split_executor():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
@@ -6,7 +6,6 @@ import requests
 import aiohttp
 import asyncio
 import hashlib
-from concurrent.futures import ThreadPoolExecutor
 import time
 import re
 
@@ -20,7 +19,12 @@ from langchain_community.retrievers import BM25Retriever
 from langchain_core.documents import Document
 
 from open_webui.config import VECTOR_DB
-from open_webui.retrieval.vector.factory import VECTOR_DB_CLIENT
+from open_webui.retrieval.vector.factory import VECTOR_DB_CLIENT, BM25_INDEX
+from open_webui.retrieval.bm25 import get_content_hash, get_enriched_text
+from open_webui.retrieval.embedding_cache import (
+    EMBEDDING_CACHE,
+    memoize_query_embeddings,
+)
 
 
 from open_webui.models.users import UserModel
@@ -33,6 +37,7 @@ from open_webui.models.access_grants import AccessGrants
 
 from open_webui.retrieval.vector.main import GetResult
 from open_webui.utils.headers import include_user_info_headers
+from open_webui.utils.session_pool import EMBEDDING_SESSION_POOL
 from open_webui.utils.misc import get_message_list
 
 from open_webui.retrieval.web.utils import get_web_loader
@@ -44,6 +49,7 @@ from open_webui.env import (
     OFFLINE_MODE,
     ENABLE_FORWARD_USER_INFO_HEADERS,
     AIOHTTP_CLIENT_SESSION_SSL,
+    RAG_EMBEDDING_MAX_RETRIES,
 )
 from open_webui.config import (
     RAG_EMBEDDING_QUERY_PREFIX,
@@ -91,11 +97,6 @@ def get_content_from_url(request, url: str) -> str:
 CHUNK_HASH_KEY = "_chunk_hash"
 
 
-def _content_hash(text: str) -> str:
-    """SHA-256 hash of text, used as a stable chunk identifier for RRF dedup."""
-    return hashlib.sha256(text.encode()).hexdigest()
-
-
 class VectorSearchRetriever(BaseRetriever):
     collection_name: Any
     embedding_function: Any
@@ -122,7 +123,7 @@ class VectorSearchRetriever(BaseRetriever):
         run_manager: CallbackManagerForRetrieverRun,
     ) -> list[Document]:
         embedding = await self.embedding_function(query, RAG_EMBEDDING_QUERY_PREFIX)
-        result = VECTOR_DB_CLIENT.search(
+        result = await VECTOR_DB_CLIENT.asearch(
             collection_name=self.collection_name,
             vectors=[embedding],
             limit=self.top_k,
@@ -135,7 +136,7 @@ class VectorSearchRetriever(BaseRetriever):
         results = []
         for idx in range(len(ids)):
             metadata = metadatas[idx]
-            metadata[CHUNK_HASH_KEY] = _content_hash(documents[idx])
+            metadata[CHUNK_HASH_KEY] = get_content_hash(documents[idx])
             results.append(
                 Document(
                     metadata=metadata,
@@ -145,12 +146,57 @@ class VectorSearchRetriever(BaseRetriever):
         return results
 
 
-def query_doc(
+class BM25IndexRetriever(BaseRetriever):
+    collection_name: str
+    k: int
+    enriched: bool = False
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> list[Document]:
+        return [
+            Document(
+                metadata={**metadata, CHUNK_HASH_KEY: chunk_hash},
+                page_content=text,
+            )
+            for text, metadata, chunk_hash in BM25_INDEX.search(
+                self.collection_name, query, self.k, enriched=self.enriched
+            )
+        ]
+
+    async def _aget_relevant_documents(
+        self,
+        query: str,
+        *,
+        run_manager: CallbackManagerForRetrieverRun,
+    ) -> list[Document]:
+        return await asyncio.to_thread(
+            self._get_relevant_documents, query, run_manager=run_manager
+        )
+
+
+def ensure_bm25_index(collection_name: str) -> bool:
+    """
+    Make sure the persistent BM25 index of a collection exists, building it
+    from the vector DB once if needed. Returns False when the index is disabled
+    or not available (yet), in which case callers fetch the collection.
+    """
+    if BM25_INDEX is None:
+        return False
+
+    # VECTOR_DB_CLIENT is the BM25IndexedVectorDB wrapping the configured client
+    VECTOR_DB_CLIENT.ensure_index(collection_name)
+    # Not built when another worker is building it, the fetch failed or the
+    # build was dropped
+    return BM25_INDEX.exists(collection_name)
+
+
+async def query_doc(
     collection_name: str, query_embedding: list[float], k: int, user: UserModel = None
 ):
     try:
         log.debug(f"query_doc:doc {collection_name}")
-        result = VECTOR_DB_CLIENT.search(
+        result = await VECTOR_DB_CLIENT.asearch(
             collection_name=collection_name,
             vectors=[query_embedding],
             limit=k,
@@ -180,41 +226,10 @@ def get_doc(collection_name: str, user: UserModel = None):
 
 
 def get_enriched_texts(collection_result: GetResult) -> list[str]:
-    enriched_texts = []
-    for idx, text in enumerate(collection_result.documents[0]):
-        metadata = collection_result.metadatas[0][idx]
-        metadata_parts = [text]
-
-        # Add filename (repeat twice for extra weight in BM25 scoring)
-        if metadata.get("name"):
-            filename = metadata["name"]
-            filename_tokens = (
-                filename.replace("_", " ").replace("-", " ").replace(".", " ")
-            )
-            metadata_parts.append(
-                f"Filename: {filename} {filename_tokens} {filename_tokens}"
-            )
-
-        # Add title if available
-        if metadata.get("title"):
-            metadata_parts.append(f"Title: {metadata['title']}")
-
-        # Add document section headings if available (from markdown splitter)
-        if metadata.get("headings") and isinstance(metadata["headings"], list):
-            headings = " > ".join(str(h) for h in metadata["headings"])
-            metadata_parts.append(f"Section: {headings}")
-
-        # Add source URL/path if available
-        if metadata.get("source"):
-            metadata_parts.append(f"Source: {metadata['source']}")
-
-        # Add snippet for web search results
-        if metadata.get("snippet"):
-            metadata_parts.append(f"Snippet: {metadata['snippet']}")
-
-        enriched_texts.append(" ".join(metadata_parts))
-
-    return enriched_texts
+    return [
+        get_enriched_text(text, collection_result.metadatas[0][idx])
+        for idx, text in enumerate(collection_result.documents[0])
+    ]
 
 
 async def query_doc_with_hybrid_search(
@@ -230,43 +245,56 @@ async def query_doc_with_hybrid_search(
     enable_enriched_texts: bool = False,
 ) -> dict:
     try:
-        # First check if collection_result has the required attributes
-        if (
-            not collection_result
-            or not hasattr(collection_result, "documents")
-            or not hasattr(collection_result, "metadatas")
-        ):
-            log.warning(f"query_doc_with_hybrid_search:no_docs {collection_name}")
-            return {"documents": [], "metadatas": [], "distances": []}
+        if BM25_INDEX is not None and BM25_INDEX.exists(collection_name):
+            # Persistent index: no need to fetch, hash or tokenize the corpus
+            if BM25_INDEX.count(collection_name) == 0:
+                log.warning(f"query_doc_with_hybrid_search:no_docs {collection_name}")
+                return {"documents": [], "metadatas": [], "distances": []}
+
+            log.debug(f"query_doc_with_hybrid_search:bm25_index {collection_name}")
+            bm25_retriever = BM25IndexRetriever(
+                collection_name=collection_name,
+                k=k,
+                enriched=enable_enriched_texts,
+            )
+        else:
+            # First check if collection_result has the required attributes
+            if (
+                not collection_result
+                or not hasattr(collection_result, "documents")
+                or not hasattr(collection_result, "metadatas")
+            ):
+                log.warning(f"query_doc_with_hybrid_search:no_docs {collection_name}")
+                return {"documents": [], "metadatas": [], "distances": []}
 
-        # Now safely check the documents content after confirming attributes exist
-        if (
-            not collection_result.documents
-            or len(collection_result.documents) == 0
-            or not collection_result.documents[0]
-        ):
-            log.warning(f"query_doc_with_hybrid_search:no_docs {collection_name}")
-            return {"documents": [], "metadatas": [], "distances": []}
+            # Now safely check the documents content after confirming attributes exist
+            if (
+                not collection_result.documents
+                or len(collection_result.documents) == 0
+                or not collection_result.documents[0]
+            ):
+                log.warning(f"query_doc_with_hybrid_search:no_docs {collection_name}")
+                return {"documents": [], "metadatas": [], "distances": []}
 
-        log.debug(f"query_doc_with_hybrid_search:doc {collection_name}")
+            log.debug(f"query_doc_with_hybrid_search:doc {collection_name}")
 
-        original_texts = collection_result.documents[0]
-        bm25_metadatas = [
-            {**meta, CHUNK_HASH_KEY: _content_hash(original_texts[idx])}
-            for idx, meta in enumerate(collection_result.metadatas[0])
-        ]
+            original_texts = collection_result.documents[0]
+            bm25_metadatas = [
+                {**meta, CHUNK_HASH_KEY: get_content_hash(original_texts[idx])}
+                for idx, meta in enumerate(collection_result.metadatas[0])
+            ]
 
-        bm25_texts = (
-            get_enriched_texts(collection_result)
-            if enable_enriched_texts
-            else original_texts
-        )
+            bm25_texts = (
+                get_enriched_texts(collection_result)
+                if enable_enriched_texts
+                else original_texts
+            )
 
-        bm25_retriever = BM25Retriever.from_texts(
-            texts=bm25_texts,
-            metadatas=bm25_metadatas,
-        )
-        bm25_retriever.k = k
+            bm25_retriever = BM25Retriever.from_texts(
+                texts=bm25_texts,
+                metadatas=bm25_metadatas,
+            )
+            bm25_retriever.k = k
 
         vector_search_retriever = VectorSearchRetriever(
             collection_name=collection_name,
@@ -433,20 +461,27 @@ async def query_collection(
     results = []
     error = False
 
-    def process_query_collection(collection_name, query_embedding):
+    async def process_query_collection(collection_name, query_embeddings):
+        # All query vectors are searched in one round-trip per collection
         try:
             if collection_name:
-                result = query_doc(
+                log.debug(f"query_collection:doc {collection_name}")
+                result = await VECTOR_DB_CLIENT.asearch(
                     collection_name=collection_name,
-                    k=k,
-                    query_embedding=query_embedding,
+                    vectors=query_embeddings,
+                    limit=k,
                 )
                 if result is not None:
-                    return result.model_dump(), None
-            return None, None
+                    # Split into one single-row result per query
+                    result = result.model_dump()
+                    return [
+                        {key: [value[idx]] for key, value in result.items() if value}
+                        for idx in range(len(result["ids"] or []))
+                    ], None
+            return [], None
         except Exception as e:
             log.exception(f"Error when querying the collection: {e}")
-            return None, e
+            return [], e
 
     # Generate all query embeddings (in one call)
     query_embeddings = await embedding_function(
@@ -456,21 +491,18 @@ async def query_collection(
         f"query_collection: processing {len(queries)} queries across {len(collection_names)} collections"
     )
 
-    with ThreadPoolExecutor() as executor:
-        future_results = []
-        for query_embedding in query_embeddings:
-            for collection_name in collection_names:
-                result = executor.submit(
-                    process_query_collection, collection_name, query_embedding
-                )
-                future_results.append(result)
-        task_results = [future.result() for future in future_results]
+    task_results = await asyncio.gather(
+        *[
+            process_query_collection(collection_name, query_embeddings)
+            for collection_name in collection_names
+        ]
+    )
 
-    for result, err in task_results:
+    for collection_results, err in task_results:
         if err is not None:
             error = True
-        elif result is not None:
-            results.append(result)
+        else:
+            results.extend(collection_results)
 
     if error and not results:
         log.warning("All collection queries failed. No results returned.")
@@ -496,15 +528,19 @@ async def query_collection_with_hybrid_search(
     collection_results = {}
     for collection_name in collection_names:
         try:
+            if await asyncio.to_thread(ensure_bm25_index, collection_name):
+                # Searched through the persistent BM25 index instead
+                collection_results[collection_name] = None
+                continue
+
             log.debug(
                 f"query_collection_with_hybrid_search:VECTOR_DB_CLIENT.get:collection {collection_name}"
             )
-            collection_results[collection_name] = VECTOR_DB_CLIENT.get(
+            collection_results[collection_name] = await VECTOR_DB_CLIENT.aget(
                 collection_name=collection_name
             )
         except Exception as e:
             log.exception(f"Failed to fetch collection {collection_name}: {e}")
-            collection_results[collection_name] = None
 
     log.info(
         f"Starting hybrid search for {len(queries)} queries in {len(collection_names)} collections..."
@@ -530,11 +566,11 @@ async def query_collection_with_hybrid_search(
             return None, e
 
     # Prepare tasks for all collections and queries
-    # Avoid running any tasks for collections that failed to fetch data (have assigned None)
+    # Avoid running any tasks for collections that failed to fetch data
     tasks = [
         (collection_name, query)
         for collection_name in collection_names
-        if collection_results[collection_name] is not None
+        if collection_name in collection_results
         for query in queries
     ]
 
@@ -621,21 +657,18 @@ async def agenerate_openai_batch_embeddings(
         if ENABLE_FORWARD_USER_INFO_HEADERS and user:
             headers = include_user_info_headers(headers, user)
 
-        async with aiohttp.ClientSession(
-            trust_env=True, timeout=aiohttp.ClientTimeout(total=AIOHTTP_CLIENT_TIMEOUT)
-        ) as session:
-            async with session.post(
-                f"{url}/embeddings",
-                headers=headers,
-                json=form_data,
-                ssl=AIOHTTP_CLIENT_SESSION_SSL,
-            ) as r:
-                r.raise_for_status()
-                data = await r.json()
-                if "data" in data:
-                    return [item["embedding"] for item in data["data"]]
-                else:
-                    raise Exception("Something went wrong :/")
+        data = await EMBEDDING_SESSION_POOL.request_json(
+            "POST",
+            f"{url}/embeddings",
+            max_retries=RAG_EMBEDDING_MAX_RETRIES,
+            headers=headers,
+            json=form_data,
+            ssl=AIOHTTP_CLIENT_SESSION_SSL,
+        )
+        if "data" in data:
+            return [item["embedding"] for item in data["data"]]
+        else:
+            raise Exception("Something went wrong :/")
     except Exception as e:
         log.exception(f"Error generating openai batch embeddings: {e}")
         return None
@@ -715,21 +748,18 @@ async def agenerate_azure_openai_batch_embeddings(
         if ENABLE_FORWARD_USER_INFO_HEADERS and user:
             headers = include_user_info_headers(headers, user)
 
-        async with aiohttp.ClientSession(
-            trust_env=True, timeout=aiohttp.ClientTimeout(total=AIOHTTP_CLIENT_TIMEOUT)
-        ) as session:
-            async with session.post(
-                full_url,
-                headers=headers,
-                json=form_data,
-                ssl=AIOHTTP_CLIENT_SESSION_SSL,
-            ) as r:
-                r.raise_for_status()
-                data = await r.json()
-                if "data" in data:
-                    return [item["embedding"] for item in data["data"]]
-                else:
-                    raise Exception("Something went wrong :/")
+        data = await EMBEDDING_SESSION_POOL.request_json(
+            "POST",
+            full_url,
+            max_retries=RAG_EMBEDDING_MAX_RETRIES,
+            headers=headers,
+            json=form_data,
+            ssl=AIOHTTP_CLIENT_SESSION_SSL,
+        )
+        if "data" in data:
+            return [item["embedding"] for item in data["data"]]
+        else:
+            raise Exception("Something went wrong :/")
     except Exception as e:
         log.exception(f"Error generating azure openai batch embeddings: {e}")
         return None
@@ -800,21 +830,18 @@ async def agenerate_ollama_batch_embeddings(
         if ENABLE_FORWARD_USER_INFO_HEADERS and user:
             headers = include_user_info_headers(headers, user)
 
-        async with aiohttp.ClientSession(
-            trust_env=True, timeout=aiohttp.ClientTimeout(total=AIOHTTP_CLIENT_TIMEOUT)
-        ) as session:
-            async with session.post(
-                f"{url}/api/embed",
-                headers=headers,
-                json=form_data,
-                ssl=AIOHTTP_CLIENT_SESSION_SSL,
-            ) as r:
-                r.raise_for_status()
-                data = await r.json()
-                if "embeddings" in data:
-                    return data["embeddings"]
-                else:
-                    raise Exception("Something went wrong :/")
+        data = await EMBEDDING_SESSION_POOL.request_json(
+            "POST",
+            f"{url}/api/embed",
+            max_retries=RAG_EMBEDDING_MAX_RETRIES,
+            headers=headers,
+            json=form_data,
+            ssl=AIOHTTP_CLIENT_SESSION_SSL,
+        )
+        if "embeddings" in data:
+            return data["embeddings"]
+        else:
+            raise Exception("Something went wrong :/")
     except Exception as e:
         log.exception(f"Error generating ollama batch embeddings: {e}")
         return None
@@ -846,7 +873,6 @@ def get_embedding_function(
                 prefix,
             )
 
-        return async_embedding_function
     elif embedding_engine in ["ollama", "openai", "azure_openai"]:
         embedding_function = lambda query, prefix=None, user=None: generate_embeddings(
             engine=embedding_engine,
@@ -914,10 +940,17 @@ def get_embedding_function(
             else:
                 return await embedding_function(query, prefix, user)
 
-        return async_embedding_function
     else:
         raise ValueError(f"Unknown embedding engine: {embedding_engine}")
 
+    if EMBEDDING_CACHE is not None:
+        async_embedding_function = EMBEDDING_CACHE.wrap(
+            async_embedding_function, embedding_engine, embedding_model
+        )
+    return memoize_query_embeddings(
+        async_embedding_function, embedding_engine, embedding_model
+    )
+
 
 async def generate_embeddings(
     engine: str,
@@ -10,8 +10,9 @@ from open_webui.retrieval.vector.main import (
     VectorItem,
     SearchResult,
     GetResult,
+    VectorGetResult,
 )
-from open_webui.retrieval.vector.utils import process_metadata
+from open_webui.retrieval.vector.utils import process_metadata, to_float_list
 
 from open_webui.config import (
     CHROMA_DATA_PATH,
@@ -126,6 +127,28 @@ class ChromaClient(VectorDBBase):
         except:
             return None
 
+    def query_vectors(
+        self, collection_name: str, filter: dict, limit: Optional[int] = None
+    ) -> Optional[VectorGetResult]:
+        try:
+            collection = self.client.get_collection(name=collection_name)
+            if collection:
+                result = collection.get(
+                    where=filter,
+                    limit=limit,
+                    include=["embeddings", "documents", "metadatas"],
+                )
+
+                return VectorGetResult(
+                    ids=[result["ids"]],
+                    documents=[result["documents"]],
+                    metadatas=[result["metadatas"]],
+                    vectors=[[to_float_list(v) for v in result["embeddings"]]],
+                )
+            return None
+        except Exception:
+            return None
+
     def get(self, collection_name: str) -> Optional[GetResult]:
         # Get all the items in the collection.
         collection = self.client.get_collection(name=collection_name)
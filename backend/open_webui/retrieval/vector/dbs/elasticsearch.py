@@ -2,17 +2,20 @@
 NOTE: This vector database integration is community-supported and maintained on a best-effort basis.
 """
 
-from elasticsearch import Elasticsearch, BadRequestError
+from elasticsearch import AsyncElasticsearch, Elasticsearch, BadRequestError
 from typing import Optional
+import asyncio
 import ssl
-from elasticsearch.helpers import bulk, scan
+import weakref
+from elasticsearch.helpers import async_bulk, async_scan, bulk, scan
 
-from open_webui.retrieval.vector.utils import process_metadata
+from open_webui.retrieval.vector.utils import get_loop_client, process_metadata
 from open_webui.retrieval.vector.main import (
     VectorDBBase,
     VectorItem,
     SearchResult,
     GetResult,
+    VectorGetResult,
 )
 from open_webui.config import (
     ELASTICSEARCH_URL,
@@ -36,7 +39,7 @@ class ElasticsearchClient(VectorDBBase):
 
     def __init__(self):
         self.index_prefix = ELASTICSEARCH_INDEX_PREFIX
-        self.client = Elasticsearch(
+        self.client_kwargs = dict(
             hosts=[ELASTICSEARCH_URL],
             ca_certs=ELASTICSEARCH_CA_CERTS,
             api_key=ELASTICSEARCH_API_KEY,
@@ -48,6 +51,13 @@ class ElasticsearchClient(VectorDBBase):
             ),
             ssl_assert_fingerprint=SSL_ASSERT_FINGERPRINT,
         )
+        self.client = Elasticsearch(**self.client_kwargs)
+        self._async_clients = weakref.WeakKeyDictionary()
+
+    def _get_async_client(self) -> AsyncElasticsearch:
+        return get_loop_client(
+            self._async_clients, lambda: AsyncElasticsearch(**self.client_kwargs)
+        )
 
     # Status: works
     def _get_index_name(self, dimension: int) -> str:
@@ -85,22 +95,27 @@ class ElasticsearchClient(VectorDBBase):
 
     # Status: works
     def _result_to_search_result(self, result) -> SearchResult:
+        # One row per query of a multi search response
         ids = []
         distances = []
         documents = []
         metadatas = []
 
-        for hit in result["hits"]["hits"]:
-            ids.append(hit["_id"])
-            distances.append(hit["_score"])
-            documents.append(hit["_source"].get("text"))
-            metadatas.append(hit["_source"].get("metadata"))
+        for response in result["responses"]:
+            if "error" in response:
+                raise Exception(f"Elasticsearch search failed: {response['error']}")
+
+            hits = response["hits"]["hits"]
+            ids.append([hit["_id"] for hit in hits])
+            distances.append([hit["_score"] for hit in hits])
+            documents.append([hit["_source"].get("text") for hit in hits])
+            metadatas.append([hit["_source"].get("metadata") for hit in hits])
 
         return SearchResult(
-            ids=[ids],
-            distances=[distances],
-            documents=[documents],
-            metadatas=[metadatas],
+            ids=ids,
+            distances=distances,
+            documents=documents,
+            metadatas=metadatas,
         )
 
     # Status: works
@@ -155,6 +170,34 @@ class ElasticsearchClient(VectorDBBase):
         query = {"query": {"term": {"collection": collection_name}}}
         self.client.delete_by_query(index=f"{self.index_prefix}*", body=query)
 
+    def _get_searches(self, collection_name: str, vectors: list[list[float]], limit):
+        # Multi search body: a header and a script_score query per vector
+        searches = []
+        for vector in vectors:
+            searches.append({})
+            searches.append(
+                {
+                    "size": limit,
+                    "_source": ["text", "metadata"],
+                    "query": {
+                        "script_score": {
+                            "query": {
+                                "bool": {
+                                    "filter": [
+                                        {"term": {"collection": collection_name}}
+                                    ]
+                                }
+                            },
+                            "script": {
+                                "source": "cosineSimilarity(params.vector, 'vector') + 1.0",
+                                "params": {"vector": vector},
+                            },
+                        }
+                    },
+                }
+            )
+        return searches
+
     # Status: works
     def search(
         self,
@@ -163,37 +206,28 @@ class ElasticsearchClient(VectorDBBase):
         filter: Optional[dict] = None,
         limit: int = 10,
     ) -> Optional[SearchResult]:
-        query = {
-            "size": limit,
-            "_source": ["text", "metadata"],
-            "query": {
-                "script_score": {
-                    "query": {
-                        "bool": {"filter": [{"term": {"collection": collection_name}}]}
-                    },
-                    "script": {
-                        "source": "cosineSimilarity(params.vector, 'vector') + 1.0",
-                        "params": {
-                            "vector": vectors[0]
-                        },  # Assuming single query vector
-                    },
-                }
-            },
-        }
-
-        result = self.client.search(
-            index=self._get_index_name(len(vectors[0])), body=query
+        result = self.client.msearch(
+            index=self._get_index_name(len(vectors[0])),
+            searches=self._get_searches(collection_name, vectors, limit),
         )
 
         return self._result_to_search_result(result)
 
-    # Status: only tested halfwat
-    def query(
-        self, collection_name: str, filter: dict, limit: Optional[int] = None
-    ) -> Optional[GetResult]:
-        if not self.has_collection(collection_name):
-            return None
+    async def asearch(
+        self,
+        collection_name: str,
+        vectors: list[list[float]],
+        filter: Optional[dict] = None,
+        limit: int = 10,
+    ) -> Optional[SearchResult]:
+        result = await self._get_async_client().msearch(
+            index=self._get_index_name(len(vectors[0])),
+            searches=self._get_searches(collection_name, vectors, limit),
+        )
 
+        return self._result_to_search_result(result)
+
+    def _get_query_body(self, collection_name: str, filter: dict) -> dict:
         query_body = {
             "query": {"bool": {"filter": []}},
             "_source": ["text", "metadata"],
@@ -204,13 +238,20 @@ class ElasticsearchClient(VectorDBBase):
         query_body["query"]["bool"]["filter"].append(
             {"term": {"collection": collection_name}}
         )
-        size = limit if limit else 10
+        return query_body
+
+    # Status: only tested halfwat
+    def query(
+        self, collection_name: str, filter: dict, limit: Optional[int] = None
+    ) -> Optional[GetResult]:
+        if not self.has_collection(collection_name):
+            return None
 
         try:
             result = self.client.search(
                 index=f"{self.index_prefix}*",
-                body=query_body,
-                size=size,
+                body=self._get_query_body(collection_name, filter),
+                size=limit if limit else 10,
             )
 
             return self._result_to_get_result(result)
@@ -218,6 +259,64 @@ class ElasticsearchClient(VectorDBBase):
         except Exception as e:
             return None
 
+    async def aquery(
+        self, collection_name: str, filter: dict, limit: Optional[int] = None
+    ) -> Optional[GetResult]:
+        try:
+            client = self._get_async_client()
+            result = await client.search(
+                index=f"{self.index_prefix}*",
+                body=self._get_query_body(collection_name, filter),
+                size=limit if limit else 10,
+            )
+
+            # No hits also covers a missing collection
+            return self._result_to_get_result(result)
+
+        except Exception as e:
+            return None
+
+    def query_vectors(
+        self, collection_name: str, filter: dict, limit: Optional[int] = None
+    ) -> Optional[VectorGetResult]:
+        query_body = {
+            "query": {
+                "bool": {
+                    "filter": [
+                        {"term": {"collection": collection_name}},
+                        *(
+                            {"term": {f"metadata.{field}": value}}
+                            for field, value in filter.items()
+                        ),
+                    ]
+                }
+            },
+            "_source": ["text", "metadata", "vector"],
+        }
+
+        try:
+            if limit:
+                result = self.client.search(
+                    index=f"{self.index_prefix}*", body=query_body, size=limit
+                )
+                hits = result["hits"]["hits"]
+            else:
+                # Copies need every item, not the first page
+                hits = list(
+                    scan(self.client, index=f"{self.index_prefix}*", query=query_body)
+                )
+
+            get_result = self._scan_result_to_get_result(hits)
+            if get_result is None:
+                return None
+
+            return VectorGetResult(
+                **get_result.model_dump(),
+                vectors=[[hit["_source"].get("vector") for hit in hits]],
+            )
+        except Exception as e:
+            return None
+
     # Status: works
     def _has_index(self, dimension: int):
         return self.client.indices.exists(
@@ -239,48 +338,76 @@ class ElasticsearchClient(VectorDBBase):
 
         return self._scan_result_to_get_result(results)
 
+    async def aget(self, collection_name: str) -> Optional[GetResult]:
+        query = {
+            "query": {"bool": {"filter": [{"term": {"collection": collection_name}}]}},
+            "_source": ["text", "metadata"],
+        }
+        results = [
+            hit
+            async for hit in async_scan(
+                self._get_async_client(), index=f"{self.index_prefix}*", query=query
+            )
+        ]
+
+        return self._scan_result_to_get_result(results)
+
+    def _get_insert_actions(self, collection_name: str, batch: list[VectorItem]):
+        return [
+            {
+                "_index": self._get_index_name(dimension=len(batch[0]["vector"])),
+                "_id": item["id"],
+                "_source": {
+                    "collection": collection_name,
+                    "vector": item["vector"],
+                    "text": item["text"],
+                    "metadata": process_metadata(item["metadata"]),
+                },
+            }
+            for item in batch
+        ]
+
+    def _get_upsert_actions(self, collection_name: str, batch: list[VectorItem]):
+        return [
+            {
+                "_op_type": "update",
+                "_index": self._get_index_name(dimension=len(item["vector"])),
+                "_id": item["id"],
+                "doc": {
+                    "collection": collection_name,
+                    "vector": item["vector"],
+                    "text": item["text"],
+                    "metadata": process_metadata(item["metadata"]),
+                },
+                "doc_as_upsert": True,
+            }
+            for item in batch
+        ]
+
     # Status: works
     def insert(self, collection_name: str, items: list[VectorItem]):
-        if not self._has_index(dimension=len(items[0]["vector"])):
-            self._create_index(dimension=len(items[0]["vector"]))
-
+        self.get_or_create_index(dimension=len(items[0]["vector"]))
         for batch in self._create_batches(items):
-            actions = [
-                {
-                    "_index": self._get_index_name(dimension=len(items[0]["vector"])),
-                    "_id": item["id"],
-                    "_source": {
-                        "collection": collection_name,
-                        "vector": item["vector"],
-                        "text": item["text"],
-                        "metadata": process_metadata(item["metadata"]),
-                    },
-                }
-                for item in batch
-            ]
-            bulk(self.client, actions)
+            bulk(self.client, self._get_insert_actions(collection_name, batch))
 
     # Upsert documents using the update API with doc_as_upsert=True.
     def upsert(self, collection_name: str, items: list[VectorItem]):
-        if not self._has_index(dimension=len(items[0]["vector"])):
-            self._create_index(dimension=len(items[0]["vector"]))
+        self.get_or_create_index(dimension=len(items[0]["vector"]))
         for batch in self._create_batches(items):
-            actions = [
-                {
-                    "_op_type": "update",
-                    "_index": self._get_index_name(dimension=len(item["vector"])),
-                    "_id": item["id"],
-                    "doc": {
-                        "collection": collection_name,
-                        "vector": item["vector"],
-                        "text": item["text"],
-                        "metadata": process_metadata(item["metadata"]),
-                    },
-                    "doc_as_upsert": True,
-                }
-                for item in batch
-            ]
-            bulk(self.client, actions)
+            bulk(self.client, self._get_upsert_actions(collection_name, batch))
+
+    async def ainsert(self, collection_name: str, items: list[VectorItem]):
+        # Index creation is rare; reuse the sync path
+        await asyncio.to_thread(self.get_or_create_index, len(items[0]["vector"]))
+        client = self._get_async_client()
+        for batch in self._create_batches(items):
+            await async_bulk(client, self._get_insert_actions(collection_name, batch))
+
+    async def aupsert(self, collection_name: str, items: list[VectorItem]):
+        await asyncio.to_thread(self.get_or_create_index, len(items[0]["vector"]))
+        client = self._get_async_client()
+        for batch in self._create_batches(items):
+            await async_bulk(client, self._get_upsert_actions(collection_name, batch))
 
     # Delete specific documents from a collection by filtering on both collection and document IDs.
     def delete(
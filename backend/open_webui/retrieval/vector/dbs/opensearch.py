@@ -2,16 +2,19 @@
 NOTE: This vector database integration is community-supported and maintained on a best-effort basis.
 """
 
-from opensearchpy import OpenSearch
-from opensearchpy.helpers import bulk
+from opensearchpy import AsyncOpenSearch, OpenSearch
+from opensearchpy.helpers import async_bulk, bulk, scan
 from typing import Optional
+import asyncio
+import weakref
 
-from open_webui.retrieval.vector.utils import process_metadata
+from open_webui.retrieval.vector.utils import get_loop_client, process_metadata
 from open_webui.retrieval.vector.main import (
     VectorDBBase,
     VectorItem,
     SearchResult,
     GetResult,
+    VectorGetResult,
 )
 from open_webui.config import (
     OPENSEARCH_URI,
@@ -25,25 +28,35 @@ from open_webui.config import (
 class OpenSearchClient(VectorDBBase):
     def __init__(self):
         self.index_prefix = "open_webui"
-        self.client = OpenSearch(
+        self.client_kwargs = dict(
             hosts=[OPENSEARCH_URI],
             use_ssl=OPENSEARCH_SSL,
             verify_certs=OPENSEARCH_CERT_VERIFY,
             http_auth=(OPENSEARCH_USERNAME, OPENSEARCH_PASSWORD),
         )
+        self.client = OpenSearch(**self.client_kwargs)
+        self._async_clients = weakref.WeakKeyDictionary()
+
+    def _get_async_client(self) -> AsyncOpenSearch:
+        return get_loop_client(
+            self._async_clients, lambda: AsyncOpenSearch(**self.client_kwargs)
+        )
 
     def _get_index_name(self, collection_name: str) -> str:
         return f"{self.index_prefix}_{collection_name}"
 
     def _result_to_get_result(self, result) -> GetResult:
-        if not result["hits"]["hits"]:
+        return self._scan_result_to_get_result(result["hits"]["hits"])
+
+    def _scan_result_to_get_result(self, result) -> GetResult:
+        if not result:
             return None
 
         ids = []
         documents = []
         metadatas = []
 
-        for hit in result["hits"]["hits"]:
+        for hit in result:
             ids.append(hit["_id"])
             documents.append(hit["_source"].get("text"))
             metadatas.append(hit["_source"].get("metadata"))
@@ -51,27 +64,49 @@ class OpenSearchClient(VectorDBBase):
         return GetResult(ids=[ids], documents=[documents], metadatas=[metadatas])
 
     def _result_to_search_result(self, result) -> SearchResult:
-        if not result["hits"]["hits"]:
+        # One row per query of a multi search response
+        responses = [
+            response.get("hits", {}).get("hits", []) for response in result["responses"]
+        ]
+        if not any(responses):
             return None
 
-        ids = []
-        distances = []
-        documents = []
-        metadatas = []
-
-        for hit in result["hits"]["hits"]:
-            ids.append(hit["_id"])
-            distances.append(hit["_score"])
-            documents.append(hit["_source"].get("text"))
-            metadatas.append(hit["_source"].get("metadata"))
-
         return SearchResult(
-            ids=[ids],
-            distances=[distances],
-            documents=[documents],
-            metadatas=[metadatas],
+            ids=[[hit["_id"] for hit in hits] for hits in responses],
+            distances=[[hit["_score"] for hit in hits] for hits in responses],
+            documents=[
+                [hit["_source"].get("text") for hit in hits] for hits in responses
+            ],
+            metadatas=[
+                [hit["_source"].get("metadata") for hit in hits] for hits in responses
+            ],
         )
 
+    def _get_search_body(self, vectors: list[list[float | int]], limit) -> list:
+        # Multi search body: a header and a script_score query per vector
+        body = []
+        for vector in vectors:
+            body.append({})
+            body.append(
+                {
+                    "size": limit,
+                    "_source": ["text", "metadata"],
+                    "query": {
+                        "script_score": {
+                            "query": {"match_all": {}},
+                            "script": {
+                                "source": "(cosineSimilarity(params.query_value, doc[params.field]) + 1.0) / 2.0",
+                                "params": {
+                                    "field": "vector",
+                                    "query_value": vector,
+                                },
+                            },
+                        }
+                    },
+                }
+            )
+        return body
+
     def _create_index(self, collection_name: str, dimension: int):
         body = {
             "settings": {"index": {"knn": True}},
@@ -127,25 +162,31 @@ class OpenSearchClient(VectorDBBase):
             if not self.has_collection(collection_name):
                 return None
 
-            query = {
-                "size": limit,
-                "_source": ["text", "metadata"],
-                "query": {
-                    "script_score": {
-                        "query": {"match_all": {}},
-                        "script": {
-                            "source": "(cosineSimilarity(params.query_value, doc[params.field]) + 1.0) / 2.0",
-                            "params": {
-                                "field": "vector",
-                                "query_value": vectors[0],
-                            },  # Assuming single query vector
-                        },
-                    }
-                },
-            }
+            result = self.client.msearch(
+                index=self._get_index_name(collection_name),
+                body=self._get_search_body(vectors, limit),
+            )
 
-            result = self.client.search(
-                index=self._get_index_name(collection_name), body=query
+            return self._result_to_search_result(result)
+
+        except Exception as e:
+            return None
+
+    async def asearch(
+        self,
+        collection_name: str,
+        vectors: list[list[float | int]],
+        filter: Optional[dict] = None,
+        limit: int = 10,
+    ) -> Optional[SearchResult]:
+        try:
+            client = self._get_async_client()
+            index = self._get_index_name(collection_name)
+            if not await client.indices.exists(index=index):
+                return None
+
+            result = await client.msearch(
+                index=index, body=self._get_search_body(vectors, limit)
             )
 
             return self._result_to_search_result(result)
@@ -159,23 +200,31 @@ class OpenSearchClient(VectorDBBase):
         if not self.has_collection(collection_name):
             return None
 
-        query_body = {
-            "query": {"bool": {"filter": []}},
-            "_source": ["text", "metadata"],
-        }
-
-        for field, value in filter.items():
-            query_body["query"]["bool"]["filter"].append(
-                {"term": {"metadata." + str(field) + ".keyword": value}}
+        try:
+            result = self.client.search(
+                index=self._get_index_name(collection_name),
+                body=self._get_query_body(filter),
+                size=limit if limit else 10000,
             )
 
-        size = limit if limit else 10000
+            return self._result_to_get_result(result)
+
+        except Exception as e:
+            return None
+
+    async def aquery(
+        self, collection_name: str, filter: dict, limit: Optional[int] = None
+    ) -> Optional[GetResult]:
+        client = self._get_async_client()
+        index = self._get_index_name(collection_name)
+        if not await client.indices.exists(index=index):
+            return None
 
         try:
-            result = self.client.search(
-                index=self._get_index_name(collection_name),
-                body=query_body,
-                size=size,
+            result = await client.search(
+                index=index,
+                body=self._get_query_body(filter),
+                size=limit if limit else 10000,
             )
 
             return self._result_to_get_result(result)
@@ -183,6 +232,47 @@ class OpenSearchClient(VectorDBBase):
         except Exception as e:
             return None
 
+    def query_vectors(
+        self, collection_name: str, filter: dict, limit: Optional[int] = None
+    ) -> Optional[VectorGetResult]:
+        if not self.has_collection(collection_name):
+            return None
+
+        query_body = self._get_query_body(filter)
+        query_body["_source"].append("vector")
+
+        index = self._get_index_name(collection_name)
+        try:
+            if limit:
+                result = self.client.search(index=index, body=query_body, size=limit)
+                hits = result["hits"]["hits"]
+            else:
+                # Copies need every item, not the first page
+                hits = list(scan(self.client, index=index, query=query_body))
+
+            get_result = self._scan_result_to_get_result(hits)
+            if get_result is None:
+                return None
+
+            return VectorGetResult(
+                **get_result.model_dump(),
+                vectors=[[hit["_source"].get("vector") for hit in hits]],
+            )
+        except Exception as e:
+            return None
+
+    def _get_query_body(self, filter: dict) -> dict:
+        query_body = {
+            "query": {"bool": {"filter": []}},
+            "_source": ["text", "metadata"],
+        }
+
+        for field, value in filter.items():
+            query_body["query"]["bool"]["filter"].append(
+                {"term": {"metadata." + str(field) + ".keyword": value}}
+            )
+        return query_body
+
     def _create_index_if_not_exists(self, collection_name: str, dimension: int):
         if not self.has_collection(collection_name):
             self._create_index(collection_name, dimension)
@@ -195,26 +285,52 @@ class OpenSearchClient(VectorDBBase):
         )
         return self._result_to_get_result(result)
 
+    async def aget(self, collection_name: str) -> Optional[GetResult]:
+        query = {"query": {"match_all": {}}, "_source": ["text", "metadata"]}
+
+        result = await self._get_async_client().search(
+            index=self._get_index_name(collection_name), body=query
+        )
+        return self._result_to_get_result(result)
+
+    def _get_insert_actions(self, collection_name: str, batch: list[VectorItem]):
+        return [
+            {
+                "_op_type": "index",
+                "_index": self._get_index_name(collection_name),
+                "_id": item["id"],
+                "_source": {
+                    "vector": item["vector"],
+                    "text": item["text"],
+                    "metadata": process_metadata(item["metadata"]),
+                },
+            }
+            for item in batch
+        ]
+
+    def _get_upsert_actions(self, collection_name: str, batch: list[VectorItem]):
+        return [
+            {
+                "_op_type": "update",
+                "_index": self._get_index_name(collection_name),
+                "_id": item["id"],
+                "doc": {
+                    "vector": item["vector"],
+                    "text": item["text"],
+                    "metadata": process_metadata(item["metadata"]),
+                },
+                "doc_as_upsert": True,
+            }
+            for item in batch
+        ]
+
     def insert(self, collection_name: str, items: list[VectorItem]):
         self._create_index_if_not_exists(
             collection_name=collection_name, dimension=len(items[0]["vector"])
         )
 
         for batch in self._create_batches(items):
-            actions = [
-                {
-                    "_op_type": "index",
-                    "_index": self._get_index_name(collection_name),
-                    "_id": item["id"],
-                    "_source": {
-                        "vector": item["vector"],
-                        "text": item["text"],
-                        "metadata": process_metadata(item["metadata"]),
-                    },
-                }
-                for item in batch
-            ]
-            bulk(self.client, actions)
+            bulk(self.client, self._get_insert_actions(collection_name, batch))
         self.client.indices.refresh(index=self._get_index_name(collection_name))
 
     def upsert(self, collection_name: str, items: list[VectorItem]):
@@ -223,23 +339,28 @@ class OpenSearchClient(VectorDBBase):
         )
 
         for batch in self._create_batches(items):
-            actions = [
-                {
-                    "_op_type": "update",
-                    "_index": self._get_index_name(collection_name),
-                    "_id": item["id"],
-                    "doc": {
-                        "vector": item["vector"],
-                        "text": item["text"],
-                        "metadata": process_metadata(item["metadata"]),
-                    },
-                    "doc_as_upsert": True,
-                }
-                for item in batch
-            ]
-            bulk(self.client, actions)
+            bulk(self.client, self._get_upsert_actions(collection_name, batch))
         self.client.indices.refresh(index=self._get_index_name(collection_name))
 
+    async def _awrite(self, get_actions, collection_name: str, items: list[VectorItem]):
+        # Index creation is rare; reuse the sync path
+        await asyncio.to_thread(
+            self._create_index_if_not_exists,
+            collection_name=collection_name,
+            dimension=len(items[0]["vector"]),
+        )
+
+        client = self._get_async_client()
+        for batch in self._create_batches(items):
+            await async_bulk(client, get_actions(collection_name, batch))
+        await client.indices.refresh(index=self._get_index_name(collection_name))
+
+    async def ainsert(self, collection_name: str, items: list[VectorItem]):
+        await self._awrite(self._get_insert_actions, collection_name, items)
+
+    async def aupsert(self, collection_name: str, items: list[VectorItem]):
+        await self._awrite(self._get_upsert_actions, collection_name, items)
+
     def delete(
         self,
         collection_name: str,
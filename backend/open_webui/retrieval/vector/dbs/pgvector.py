@@ -27,12 +27,13 @@ from sqlalchemy.ext.mutable import MutableDict
 from sqlalchemy.exc import NoSuchTableError
 
 
-from open_webui.retrieval.vector.utils import process_metadata
+from open_webui.retrieval.vector.utils import process_metadata, to_float_list
 from open_webui.retrieval.vector.main import (
     VectorDBBase,
     VectorItem,
     SearchResult,
     GetResult,
+    VectorGetResult,
 )
 from open_webui.config import (
     PGVECTOR_DB_URL,
@@ -618,6 +619,50 @@ class PgvectorClient(VectorDBBase):
             log.exception(f"Error during query: {e}")
             return None
 
+    def query_vectors(
+        self, collection_name: str, filter: Dict[str, Any], limit: Optional[int] = None
+    ) -> Optional[VectorGetResult]:
+        try:
+            if PGVECTOR_PGCRYPTO:
+                text_col = pgcrypto_decrypt(
+                    DocumentChunk.text, PGVECTOR_PGCRYPTO_KEY, Text
+                )
+                metadata_col = pgcrypto_decrypt(
+                    DocumentChunk.vmetadata, PGVECTOR_PGCRYPTO_KEY, JSONB
+                )
+            else:
+                text_col = DocumentChunk.text
+                metadata_col = DocumentChunk.vmetadata
+
+            where_clauses = [DocumentChunk.collection_name == collection_name]
+            for key, value in filter.items():
+                where_clauses.append(metadata_col[key].astext == str(value))
+
+            stmt = select(
+                DocumentChunk.id,
+                text_col.label("text"),
+                metadata_col.label("vmetadata"),
+                DocumentChunk.vector,
+            ).where(*where_clauses)
+            if limit is not None:
+                stmt = stmt.limit(limit)
+            results = self.session.execute(stmt).all()
+
+            self.session.rollback()  # read-only transaction
+            if not results:
+                return None
+
+            return VectorGetResult(
+                ids=[[row.id for row in results]],
+                documents=[[row.text for row in results]],
+                metadatas=[[row.vmetadata for row in results]],
+                vectors=[[to_float_list(row.vector) for row in results]],
+            )
+        except Exception as e:
+            self.session.rollback()
+            log.exception(f"Error during query_vectors: {e}")
+            return None
+
     def get(
         self, collection_name: str, limit: Optional[int] = None
     ) -> Optional[GetResult]:
@@ -413,42 +413,42 @@ class PineconeClient(VectorDBBase):
             limit = NO_LIMIT
 
         try:
-            # Search using the first vector (assuming this is the intended behavior)
-            query_vector = vectors[0]
-
-            # Perform the search
-            query_response = self.index.query(
-                vector=query_vector,
-                top_k=limit,
-                include_metadata=True,
-                filter={"collection_name": collection_name_with_prefix},
+            # Pinecone queries take a single vector; run one per query vector
+            # on the batch executor and return one result row per vector
+            responses = list(
+                self._executor.map(
+                    lambda query_vector: self.index.query(
+                        vector=query_vector,
+                        top_k=limit,
+                        include_metadata=True,
+                        filter={"collection_name": collection_name_with_prefix},
+                    ),
+                    vectors,
+                )
             )
 
-            matches = getattr(query_response, "matches", []) or []
-            if not matches:
-                # Return empty result if no matches
-                return SearchResult(
-                    ids=[[]],
-                    documents=[[]],
-                    metadatas=[[]],
-                    distances=[[]],
+            ids, documents, metadatas, distances = [], [], [], []
+            for query_response in responses:
+                matches = getattr(query_response, "matches", []) or []
+
+                # Convert to GetResult format
+                get_result = self._result_to_get_result(matches)
+                ids.extend(get_result.ids)
+                documents.extend(get_result.documents)
+                metadatas.extend(get_result.metadatas)
+
+                # Calculate normalized distances based on metric
+                distances.append(
+                    [
+                        self._normalize_distance(getattr(match, "score", 0.0))
+                        for match in matches
+                    ]
                 )
 
-            # Convert to GetResult format
-            get_result = self._result_to_get_result(matches)
-
-            # Calculate normalized distances based on metric
-            distances = [
-                [
-                    self._normalize_distance(getattr(match, "score", 0.0))
-                    for match in matches
-                ]
-            ]
-
             return SearchResult(
-                ids=get_result.ids,
-                documents=get_result.documents,
-                metadatas=get_result.metadatas,
+                ids=ids,
+                documents=documents,
+                metadatas=metadatas,
                 distances=distances,
             )
         except Exception as e:
@@ -3,10 +3,12 @@ NOTE: This vector database integration is community-supported and maintained on
 """
 
 from typing import Optional
+import asyncio
 import logging
+import weakref
 from urllib.parse import urlparse
 
-from qdrant_client import QdrantClient as Qclient
+from qdrant_client import AsyncQdrantClient, QdrantClient as Qclient
 from qdrant_client.http.models import PointStruct
 from qdrant_client.models import models
 
@@ -15,7 +17,9 @@ from open_webui.retrieval.vector.main import (
     VectorItem,
     SearchResult,
     GetResult,
+    VectorGetResult,
 )
+from open_webui.retrieval.vector.utils import get_loop_client
 from open_webui.config import (
     QDRANT_URI,
     QDRANT_API_KEY,
@@ -28,6 +32,7 @@ from open_webui.config import (
 )
 
 NO_LIMIT = 999999999
+UPLOAD_BATCH_SIZE = 64
 
 log = logging.getLogger(__name__)
 
@@ -42,6 +47,7 @@ class QdrantClient(VectorDBBase):
         self.GRPC_PORT = QDRANT_GRPC_PORT
         self.QDRANT_TIMEOUT = QDRANT_TIMEOUT
         self.QDRANT_HNSW_M = QDRANT_HNSW_M
+        self._async_clients = weakref.WeakKeyDictionary()
 
         if not self.QDRANT_URI:
             self.client = None
@@ -53,7 +59,7 @@ class QdrantClient(VectorDBBase):
         http_port = parsed.port or 6333  # default REST port
 
         if self.PREFER_GRPC:
-            self.client = Qclient(
+            self.client_kwargs = dict(
                 host=host,
                 port=http_port,
                 grpc_port=self.GRPC_PORT,
@@ -62,11 +68,17 @@ class QdrantClient(VectorDBBase):
                 timeout=self.QDRANT_TIMEOUT,
             )
         else:
-            self.client = Qclient(
+            self.client_kwargs = dict(
                 url=self.QDRANT_URI,
                 api_key=self.QDRANT_API_KEY,
                 timeout=QDRANT_TIMEOUT,
             )
+        self.client = Qclient(**self.client_kwargs)
+
+    def _get_async_client(self) -> AsyncQdrantClient:
+        return get_loop_client(
+            self._async_clients, lambda: AsyncQdrantClient(**self.client_kwargs)
+        )
 
     def _result_to_get_result(self, points) -> GetResult:
         ids = []
@@ -87,6 +99,43 @@ class QdrantClient(VectorDBBase):
             }
         )
 
+    def _responses_to_search_result(self, responses) -> SearchResult:
+        ids = []
+        documents = []
+        metadatas = []
+        distances = []
+
+        for response in responses:
+            get_result = self._result_to_get_result(response.points)
+            ids.extend(get_result.ids)
+            documents.extend(get_result.documents)
+            metadatas.extend(get_result.metadatas)
+            # qdrant distance is [-1, 1], normalize to [0, 1]
+            distances.append([(point.score + 1.0) / 2.0 for point in response.points])
+
+        return SearchResult(
+            ids=ids, documents=documents, metadatas=metadatas, distances=distances
+        )
+
+    def _get_search_requests(self, vectors: list[list[float | int]], limit):
+        if limit is None:
+            limit = NO_LIMIT  # otherwise qdrant would set limit to 10!
+
+        return [
+            models.QueryRequest(query=vector, limit=limit, with_payload=True)
+            for vector in vectors
+        ]
+
+    def _get_query_filter(self, filter: dict) -> models.Filter:
+        field_conditions = []
+        for key, value in filter.items():
+            field_conditions.append(
+                models.FieldCondition(
+                    key=f"metadata.{key}", match=models.MatchValue(value=value)
+                )
+            )
+        return models.Filter(should=field_conditions)
+
     def _create_collection(self, collection_name: str, dimension: int):
         collection_name_with_prefix = f"{self.collection_prefix}_{collection_name}"
         self.client.create_collection(
@@ -155,23 +204,25 @@ class QdrantClient(VectorDBBase):
         filter: Optional[dict] = None,
         limit: int = 10,
     ) -> Optional[SearchResult]:
-        # Search for the nearest neighbor items based on the vectors and return 'limit' number of results.
-        if limit is None:
-            limit = NO_LIMIT  # otherwise qdrant would set limit to 10!
-
-        query_response = self.client.query_points(
+        # Search for the nearest neighbor items of every vector in one batch request.
+        responses = self.client.query_batch_points(
             collection_name=f"{self.collection_prefix}_{collection_name}",
-            query=vectors[0],
-            limit=limit,
+            requests=self._get_search_requests(vectors, limit),
         )
-        get_result = self._result_to_get_result(query_response.points)
-        return SearchResult(
-            ids=get_result.ids,
-            documents=get_result.documents,
-            metadatas=get_result.metadatas,
-            # qdrant distance is [-1, 1], normalize to [0, 1]
-            distances=[[(point.score + 1.0) / 2.0 for point in query_response.points]],
+        return self._responses_to_search_result(responses)
+
+    async def asearch(
+        self,
+        collection_name: str,
+        vectors: list[list[float | int]],
+        filter: Optional[dict] = None,
+        limit: int = 10,
+    ) -> Optional[SearchResult]:
+        responses = await self._get_async_client().query_batch_points(
+            collection_name=f"{self.collection_prefix}_{collection_name}",
+            requests=self._get_search_requests(vectors, limit),
         )
+        return self._responses_to_search_result(responses)
 
     def query(self, collection_name: str, filter: dict, limit: Optional[int] = None):
         # Construct the filter string for querying
@@ -181,17 +232,30 @@ class QdrantClient(VectorDBBase):
             if limit is None:
                 limit = NO_LIMIT  # otherwise qdrant would set limit to 10!
 
-            field_conditions = []
-            for key, value in filter.items():
-                field_conditions.append(
-                    models.FieldCondition(
-                        key=f"metadata.{key}", match=models.MatchValue(value=value)
-                    )
-                )
-
             points = self.client.scroll(
                 collection_name=f"{self.collection_prefix}_{collection_name}",
-                scroll_filter=models.Filter(should=field_conditions),
+                scroll_filter=self._get_query_filter(filter),
+                limit=limit,
+            )
+            return self._result_to_get_result(points[0])
+        except Exception as e:
+            log.exception(f"Error querying a collection '{collection_name}': {e}")
+            return None
+
+    async def aquery(
+        self, collection_name: str, filter: dict, limit: Optional[int] = None
+    ):
+        client = self._get_async_client()
+        name = f"{self.collection_prefix}_{collection_name}"
+        if not await client.collection_exists(name):
+            return None
+        try:
+            if limit is None:
+                limit = NO_LIMIT  # otherwise qdrant would set limit to 10!
+
+            points = await client.scroll(
+                collection_name=name,
+                scroll_filter=self._get_query_filter(filter),
                 limit=limit,
             )
             return self._result_to_get_result(points[0])
@@ -207,6 +271,36 @@ class QdrantClient(VectorDBBase):
         )
         return self._result_to_get_result(points[0])
 
+    def query_vectors(
+        self, collection_name: str, filter: dict, limit: Optional[int] = None
+    ) -> Optional[VectorGetResult]:
+        if not self.has_collection(collection_name):
+            return None
+        try:
+            points, _ = self.client.scroll(
+                collection_name=f"{self.collection_prefix}_{collection_name}",
+                scroll_filter=self._get_query_filter(filter),
+                limit=limit if limit is not None else NO_LIMIT,
+                with_vectors=True,
+            )
+            get_result = self._result_to_get_result(points)
+            return VectorGetResult(
+                ids=get_result.ids,
+                documents=get_result.documents,
+                metadatas=get_result.metadatas,
+                vectors=[[point.vector for point in points]],
+            )
+        except Exception as e:
+            log.exception(f"Error querying a collection '{collection_name}': {e}")
+            return None
+
+    async def aget(self, collection_name: str) -> Optional[GetResult]:
+        points = await self._get_async_client().scroll(
+            collection_name=f"{self.collection_prefix}_{collection_name}",
+            limit=NO_LIMIT,  # otherwise qdrant would set limit to 10!
+        )
+        return self._result_to_get_result(points[0])
+
     def insert(self, collection_name: str, items: list[VectorItem]):
         # Insert the items into the collection, if the collection does not exist, it will be created.
         self._create_collection_if_not_exists(collection_name, len(items[0]["vector"]))
@@ -219,6 +313,26 @@ class QdrantClient(VectorDBBase):
         points = self._create_points(items)
         return self.client.upsert(f"{self.collection_prefix}_{collection_name}", points)
 
+    async def aupsert(self, collection_name: str, items: list[VectorItem]):
+        client = self._get_async_client()
+        name = f"{self.collection_prefix}_{collection_name}"
+        if not await client.collection_exists(name):
+            # Collection and payload index setup is rare; reuse the sync path
+            await asyncio.to_thread(
+                self._create_collection_if_not_exists,
+                collection_name,
+                len(items[0]["vector"]),
+            )
+
+        points = self._create_points(items)
+        for i in range(0, len(points), UPLOAD_BATCH_SIZE):
+            await client.upsert(name, points[i : i + UPLOAD_BATCH_SIZE])
+
+    async def ainsert(self, collection_name: str, items: list[VectorItem]):
+        # Point ids are unique, so inserting is the same batched upsert that
+        # upload_points performs for the sync client.
+        await self.aupsert(collection_name, items)
+
     def delete(
         self,
         collection_name: str,
@@ -275,18 +275,30 @@ class QdrantClient(VectorDBBase):
             return None
 
         tenant_filter = _tenant_filter(tenant_id)
-        query_response = self.client.query_points(
+        # Search the nearest neighbors of every vector in one batch request
+        responses = self.client.query_batch_points(
             collection_name=mt_collection,
-            query=vectors[0],
-            limit=limit,
-            query_filter=models.Filter(must=[tenant_filter]),
+            requests=[
+                models.QueryRequest(
+                    query=vector,
+                    limit=limit,
+                    filter=models.Filter(must=[tenant_filter]),
+                    with_payload=True,
+                )
+                for vector in vectors
+            ],
         )
-        get_result = self._result_to_get_result(query_response.points)
+
+        ids, documents, metadatas, distances = [], [], [], []
+        for response in responses:
+            get_result = self._result_to_get_result(response.points)
+            ids.extend(get_result.ids)
+            documents.extend(get_result.documents)
+            metadatas.extend(get_result.metadatas)
+            distances.append([(point.score + 1.0) / 2.0 for point in response.points])
+
         return SearchResult(
-            ids=get_result.ids,
-            documents=get_result.documents,
-            metadatas=get_result.metadatas,
-            distances=[[(point.score + 1.0) / 2.0 for point in query_response.points]],
+            ids=ids, documents=documents, metadatas=metadatas, distances=distances
         )
 
     def query(
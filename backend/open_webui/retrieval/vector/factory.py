@@ -1,9 +1,12 @@
 from open_webui.retrieval.vector.main import VectorDBBase
 from open_webui.retrieval.vector.type import VectorType
+from open_webui.retrieval.bm25 import BM25Index, BM25IndexedVectorDB
 from open_webui.config import (
     VECTOR_DB,
     ENABLE_QDRANT_MULTITENANCY_MODE,
     ENABLE_MILVUS_MULTITENANCY_MODE,
+    ENABLE_RAG_BM25_INDEX,
+    RAG_BM25_INDEX_DIR,
 )
 
 
@@ -86,3 +89,7 @@ class Vector:
 
 
 VECTOR_DB_CLIENT = Vector.get_vector(VECTOR_DB)
+
+BM25_INDEX = BM25Index(RAG_BM25_INDEX_DIR) if ENABLE_RAG_BM25_INDEX else None
+if BM25_INDEX is not None:
+    VECTOR_DB_CLIENT = BM25IndexedVectorDB(VECTOR_DB_CLIENT, BM25_INDEX)
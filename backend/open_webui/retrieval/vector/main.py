@@ -1,3 +1,4 @@
+import asyncio
 from pydantic import BaseModel
 from abc import ABC, abstractmethod
 from typing import Any, Dict, List, Optional, Union
@@ -20,6 +21,10 @@ class SearchResult(GetResult):
     distances: Optional[List[List[float | int]]]
 
 
+class VectorGetResult(GetResult):
+    vectors: Optional[List[List[List[float | int]]]]
+
+
 class VectorDBBase(ABC):
     """
     Abstract base class for all vector database backends.
@@ -29,6 +34,11 @@ class VectorDBBase(ABC):
 
     Any custom vector database integration must inherit from this class and
     implement all abstract methods.
+
+    `search` takes a batch of query vectors and returns one result row per
+    vector. The async variants (`asearch`, `aquery`, `aget`, `ainsert`,
+    `aupsert`, `adelete`) default to running the sync method in a worker
+    thread; backends with an async client should override them.
     """
 
     @abstractmethod
@@ -74,6 +84,17 @@ class VectorDBBase(ABC):
         """Retrieve all vectors from a collection."""
         pass
 
+    def query_vectors(
+        self, collection_name: str, filter: Dict, limit: Optional[int] = None
+    ) -> Optional[VectorGetResult]:
+        """
+        Query items using metadata filter, including their stored vectors.
+
+        Used to copy items between collections without re-embedding them.
+        Backends that can't return stored vectors return None.
+        """
+        return None
+
     @abstractmethod
     def delete(
         self,
@@ -88,3 +109,50 @@ class VectorDBBase(ABC):
     def reset(self) -> None:
         """Reset the vector database by removing all collections or those matching a condition."""
         pass
+
+    async def asearch(
+        self,
+        collection_name: str,
+        vectors: List[List[Union[float, int]]],
+        filter: Optional[Dict] = None,
+        limit: int = 10,
+    ) -> Optional[SearchResult]:
+        """Async variant of `search`."""
+        return await asyncio.to_thread(
+            self.search,
+            collection_name=collection_name,
+            vectors=vectors,
+            filter=filter,
+            limit=limit,
+        )
+
+    async def aquery(
+        self, collection_name: str, filter: Dict, limit: Optional[int] = None
+    ) -> Optional[GetResult]:
+        """Async variant of `query`."""
+        return await asyncio.to_thread(
+            self.query, collection_name=collection_name, filter=filter, limit=limit
+        )
+
+    async def aget(self, collection_name: str) -> Optional[GetResult]:
+        """Async variant of `get`."""
+        return await asyncio.to_thread(self.get, collection_name=collection_name)
+
+    async def ainsert(self, collection_name: str, items: List[VectorItem]) -> None:
+        """Async variant of `insert`."""
+        return await asyncio.to_thread(self.insert, collection_name, items)
+
+    async def aupsert(self, collection_name: str, items: List[VectorItem]) -> None:
+        """Async variant of `upsert`."""
+        return await asyncio.to_thread(self.upsert, collection_name, items)
+
+    async def adelete(
+        self,
+        collection_name: str,
+        ids: Optional[List[str]] = None,
+        filter: Optional[Dict] = None,
+    ) -> None:
+        """Async variant of `delete`."""
+        return await asyncio.to_thread(
+            self.delete, collection_name=collection_name, ids=ids, filter=filter
+        )
@@ -1,3 +1,5 @@
+import asyncio
+import weakref
 from datetime import datetime
 
 KEYS_TO_EXCLUDE = ["content", "pages", "tables", "paragraphs", "sections", "figures"]
@@ -26,3 +28,23 @@ def process_metadata(
         else:
             result[key] = value
     return result
+
+
+def to_float_list(vector) -> list[float]:
+    # Stored vectors come back as lists, numpy arrays or pgvector types
+    if hasattr(vector, "to_list"):
+        return vector.to_list()
+    if hasattr(vector, "tolist"):
+        return vector.tolist()
+    return list(vector)
+
+
+def get_loop_client(clients: weakref.WeakKeyDictionary, factory):
+    # Async clients hold connections bound to the event loop they were first
+    # used on, so keep one per running loop.
+    loop = asyncio.get_running_loop()
+    client = clients.get(loop)
+    if client is None:
+        client = factory()
+        clients[loop] = client
+    return client
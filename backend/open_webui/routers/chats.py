@@ -34,6 +34,7 @@ from pydantic import BaseModel
 
 
 from open_webui.utils.auth import get_admin_user, get_verified_user
+from open_webui.utils.chat_save import CHAT_SAVE_BUFFER
 from open_webui.utils.access_control import has_permission
 
 log = logging.getLogger(__name__)
@@ -1018,7 +1019,9 @@ async def update_chat_message_by_id(
             detail=ERROR_MESSAGES.ACCESS_PROHIBITED,
         )
 
-    chat = Chats.upsert_message_to_chat_by_id_and_message_id(
+    chat = await CHAT_SAVE_BUFFER.write_through(
+        id,
+        Chats.upsert_message_to_chat_by_id_and_message_id,
         id,
         message_id,
         {
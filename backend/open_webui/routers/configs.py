@@ -18,6 +18,7 @@ from open_webui.utils.tools import (
     set_terminal_servers,
 )
 from open_webui.utils.mcp.client import MCPClient
+from open_webui.utils.mcp.pool import MCP_SESSION_POOL
 from open_webui.models.oauth_sessions import OAuthSessions
 
 
@@ -188,6 +189,8 @@ async def set_tool_servers_config(
     ]
 
     await set_tool_servers(request)
+    # Pooled MCP sessions may belong to changed or removed connections
+    await MCP_SESSION_POOL.clear()
 
     for connection in request.app.state.config.TOOL_SERVER_CONNECTIONS:
         server_type = connection.get("type", "openapi")
@@ -215,6 +218,11 @@ async def set_tool_servers_config(
     }
 
 
+@router.get("/tool_servers/mcp/pool", response_model=dict)
+async def get_mcp_session_pool_stats(user=Depends(get_admin_user)):
+    return MCP_SESSION_POOL.get_stats()
+
+
 class TerminalServerConnection(BaseModel):
     id: Optional[str] = ""
     name: Optional[str] = ""
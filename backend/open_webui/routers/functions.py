@@ -19,6 +19,7 @@ from open_webui.utils.plugin import (
     load_function_module_by_id,
     replace_imports,
     get_function_module_from_cache,
+    get_plugin_cache_stats,
     resolve_valves_schema_options,
 )
 from open_webui.config import CACHE_DIR
@@ -67,6 +68,16 @@ async def get_functions(
     return Functions.get_functions(include_valves=include_valves, db=db)
 
 
+############################
+# FunctionCacheStats
+############################
+
+
+@router.get("/cache", response_model=dict)
+async def get_functions_cache_stats(user=Depends(get_admin_user)):
+    return get_plugin_cache_stats("functions")
+
+
 ############################
 # LoadFunctionFromLink
 ############################
@@ -26,6 +26,10 @@ from open_webui.routers.retrieval import (
     BatchProcessFilesForm,
 )
 from open_webui.storage.provider import Storage
+from open_webui.utils.knowledge_reindex import (
+    KNOWLEDGE_REINDEX_JOB,
+    get_status as get_reindex_status,
+)
 
 from open_webui.constants import ERROR_MESSAGES
 from open_webui.utils.auth import get_verified_user, get_admin_user
@@ -297,63 +301,26 @@ async def create_new_knowledge(
 async def reindex_knowledge_files(
     request: Request,
     user=Depends(get_verified_user),
-    db: Session = Depends(get_session),
 ):
+    """
+    Start re-indexing every knowledge base as a background job. Admin only.
+
+    Returns once the job is scheduled (or already running); progress is
+    available from /reindex/status and as `knowledge:reindex` socket events.
+    """
     if user.role != "admin":
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail=ERROR_MESSAGES.UNAUTHORIZED,
         )
 
-    knowledge_bases = Knowledges.get_knowledge_bases(db=db)
-
-    log.info(f"Starting reindexing for {len(knowledge_bases)} knowledge bases")
-
-    for knowledge_base in knowledge_bases:
-        try:
-            files = Knowledges.get_files_by_id(knowledge_base.id, db=db)
-            try:
-                if VECTOR_DB_CLIENT.has_collection(collection_name=knowledge_base.id):
-                    VECTOR_DB_CLIENT.delete_collection(
-                        collection_name=knowledge_base.id
-                    )
-            except Exception as e:
-                log.error(f"Error deleting collection {knowledge_base.id}: {str(e)}")
-                continue  # Skip, don't raise
-
-            failed_files = []
-            for file in files:
-                try:
-                    await run_in_threadpool(
-                        process_file,
-                        request,
-                        ProcessFileForm(
-                            file_id=file.id, collection_name=knowledge_base.id
-                        ),
-                        user=user,
-                        db=db,
-                    )
-                except Exception as e:
-                    log.error(
-                        f"Error processing file {file.filename} (ID: {file.id}): {str(e)}"
-                    )
-                    failed_files.append({"file_id": file.id, "error": str(e)})
-                    continue
-
-        except Exception as e:
-            log.error(f"Error processing knowledge base {knowledge_base.id}: {str(e)}")
-            # Don't raise, just continue
-            continue
+    await KNOWLEDGE_REINDEX_JOB.start(request, user)
+    return True
 
-        if failed_files:
-            log.warning(
-                f"Failed to process {len(failed_files)} files in knowledge base {knowledge_base.id}"
-            )
-            for failed in failed_files:
-                log.warning(f"File ID: {failed['file_id']}, Error: {failed['error']}")
 
-    log.info(f"Reindexing completed.")
-    return True
+@router.get("/reindex/status", response_model=dict)
+async def get_reindex_knowledge_files_status(user=Depends(get_admin_user)):
+    return get_reindex_status(KNOWLEDGE_REINDEX_JOB.load_state())
 
 
 ############################
@@ -1,12 +1,7 @@
-# TODO: Implement a more intelligent load balancing mechanism for distributing requests among multiple backend instances.
-# Current implementation uses a simple round-robin approach (random.choice). Consider incorporating algorithms like weighted round-robin,
-# least connections, or least response time for better resource utilization and performance optimization.
-
 import asyncio
 import json
 import logging
 import os
-import random
 import re
 import time
 from datetime import datetime
@@ -18,6 +13,12 @@ from aiocache import cached
 import requests
 
 from open_webui.utils.headers import include_user_info_headers
+from open_webui.utils.session_pool import LLM_SESSION_POOL
+from open_webui.utils.balancer import (
+    OLLAMA_BALANCER,
+    UpstreamRequest,
+    get_connection_weights,
+)
 from open_webui.models.chats import Chats
 from open_webui.models.users import UserModel
 
@@ -65,7 +66,6 @@ from open_webui.env import (
     ENV,
     MODELS_CACHE_TTL,
     AIOHTTP_CLIENT_SESSION_SSL,
-    AIOHTTP_CLIENT_TIMEOUT,
     AIOHTTP_CLIENT_TIMEOUT_MODEL_LIST,
     BYPASS_MODEL_ACCESS_CONTROL,
 )
@@ -113,15 +113,12 @@ async def send_post_request(
     content_type: Optional[str] = None,
     user: UserModel = None,
     metadata: Optional[dict] = None,
+    upstream: Optional[UpstreamRequest] = None,
 ):
 
     r = None
     streaming = False
     try:
-        session = aiohttp.ClientSession(
-            trust_env=True, timeout=aiohttp.ClientTimeout(total=AIOHTTP_CLIENT_TIMEOUT)
-        )
-
         headers = {
             "Content-Type": "application/json",
             **({"Authorization": f"Bearer {key}"} if key else {}),
@@ -132,17 +129,19 @@ async def send_post_request(
             if metadata and metadata.get("chat_id"):
                 headers[FORWARD_SESSION_INFO_HEADER_CHAT_ID] = metadata.get("chat_id")
 
-        r = await session.post(
+        r = await LLM_SESSION_POOL.get_session(url).post(
             url,
             data=payload,
             headers=headers,
             ssl=AIOHTTP_CLIENT_SESSION_SSL,
         )
+        if upstream:
+            upstream.responded(r.status)
 
         if r.ok is False:
             try:
                 res = await r.json()
-                await cleanup_response(r, session)
+                await cleanup_response(r)
                 if "error" in res:
                     raise HTTPException(status_code=r.status, detail=res["error"])
             except HTTPException as e:
@@ -163,7 +162,7 @@ async def send_post_request(
 
             streaming = True
             return StreamingResponse(
-                stream_wrapper(r, session),
+                stream_wrapper(r, upstream=upstream),
                 status_code=r.status,
                 headers=response_headers,
             )
@@ -182,7 +181,9 @@ async def send_post_request(
         )
     finally:
         if not streaming:
-            await cleanup_response(r, session)
+            if upstream:
+                upstream.finish(error=r is None)
+            await cleanup_response(r)
 
 
 def get_api_key(idx, url, configs):
@@ -193,6 +194,17 @@ def get_api_key(idx, url, configs):
     )  # Legacy support
 
 
+def select_url_idx(request: Request, url_idxs: list[int]) -> int:
+    base_urls = request.app.state.config.OLLAMA_BASE_URLS
+    return OLLAMA_BALANCER.select(
+        url_idxs,
+        base_urls,
+        get_connection_weights(
+            url_idxs, base_urls, request.app.state.config.OLLAMA_API_CONFIGS
+        ),
+    )
+
+
 ##########################################
 #
 # API routes
@@ -267,6 +279,11 @@ async def get_config(request: Request, user=Depends(get_admin_user)):
     }
 
 
+@router.get("/balancer")
+async def get_balancer_stats(user=Depends(get_admin_user)):
+    return OLLAMA_BALANCER.get_stats()
+
+
 class OllamaConfigForm(BaseModel):
     ENABLE_OLLAMA_API: Optional[bool] = None
     OLLAMA_BASE_URLS: list[str]
@@ -961,7 +978,7 @@ async def show_model_info(
             detail=ERROR_MESSAGES.MODEL_NOT_FOUND(model),
         )
 
-    url_idx = random.choice(models[model]["urls"])
+    url_idx = select_url_idx(request, models[model]["urls"])
 
     url = request.app.state.config.OLLAMA_BASE_URLS[url_idx]
     key = get_api_key(url_idx, url, request.app.state.config.OLLAMA_API_CONFIGS)
@@ -1034,7 +1051,7 @@ async def embed(
             models = request.app.state.OLLAMA_MODELS
 
         if model in models:
-            url_idx = random.choice(models[model]["urls"])
+            url_idx = select_url_idx(request, models[model]["urls"])
         else:
             raise HTTPException(
                 status_code=400,
@@ -1119,7 +1136,7 @@ async def embeddings(
             models = request.app.state.OLLAMA_MODELS
 
         if model in models:
-            url_idx = random.choice(models[model]["urls"])
+            url_idx = select_url_idx(request, models[model]["urls"])
         else:
             raise HTTPException(
                 status_code=400,
@@ -1206,7 +1223,7 @@ async def generate_completion(
 
         model = form_data.model
         if model in models:
-            url_idx = random.choice(models[model]["urls"])
+            url_idx = select_url_idx(request, models[model]["urls"])
         else:
             raise HTTPException(
                 status_code=400,
@@ -1228,6 +1245,7 @@ async def generate_completion(
         payload=form_data.model_dump_json(exclude_none=True).encode(),
         key=get_api_key(url_idx, url, request.app.state.config.OLLAMA_API_CONFIGS),
         user=user,
+        upstream=OLLAMA_BALANCER.track(url),
     )
 
 
@@ -1273,7 +1291,7 @@ async def get_ollama_url(request: Request, model: str, url_idx: Optional[int] =
                 status_code=400,
                 detail=ERROR_MESSAGES.MODEL_NOT_FOUND(model),
             )
-        url_idx = random.choice(models[model].get("urls", []))
+        url_idx = select_url_idx(request, models[model].get("urls", []))
     url = request.app.state.config.OLLAMA_BASE_URLS[url_idx]
     return url, url_idx
 
@@ -1379,6 +1397,7 @@ async def generate_chat_completion(
         content_type="application/x-ndjson",
         user=user,
         metadata=metadata,
+        upstream=OLLAMA_BALANCER.track(url),
     )
 
 
@@ -1490,6 +1509,7 @@ async def generate_openai_completion(
         key=get_api_key(url_idx, url, request.app.state.config.OLLAMA_API_CONFIGS),
         user=user,
         metadata=metadata,
+        upstream=OLLAMA_BALANCER.track(url),
     )
 
 
@@ -1577,6 +1597,7 @@ async def generate_openai_chat_completion(
         key=get_api_key(url_idx, url, request.app.state.config.OLLAMA_API_CONFIGS),
         user=user,
         metadata=metadata,
+        upstream=OLLAMA_BALANCER.track(url),
     )
 
 
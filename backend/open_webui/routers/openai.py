@@ -33,7 +33,6 @@ from open_webui.config import (
 from open_webui.env import (
     MODELS_CACHE_TTL,
     AIOHTTP_CLIENT_SESSION_SSL,
-    AIOHTTP_CLIENT_TIMEOUT,
     AIOHTTP_CLIENT_TIMEOUT_MODEL_LIST,
     ENABLE_FORWARD_USER_INFO_HEADERS,
     FORWARD_SESSION_INFO_HEADER_CHAT_ID,
@@ -57,6 +56,12 @@ from open_webui.utils.misc import (
 
 from open_webui.utils.auth import get_admin_user, get_verified_user
 from open_webui.utils.headers import include_user_info_headers
+from open_webui.utils.balancer import (
+    OPENAI_BALANCER,
+    get_connection_group,
+    get_connection_weights,
+)
+from open_webui.utils.session_pool import LLM_SESSION_POOL
 from open_webui.utils.anthropic import is_anthropic_url, get_anthropic_models
 
 log = logging.getLogger(__name__)
@@ -199,6 +204,18 @@ def get_microsoft_entra_id_access_token():
         return None
 
 
+def select_url_idx(request: Request, model: dict) -> int:
+    url_idxs = model.get("urls") or [model["urlIdx"]]
+    base_urls = request.app.state.config.OPENAI_API_BASE_URLS
+    return OPENAI_BALANCER.select(
+        url_idxs,
+        base_urls,
+        get_connection_weights(
+            url_idxs, base_urls, request.app.state.config.OPENAI_API_CONFIGS
+        ),
+    )
+
+
 ##########################################
 #
 # API routes
@@ -218,6 +235,11 @@ async def get_config(request: Request, user=Depends(get_admin_user)):
     }
 
 
+@router.get("/balancer")
+async def get_balancer_stats(user=Depends(get_admin_user)):
+    return OPENAI_BALANCER.get_stats()
+
+
 class OpenAIConfigForm(BaseModel):
     ENABLE_OPENAI_API: Optional[bool] = None
     OPENAI_API_BASE_URLS: list[str]
@@ -489,9 +511,10 @@ async def get_all_models(request: Request, user: UserModel) -> dict[str, list]:
     if not request.app.state.config.ENABLE_OPENAI_API:
         return {"data": []}
 
-    # Cache config value locally to avoid repeated Redis lookups inside
+    # Cache config values locally to avoid repeated Redis lookups inside
     # the nested loop in get_merged_models (one GET per model otherwise).
     api_base_urls = request.app.state.config.OPENAI_API_BASE_URLS
+    api_configs = request.app.state.config.OPENAI_API_CONFIGS
 
     responses = await get_all_models_responses(request, user=user)
 
@@ -534,6 +557,7 @@ async def get_all_models(request: Request, user: UserModel) -> dict[str, list]:
                         # Skip unwanted OpenAI models
                         continue
 
+                    group = get_connection_group(idx, api_base_urls, api_configs)
                     if model_id and model_id not in models:
                         models[model_id] = {
                             **model,
@@ -542,7 +566,22 @@ async def get_all_models(request: Request, user: UserModel) -> dict[str, list]:
                             "openai": model,
                             "connection_type": model.get("connection_type", "external"),
                             "urlIdx": idx,
+                            "urls": [idx],
                         }
+                    elif (
+                        model_id
+                        and group is not None
+                        and group
+                        == get_connection_group(
+                            models[model_id]["urlIdx"], api_base_urls, api_configs
+                        )
+                        and idx not in models[model_id]["urls"]
+                    ):
+                        # Served by several connections of one balance group
+                        # (replicas or accounts of the same provider); chat
+                        # completions and embeddings are balanced across
+                        # them. Otherwise the first connection serves it.
+                        models[model_id]["urls"].append(idx)
 
         return models
 
@@ -1010,7 +1049,7 @@ async def generate_chat_completion(
     model = models.get(model_id)
 
     if model:
-        idx = model["urlIdx"]
+        idx = select_url_idx(request, model)
     else:
         raise HTTPException(
             status_code=404,
@@ -1092,16 +1131,12 @@ async def generate_chat_completion(
     payload = json.dumps(payload)
 
     r = None
-    session = None
     streaming = False
     response = None
+    upstream = OPENAI_BALANCER.track(url)
 
     try:
-        session = aiohttp.ClientSession(
-            trust_env=True, timeout=aiohttp.ClientTimeout(total=AIOHTTP_CLIENT_TIMEOUT)
-        )
-
-        r = await session.request(
+        r = await LLM_SESSION_POOL.get_session(request_url).request(
             method="POST",
             url=request_url,
             data=payload,
@@ -1109,12 +1144,15 @@ async def generate_chat_completion(
             cookies=cookies,
             ssl=AIOHTTP_CLIENT_SESSION_SSL,
         )
+        upstream.responded(r.status)
 
         # Check if response is SSE
         if "text/event-stream" in r.headers.get("Content-Type", ""):
             streaming = True
             return StreamingResponse(
-                stream_wrapper(r, session, stream_chunks_handler),
+                stream_wrapper(
+                    r, content_handler=stream_chunks_handler, upstream=upstream
+                ),
                 status_code=r.status,
                 headers=dict(r.headers),
             )
@@ -1145,7 +1183,8 @@ async def generate_chat_completion(
         )
     finally:
         if not streaming:
-            await cleanup_response(r, session)
+            upstream.finish(error=r is None)
+            await cleanup_response(r)
 
 
 async def embeddings(request: Request, form_data: dict, user):
@@ -1171,7 +1210,7 @@ async def embeddings(request: Request, form_data: dict, user):
         await get_all_models(request, user=user)
         models = request.app.state.OPENAI_MODELS
     if model_id in models:
-        idx = models[model_id]["urlIdx"]
+        idx = select_url_idx(request, models[model_id])
 
     url = request.app.state.config.OPENAI_API_BASE_URLS[idx]
     key = request.app.state.config.OPENAI_API_KEYS[idx]
@@ -1181,18 +1220,13 @@ async def embeddings(request: Request, form_data: dict, user):
     )
 
     r = None
-    session = None
     streaming = False
 
     headers, cookies = await get_headers_and_cookies(
         request, url, key, api_config, user=user
     )
     try:
-        session = aiohttp.ClientSession(
-            trust_env=True,
-            timeout=aiohttp.ClientTimeout(total=AIOHTTP_CLIENT_TIMEOUT),
-        )
-        r = await session.request(
+        r = await LLM_SESSION_POOL.get_session(url).request(
             method="POST",
             url=f"{url}/embeddings",
             data=body,
@@ -1203,7 +1237,7 @@ async def embeddings(request: Request, form_data: dict, user):
         if "text/event-stream" in r.headers.get("Content-Type", ""):
             streaming = True
             return StreamingResponse(
-                stream_wrapper(r, session),
+                stream_wrapper(r),
                 status_code=r.status,
                 headers=dict(r.headers),
             )
@@ -1230,7 +1264,7 @@ async def embeddings(request: Request, form_data: dict, user):
         )
     finally:
         if not streaming:
-            await cleanup_response(r, session)
+            await cleanup_response(r)
 
 
 class ResponsesForm(BaseModel):
@@ -1284,7 +1318,6 @@ async def responses(
     )
 
     r = None
-    session = None
     streaming = False
 
     try:
@@ -1308,11 +1341,7 @@ async def responses(
         else:
             request_url = f"{url}/responses"
 
-        session = aiohttp.ClientSession(
-            trust_env=True,
-            timeout=aiohttp.ClientTimeout(total=AIOHTTP_CLIENT_TIMEOUT),
-        )
-        r = await session.request(
+        r = await LLM_SESSION_POOL.get_session(request_url).request(
             method="POST",
             url=request_url,
             data=body,
@@ -1325,7 +1354,7 @@ async def responses(
         if "text/event-stream" in r.headers.get("Content-Type", ""):
             streaming = True
             return StreamingResponse(
-                stream_wrapper(r, session),
+                stream_wrapper(r),
                 status_code=r.status,
                 headers=dict(r.headers),
             )
@@ -1353,7 +1382,7 @@ async def responses(
         )
     finally:
         if not streaming:
-            await cleanup_response(r, session)
+            await cleanup_response(r)
 
 
 @router.api_route("/{path:path}", methods=["GET", "POST", "PUT", "DELETE"])
@@ -1392,7 +1421,6 @@ async def proxy(path: str, request: Request, user=Depends(get_verified_user)):
     )
 
     r = None
-    session = None
     streaming = False
 
     try:
@@ -1418,11 +1446,7 @@ async def proxy(path: str, request: Request, user=Depends(get_verified_user)):
         else:
             request_url = f"{url}/{path}"
 
-        session = aiohttp.ClientSession(
-            trust_env=True,
-            timeout=aiohttp.ClientTimeout(total=AIOHTTP_CLIENT_TIMEOUT),
-        )
-        r = await session.request(
+        r = await LLM_SESSION_POOL.get_session(request_url).request(
             method=request.method,
             url=request_url,
             data=body,
@@ -1435,7 +1459,7 @@ async def proxy(path: str, request: Request, user=Depends(get_verified_user)):
         if "text/event-stream" in r.headers.get("Content-Type", ""):
             streaming = True
             return StreamingResponse(
-                stream_wrapper(r, session),
+                stream_wrapper(r),
                 status_code=r.status,
                 headers=dict(r.headers),
             )
@@ -1463,4 +1487,4 @@ async def proxy(path: str, request: Request, user=Depends(get_verified_user)):
         )
     finally:
         if not streaming:
-            await cleanup_response(r, session)
+            await cleanup_response(r)
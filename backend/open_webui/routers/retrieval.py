@@ -1,3 +1,4 @@
+import ast
 import json
 import logging
 import mimetypes
@@ -26,14 +27,8 @@ from fastapi import (
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
-import tiktoken
 
 
-from langchain_text_splitters import (
-    RecursiveCharacterTextSplitter,
-    TokenTextSplitter,
-    MarkdownHeaderTextSplitter,
-)
 from langchain_core.documents import Document
 
 from open_webui.models.files import FileModel, FileUpdateForm, Files
@@ -89,13 +84,20 @@ from open_webui.retrieval.utils import (
     query_collection_with_hybrid_search,
     query_doc,
     query_doc_with_hybrid_search,
+    ensure_bm25_index,
 )
 from open_webui.retrieval.vector.utils import filter_metadata
+from open_webui.retrieval.splitters import (
+    split_docs,
+    split_docs_in_pool,
+)
 from open_webui.utils.misc import (
     calculate_sha256_string,
     sanitize_text_for_db,
 )
 from open_webui.utils.auth import get_admin_user, get_verified_user
+from open_webui.utils.session_pool import EMBEDDING_SESSION_POOL
+from open_webui.retrieval.embedding_cache import EMBEDDING_CACHE
 from open_webui.utils.access_control import has_permission
 
 from open_webui.config import (
@@ -104,6 +106,8 @@ from open_webui.config import (
     RAG_EMBEDDING_MODEL_TRUST_REMOTE_CODE,
     RAG_RERANKING_MODEL_AUTO_UPDATE,
     RAG_RERANKING_MODEL_TRUST_REMOTE_CODE,
+    RAG_SPLIT_PROCESS_POOL_MIN_CHARS,
+    RAG_SPLIT_PROCESS_POOL_SIZE,
     UPLOAD_DIR,
     DEFAULT_LOCALE,
     RAG_EMBEDDING_CONTENT_PREFIX,
@@ -301,6 +305,20 @@ async def get_embedding_config(request: Request, user=Depends(get_admin_user)):
     }
 
 
+@router.get("/embedding/pool")
+async def get_embedding_pool_stats(user=Depends(get_admin_user)):
+    """Connection reuse and retry counters of the embedding HTTP pool, per upstream."""
+    return EMBEDDING_SESSION_POOL.get_stats()
+
+
+@router.get("/embedding/cache")
+async def get_embedding_cache_stats(user=Depends(get_admin_user)):
+    """Hit/miss counters of the embedding cache."""
+    if EMBEDDING_CACHE is None:
+        return {"enabled": False}
+    return {"enabled": True, **EMBEDDING_CACHE.get_stats()}
+
+
 class OpenAIConfigForm(BaseModel):
     url: str
     key: str
@@ -1360,83 +1378,28 @@ async def update_rag_config(
 ####################################
 
 
-def can_merge_chunks(a: Document, b: Document) -> bool:
-    if a.metadata.get("source") != b.metadata.get("source"):
-        return False
-
-    a_file_id = a.metadata.get("file_id")
-    b_file_id = b.metadata.get("file_id")
-
-    if a_file_id is not None and b_file_id is not None:
-        return a_file_id == b_file_id
-
-    return True
-
-
-def merge_docs_to_target_size(
-    request: Request,
-    chunks: list[Document],
-) -> list[Document]:
-    """
-    Best-effort normalization of chunk sizes.
-
-    Attempts to grow small chunks up to a desired minimum size,
-    without exceeding the maximum size or crossing source/file
-    boundaries.
-    """
-    min_chunk_size_target = request.app.state.config.CHUNK_MIN_SIZE_TARGET
-    max_chunk_size = request.app.state.config.CHUNK_SIZE
-
-    if min_chunk_size_target <= 0:
-        return chunks
-
-    measure_chunk_size = len
-    if request.app.state.config.TEXT_SPLITTER == "token":
-        encoding = tiktoken.get_encoding(
-            str(request.app.state.config.TIKTOKEN_ENCODING_NAME)
-        )
-        measure_chunk_size = lambda text: len(encoding.encode(text))
-
-    processed_chunks: list[Document] = []
-
-    current_chunk: Document | None = None
-    current_content: str = ""
-
-    for next_chunk in chunks:
-        if current_chunk is None:
-            current_chunk = next_chunk
-            current_content = next_chunk.page_content
-            continue  # First chunk initialization
-
-        proposed_content = f"{current_content}\n\n{next_chunk.page_content}"
+def split_documents(request: Request, docs: list[Document]) -> list[Document]:
+    split_config = {
+        "text_splitter": request.app.state.config.TEXT_SPLITTER,
+        "chunk_size": request.app.state.config.CHUNK_SIZE,
+        "chunk_overlap": request.app.state.config.CHUNK_OVERLAP,
+        "chunk_min_size_target": request.app.state.config.CHUNK_MIN_SIZE_TARGET,
+        "tiktoken_encoding_name": str(request.app.state.config.TIKTOKEN_ENCODING_NAME),
+        "enable_markdown_header_text_splitter": request.app.state.config.ENABLE_MARKDOWN_HEADER_TEXT_SPLITTER,
+    }
 
-        can_merge = (
-            can_merge_chunks(current_chunk, next_chunk)
-            and measure_chunk_size(current_content) < min_chunk_size_target
-            and measure_chunk_size(proposed_content) <= max_chunk_size
-        )
+    if split_config["text_splitter"] not in ["", "character", "token"]:
+        raise ValueError(ERROR_MESSAGES.DEFAULT("Invalid text splitter"))
 
-        if can_merge:
-            current_content = proposed_content
-        else:
-            processed_chunks.append(
-                Document(
-                    page_content=current_content,
-                    metadata={**current_chunk.metadata},
-                )
+    if RAG_SPLIT_PROCESS_POOL_SIZE > 0:
+        size = sum(len(doc.page_content) for doc in docs)
+        if size >= RAG_SPLIT_PROCESS_POOL_MIN_CHARS:
+            log.info(f"Splitting {size} characters in a worker process")
+            return split_docs_in_pool(
+                docs, max_workers=RAG_SPLIT_PROCESS_POOL_SIZE, **split_config
             )
-            current_chunk = next_chunk
-            current_content = next_chunk.page_content
-
-    if current_chunk is not None:
-        processed_chunks.append(
-            Document(
-                page_content=current_content,
-                metadata={**current_chunk.metadata},
-            )
-        )
 
-    return processed_chunks
+    return split_docs(docs, **split_config)
 
 
 def save_docs_to_vector_db(
@@ -1448,7 +1411,10 @@ def save_docs_to_vector_db(
     split: bool = True,
     add: bool = False,
     user=None,
+    embeddings: Optional[list] = None,
 ) -> bool:
+    # `embeddings` are stored vectors of `docs` (e.g. copied from the file's own
+    # collection); when given, the docs are neither split nor embedded again.
     def _get_docs_info(docs: list[Document]) -> str:
         docs_info = set()
 
@@ -1490,62 +1456,12 @@ def save_docs_to_vector_db(
                     log.info(f"Document with hash {metadata['hash']} already exists")
                     raise ValueError(ERROR_MESSAGES.DUPLICATE_CONTENT)
 
-    if split:
-        if request.app.state.config.ENABLE_MARKDOWN_HEADER_TEXT_SPLITTER:
-            log.info("Using markdown header text splitter")
-            # Define headers to split on - covering most common markdown header levels
-            markdown_splitter = MarkdownHeaderTextSplitter(
-                headers_to_split_on=[
-                    ("#", "Header 1"),
-                    ("##", "Header 2"),
-                    ("###", "Header 3"),
-                    ("####", "Header 4"),
-                    ("#####", "Header 5"),
-                    ("######", "Header 6"),
-                ],
-                strip_headers=False,  # Keep headers in content for context
-            )
+    if embeddings is not None and len(embeddings) != len(docs):
+        log.warning("Stored embeddings don't match the documents, re-embedding")
+        embeddings = None
 
-            split_docs = []
-            for doc in docs:
-                split_docs.extend(
-                    [
-                        Document(
-                            page_content=split_chunk.page_content,
-                            metadata={**doc.metadata},
-                        )
-                        for split_chunk in markdown_splitter.split_text(
-                            doc.page_content
-                        )
-                    ]
-                )
-
-            docs = split_docs
-            if request.app.state.config.CHUNK_MIN_SIZE_TARGET > 0:
-                docs = merge_docs_to_target_size(request, docs)
-
-        if request.app.state.config.TEXT_SPLITTER in ["", "character"]:
-            text_splitter = RecursiveCharacterTextSplitter(
-                chunk_size=request.app.state.config.CHUNK_SIZE,
-                chunk_overlap=request.app.state.config.CHUNK_OVERLAP,
-                add_start_index=True,
-            )
-            docs = text_splitter.split_documents(docs)
-        elif request.app.state.config.TEXT_SPLITTER == "token":
-            log.info(
-                f"Using token text splitter: {request.app.state.config.TIKTOKEN_ENCODING_NAME}"
-            )
-
-            tiktoken.get_encoding(str(request.app.state.config.TIKTOKEN_ENCODING_NAME))
-            text_splitter = TokenTextSplitter(
-                encoding_name=str(request.app.state.config.TIKTOKEN_ENCODING_NAME),
-                chunk_size=request.app.state.config.CHUNK_SIZE,
-                chunk_overlap=request.app.state.config.CHUNK_OVERLAP,
-                add_start_index=True,
-            )
-            docs = text_splitter.split_documents(docs)
-        else:
-            raise ValueError(ERROR_MESSAGES.DEFAULT("Invalid text splitter"))
+    if split and embeddings is None:
+        docs = split_documents(request, docs)
 
     if len(docs) == 0:
         raise ValueError(ERROR_MESSAGES.EMPTY_CONTENT)
@@ -1576,53 +1492,12 @@ def save_docs_to_vector_db(
                 )
                 return True
 
-        log.info(f"generating embeddings for {collection_name}")
-        embedding_function = get_embedding_function(
-            request.app.state.config.RAG_EMBEDDING_ENGINE,
-            request.app.state.config.RAG_EMBEDDING_MODEL,
-            request.app.state.ef,
-            (
-                request.app.state.config.RAG_OPENAI_API_BASE_URL
-                if request.app.state.config.RAG_EMBEDDING_ENGINE == "openai"
-                else (
-                    request.app.state.config.RAG_OLLAMA_BASE_URL
-                    if request.app.state.config.RAG_EMBEDDING_ENGINE == "ollama"
-                    else request.app.state.config.RAG_AZURE_OPENAI_BASE_URL
-                )
-            ),
-            (
-                request.app.state.config.RAG_OPENAI_API_KEY
-                if request.app.state.config.RAG_EMBEDDING_ENGINE == "openai"
-                else (
-                    request.app.state.config.RAG_OLLAMA_API_KEY
-                    if request.app.state.config.RAG_EMBEDDING_ENGINE == "ollama"
-                    else request.app.state.config.RAG_AZURE_OPENAI_API_KEY
-                )
-            ),
-            request.app.state.config.RAG_EMBEDDING_BATCH_SIZE,
-            azure_api_version=(
-                request.app.state.config.RAG_AZURE_OPENAI_API_VERSION
-                if request.app.state.config.RAG_EMBEDDING_ENGINE == "azure_openai"
-                else None
-            ),
-            enable_async=request.app.state.config.ENABLE_ASYNC_EMBEDDING,
-            concurrent_requests=request.app.state.config.RAG_EMBEDDING_CONCURRENT_REQUESTS,
-        )
-
-        # Run async embedding in sync context using the main event loop
-        # This allows the main loop to stay responsive to health checks during long operations
-        embedding_timeout = RAG_EMBEDDING_TIMEOUT
-
-        future = asyncio.run_coroutine_threadsafe(
-            embedding_function(
-                list(map(lambda x: x.replace("\n", " "), texts)),
-                prefix=RAG_EMBEDDING_CONTENT_PREFIX,
-                user=user,
-            ),
-            request.app.state.main_loop,
-        )
-        embeddings = future.result(timeout=embedding_timeout)
-        log.info(f"embeddings generated {len(embeddings)} for {len(texts)} items")
+        if embeddings is not None:
+            log.info(
+                f"copying {len(embeddings)} stored embeddings to {collection_name}"
+            )
+        else:
+            embeddings = generate_docs_embeddings(request, texts, user=user)
 
         items = [
             {
@@ -1647,6 +1522,73 @@ def save_docs_to_vector_db(
         raise e
 
 
+def generate_docs_embeddings(request: Request, texts: list[str], user=None) -> list:
+    log.info(f"generating embeddings for {len(texts)} items")
+    embedding_function = get_embedding_function(
+        request.app.state.config.RAG_EMBEDDING_ENGINE,
+        request.app.state.config.RAG_EMBEDDING_MODEL,
+        request.app.state.ef,
+        (
+            request.app.state.config.RAG_OPENAI_API_BASE_URL
+            if request.app.state.config.RAG_EMBEDDING_ENGINE == "openai"
+            else (
+                request.app.state.config.RAG_OLLAMA_BASE_URL
+                if request.app.state.config.RAG_EMBEDDING_ENGINE == "ollama"
+                else request.app.state.config.RAG_AZURE_OPENAI_BASE_URL
+            )
+        ),
+        (
+            request.app.state.config.RAG_OPENAI_API_KEY
+            if request.app.state.config.RAG_EMBEDDING_ENGINE == "openai"
+            else (
+                request.app.state.config.RAG_OLLAMA_API_KEY
+                if request.app.state.config.RAG_EMBEDDING_ENGINE == "ollama"
+                else request.app.state.config.RAG_AZURE_OPENAI_API_KEY
+            )
+        ),
+        request.app.state.config.RAG_EMBEDDING_BATCH_SIZE,
+        azure_api_version=(
+            request.app.state.config.RAG_AZURE_OPENAI_API_VERSION
+            if request.app.state.config.RAG_EMBEDDING_ENGINE == "azure_openai"
+            else None
+        ),
+        enable_async=request.app.state.config.ENABLE_ASYNC_EMBEDDING,
+        concurrent_requests=request.app.state.config.RAG_EMBEDDING_CONCURRENT_REQUESTS,
+    )
+
+    # Run async embedding in sync context using the main event loop
+    # This allows the main loop to stay responsive to health checks during long operations
+    embedding_timeout = RAG_EMBEDDING_TIMEOUT
+
+    future = asyncio.run_coroutine_threadsafe(
+        embedding_function(
+            list(map(lambda x: x.replace("\n", " "), texts)),
+            prefix=RAG_EMBEDDING_CONTENT_PREFIX,
+            user=user,
+        ),
+        request.app.state.main_loop,
+    )
+    embeddings = future.result(timeout=embedding_timeout)
+    log.info(f"embeddings generated {len(embeddings)} for {len(texts)} items")
+    return embeddings
+
+
+def has_embedding_config(metadata: Optional[dict], engine: str, model: str) -> bool:
+    """Whether a stored chunk was embedded with the given engine and model."""
+    embedding_config = (metadata or {}).get("embedding_config")
+    if isinstance(embedding_config, str):
+        # Some backends flatten nested metadata to its str() form
+        try:
+            embedding_config = ast.literal_eval(embedding_config)
+        except (ValueError, SyntaxError):
+            return False
+
+    return isinstance(embedding_config, dict) and (
+        embedding_config.get("engine") == engine
+        and embedding_config.get("model") == model
+    )
+
+
 class ProcessFileForm(BaseModel):
     file_id: str
     content: Optional[str] = None
@@ -1675,6 +1617,7 @@ def process_file(
         try:
 
             collection_name = form_data.collection_name
+            embeddings = None
 
             if collection_name is None:
                 collection_name = f"file-{file.id}"
@@ -1710,9 +1653,15 @@ def process_file(
                 # Check if the file has already been processed and save the content
                 # Usage: /knowledge/{id}/file/add, /knowledge/{id}/file/update
 
-                result = VECTOR_DB_CLIENT.query(
+                # Fetch the stored vectors too, so chunks embedded with the
+                # current engine and model are copied instead of re-embedded
+                result = VECTOR_DB_CLIENT.query_vectors(
                     collection_name=f"file-{file.id}", filter={"file_id": file.id}
                 )
+                if result is None:
+                    result = VECTOR_DB_CLIENT.query(
+                        collection_name=f"file-{file.id}", filter={"file_id": file.id}
+                    )
 
                 if result is not None and len(result.ids[0]) > 0:
                     docs = [
@@ -1722,6 +1671,17 @@ def process_file(
                         )
                         for idx, id in enumerate(result.ids[0])
                     ]
+
+                    vectors = getattr(result, "vectors", None)
+                    if vectors and all(
+                        has_embedding_config(
+                            metadata,
+                            request.app.state.config.RAG_EMBEDDING_ENGINE,
+                            request.app.state.config.RAG_EMBEDDING_MODEL,
+                        )
+                        for metadata in result.metadatas[0]
+                    ):
+                        embeddings = vectors[0]
                 else:
                     docs = [
                         Document(
@@ -1844,6 +1804,7 @@ def process_file(
                         },
                         add=(True if form_data.collection_name else False),
                         user=user,
+                        embeddings=embeddings,
                     )
                     log.info(f"added {len(docs)} items to collection {collection_name}")
 
@@ -2544,8 +2505,12 @@ async def query_doc_handler(
             form_data.hybrid is None or form_data.hybrid
         ):
             collection_results = {}
-            collection_results[form_data.collection_name] = VECTOR_DB_CLIENT.get(
-                collection_name=form_data.collection_name
+            collection_results[form_data.collection_name] = (
+                None
+                if await asyncio.to_thread(ensure_bm25_index, form_data.collection_name)
+                else await VECTOR_DB_CLIENT.aget(
+                    collection_name=form_data.collection_name
+                )
             )
             return await query_doc_with_hybrid_search(
                 collection_name=form_data.collection_name,
@@ -2582,7 +2547,7 @@ async def query_doc_handler(
             query_embedding = await request.app.state.EMBEDDING_FUNCTION(
                 form_data.query, prefix=RAG_EMBEDDING_QUERY_PREFIX, user=user
             )
-            return query_doc(
+            return await query_doc(
                 collection_name=form_data.collection_name,
                 query_embedding=query_embedding,
                 k=form_data.k if form_data.k else request.app.state.config.TOP_K,
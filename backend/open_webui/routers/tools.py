@@ -26,6 +26,7 @@ from open_webui.utils.plugin import (
     load_tool_module_by_id,
     replace_imports,
     get_tool_module_from_cache,
+    get_plugin_cache_stats,
     resolve_valves_schema_options,
 )
 from open_webui.utils.tools import get_tool_specs
@@ -347,6 +348,16 @@ async def export_tools(
         return Tools.get_tools_by_user_id(user.id, "read", db=db)
 
 
+############################
+# ToolCacheStats
+############################
+
+
+@router.get("/cache", response_model=dict)
+async def get_tools_cache_stats(user=Depends(get_admin_user)):
+    return get_plugin_cache_stats("tools")
+
+
 ############################
 # CreateNewTools
 ############################
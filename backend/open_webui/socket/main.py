@@ -7,7 +7,6 @@ import sys
 import time
 from typing import Dict, Set
 from redis import asyncio as aioredis
-import pycrdt as Y
 
 from open_webui.models.users import Users, UserNameResponse
 from open_webui.models.channels import Channels
@@ -40,7 +39,16 @@ from open_webui.env import (
     WEBSOCKET_EVENT_CALLER_TIMEOUT,
 )
 from open_webui.utils.auth import decode_token
-from open_webui.socket.utils import RedisDict, RedisLock, YdocManager
+from open_webui.utils.chat_save import CHAT_SAVE_BUFFER
+from open_webui.socket.utils import (
+    AsyncLocalDict,
+    AsyncRedisDict,
+    LocalUsagePool,
+    RedisLock,
+    RedisReplicaDict,
+    RedisUsagePool,
+    YdocManager,
+)
 from open_webui.tasks import create_task, stop_item_tasks
 from open_webui.utils.redis import get_redis_connection
 from open_webui.utils.access_control import has_permission
@@ -56,6 +64,7 @@ log = logging.getLogger(__name__)
 
 
 REDIS = None
+REDIS_BINARY = None
 
 # Configure CORS for Socket.IO
 SOCKETIO_CORS_ORIGINS = "*" if CORS_ALLOW_ORIGIN == ["*"] else CORS_ALLOW_ORIGIN
@@ -114,25 +123,36 @@ if WEBSOCKET_MANAGER == "redis":
         redis_cluster=WEBSOCKET_REDIS_CLUSTER,
         async_mode=True,
     )
+    # For binary values such as Yjs updates
+    REDIS_BINARY = get_redis_connection(
+        redis_url=WEBSOCKET_REDIS_URL,
+        redis_sentinels=get_sentinels_from_env(
+            WEBSOCKET_SENTINEL_HOSTS, WEBSOCKET_SENTINEL_PORT
+        ),
+        redis_cluster=WEBSOCKET_REDIS_CLUSTER,
+        async_mode=True,
+        decode_responses=False,
+    )
 
     redis_sentinels = get_sentinels_from_env(
         WEBSOCKET_SENTINEL_HOSTS, WEBSOCKET_SENTINEL_PORT
     )
 
-    MODELS = RedisDict(
+    # Read on every chat request; served from a node-local replica
+    MODELS = RedisReplicaDict(
         f"{REDIS_KEY_PREFIX}:models",
         redis_url=WEBSOCKET_REDIS_URL,
         redis_sentinels=redis_sentinels,
         redis_cluster=WEBSOCKET_REDIS_CLUSTER,
     )
 
-    SESSION_POOL = RedisDict(
+    SESSION_POOL = AsyncRedisDict(
         f"{REDIS_KEY_PREFIX}:session_pool",
         redis_url=WEBSOCKET_REDIS_URL,
         redis_sentinels=redis_sentinels,
         redis_cluster=WEBSOCKET_REDIS_CLUSTER,
     )
-    USAGE_POOL = RedisDict(
+    USAGE_POOL = RedisUsagePool(
         f"{REDIS_KEY_PREFIX}:usage_pool",
         redis_url=WEBSOCKET_REDIS_URL,
         redis_sentinels=redis_sentinels,
@@ -163,8 +183,8 @@ if WEBSOCKET_MANAGER == "redis":
 else:
     MODELS = {}
 
-    SESSION_POOL = {}
-    USAGE_POOL = {}
+    SESSION_POOL = AsyncLocalDict()
+    USAGE_POOL = LocalUsagePool()
 
     aquire_func = release_func = renew_func = lambda: True
     session_aquire_func = session_release_func = session_renew_func = lambda: True
@@ -173,6 +193,7 @@ else:
 YDOC_MANAGER = YdocManager(
     redis=REDIS,
     redis_key_prefix=f"{REDIS_KEY_PREFIX}:ydoc:documents",
+    binary_redis=REDIS_BINARY,
 )
 
 
@@ -189,13 +210,17 @@ async def periodic_session_pool_cleanup():
                 return
 
             now = int(time.time())
-            for sid in list(SESSION_POOL.keys()):
-                entry = SESSION_POOL.get(sid)
+            expired_sids = []
+            for sid, entry in await SESSION_POOL.items():
                 if entry and now - entry.get("last_seen_at", 0) > SESSION_POOL_TIMEOUT:
                     log.warning(
                         f"Reaping orphaned session {sid} (user {entry.get('id')})"
                     )
-                    del SESSION_POOL[sid]
+                    expired_sids.append(sid)
+
+            await SESSION_POOL.delete_many(expired_sids)
+            for sid in expired_sids:
+                await USAGE_POOL.remove_session(sid)
             await asyncio.sleep(SESSION_POOL_TIMEOUT)
     finally:
         session_release_func()
@@ -228,26 +253,8 @@ async def periodic_usage_pool_cleanup():
                 log.error(f"Unable to renew cleanup lock. Exiting usage pool cleanup.")
                 raise Exception("Unable to renew usage pool cleanup lock.")
 
-            now = int(time.time())
-            send_usage = False
-            for model_id, connections in list(USAGE_POOL.items()):
-                # Creating a list of sids to remove if they have timed out
-                expired_sids = [
-                    sid
-                    for sid, details in connections.items()
-                    if now - details["updated_at"] > TIMEOUT_DURATION
-                ]
-
-                for sid in expired_sids:
-                    del connections[sid]
-
-                if not connections:
-                    log.debug(f"Cleaning up model {model_id} from usage pool")
-                    del USAGE_POOL[model_id]
-                else:
-                    USAGE_POOL[model_id] = connections
-
-                send_usage = True
+            # Drop sids whose usage reports have timed out
+            await USAGE_POOL.remove_expired(TIMEOUT_DURATION, int(time.time()))
             await asyncio.sleep(TIMEOUT_DURATION)
     finally:
         release_func()
@@ -259,14 +266,14 @@ app = socketio.ASGIApp(
 )
 
 
-def get_models_in_use():
+async def get_models_in_use():
     # List models that are currently in use
-    models_in_use = list(USAGE_POOL.keys())
+    models_in_use = await USAGE_POOL.get_models()
     return models_in_use
 
 
-def get_user_id_from_session_pool(sid):
-    user = SESSION_POOL.get(sid)
+async def get_user_id_from_session_pool(sid):
+    user = await SESSION_POOL.get(sid)
     if user:
         return user["id"]
     return None
@@ -281,18 +288,11 @@ def get_session_ids_from_room(room):
     return [session_id[0] for session_id in active_session_ids]
 
 
-def get_user_ids_from_room(room):
+async def get_user_ids_from_room(room):
     active_session_ids = get_session_ids_from_room(room)
 
-    active_user_ids = list(
-        set(
-            [
-                SESSION_POOL.get(session_id)["id"]
-                for session_id in active_session_ids
-                if SESSION_POOL.get(session_id) is not None
-            ]
-        )
-    )
+    sessions = await SESSION_POOL.get_many(active_session_ids)
+    active_user_ids = list(set([session["id"] for session in sessions.values()]))
     return active_user_ids
 
 
@@ -330,16 +330,13 @@ async def enter_room_for_users(room: str, user_ids: list[str]):
 
 @sio.on("usage")
 async def usage(sid, data):
-    if sid in SESSION_POOL:
+    if await SESSION_POOL.contains(sid):
         model_id = data["model"]
         # Record the timestamp for the last update
         current_time = int(time.time())
 
         # Store the new usage data and task
-        USAGE_POOL[model_id] = {
-            **(USAGE_POOL[model_id] if model_id in USAGE_POOL else {}),
-            sid: {"updated_at": current_time},
-        }
+        await USAGE_POOL.touch(sid, model_id, current_time)
 
 
 @sio.event
@@ -352,18 +349,21 @@ async def connect(sid, environ, auth):
             user = Users.get_user_by_id(data["id"])
 
         if user:
-            SESSION_POOL[sid] = {
-                **user.model_dump(
-                    exclude=[
-                        "profile_image_url",
-                        "profile_banner_image_url",
-                        "date_of_birth",
-                        "bio",
-                        "gender",
-                    ]
-                ),
-                "last_seen_at": int(time.time()),
-            }
+            await SESSION_POOL.set(
+                sid,
+                {
+                    **user.model_dump(
+                        exclude=[
+                            "profile_image_url",
+                            "profile_banner_image_url",
+                            "date_of_birth",
+                            "bio",
+                            "gender",
+                        ]
+                    ),
+                    "last_seen_at": int(time.time()),
+                },
+            )
             await sio.enter_room(sid, f"user:{user.id}")
 
 
@@ -382,18 +382,21 @@ async def user_join(sid, data):
     if not user:
         return
 
-    SESSION_POOL[sid] = {
-        **user.model_dump(
-            exclude=[
-                "profile_image_url",
-                "profile_banner_image_url",
-                "date_of_birth",
-                "bio",
-                "gender",
-            ]
-        ),
-        "last_seen_at": int(time.time()),
-    }
+    await SESSION_POOL.set(
+        sid,
+        {
+            **user.model_dump(
+                exclude=[
+                    "profile_image_url",
+                    "profile_banner_image_url",
+                    "date_of_birth",
+                    "bio",
+                    "gender",
+                ]
+            ),
+            "last_seen_at": int(time.time()),
+        },
+    )
 
     await sio.enter_room(sid, f"user:{user.id}")
 
@@ -409,9 +412,9 @@ async def user_join(sid, data):
 
 @sio.on("heartbeat")
 async def heartbeat(sid, data):
-    user = SESSION_POOL.get(sid)
+    user = await SESSION_POOL.get(sid)
     if user:
-        SESSION_POOL[sid] = {**user, "last_seen_at": int(time.time())}
+        await SESSION_POOL.set(sid, {**user, "last_seen_at": int(time.time())})
         Users.update_last_active_by_id(user["id"])
 
 
@@ -488,7 +491,7 @@ async def channel_events(sid, data):
     event_data = data["data"]
     event_type = event_data["type"]
 
-    user = SESSION_POOL.get(sid)
+    user = await SESSION_POOL.get(sid)
 
     if not user:
         return
@@ -511,7 +514,7 @@ async def channel_events(sid, data):
 @sio.on("ydoc:document:join")
 async def ydoc_document_join(sid, data):
     """Handle user joining a document"""
-    user = SESSION_POOL.get(sid)
+    user = await SESSION_POOL.get(sid)
     if not user:
         return
 
@@ -552,19 +555,13 @@ async def ydoc_document_join(sid, data):
 
         active_session_ids = get_session_ids_from_room(f"doc_{document_id}")
 
-        # Get the Yjs document state
-        ydoc = Y.Doc()
-        updates = await YDOC_MANAGER.get_updates(document_id)
-        for update in updates:
-            ydoc.apply_update(bytes(update))
-
-        # Encode the entire document state as an update
-        state_update = ydoc.get_update()
+        # The entire document state, encoded as an update
+        state_update = await YDOC_MANAGER.get_state(document_id)
         await sio.emit(
             "ydoc:document:state",
             {
                 "document_id": document_id,
-                "state": list(state_update),  # Convert bytes to list for JSON
+                "state": state_update,  # Sent as a binary attachment
                 "sessions": active_session_ids,
             },
             room=sid,
@@ -631,20 +628,14 @@ async def yjs_document_state(sid, data):
             log.warning(f"Document {document_id} not found")
             return
 
-        # Get the Yjs document state
-        ydoc = Y.Doc()
-        updates = await YDOC_MANAGER.get_updates(document_id)
-        for update in updates:
-            ydoc.apply_update(bytes(update))
-
-        # Encode the entire document state as an update
-        state_update = ydoc.get_update()
+        # The entire document state, encoded as an update
+        state_update = await YDOC_MANAGER.get_state(document_id)
 
         await sio.emit(
             "ydoc:document:state",
             {
                 "document_id": document_id,
-                "state": list(state_update),  # Convert bytes to list for JSON
+                "state": state_update,  # Sent as a binary attachment
                 "sessions": active_session_ids,
             },
             room=sid,
@@ -666,11 +657,12 @@ async def yjs_document_update(sid, data):
 
         user_id = data.get("user_id", sid)
 
-        update = data["update"]  # List of bytes from frontend
+        # Binary from current clients, a list of ints from older ones
+        update = bytes(data["update"])
 
         await YDOC_MANAGER.append_to_updates(
             document_id=document_id,
-            update=update,  # Convert list of bytes to bytes
+            update=update,
         )
 
         # Broadcast update to all other users in the document
@@ -686,7 +678,7 @@ async def yjs_document_update(sid, data):
             skip_sid=sid,
         )
 
-        user = SESSION_POOL.get(sid)
+        user = await SESSION_POOL.get(sid)
         if not user:
             return
 
@@ -756,19 +748,9 @@ async def yjs_awareness_update(sid, data):
 
 @sio.event
 async def disconnect(sid):
-    if sid in SESSION_POOL:
-        user = SESSION_POOL[sid]
-        del SESSION_POOL[sid]
-
+    if await SESSION_POOL.delete(sid):
         # Clean up USAGE_POOL entries for this session
-        for model_id in list(USAGE_POOL.keys()):
-            connections = USAGE_POOL.get(model_id)
-            if connections and sid in connections:
-                del connections[sid]
-                if not connections:
-                    del USAGE_POOL[model_id]
-                else:
-                    USAGE_POOL[model_id] = connections
+        await USAGE_POOL.remove_session(sid)
 
         await YDOC_MANAGER.remove_user_from_all_documents(sid)
     else:
@@ -799,105 +781,61 @@ def get_event_emitter(request_info, update_db=True):
         ):
 
             event_type = event_data.get("type")
+            data = event_data.get("data", {})
+
+            # Applied to the buffered message and written in batches, so a
+            # burst of events doesn't reload and rewrite the chat each time
+            updater = None
 
             if event_type == "status":
-                await asyncio.to_thread(
-                    Chats.add_message_status_to_chat_by_id_and_message_id,
-                    request_info["chat_id"],
-                    request_info["message_id"],
-                    event_data.get("data", {}),
-                )
+
+                def updater(message):
+                    if message is None:
+                        return None
+                    return {"statusHistory": [*message.get("statusHistory", []), data]}
 
             elif event_type == "message":
-                message = await asyncio.to_thread(
-                    Chats.get_message_by_id_and_message_id,
-                    request_info["chat_id"],
-                    request_info["message_id"],
-                )
 
-                if message:
-                    content = message.get("content", "")
-                    content += event_data.get("data", {}).get("content", "")
-
-                    await asyncio.to_thread(
-                        Chats.upsert_message_to_chat_by_id_and_message_id,
-                        request_info["chat_id"],
-                        request_info["message_id"],
-                        {
-                            "content": content,
-                        },
-                    )
+                def updater(message):
+                    if message is None:
+                        return None
+                    return {
+                        "content": message.get("content", "") + data.get("content", "")
+                    }
 
             elif event_type == "replace":
-                content = event_data.get("data", {}).get("content", "")
-
-                await asyncio.to_thread(
-                    Chats.upsert_message_to_chat_by_id_and_message_id,
-                    request_info["chat_id"],
-                    request_info["message_id"],
-                    {
-                        "content": content,
-                    },
-                )
+
+                def updater(message):
+                    return {"content": data.get("content", "")}
 
             elif event_type == "embeds":
-                message = await asyncio.to_thread(
-                    Chats.get_message_by_id_and_message_id,
-                    request_info["chat_id"],
-                    request_info["message_id"],
-                )
 
-                embeds = event_data.get("data", {}).get("embeds", [])
-                embeds.extend(message.get("embeds", []))
-
-                await asyncio.to_thread(
-                    Chats.upsert_message_to_chat_by_id_and_message_id,
-                    request_info["chat_id"],
-                    request_info["message_id"],
-                    {
-                        "embeds": embeds,
-                    },
-                )
+                def updater(message):
+                    return {
+                        "embeds": [
+                            *data.get("embeds", []),
+                            *(message or {}).get("embeds", []),
+                        ]
+                    }
 
             elif event_type == "files":
-                message = await asyncio.to_thread(
-                    Chats.get_message_by_id_and_message_id,
-                    request_info["chat_id"],
-                    request_info["message_id"],
-                )
 
-                files = event_data.get("data", {}).get("files", [])
-                files.extend(message.get("files", []))
-
-                await asyncio.to_thread(
-                    Chats.upsert_message_to_chat_by_id_and_message_id,
-                    request_info["chat_id"],
-                    request_info["message_id"],
-                    {
-                        "files": files,
-                    },
-                )
+                def updater(message):
+                    return {
+                        "files": [
+                            *data.get("files", []),
+                            *(message or {}).get("files", []),
+                        ]
+                    }
 
             elif event_type in ("source", "citation"):
-                data = event_data.get("data", {})
                 if data.get("type") is None:
-                    message = await asyncio.to_thread(
-                        Chats.get_message_by_id_and_message_id,
-                        request_info["chat_id"],
-                        request_info["message_id"],
-                    )
 
-                    sources = message.get("sources", [])
-                    sources.append(data)
+                    def updater(message):
+                        return {"sources": [*(message or {}).get("sources", []), data]}
 
-                    await asyncio.to_thread(
-                        Chats.upsert_message_to_chat_by_id_and_message_id,
-                        request_info["chat_id"],
-                        request_info["message_id"],
-                        {
-                            "sources": sources,
-                        },
-                    )
+            if updater is not None:
+                await CHAT_SAVE_BUFFER.update(chat_id, message_id, updater)
 
     if (
         "user_id" in request_info
@@ -1,4 +1,6 @@
+import asyncio
 import json
+import time
 import uuid
 from open_webui.utils.redis import get_redis_connection
 from open_webui.env import REDIS_KEY_PREFIX
@@ -117,86 +119,547 @@ class RedisDict:
         return self[key]
 
 
+class RedisReplicaDict(RedisDict):
+    """
+    RedisDict with a node-local replica for read-heavy data such as models.
+
+    Reads are plain dict lookups on the replica. Every write bumps a version
+    counter and publishes it on `{name}:updates`; `listen` marks the replica
+    stale when another node published a newer version, and the next read
+    reloads the hash in one round trip. As a fallback for missed messages
+    the version is also checked at most every `check_interval` seconds.
+    """
+
+    def __init__(
+        self,
+        name,
+        redis_url,
+        redis_sentinels=[],
+        redis_cluster=False,
+        check_interval: float = 5.0,
+    ):
+        super().__init__(name, redis_url, redis_sentinels, redis_cluster)
+        self.redis_url = redis_url
+        self.redis_sentinels = redis_sentinels
+        self.redis_cluster = redis_cluster
+        self.check_interval = check_interval
+
+        self.version_key = f"{name}:version"
+        self.channel = f"{name}:updates"
+
+        self._data: dict = {}
+        self._version = -1
+        self._stale = True
+        self._checked_at = 0.0
+
+    def _get_version(self, value) -> int:
+        try:
+            return int(value or 0)
+        except (TypeError, ValueError):
+            return 0
+
+    def _reload(self):
+        # The version is read before the data, so a concurrent write can only
+        # leave the replica newer than its version, never older
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.get(self.version_key)
+        pipe.hgetall(self.name)
+        version, data = pipe.execute()
+
+        self._data = {k: json.loads(v) for k, v in data.items()}
+        self._version = self._get_version(version)
+        self._stale = False
+        self._checked_at = time.monotonic()
+
+    def _ensure_fresh(self):
+        now = time.monotonic()
+        if not self._stale and now - self._checked_at >= self.check_interval:
+            self._checked_at = now
+            if self._get_version(self.redis.get(self.version_key)) != self._version:
+                self._stale = True
+
+        if self._stale:
+            self._reload()
+
+    def _commit(self, update):
+        """Bump the version after a write and apply it to the replica."""
+        version = self.redis.incr(self.version_key)
+        if not self._stale and version == self._version + 1:
+            # Swapped rather than mutated, so readers never see a partial update
+            self._data = update(dict(self._data))
+            self._version = version
+        else:
+            # Another node wrote in between; reload on the next read
+            self._stale = True
+        self.redis.publish(self.channel, version)
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self._commit(lambda data: {**data, key: value})
+
+    def __getitem__(self, key):
+        self._ensure_fresh()
+        return self._data[key]
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self._commit(lambda data: {k: v for k, v in data.items() if k != key})
+
+    def __contains__(self, key):
+        self._ensure_fresh()
+        return key in self._data
+
+    def __len__(self):
+        self._ensure_fresh()
+        return len(self._data)
+
+    def keys(self):
+        self._ensure_fresh()
+        return list(self._data.keys())
+
+    def values(self):
+        self._ensure_fresh()
+        return list(self._data.values())
+
+    def items(self):
+        self._ensure_fresh()
+        return list(self._data.items())
+
+    def set(self, mapping: dict):
+        super().set(mapping)
+        self._commit(lambda data: dict(mapping))
+
+    def get(self, key, default=None):
+        self._ensure_fresh()
+        return self._data.get(key, default)
+
+    def clear(self):
+        super().clear()
+        self._commit(lambda data: {})
+
+    async def listen(self):
+        redis = get_redis_connection(
+            self.redis_url,
+            self.redis_sentinels,
+            redis_cluster=self.redis_cluster,
+            async_mode=True,
+            decode_responses=True,
+        )
+        pubsub = redis.pubsub()
+        await pubsub.subscribe(self.channel)
+
+        async for message in pubsub.listen():
+            if message["type"] != "message":
+                continue
+
+            # Our own writes are already applied to the replica
+            if self._get_version(message["data"]) != self._version:
+                self._stale = True
+
+
+class AsyncRedisDict:
+    """
+    Async counterpart of `RedisDict` for state touched from socket handlers.
+
+    Every operation is a single round trip on the async client, and the
+    `*_many` methods read or write several keys in one command, so handlers
+    never block the event loop on Redis.
+    """
+
+    def __init__(self, name, redis_url, redis_sentinels=[], redis_cluster=False):
+        self.name = name
+        self.redis = get_redis_connection(
+            redis_url,
+            redis_sentinels,
+            redis_cluster=redis_cluster,
+            async_mode=True,
+            decode_responses=True,
+        )
+
+    async def get(self, key, default=None):
+        value = await self.redis.hget(self.name, key)
+        return json.loads(value) if value is not None else default
+
+    async def set(self, key, value):
+        await self.redis.hset(self.name, key, json.dumps(value))
+
+    async def delete(self, key) -> bool:
+        return await self.redis.hdel(self.name, key) > 0
+
+    async def contains(self, key) -> bool:
+        return await self.redis.hexists(self.name, key)
+
+    async def length(self) -> int:
+        return await self.redis.hlen(self.name)
+
+    async def keys(self) -> list:
+        return await self.redis.hkeys(self.name)
+
+    async def items(self) -> list:
+        return [
+            (k, json.loads(v)) for k, v in (await self.redis.hgetall(self.name)).items()
+        ]
+
+    async def get_many(self, keys: list) -> dict:
+        if not keys:
+            return {}
+        values = await self.redis.hmget(self.name, keys)
+        return {
+            key: json.loads(value)
+            for key, value in zip(keys, values)
+            if value is not None
+        }
+
+    async def set_many(self, mapping: dict):
+        if mapping:
+            await self.redis.hset(
+                self.name, mapping={k: json.dumps(v) for k, v in mapping.items()}
+            )
+
+    async def delete_many(self, keys: list) -> int:
+        if not keys:
+            return 0
+        return await self.redis.hdel(self.name, *keys)
+
+
+class AsyncLocalDict:
+    """In-process `AsyncRedisDict` for single-node deployments."""
+
+    def __init__(self):
+        self._data = {}
+
+    async def get(self, key, default=None):
+        return self._data.get(key, default)
+
+    async def set(self, key, value):
+        self._data[key] = value
+
+    async def delete(self, key) -> bool:
+        return self._data.pop(key, None) is not None
+
+    async def contains(self, key) -> bool:
+        return key in self._data
+
+    async def length(self) -> int:
+        return len(self._data)
+
+    async def keys(self) -> list:
+        return list(self._data.keys())
+
+    async def items(self) -> list:
+        return list(self._data.items())
+
+    async def get_many(self, keys: list) -> dict:
+        return {key: self._data[key] for key in keys if key in self._data}
+
+    async def set_many(self, mapping: dict):
+        self._data.update(mapping)
+
+    async def delete_many(self, keys: list) -> int:
+        return sum(1 for key in keys if self._data.pop(key, None) is not None)
+
+
+class RedisUsagePool:
+    """
+    Which sessions use which models, indexed both ways.
+
+    `{name}:model:{model_id}` maps sids to their last usage time,
+    `{name}:sid:{sid}` holds the models a sid used and `{name}:models` the
+    models in use, so a disconnect only touches the models of that sid.
+    Each report is one pipelined round trip with no read-modify-write, so
+    concurrent reports from other nodes are never lost.
+    """
+
+    def __init__(
+        self,
+        name,
+        redis_url,
+        redis_sentinels=[],
+        redis_cluster=False,
+        index_ttl: int = 3600,
+    ):
+        self.name = name
+        self.models_key = f"{name}:models"
+        # Sid indexes outlive crashed nodes only this long
+        self.index_ttl = index_ttl
+        self.redis = get_redis_connection(
+            redis_url,
+            redis_sentinels,
+            redis_cluster=redis_cluster,
+            async_mode=True,
+            decode_responses=True,
+        )
+
+    def _model_key(self, model_id: str) -> str:
+        return f"{self.name}:model:{model_id}"
+
+    def _sid_key(self, sid: str) -> str:
+        return f"{self.name}:sid:{sid}"
+
+    async def touch(self, sid: str, model_id: str, updated_at: int):
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.sadd(self.models_key, model_id)
+        pipe.hset(self._model_key(model_id), sid, updated_at)
+        pipe.sadd(self._sid_key(sid), model_id)
+        pipe.expire(self._sid_key(sid), self.index_ttl)
+        await pipe.execute()
+
+    async def _drop_empty(self, model_ids: list[str]):
+        pipe = self.redis.pipeline(transaction=False)
+        for model_id in model_ids:
+            pipe.hlen(self._model_key(model_id))
+        lengths = await pipe.execute()
+
+        empty = [model_id for model_id, length in zip(model_ids, lengths) if not length]
+        if empty:
+            await self.redis.srem(self.models_key, *empty)
+
+    async def remove_session(self, sid: str):
+        model_ids = list(await self.redis.smembers(self._sid_key(sid)))
+
+        pipe = self.redis.pipeline(transaction=False)
+        for model_id in model_ids:
+            pipe.hdel(self._model_key(model_id), sid)
+        pipe.delete(self._sid_key(sid))
+        await pipe.execute()
+
+        if model_ids:
+            await self._drop_empty(model_ids)
+
+    async def get_models(self) -> list[str]:
+        return list(await self.redis.smembers(self.models_key))
+
+    async def remove_expired(self, timeout: float, now: int):
+        model_ids = await self.get_models()
+        if not model_ids:
+            return
+
+        pipe = self.redis.pipeline(transaction=False)
+        for model_id in model_ids:
+            pipe.hgetall(self._model_key(model_id))
+        connections = await pipe.execute()
+
+        pipe = self.redis.pipeline(transaction=False)
+        for model_id, sids in zip(model_ids, connections):
+            expired = [
+                sid
+                for sid, updated_at in sids.items()
+                if now - int(updated_at) > timeout
+            ]
+            if expired:
+                pipe.hdel(self._model_key(model_id), *expired)
+                for sid in expired:
+                    pipe.srem(self._sid_key(sid), model_id)
+        await pipe.execute()
+
+        await self._drop_empty(model_ids)
+
+
+class LocalUsagePool:
+    """In-process `RedisUsagePool` for single-node deployments."""
+
+    def __init__(self):
+        self._models: dict[str, dict[str, int]] = {}
+        self._sids: dict[str, set[str]] = {}
+
+    async def touch(self, sid: str, model_id: str, updated_at: int):
+        self._models.setdefault(model_id, {})[sid] = updated_at
+        self._sids.setdefault(sid, set()).add(model_id)
+
+    def _remove(self, sid: str, model_id: str):
+        connections = self._models.get(model_id)
+        if connections is not None:
+            connections.pop(sid, None)
+            if not connections:
+                del self._models[model_id]
+
+    async def remove_session(self, sid: str):
+        for model_id in self._sids.pop(sid, set()):
+            self._remove(sid, model_id)
+
+    async def get_models(self) -> list[str]:
+        return list(self._models.keys())
+
+    async def remove_expired(self, timeout: float, now: int):
+        for model_id, connections in list(self._models.items()):
+            for sid, updated_at in list(connections.items()):
+                if now - updated_at > timeout:
+                    self._remove(sid, model_id)
+                    models = self._sids.get(sid)
+                    if models is not None:
+                        models.discard(model_id)
+                        if not models:
+                            del self._sids[sid]
+
+
+def merge_ydoc_updates(updates: List[bytes]) -> bytes:
+    """Squash Yjs updates into one update encoding the whole document."""
+    ydoc = Y.Doc()
+    for update in updates:
+        ydoc.apply_update(bytes(update))
+    return ydoc.get_update()
+
+
 class YdocManager:
-    COMPACTION_THRESHOLD = 500
+    """
+    Yjs document state shared by the sessions editing a document.
+
+    Each document is a compacted snapshot plus a log of the raw update bytes
+    received since. Once the log reaches `SNAPSHOT_INTERVAL` updates they are
+    folded into the snapshot, so a join reads one snapshot and at most that
+    many updates instead of replaying the document's whole history.
+    """
+
+    SNAPSHOT_INTERVAL = 100
+    # Seconds a compaction may hold its document's lock
+    COMPACTION_LOCK_TIMEOUT = 30
 
     def __init__(
         self,
         redis=None,
         redis_key_prefix: str = f"{REDIS_KEY_PREFIX}:ydoc:documents",
+        binary_redis=None,
     ):
+        self._snapshots = {}
         self._updates = {}
         self._users = {}
+        self._compacting = set()
         self._redis = redis
+        # Updates are stored as raw bytes, which need a client that doesn't
+        # decode responses
+        self._binary_redis = binary_redis
         self._redis_key_prefix = redis_key_prefix
 
+    def _get_key(self, document_id: str, name: str) -> str:
+        return f"{self._redis_key_prefix}:{document_id}:{name}"
+
     async def append_to_updates(self, document_id: str, update: bytes):
         document_id = document_id.replace(":", "_")
+        update = bytes(update)
+
         if self._redis:
-            redis_key = f"{self._redis_key_prefix}:{document_id}:updates"
-            await self._redis.rpush(redis_key, json.dumps(list(update)))
-            list_len = await self._redis.llen(redis_key)
-            if list_len >= self.COMPACTION_THRESHOLD:
-                await self._compact_updates_redis(document_id)
+            log_len = await self._binary_redis.rpush(
+                self._get_key(document_id, "log"), update
+            )
+            if log_len >= self.SNAPSHOT_INTERVAL or (
+                log_len == 1
+                and await self._redis.exists(self._get_key(document_id, "updates"))
+            ):
+                # Also fold a document stored by earlier versions into a
+                # snapshot on its first new update
+                await self._compact_redis(document_id)
         else:
-            if document_id not in self._updates:
-                self._updates[document_id] = []
-            self._updates[document_id].append(update)
-            if len(self._updates[document_id]) >= self.COMPACTION_THRESHOLD:
-                self._compact_updates_memory(document_id)
-
-    async def _compact_updates_redis(self, document_id: str):
-        """Rolling compaction: squash oldest half into one snapshot."""
-        redis_key = f"{self._redis_key_prefix}:{document_id}:updates"
-        all_updates = await self._redis.lrange(redis_key, 0, -1)
-        if len(all_updates) <= 1:
+            updates = self._updates.setdefault(document_id, [])
+            updates.append(update)
+            if len(updates) >= self.SNAPSHOT_INTERVAL:
+                await self._compact_memory(document_id)
+
+    async def _get_legacy_updates(self, document_id: str) -> List[bytes]:
+        # Documents stored as JSON integer lists by earlier versions
+        legacy = await self._redis.lrange(self._get_key(document_id, "updates"), 0, -1)
+        return [bytes(json.loads(update)) for update in legacy]
+
+    async def _compact_redis(self, document_id: str):
+        """Fold the logged (and any legacy) updates into the snapshot."""
+        lock_key = self._get_key(document_id, "compacting")
+        if not await self._redis.set(
+            lock_key, "1", nx=True, ex=self.COMPACTION_LOCK_TIMEOUT
+        ):
+            # Another node is compacting this document
             return
-        mid = len(all_updates) // 2
-        ydoc = Y.Doc()
-        for raw in all_updates[:mid]:
-            ydoc.apply_update(bytes(json.loads(raw)))
-        snapshot = json.dumps(list(ydoc.get_update()))
-        pipe = self._redis.pipeline()
-        pipe.delete(redis_key)
-        pipe.rpush(redis_key, snapshot, *all_updates[mid:])
-        await pipe.execute()
 
-    def _compact_updates_memory(self, document_id: str):
-        """Rolling compaction: squash oldest half into one snapshot."""
-        updates = self._updates.get(document_id, [])
-        if len(updates) <= 1:
+        try:
+            log_key = self._get_key(document_id, "log")
+            updates = await self._binary_redis.lrange(log_key, 0, -1)
+            if not updates:
+                return
+            snapshot = await self._binary_redis.get(
+                self._get_key(document_id, "snapshot")
+            )
+            base = (
+                [snapshot] if snapshot else await self._get_legacy_updates(document_id)
+            )
+
+            snapshot = await asyncio.to_thread(merge_ydoc_updates, [*base, *updates])
+
+            # The snapshot is written before the log is trimmed and the legacy
+            # list deleted, so readers (log, legacy list, then snapshot) never
+            # miss an update; updates that arrived meanwhile stay in the log
+            await self._binary_redis.set(
+                self._get_key(document_id, "snapshot"), snapshot
+            )
+            await self._redis.delete(self._get_key(document_id, "updates"))
+            await self._binary_redis.ltrim(log_key, len(updates), -1)
+        finally:
+            await self._redis.delete(lock_key)
+
+    async def _compact_memory(self, document_id: str):
+        if document_id in self._compacting:
             return
-        mid = len(updates) // 2
-        ydoc = Y.Doc()
-        for update in updates[:mid]:
-            ydoc.apply_update(bytes(update))
-        self._updates[document_id] = [ydoc.get_update()] + updates[mid:]
+        self._compacting.add(document_id)
+
+        try:
+            updates = list(self._updates.get(document_id, []))
+            snapshot = self._snapshots.get(document_id)
+            merged = await asyncio.to_thread(
+                merge_ydoc_updates, [snapshot, *updates] if snapshot else updates
+            )
+
+            # The document may have been cleared while merging
+            if document_id in self._updates:
+                self._snapshots[document_id] = merged
+                self._updates[document_id] = self._updates[document_id][len(updates) :]
+        finally:
+            self._compacting.discard(document_id)
 
     async def get_updates(self, document_id: str) -> List[bytes]:
+        """The snapshot followed by the updates logged since."""
         document_id = document_id.replace(":", "_")
 
         if self._redis:
-            redis_key = f"{self._redis_key_prefix}:{document_id}:updates"
-            updates = await self._redis.lrange(redis_key, 0, -1)
-            return [bytes(json.loads(update)) for update in updates]
+            updates = await self._binary_redis.lrange(
+                self._get_key(document_id, "log"), 0, -1
+            )
+            legacy = await self._get_legacy_updates(document_id)
+            snapshot = await self._binary_redis.get(
+                self._get_key(document_id, "snapshot")
+            )
+            if snapshot is None:
+                # Not folded into a snapshot yet
+                return [*legacy, *updates]
         else:
-            return self._updates.get(document_id, [])
+            updates = list(self._updates.get(document_id, []))
+            snapshot = self._snapshots.get(document_id)
+
+        return [snapshot, *updates] if snapshot else updates
+
+    async def get_state(self, document_id: str) -> bytes:
+        """The document encoded as a single update."""
+        updates = await self.get_updates(document_id)
+        if len(updates) == 1:
+            return updates[0]
+        return await asyncio.to_thread(merge_ydoc_updates, updates)
 
     async def document_exists(self, document_id: str) -> bool:
         document_id = document_id.replace(":", "_")
 
         if self._redis:
-            redis_key = f"{self._redis_key_prefix}:{document_id}:updates"
-            return await self._redis.exists(redis_key) > 0
+            return (
+                await self._redis.exists(
+                    self._get_key(document_id, "snapshot"),
+                    self._get_key(document_id, "log"),
+                    self._get_key(document_id, "updates"),
+                )
+                > 0
+            )
         else:
-            return document_id in self._updates
+            return document_id in self._updates or document_id in self._snapshots
 
     async def get_users(self, document_id: str) -> List[str]:
         document_id = document_id.replace(":", "_")
 
         if self._redis:
-            redis_key = f"{self._redis_key_prefix}:{document_id}:users"
-            users = await self._redis.smembers(redis_key)
+            users = await self._redis.smembers(self._get_key(document_id, "users"))
             return list(users)
         else:
             return self._users.get(document_id, [])
@@ -205,8 +668,7 @@ class YdocManager:
         document_id = document_id.replace(":", "_")
 
         if self._redis:
-            redis_key = f"{self._redis_key_prefix}:{document_id}:users"
-            await self._redis.sadd(redis_key, user_id)
+            await self._redis.sadd(self._get_key(document_id, "users"), user_id)
         else:
             if document_id not in self._users:
                 self._users[document_id] = set()
@@ -216,8 +678,7 @@ class YdocManager:
         document_id = document_id.replace(":", "_")
 
         if self._redis:
-            redis_key = f"{self._redis_key_prefix}:{document_id}:users"
-            await self._redis.srem(redis_key, user_id)
+            await self._redis.srem(self._get_key(document_id, "users"), user_id)
         else:
             if document_id in self._users and user_id in self._users[document_id]:
                 self._users[document_id].remove(user_id)
@@ -226,16 +687,15 @@ class YdocManager:
         if self._redis:
             keys = []
             async for key in self._redis.scan_iter(
-                match=f"{self._redis_key_prefix}:*", count=100
+                match=f"{self._redis_key_prefix}:*:users", count=100
             ):
                 keys.append(key)
             for key in keys:
-                if key.endswith(":users"):
-                    await self._redis.srem(key, user_id)
+                await self._redis.srem(key, user_id)
 
-                    document_id = key.split(":")[-2]
-                    if len(await self.get_users(document_id)) == 0:
-                        await self.clear_document(document_id)
+                document_id = key.split(":")[-2]
+                if len(await self.get_users(document_id)) == 0:
+                    await self.clear_document(document_id)
 
         else:
             for document_id in list(self._users.keys()):
@@ -250,12 +710,13 @@ class YdocManager:
         document_id = document_id.replace(":", "_")
 
         if self._redis:
-            redis_key = f"{self._redis_key_prefix}:{document_id}:updates"
-            await self._redis.delete(redis_key)
-            redis_users_key = f"{self._redis_key_prefix}:{document_id}:users"
-            await self._redis.delete(redis_users_key)
+            await self._redis.delete(
+                self._get_key(document_id, "snapshot"),
+                self._get_key(document_id, "log"),
+                self._get_key(document_id, "updates"),
+                self._get_key(document_id, "users"),
+            )
         else:
-            if document_id in self._updates:
-                del self._updates[document_id]
-            if document_id in self._users:
-                del self._users[document_id]
+            self._snapshots.pop(document_id, None)
+            self._updates.pop(document_id, None)
+            self._users.pop(document_id, None)
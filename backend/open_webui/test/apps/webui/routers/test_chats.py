@@ -0,0 +1,90 @@
+from test.util.abstract_integration_test import AbstractPostgresTest
+from test.util.mock_user import mock_webui_user
+
+
+class TestChatSearch(AbstractPostgresTest):
+    BASE_PATH = "/api/v1/chats"
+
+    def setup_class(cls):
+        super().setup_class()
+        from open_webui.models.chats import ChatForm, Chats
+
+        cls.chats = Chats
+        cls.chat_form = ChatForm
+
+    def setup_method(self):
+        super().setup_method()
+        self.text_chat = self.chats.insert_new_chat(
+            "1",
+            self.chat_form(
+                chat={
+                    "title": "Greetings",
+                    "history": {
+                        "currentId": "m1",
+                        "messages": {
+                            "m1": {
+                                "id": "m1",
+                                "parentId": None,
+                                "role": "user",
+                                "content": "hello\nworld, see https://example.com/docs",
+                            },
+                        },
+                    },
+                }
+            ),
+        )
+        self.blocks_chat = self.chats.insert_new_chat(
+            "1",
+            self.chat_form(
+                chat={
+                    "title": "Coffee",
+                    "history": {
+                        "currentId": "m2",
+                        "messages": {
+                            "m2": {
+                                "id": "m2",
+                                "parentId": None,
+                                "role": "user",
+                                "content": [
+                                    {"type": "text", "text": "un café crème"},
+                                    {
+                                        "type": "image_url",
+                                        "image_url": {"url": "https://cdn.test/x"},
+                                    },
+                                ],
+                            },
+                        },
+                    },
+                }
+            ),
+        )
+
+    def search(self, text):
+        with mock_webui_user(id="1"):
+            response = self.fast_api_client.get(
+                self.create_url("/search", query_params={"text": text})
+            )
+        assert response.status_code == 200
+        return [chat["id"] for chat in response.json()]
+
+    def test_search_message_text(self):
+        assert self.search("world") == [self.text_chat.id]
+        assert self.search("hello world") == [self.text_chat.id]
+        assert self.search("café") == [self.blocks_chat.id]
+        assert self.search("crème") == [self.blocks_chat.id]
+        assert self.search("greetings") == [self.text_chat.id]
+
+    def test_search_ignores_json_encoding(self):
+        # Escapes, keys and nested values of the stored JSON are not text
+        assert self.search("nworld") == []
+        assert self.search("u00e9") == []
+        assert self.search("image_url") == []
+        assert self.search("cdn") == []
+
+    def test_search_other_user(self):
+        with mock_webui_user(id="2"):
+            response = self.fast_api_client.get(
+                self.create_url("/search", query_params={"text": "world"})
+            )
+        assert response.status_code == 200
+        assert response.json() == []
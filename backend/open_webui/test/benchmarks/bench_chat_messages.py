@@ -0,0 +1,123 @@
+"""
+Micro-benchmark: loading chat history from the chat JSON vs. chat_message rows.
+
+Creates chats of increasing size in the configured database (one user and
+one assistant message per turn, assistant messages carrying a tool output of
+--output-bytes, and a regenerated sibling every tenth turn), then times the
+reads `process_chat_payload` and the event emitter do: loading the branch
+ending at the last message and loading one message. The JSON path parses the
+whole `chat.chat` blob (`get_message_list` over `history.messages`); the row
+path follows `parent_id` with a recursive query on `chat_message`. The
+benchmark chats are deleted afterwards.
+
+Usage:
+    python -m open_webui.test.benchmarks.bench_chat_messages [--sizes 10,100,1000,5000] [--output-bytes 4096] [--runs 20]
+"""
+
+import argparse
+import time
+import uuid
+
+from open_webui.models.chat_messages import ChatMessages
+from open_webui.models.chats import ChatForm, Chats
+from open_webui.utils.misc import get_message_list
+
+
+def generate_chat(turns: int, output_bytes: int) -> tuple[dict, str]:
+    messages = {}
+    parent_id = None
+    timestamp = int(time.time()) - turns
+
+    for i in range(turns):
+        user_id = f"user-{i}"
+        messages[user_id] = {
+            "id": user_id,
+            "parentId": parent_id,
+            "role": "user",
+            "content": f"Question {i}",
+            "timestamp": timestamp + i,
+        }
+
+        assistant_ids = [f"assistant-{i}"]
+        if i % 10 == 9:
+            assistant_ids.insert(0, f"assistant-{i}-regenerated")
+
+        for assistant_id in assistant_ids:
+            messages[assistant_id] = {
+                "id": assistant_id,
+                "parentId": user_id,
+                "role": "assistant",
+                "model": "bench-model",
+                "content": f"Answer {i}",
+                "output": [
+                    {
+                        "type": "function_call_output",
+                        "call_id": f"call-{i}",
+                        "output": "x" * output_bytes,
+                    }
+                ],
+                "timestamp": timestamp + i,
+            }
+
+        parent_id = assistant_ids[-1]
+
+    return {
+        "title": f"Benchmark chat ({turns} turns)",
+        "history": {"messages": messages, "currentId": parent_id},
+    }, parent_id
+
+
+def timed(fn, runs: int) -> float:
+    start = time.perf_counter()
+    for _ in range(runs):
+        result = fn()
+    elapsed = (time.perf_counter() - start) / runs
+    assert result
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="10,100,1000,5000")
+    parser.add_argument("--output-bytes", type=int, default=4096)
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    user_id = f"bench-{uuid.uuid4().hex}"
+    chat_ids = []
+
+    print(
+        f"{'turns':>6} {'messages':>9} {'branch json':>12} {'branch rows':>12} "
+        f"{'message json':>13} {'message rows':>13}"
+    )
+    try:
+        for turns in [int(size) for size in args.sizes.split(",")]:
+            chat, last_id = generate_chat(turns, args.output_bytes)
+            chat_id = Chats.insert_new_chat(user_id, ChatForm(chat=chat)).id
+            chat_ids.append(chat_id)
+
+            def branch_json():
+                messages = Chats.get_chat_by_id(chat_id).chat["history"]["messages"]
+                return get_message_list(messages, last_id)
+
+            def message_json():
+                chat = Chats.get_chat_by_id(chat_id).chat
+                return chat["history"]["messages"].get(last_id)
+
+            branch = ChatMessages.get_message_list(chat_id, last_id)
+            assert [m["id"] for m in branch] == [m["id"] for m in branch_json()]
+
+            print(
+                f"{turns:>6} {len(chat['history']['messages']):>9} "
+                f"{timed(branch_json, args.runs) * 1e3:>10.2f}ms "
+                f"{timed(lambda: ChatMessages.get_message_list(chat_id, last_id), args.runs) * 1e3:>10.2f}ms "
+                f"{timed(message_json, args.runs) * 1e3:>11.2f}ms "
+                f"{timed(lambda: ChatMessages.get_message(chat_id, last_id), args.runs) * 1e3:>11.2f}ms"
+            )
+    finally:
+        for chat_id in chat_ids:
+            Chats.delete_chat_by_id(chat_id)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Micro-benchmark: per-request model lookups on the Redis-backed model registry.
+
+Fills a registry with N model records the way `get_all_models` does, then
+runs the lookup `chat_completion` does for every request (`model_id in
+MODELS` followed by `MODELS[model_id]`) against a plain `RedisDict` and
+against the node-local `RedisReplicaDict`. Requires a running Redis.
+
+Usage:
+    python -m open_webui.test.benchmarks.bench_model_registry [--redis-url redis://localhost:6379/0] [--models 200] [--requests 5000]
+"""
+
+import argparse
+import random
+import time
+import uuid
+
+from open_webui.socket.utils import RedisDict, RedisReplicaDict
+
+
+def generate_models(count: int) -> dict:
+    return {
+        f"model-{i}": {
+            "id": f"model-{i}",
+            "name": f"Model {i}",
+            "object": "model",
+            "owned_by": "openai",
+            "connection_type": "external",
+            "openai": {"id": f"model-{i}", "object": "model", "owned_by": "openai"},
+            "urlIdx": i % 4,
+            "info": {
+                "meta": {
+                    "description": "A model " * 20,
+                    "capabilities": {"vision": True, "citations": True},
+                    "toolIds": [f"tool-{j}" for j in range(5)],
+                },
+                "params": {"temperature": 0.7, "system": "You are helpful. " * 10},
+            },
+            "actions": [],
+            "filters": [],
+            "tags": [{"name": "bench"}],
+        }
+        for i in range(count)
+    }
+
+
+def lookup(registry, model_ids: list[str]) -> float:
+    start = time.perf_counter()
+    for model_id in model_ids:
+        if model_id not in registry:
+            raise KeyError(model_id)
+        registry[model_id]
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--redis-url", default="redis://localhost:6379/0")
+    parser.add_argument("--models", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=5_000)
+    args = parser.parse_args()
+
+    name = f"bench:models:{uuid.uuid4().hex}"
+    models = generate_models(args.models)
+    rng = random.Random(0)
+    model_ids = [rng.choice(list(models)) for _ in range(args.requests)]
+
+    redis_dict = RedisDict(name, redis_url=args.redis_url)
+    replica = RedisReplicaDict(name, redis_url=args.redis_url)
+
+    try:
+        replica.set(models)
+
+        redis_time = lookup(redis_dict, model_ids)
+        replica_time = lookup(replica, model_ids)
+
+        # A rebuild on another node: the next lookup reloads the replica
+        RedisReplicaDict(name, redis_url=args.redis_url).set(models)
+        replica._stale = True
+        reload_time = lookup(replica, model_ids[:1])
+    finally:
+        redis_dict.redis.delete(name, replica.version_key)
+
+    print(f"models:            {args.models}")
+    print(f"requests:          {args.requests}")
+    print(f"RedisDict:         {redis_time / args.requests * 1e6:.1f}us/request")
+    print(f"RedisReplicaDict:  {replica_time / args.requests * 1e6:.1f}us/request")
+    print(f"replica reload:    {reload_time * 1e3:.2f}ms")
+    print(f"speedup:           {redis_time / replica_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
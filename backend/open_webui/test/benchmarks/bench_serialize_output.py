@@ -0,0 +1,119 @@
+"""
+Micro-benchmark: stream deltas through `serialize_output` and `OutputSerializer`.
+
+Simulates a reasoning model streaming a long <think> block followed by a tool
+call and a long answer, rendering the full output after every delta the way
+`streaming_chat_response_handler` does.
+
+Usage:
+    python -m open_webui.test.benchmarks.bench_serialize_output [--deltas 10000]
+"""
+
+import argparse
+import random
+import time
+
+from open_webui.utils.output import OutputSerializer, serialize_output
+
+WORDS = [
+    "the",
+    "model",
+    "considers",
+    "<tag>",
+    "a & b",
+    '"quoted"',
+    "```",
+    "> cited",
+    "value",
+    "\n",
+    "\n\n",
+]
+
+
+def generate_deltas(count: int, seed: int = 0) -> list[str]:
+    rng = random.Random(seed)
+    return [f"{rng.choice(WORDS)} " for _ in range(count)]
+
+
+def stream(deltas: list[str], render) -> tuple[float, list[str]]:
+    """Apply deltas to an output list and render after each one."""
+    output = []
+    rendered = []
+
+    reasoning_deltas = len(deltas) // 2
+    start = time.perf_counter()
+
+    reasoning = {
+        "type": "reasoning",
+        "id": "r_1",
+        "status": "in_progress",
+        "content": [{"type": "output_text", "text": ""}],
+        "summary": None,
+    }
+    output.append(reasoning)
+    for delta in deltas[:reasoning_deltas]:
+        reasoning["content"][-1]["text"] += delta
+        rendered.append(render(output))
+
+    reasoning["status"] = "completed"
+    reasoning["duration"] = 12
+    output.append(
+        {
+            "type": "function_call",
+            "id": "fc_1",
+            "call_id": "call_1",
+            "name": "search",
+            "arguments": '{"query": "open webui"}',
+            "status": "completed",
+        }
+    )
+    rendered.append(render(output))
+    output.append(
+        {
+            "type": "function_call_output",
+            "id": "fco_1",
+            "call_id": "call_1",
+            "output": [{"type": "input_text", "text": "<b>result</b> " * 200}],
+            "status": "completed",
+        }
+    )
+    rendered.append(render(output))
+
+    message = {
+        "type": "message",
+        "id": "msg_1",
+        "status": "in_progress",
+        "role": "assistant",
+        "content": [{"type": "output_text", "text": ""}],
+    }
+    output.append(message)
+    for delta in deltas[reasoning_deltas:]:
+        message["content"][-1]["text"] += delta
+        rendered.append(render(output))
+
+    return time.perf_counter() - start, rendered
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--deltas", type=int, default=10_000)
+    args = parser.parse_args()
+
+    deltas = generate_deltas(args.deltas)
+
+    full_time, full_rendered = stream(deltas, serialize_output)
+    incremental_time, incremental_rendered = stream(
+        deltas, OutputSerializer().serialize
+    )
+
+    assert full_rendered == incremental_rendered, "renderers diverged"
+
+    print(f"deltas:            {args.deltas}")
+    print(f"final length:      {len(full_rendered[-1])} chars")
+    print(f"serialize_output:  {full_time:.3f}s")
+    print(f"OutputSerializer:  {incremental_time:.3f}s")
+    print(f"speedup:           {full_time / incremental_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+"""
+Load test: Socket.IO session and usage pools under many concurrent sockets.
+
+Simulates N sockets doing what the socket handlers do over a connection's
+lifetime -- `connect` (store the session), a few `usage` reports per model,
+`heartbeat`s and `disconnect` -- all at once on one event loop, against the
+async pools (`AsyncRedisDict` + `RedisUsagePool`) and, for comparison, the
+previous layout (sync `RedisDict` for both pools, with usage stored as one
+JSON blob per model and disconnect scanning every model). Reports wall time,
+handler latency percentiles and the longest event loop stall seen while the
+sockets run. Requires a running Redis.
+
+Usage:
+    python -m open_webui.test.benchmarks.bench_socket_pools [--redis-url redis://localhost:6379/0] [--sockets 10000] [--models 20] [--concurrency 1000] [--skip-legacy]
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import time
+import uuid
+
+from open_webui.socket.utils import AsyncRedisDict, RedisDict, RedisUsagePool
+
+
+def get_session(sid: str) -> dict:
+    return {
+        "id": f"user-{sid}",
+        "email": f"{sid}@example.com",
+        "name": f"User {sid}",
+        "role": "user",
+        "last_seen_at": int(time.time()),
+    }
+
+
+class LegacyPools:
+    """The previous handlers' Redis access, verbatim."""
+
+    def __init__(self, prefix: str, redis_url: str):
+        self.sessions = RedisDict(f"{prefix}:session_pool", redis_url=redis_url)
+        self.usage = RedisDict(f"{prefix}:usage_pool", redis_url=redis_url)
+
+    async def connect(self, sid):
+        self.sessions[sid] = get_session(sid)
+
+    async def usage_report(self, sid, model_id):
+        if sid in self.sessions:
+            self.usage[model_id] = {
+                **(self.usage[model_id] if model_id in self.usage else {}),
+                sid: {"updated_at": int(time.time())},
+            }
+
+    async def heartbeat(self, sid):
+        user = self.sessions.get(sid)
+        if user:
+            self.sessions[sid] = {**user, "last_seen_at": int(time.time())}
+
+    async def disconnect(self, sid):
+        if sid in self.sessions:
+            del self.sessions[sid]
+            for model_id in list(self.usage.keys()):
+                connections = self.usage.get(model_id)
+                if connections and sid in connections:
+                    del connections[sid]
+                    if not connections:
+                        del self.usage[model_id]
+                    else:
+                        self.usage[model_id] = connections
+
+    def cleanup(self):
+        self.sessions.clear()
+        self.usage.clear()
+
+
+class AsyncPools:
+    """The current handlers' Redis access."""
+
+    def __init__(self, prefix: str, redis_url: str):
+        self.sessions = AsyncRedisDict(f"{prefix}:session_pool", redis_url=redis_url)
+        self.usage = RedisUsagePool(f"{prefix}:usage_pool", redis_url=redis_url)
+        self.prefix = prefix
+        self.redis_url = redis_url
+
+    async def connect(self, sid):
+        await self.sessions.set(sid, get_session(sid))
+
+    async def usage_report(self, sid, model_id):
+        if await self.sessions.contains(sid):
+            await self.usage.touch(sid, model_id, int(time.time()))
+
+    async def heartbeat(self, sid):
+        user = await self.sessions.get(sid)
+        if user:
+            await self.sessions.set(sid, {**user, "last_seen_at": int(time.time())})
+
+    async def disconnect(self, sid):
+        if await self.sessions.delete(sid):
+            await self.usage.remove_session(sid)
+
+    def cleanup(self):
+        # Sync client for teardown, outside the measured run
+        redis = RedisDict(self.prefix, redis_url=self.redis_url).redis
+        keys = list(redis.scan_iter(match=f"{self.prefix}:*", count=1000))
+        for i in range(0, len(keys), 1000):
+            redis.delete(*keys[i : i + 1000])
+
+
+async def monitor_loop(stop: asyncio.Event, stalls: list):
+    interval = 0.01
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        stalls.append(time.perf_counter() - start - interval)
+
+
+async def run_socket(pools, sid, model_ids, reports, latencies, semaphore):
+    async def timed(coroutine):
+        # Handlers in flight at once; each one holds a Redis connection
+        async with semaphore:
+            start = time.perf_counter()
+            await coroutine
+            latencies.append(time.perf_counter() - start)
+
+    await timed(pools.connect(sid))
+    for _ in range(reports):
+        for model_id in model_ids:
+            await timed(pools.usage_report(sid, model_id))
+        await timed(pools.heartbeat(sid))
+    await timed(pools.disconnect(sid))
+
+
+async def run(pools, args) -> dict:
+    rng = random.Random(0)
+    models = [f"model-{i}" for i in range(args.models)]
+
+    latencies = []
+    stalls = []
+    stop = asyncio.Event()
+    semaphore = asyncio.Semaphore(args.concurrency)
+    monitor = asyncio.create_task(monitor_loop(stop, stalls))
+
+    start = time.perf_counter()
+    await asyncio.gather(
+        *[
+            run_socket(
+                pools,
+                f"sid-{i}",
+                rng.sample(models, k=min(args.models_per_socket, args.models)),
+                args.reports,
+                latencies,
+                semaphore,
+            )
+            for i in range(args.sockets)
+        ]
+    )
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    await monitor
+
+    latencies.sort()
+    return {
+        "elapsed": elapsed,
+        "operations": len(latencies),
+        "p50": statistics.median(latencies),
+        "p99": latencies[int(len(latencies) * 0.99) - 1],
+        "max_stall": max(stalls) if stalls else 0.0,
+    }
+
+
+def report(name: str, result: dict):
+    print(f"{name}:")
+    print(f"  wall time:       {result['elapsed']:.2f}s")
+    print(f"  operations:      {result['operations']}")
+    print(f"  throughput:      {result['operations'] / result['elapsed']:.0f} ops/s")
+    print(f"  latency p50:     {result['p50'] * 1e3:.2f}ms")
+    print(f"  latency p99:     {result['p99'] * 1e3:.2f}ms")
+    print(f"  max loop stall:  {result['max_stall'] * 1e3:.1f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--redis-url", default="redis://localhost:6379/0")
+    parser.add_argument("--sockets", type=int, default=10_000)
+    parser.add_argument("--models", type=int, default=20)
+    parser.add_argument("--models-per-socket", type=int, default=2)
+    parser.add_argument("--reports", type=int, default=3)
+    parser.add_argument("--concurrency", type=int, default=1_000)
+    parser.add_argument("--skip-legacy", action="store_true")
+    args = parser.parse_args()
+
+    print(f"sockets: {args.sockets}, models: {args.models}, reports: {args.reports}")
+
+    prefix = f"bench:socket:{uuid.uuid4().hex}"
+    pools = AsyncPools(f"{prefix}:async", args.redis_url)
+    try:
+        report("async pools", asyncio.run(run(pools, args)))
+    finally:
+        pools.cleanup()
+
+    if not args.skip_legacy:
+        legacy = LegacyPools(f"{prefix}:legacy", args.redis_url)
+        try:
+            report("legacy pools", asyncio.run(run(legacy, args)))
+        finally:
+            legacy.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Micro-benchmark: per-chunk overhead of stream filters.
+
+Streams chunks through N filter functions that define `stream`, valves and
+user valves, once with `process_filter_functions` per chunk (valve lookups
+and signature inspection on every call) and once with a pipeline prepared by
+`prepare_filter_functions` at stream start. Valve lookups are served from
+memory with a simulated query latency instead of a database.
+
+Usage:
+    python -m open_webui.test.benchmarks.bench_stream_filters [--chunks 2000] [--filters 1 2 4] [--query-ms 0.2]
+"""
+
+import argparse
+import asyncio
+import time
+from types import SimpleNamespace
+
+from pydantic import BaseModel
+
+from open_webui.utils import filter as filter_utils
+from open_webui.utils.filter import (
+    prepare_filter_functions,
+    process_filter_functions,
+    run_filter_functions,
+)
+
+
+class StreamFilter:
+    class Valves(BaseModel):
+        priority: int = 0
+        suffix: str = ""
+
+    class UserValves(BaseModel):
+        enabled: bool = True
+
+    def __init__(self):
+        self.valves = self.Valves()
+
+    def stream(self, event: dict, __user__: dict, __id__: str) -> dict:
+        return event
+
+
+class InMemoryFunctions:
+    def __init__(self, query_seconds: float):
+        self.query_seconds = query_seconds
+        self.queries = 0
+
+    def _query(self, value):
+        self.queries += 1
+        if self.query_seconds:
+            time.sleep(self.query_seconds)
+        return value
+
+    def get_function_valves_by_id(self, function_id):
+        return self._query({"suffix": function_id})
+
+    def get_user_valves_by_id_and_user_id(self, function_id, user_id):
+        return self._query({"enabled": True})
+
+
+def generate_chunks(count: int) -> list[dict]:
+    return [
+        {"choices": [{"delta": {"content": f"token {i} "}, "index": 0}]}
+        for i in range(count)
+    ]
+
+
+async def run(chunks, filter_functions, extra_params, prepared: bool) -> float:
+    start = time.perf_counter()
+    if prepared:
+        filters = prepare_filter_functions(
+            None, filter_functions, "stream", extra_params
+        )
+        for chunk in chunks:
+            await run_filter_functions(filters, "stream", chunk)
+    else:
+        for chunk in chunks:
+            await process_filter_functions(
+                None, filter_functions, "stream", chunk, extra_params
+            )
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chunks", type=int, default=2_000)
+    parser.add_argument("--filters", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--query-ms", type=float, default=0.2)
+    args = parser.parse_args()
+
+    functions = InMemoryFunctions(args.query_ms / 1000)
+    modules = {}
+    filter_utils.Functions = functions
+    filter_utils.get_function_module = lambda request, function_id, **kwargs: (
+        modules[function_id]
+    )
+
+    chunks = generate_chunks(args.chunks)
+    extra_params = {"__user__": {"id": "user"}, "__body__": {}}
+
+    print(f"chunks: {args.chunks}, simulated query latency: {args.query_ms}ms")
+    print(f"{'filters':>8} {'per-call':>14} {'prepared':>14} {'queries':>16}")
+    for count in args.filters:
+        filter_functions = []
+        for i in range(count):
+            modules[f"filter_{i}"] = StreamFilter()
+            filter_functions.append(SimpleNamespace(id=f"filter_{i}"))
+
+        functions.queries = 0
+        per_call = asyncio.run(run(chunks, filter_functions, extra_params, False))
+        per_call_queries = functions.queries
+
+        functions.queries = 0
+        prepared = asyncio.run(run(chunks, filter_functions, extra_params, True))
+        prepared_queries = functions.queries
+
+        print(
+            f"{count:>8} "
+            f"{per_call / args.chunks * 1e6:>11.1f}us "
+            f"{prepared / args.chunks * 1e6:>11.1f}us "
+            f"{per_call_queries:>8}/{prepared_queries:<7}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+Micro-benchmark: Yjs document storage and joins for a heavily edited note.
+
+Generates N single-character edits on a Yjs text, stores them the way
+`YdocManager` does and measures what a `ydoc:document:join` costs: the
+previous format (each update a JSON integer list, rolling compaction of the
+oldest half at 500 entries, every join replaying the whole list) against the
+current one (raw bytes plus a snapshot compacted every `SNAPSHOT_INTERVAL`
+updates). Pass --redis-url to run the current format against Redis instead
+of the in-process store.
+
+Usage:
+    python -m open_webui.test.benchmarks.bench_ydoc_state [--edits 10000] [--joins 100] [--redis-url redis://localhost:6379/0]
+"""
+
+import argparse
+import asyncio
+import json
+import time
+import uuid
+
+import pycrdt as Y
+
+from open_webui.socket.utils import YdocManager
+
+LEGACY_COMPACTION_THRESHOLD = 500
+
+
+def generate_edits(count: int) -> list[bytes]:
+    doc = Y.Doc()
+    text = doc.get("prosemirror", type=Y.Text)
+
+    updates = []
+    for i in range(count):
+        state = doc.get_state()
+        text.insert(len(text), "abcdefghij"[i % 10] if i % 80 else "\n")
+        updates.append(doc.get_update(state))
+    return updates
+
+
+def legacy_store(updates: list[bytes]) -> list[str]:
+    stored = []
+    for update in updates:
+        stored.append(json.dumps(list(update)))
+        if len(stored) >= LEGACY_COMPACTION_THRESHOLD:
+            mid = len(stored) // 2
+            ydoc = Y.Doc()
+            for raw in stored[:mid]:
+                ydoc.apply_update(bytes(json.loads(raw)))
+            stored = [json.dumps(list(ydoc.get_update()))] + stored[mid:]
+    return stored
+
+
+def legacy_join(stored: list[str]) -> bytes:
+    ydoc = Y.Doc()
+    for update in stored:
+        ydoc.apply_update(bytes(json.loads(update)))
+    return ydoc.get_update()
+
+
+async def current(updates: list[bytes], joins: int, redis_url=None):
+    document_id = f"note:bench-{uuid.uuid4().hex}"
+    if redis_url:
+        from open_webui.utils.redis import get_redis_connection
+
+        manager = YdocManager(
+            redis=get_redis_connection(redis_url, [], async_mode=True),
+            binary_redis=get_redis_connection(
+                redis_url, [], async_mode=True, decode_responses=False
+            ),
+            redis_key_prefix="bench:ydoc:documents",
+        )
+    else:
+        manager = YdocManager()
+
+    try:
+        start = time.perf_counter()
+        for update in updates:
+            await manager.append_to_updates(document_id, update)
+        append_time = time.perf_counter() - start
+
+        stored = await manager.get_updates(document_id)
+
+        start = time.perf_counter()
+        for _ in range(joins):
+            state = await manager.get_state(document_id)
+        join_time = time.perf_counter() - start
+    finally:
+        await manager.clear_document(document_id)
+
+    return append_time, join_time, stored, state
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--edits", type=int, default=10_000)
+    parser.add_argument("--joins", type=int, default=100)
+    parser.add_argument("--redis-url", default=None)
+    args = parser.parse_args()
+
+    updates = generate_edits(args.edits)
+    print(f"edits:                 {args.edits}")
+    print(f"raw update bytes:      {sum(len(u) for u in updates)}")
+
+    start = time.perf_counter()
+    legacy = legacy_store(updates)
+    legacy_append = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(args.joins):
+        legacy_state = legacy_join(legacy)
+    legacy_join_time = time.perf_counter() - start
+
+    append_time, join_time, stored, state = asyncio.run(
+        current(updates, args.joins, args.redis_url)
+    )
+
+    # Both layouts must describe the same document
+    check = Y.Doc()
+    check.apply_update(state)
+    expected = Y.Doc()
+    expected.apply_update(legacy_state)
+    assert str(check.get("prosemirror", type=Y.Text)) == str(
+        expected.get("prosemirror", type=Y.Text)
+    )
+
+    print("legacy (JSON lists, replay on join):")
+    print(f"  stored entries:      {len(legacy)}")
+    print(f"  stored bytes:        {sum(len(u) for u in legacy)}")
+    print(f"  append all:          {legacy_append * 1e3:.1f}ms")
+    print(f"  join:                {legacy_join_time / args.joins * 1e3:.2f}ms")
+    print("current (raw bytes, snapshot + log):")
+    print(f"  stored entries:      {len(stored)}")
+    print(f"  stored bytes:        {sum(len(u) for u in stored)}")
+    print(f"  append all:          {append_time * 1e3:.1f}ms")
+    print(f"  join:                {join_time / args.joins * 1e3:.2f}ms")
+    print(f"join speedup:          {legacy_join_time / join_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
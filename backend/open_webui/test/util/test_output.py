@@ -0,0 +1,105 @@
+import random
+
+from open_webui.utils.output import OutputSerializer, serialize_output
+
+
+def reasoning_item(text, **kwargs):
+    return {
+        "type": "reasoning",
+        "status": "in_progress",
+        "content": [{"type": "output_text", "text": text}],
+        "summary": None,
+        **kwargs,
+    }
+
+
+def message_item(text):
+    return {
+        "type": "message",
+        "status": "in_progress",
+        "role": "assistant",
+        "content": [{"type": "output_text", "text": text}],
+    }
+
+
+class TestOutputSerializer:
+    def assert_matches(self, serializer, output):
+        assert serializer.serialize(output) == serialize_output(output)
+
+    def test_streamed_reasoning_and_message(self):
+        rng = random.Random(42)
+        pieces = ["a", "> b", "\n", "\n\n", "\r\n", " ", "<&>", '"', "```", "\t"]
+        serializer = OutputSerializer()
+        output = [reasoning_item("")]
+
+        for _ in range(500):
+            output[-1]["content"][-1]["text"] += rng.choice(pieces)
+            self.assert_matches(serializer, output)
+
+        output[-1]["status"] = "completed"
+        output[-1]["duration"] = 3
+        output.append(message_item(""))
+        for _ in range(500):
+            output[-1]["content"][-1]["text"] += rng.choice(pieces)
+            self.assert_matches(serializer, output)
+
+    def test_tool_call_result_arrives_later(self):
+        serializer = OutputSerializer()
+        output = [
+            message_item("Let me check."),
+            {
+                "type": "function_call",
+                "call_id": "call_1",
+                "name": "search",
+                "arguments": {"query": "a"},
+            },
+        ]
+        self.assert_matches(serializer, output)
+
+        # Mutable arguments changed in place must still be picked up
+        output[1]["arguments"]["query"] = "b"
+        self.assert_matches(serializer, output)
+
+        output.append(
+            {
+                "type": "function_call_output",
+                "call_id": "call_1",
+                "output": [{"type": "input_text", "text": "<result>"}],
+                "files": [{"type": "image", "url": "/a.png"}],
+            }
+        )
+        self.assert_matches(serializer, output)
+
+        output.append(message_item("Done"))
+        self.assert_matches(serializer, output)
+
+    def test_pending_items_and_popped_items(self):
+        serializer = OutputSerializer()
+        output = [message_item("Some text ```python")]
+        self.assert_matches(serializer, output)
+
+        pending = output + [
+            {"type": "function_call", "call_id": "x", "name": "f", "arguments": "{}"}
+        ]
+        self.assert_matches(serializer, pending)
+        self.assert_matches(serializer, output)
+
+        output.append(
+            {
+                "type": "open_webui:code_interpreter",
+                "status": "in_progress",
+                "code": "print(1)",
+                "output": None,
+            }
+        )
+        self.assert_matches(serializer, output)
+
+        output[-1]["output"] = {"stdout": "1"}
+        self.assert_matches(serializer, output)
+
+        output.pop()
+        output[-1]["content"][-1]["text"] = "Replaced"
+        self.assert_matches(serializer, output)
+
+        output.clear()
+        self.assert_matches(serializer, output)
@@ -39,6 +39,7 @@ from open_webui.models.groups import Groups
 from open_webui.models.memories import Memories
 from open_webui.retrieval.vector.factory import VECTOR_DB_CLIENT
 from open_webui.utils.sanitize import sanitize_code
+from open_webui.utils.chat_save import CHAT_SAVE_BUFFER
 
 log = logging.getLogger(__name__)
 
@@ -249,7 +250,9 @@ async def generate_image(
 
         # Persist files to DB if chat context is available
         if __chat_id__ and __message_id__ and images:
-            db_files = Chats.add_message_files_by_id_and_message_id(
+            db_files = await CHAT_SAVE_BUFFER.write_through(
+                __chat_id__,
+                Chats.add_message_files_by_id_and_message_id,
                 __chat_id__,
                 __message_id__,
                 image_files,
@@ -316,7 +319,9 @@ async def edit_image(
 
         # Persist files to DB if chat context is available
         if __chat_id__ and __message_id__ and images:
-            db_files = Chats.add_message_files_by_id_and_message_id(
+            db_files = await CHAT_SAVE_BUFFER.write_through(
+                __chat_id__,
+                Chats.add_message_files_by_id_and_message_id,
                 __chat_id__,
                 __message_id__,
                 image_files,
@@ -1983,7 +1988,7 @@ async def query_knowledge_bases(
 
             accessible_ids = [kb.id for kb in accessible_knowledge_bases.items]
 
-            search_results = VECTOR_DB_CLIENT.search(
+            search_results = await VECTOR_DB_CLIENT.asearch(
                 collection_name=KNOWLEDGE_BASES_COLLECTION,
                 vectors=[query_embedding],
                 filter={"knowledge_base_id": {"$in": accessible_ids}},
@@ -1,3 +1,4 @@
+import asyncio
 import logging
 import uuid
 import jwt
@@ -24,6 +25,8 @@ from opentelemetry import trace
 
 from open_webui.utils.access_control import has_permission
 from open_webui.models.users import Users
+from open_webui.utils.auth_cache import AUTH_CACHE
+from open_webui.utils.last_active import LAST_ACTIVE_BUFFER
 from open_webui.models.auths import Auths
 
 
@@ -328,7 +331,12 @@ async def get_current_user(
                     detail="Invalid token",
                 )
 
-            user = Users.get_user_by_id(data["id"])
+            user = AUTH_CACHE.get_user(data["id"])
+            if user is None:
+                user = await asyncio.to_thread(Users.get_user_by_id, data["id"])
+                if user is not None:
+                    AUTH_CACHE.set_user(user)
+
             if user is None:
                 raise HTTPException(
                     status_code=status.HTTP_401_UNAUTHORIZED,
@@ -353,10 +361,8 @@ async def get_current_user(
                     current_span.set_attribute("client.user.role", user.role)
                     current_span.set_attribute("client.auth.type", "jwt")
 
-                # Refresh the user's last active timestamp asynchronously
-                # to prevent blocking the request
-                if background_tasks:
-                    background_tasks.add_task(Users.update_last_active_by_id, user.id)
+                # Refresh the user's last active timestamp in the next batch
+                LAST_ACTIVE_BUFFER.touch(user.id)
             return user
         else:
             raise HTTPException(
@@ -380,7 +386,11 @@ async def get_current_user(
 
 def get_current_user_by_api_key(request, api_key: str):
     # Each function call manages its own short-lived session internally
-    user = Users.get_user_by_api_key(api_key)
+    user = AUTH_CACHE.get_user_by_api_key(api_key)
+    if user is None:
+        user = Users.get_user_by_api_key(api_key)
+        if user is not None:
+            AUTH_CACHE.set_user_by_api_key(api_key, user)
 
     if user is None:
         raise HTTPException(
@@ -389,12 +399,7 @@ def get_current_user_by_api_key(request, api_key: str):
         )
 
     if not request.state.enable_api_keys or (
-        user.role != "admin"
-        and not has_permission(
-            user.id,
-            "features.api_keys",
-            request.app.state.config.USER_PERMISSIONS,
-        )
+        user.role != "admin" and not has_api_keys_permission(request, user)
     ):
         raise HTTPException(
             status.HTTP_403_FORBIDDEN, detail=ERROR_MESSAGES.API_KEY_NOT_ALLOWED
@@ -408,10 +413,24 @@ def get_current_user_by_api_key(request, api_key: str):
         current_span.set_attribute("client.user.role", user.role)
         current_span.set_attribute("client.auth.type", "api_key")
 
-    Users.update_last_active_by_id(user.id)
+    LAST_ACTIVE_BUFFER.touch(user.id)
     return user
 
 
+def has_api_keys_permission(request, user) -> bool:
+    default_permissions = request.app.state.config.USER_PERMISSIONS
+
+    allowed = AUTH_CACHE.get_permission(
+        user.id, "features.api_keys", default_permissions
+    )
+    if allowed is None:
+        allowed = has_permission(user.id, "features.api_keys", default_permissions)
+        AUTH_CACHE.set_permission(
+            user.id, "features.api_keys", default_permissions, allowed
+        )
+    return allowed
+
+
 def get_verified_user(user=Depends(get_current_user)):
     if user.role not in {"user", "admin"}:
         raise HTTPException(
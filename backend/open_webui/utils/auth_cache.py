@@ -0,0 +1,170 @@
+import functools
+import hashlib
+import logging
+import time
+from typing import Any, Optional
+
+from open_webui.env import AUTH_USER_CACHE_TTL, REDIS_KEY_PREFIX, REDIS_URL
+from open_webui.utils.redis import get_redis_client
+
+log = logging.getLogger(__name__)
+
+
+REDIS_AUTH_CACHE_CHANNEL = f"{REDIS_KEY_PREFIX}:auth:invalidate"
+
+# Expired entries are swept once a table grows past this many entries
+SWEEP_SIZE = 10_000
+
+
+class AuthCache:
+    """
+    Short-lived cache of authenticated users and API key permissions.
+
+    Lets `get_current_user` skip the user lookup (and, for API keys, the
+    group permission check) on most requests. Entries live for `ttl`
+    seconds; model methods that change users or groups invalidate them
+    right away, and other nodes are told through a Redis pub/sub channel.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+
+        # user_id -> (expires_at, user)
+        self._users: dict[str, tuple[float, Any]] = {}
+        # sha256 of the API key -> (expires_at, user)
+        self._api_keys: dict[str, tuple[float, Any]] = {}
+        # (user_id, permission_key) -> (expires_at, (default_permissions, allowed))
+        self._permissions: dict[tuple[str, str], tuple[float, Any]] = {}
+
+    def _get(self, entries: dict, key):
+        entry = entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] < time.monotonic():
+            entries.pop(key, None)
+            return None
+        return entry[1]
+
+    def _set(self, entries: dict, key, value):
+        if self.ttl <= 0:
+            return
+
+        now = time.monotonic()
+        if len(entries) >= SWEEP_SIZE:
+            for expired_key in [
+                k for k, (expires_at, _) in list(entries.items()) if expires_at < now
+            ]:
+                entries.pop(expired_key, None)
+        entries[key] = (now + self.ttl, value)
+
+    @staticmethod
+    def _hash_api_key(api_key: str) -> str:
+        return hashlib.sha256(api_key.encode()).hexdigest()
+
+    def get_user(self, user_id: str):
+        user = self._get(self._users, user_id)
+        # Copies, so a handler changing its user doesn't change the cache
+        return user.model_copy() if user is not None else None
+
+    def set_user(self, user):
+        self._set(self._users, user.id, user.model_copy())
+
+    def get_user_by_api_key(self, api_key: str):
+        user = self._get(self._api_keys, self._hash_api_key(api_key))
+        return user.model_copy() if user is not None else None
+
+    def set_user_by_api_key(self, api_key: str, user):
+        self._set(self._api_keys, self._hash_api_key(api_key), user.model_copy())
+
+    def get_permission(
+        self, user_id: str, permission_key: str, default_permissions: dict
+    ) -> Optional[bool]:
+        entry = self._get(self._permissions, (user_id, permission_key))
+        # Defaults come from config and can change independently of the user
+        if entry is None or entry[0] != default_permissions:
+            return None
+        return entry[1]
+
+    def set_permission(
+        self,
+        user_id: str,
+        permission_key: str,
+        default_permissions: dict,
+        allowed: bool,
+    ):
+        self._set(
+            self._permissions,
+            (user_id, permission_key),
+            (default_permissions, allowed),
+        )
+
+    def drop(self, user_id: Optional[str] = None):
+        """Drop the entries of `user_id` (or every entry) from this node only."""
+        if user_id is None:
+            self._users.clear()
+            self._api_keys.clear()
+            self._permissions.clear()
+            return
+
+        self._users.pop(user_id, None)
+        for key, (_, user) in list(self._api_keys.items()):
+            if user.id == user_id:
+                self._api_keys.pop(key, None)
+        for key in [key for key in list(self._permissions) if key[0] == user_id]:
+            self._permissions.pop(key, None)
+
+    def invalidate(self, user_id: Optional[str] = None):
+        """Drop the entries of `user_id` (or every entry) on all nodes."""
+        self.drop(user_id)
+
+        if self.ttl <= 0 or not REDIS_URL:
+            return
+
+        try:
+            redis = get_redis_client()
+            if redis is not None:
+                redis.publish(REDIS_AUTH_CACHE_CHANNEL, user_id or "*")
+        except Exception as e:
+            log.warning(f"Failed to publish auth cache invalidation: {e}")
+
+    async def listen(self, redis):
+        pubsub = redis.pubsub()
+        await pubsub.subscribe(REDIS_AUTH_CACHE_CHANNEL)
+
+        async for message in pubsub.listen():
+            if message["type"] != "message":
+                continue
+
+            data = message["data"]
+            if isinstance(data, bytes):
+                data = data.decode()
+            self.drop(None if data == "*" else data)
+
+
+def invalidates_user(func):
+    """Invalidate the cached user whose id is the method's first argument."""
+
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        try:
+            return func(self, *args, **kwargs)
+        finally:
+            AUTH_CACHE.invalidate(args[0] if args else kwargs.get("id"))
+
+    return wrapper
+
+
+def invalidates_users(func):
+    """Invalidate every cached user, e.g. after group membership or permission changes."""
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        try:
+            return func(*args, **kwargs)
+        finally:
+            AUTH_CACHE.invalidate()
+
+    return wrapper
+
+
+AUTH_CACHE = AuthCache(ttl=AUTH_USER_CACHE_TTL)
@@ -0,0 +1,216 @@
+import logging
+import random
+import time
+from typing import Optional
+
+from open_webui.env import (
+    UPSTREAM_BALANCER_COOLDOWN,
+    UPSTREAM_BALANCER_FAILURE_THRESHOLD,
+    UPSTREAM_BALANCER_STRATEGY,
+)
+
+log = logging.getLogger(__name__)
+
+
+# Smoothing factor of the response latency average
+EWMA_ALPHA = 0.3
+
+
+class UpstreamStats:
+    def __init__(self):
+        self.in_flight = 0
+        self.requests = 0
+        self.errors = 0
+        self.consecutive_errors = 0
+        # Time to response headers, so long generations don't count as slow
+        self.latency_ewma: Optional[float] = None
+        self.ejected_until = 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            "in_flight": self.in_flight,
+            "requests": self.requests,
+            "errors": self.errors,
+            "consecutive_errors": self.consecutive_errors,
+            "latency_ewma": self.latency_ewma,
+            "ejected": self.ejected_until > time.monotonic(),
+        }
+
+
+class UpstreamRequest:
+    """One request to an upstream, reported back to the balancer."""
+
+    def __init__(self, balancer: "UpstreamBalancer", url: str):
+        self.balancer = balancer
+        self.url = url
+        self.start = time.monotonic()
+        self._responded = False
+        self._finished = False
+
+        balancer._get_stats(url).in_flight += 1
+
+    def responded(self, status: int):
+        """Record the response headers; 429 and 5xx count as failures."""
+        if self._responded:
+            return
+        self._responded = True
+
+        self.balancer._record(
+            self.url,
+            latency=time.monotonic() - self.start,
+            error=status == 429 or status >= 500,
+        )
+
+    def finish(self, error: bool = False):
+        """Release the request's slot, once the response body has been read."""
+        if self._finished:
+            return
+        self._finished = True
+
+        if not self._responded:
+            self._responded = True
+            self.balancer._record(self.url, latency=None, error=error)
+        self.balancer._get_stats(self.url).in_flight -= 1
+
+
+class UpstreamBalancer:
+    """
+    Picks which connection serves a model that several connections provide.
+
+    Tracks in-flight requests, a latency EWMA and recent failures per base
+    URL. "least_outstanding" picks the connection with the fewest in-flight
+    requests relative to its weight (ties go to the lower latency),
+    "weighted" picks at random in proportion to the weights and "random"
+    ignores both. Connections that fail `failure_threshold` times in a row
+    are skipped for `cooldown` seconds; after that a single further failure
+    ejects them again. State is local to each worker.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        strategy: str = UPSTREAM_BALANCER_STRATEGY,
+        failure_threshold: int = UPSTREAM_BALANCER_FAILURE_THRESHOLD,
+        cooldown: float = UPSTREAM_BALANCER_COOLDOWN,
+    ):
+        self.name = name
+        self.strategy = strategy
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+
+        self._stats: dict[str, UpstreamStats] = {}
+
+    def _get_stats(self, url: str) -> UpstreamStats:
+        stats = self._stats.get(url)
+        if stats is None:
+            stats = self._stats[url] = UpstreamStats()
+        return stats
+
+    def _record(self, url: str, latency: Optional[float], error: bool):
+        stats = self._get_stats(url)
+        stats.requests += 1
+
+        if latency is not None:
+            stats.latency_ewma = (
+                latency
+                if stats.latency_ewma is None
+                else EWMA_ALPHA * latency + (1 - EWMA_ALPHA) * stats.latency_ewma
+            )
+
+        if not error:
+            stats.consecutive_errors = 0
+            stats.ejected_until = 0.0
+            return
+
+        stats.errors += 1
+        stats.consecutive_errors += 1
+        if (
+            self.failure_threshold > 0
+            and stats.consecutive_errors >= self.failure_threshold
+        ):
+            if stats.ejected_until <= time.monotonic():
+                log.warning(
+                    f"{self.name}: ejecting {url} for {self.cooldown}s after "
+                    f"{stats.consecutive_errors} consecutive failures"
+                )
+            stats.ejected_until = time.monotonic() + self.cooldown
+
+    def select(
+        self,
+        url_idxs: list[int],
+        base_urls: list[str],
+        weights: Optional[dict[int, float]] = None,
+    ) -> int:
+        """Pick one of `url_idxs`, indexes into `base_urls`."""
+        if len(url_idxs) == 1:
+            return url_idxs[0]
+
+        now = time.monotonic()
+        candidates = [
+            idx
+            for idx in url_idxs
+            if self._get_stats(base_urls[idx]).ejected_until <= now
+        ]
+        if not candidates:
+            # Everything is failing; spread the load rather than refuse it
+            candidates = url_idxs
+
+        weights = weights or {}
+
+        def get_weight(idx: int) -> float:
+            return max(weights.get(idx, 1.0), 0.0)
+
+        if self.strategy == "random":
+            return random.choice(candidates)
+
+        if self.strategy == "weighted":
+            if sum(get_weight(idx) for idx in candidates) <= 0:
+                return random.choice(candidates)
+            return random.choices(
+                candidates, weights=[get_weight(idx) for idx in candidates]
+            )[0]
+
+        def load(idx: int):
+            stats = self._get_stats(base_urls[idx])
+            weight = get_weight(idx)
+            return (
+                stats.in_flight / weight if weight > 0 else float("inf"),
+                stats.latency_ewma if stats.latency_ewma is not None else 0.0,
+                random.random(),
+            )
+
+        return min(candidates, key=load)
+
+    def track(self, url: str) -> UpstreamRequest:
+        return UpstreamRequest(self, url)
+
+    def get_stats(self) -> dict:
+        return {
+            "strategy": self.strategy,
+            "upstreams": {url: stats.to_dict() for url, stats in self._stats.items()},
+        }
+
+
+def get_connection_weights(url_idxs: list[int], base_urls: list[str], configs: dict):
+    """Per-connection "weight" from the API configs (default 1)."""
+    weights = {}
+    for idx in url_idxs:
+        config = configs.get(str(idx), configs.get(base_urls[idx], {}))  # Legacy
+        try:
+            weights[idx] = float(config.get("weight", 1))
+        except (TypeError, ValueError):
+            weights[idx] = 1.0
+    return weights
+
+
+def get_connection_group(idx: int, base_urls: list[str], configs: dict):
+    """
+    The connection's "balance_group" from the API configs. Only connections
+    in the same group serve a model id they share; None opts out.
+    """
+    config = configs.get(str(idx), configs.get(base_urls[idx], {}))  # Legacy
+    return config.get("balance_group") or None
+
+
+OLLAMA_BALANCER = UpstreamBalancer("ollama")
+OPENAI_BALANCER = UpstreamBalancer("openai")
@@ -0,0 +1,209 @@
+import asyncio
+import copy
+import logging
+from typing import Callable, Optional
+
+from open_webui.models.chats import Chats
+from open_webui.env import (
+    REALTIME_CHAT_SAVE_FLUSH_INTERVAL,
+    REALTIME_CHAT_SAVE_FLUSH_THRESHOLD,
+)
+
+log = logging.getLogger(__name__)
+
+
+class ChatSaveBuffer:
+    """
+    Write-behind buffer for realtime message saves.
+
+    Streamed updates are merged in memory per chat and written with a single
+    `Chats.upsert_messages_to_chat_by_id` call in a worker thread, either
+    `flush_interval` seconds after the first pending update or as soon as
+    `flush_threshold` bytes of new content have accumulated. Writes for the
+    same chat are applied in order.
+
+    `update` lets event handlers mutate a message against its stored state
+    plus whatever is still buffered for it, so a burst of events costs one
+    load and one write instead of a read-modify-write of the chat each.
+    """
+
+    def __init__(self, flush_interval: float, flush_threshold: int):
+        self.flush_interval = flush_interval
+        self.flush_threshold = flush_threshold
+
+        # chat_id -> {message_id: merged message fields}
+        self._pending: dict[str, dict[str, dict]] = {}
+        # chat_id -> bytes of content appended since the last flush
+        self._pending_bytes: dict[str, int] = {}
+        # (chat_id, message_id) -> length of the last buffered content
+        self._content_lengths: dict[tuple[str, str], int] = {}
+
+        # chat_id -> {message_id: stored message, None if it does not exist},
+        # replaced with a fresh dict whenever the stored chat may have changed
+        self._stored: dict[str, dict[str, Optional[dict]]] = {}
+
+        self._timers: dict[str, asyncio.Task] = {}
+        self._writes: dict[str, asyncio.Future] = {}
+
+    def add(self, chat_id: str, message_id: str, message: dict):
+        messages = self._pending.setdefault(chat_id, {})
+        messages[message_id] = {**messages.get(message_id, {}), **message}
+
+        content = message.get("content")
+        if isinstance(content, str):
+            key = (chat_id, message_id)
+            previous_length = self._content_lengths.get(key, 0)
+            self._content_lengths[key] = len(content)
+            self._pending_bytes[chat_id] = self._pending_bytes.get(chat_id, 0) + abs(
+                len(content) - previous_length
+            )
+
+        if self._pending_bytes.get(chat_id, 0) >= self.flush_threshold:
+            self._schedule(chat_id, 0)
+        elif chat_id not in self._timers:
+            self._schedule(chat_id, self.flush_interval)
+
+    def _schedule(self, chat_id: str, delay: float):
+        timer = self._timers.pop(chat_id, None)
+        if timer is not None:
+            timer.cancel()
+        self._timers[chat_id] = asyncio.create_task(self._flush_later(chat_id, delay))
+
+    async def _flush_later(self, chat_id: str, delay: float):
+        await asyncio.sleep(delay)
+        # Once the timer fired it must not be cancelled mid-write
+        self._timers.pop(chat_id, None)
+        try:
+            await self.flush(chat_id)
+        except Exception as e:
+            log.warning(f"Failed to flush realtime save for chat {chat_id}: {e}")
+
+    async def _write(self, chat_id: str, previous: Optional[asyncio.Future]):
+        if previous is not None:
+            try:
+                await previous
+            except Exception:
+                pass
+
+        messages = self._pending.pop(chat_id, None)
+        self._pending_bytes.pop(chat_id, None)
+        self._invalidate(chat_id)
+        if not messages:
+            return
+
+        # Buffered fields may reference live objects (e.g. the streamed output
+        # list) that keep changing on the loop while the thread serializes them.
+        messages = copy.deepcopy(messages)
+        await asyncio.to_thread(Chats.upsert_messages_to_chat_by_id, chat_id, messages)
+
+    async def flush(self, chat_id: str):
+        """Write all pending updates of a chat and wait for them to land."""
+        timer = self._timers.pop(chat_id, None)
+        if timer is not None:
+            timer.cancel()
+
+        write = asyncio.ensure_future(self._write(chat_id, self._writes.get(chat_id)))
+        self._writes[chat_id] = write
+        write.add_done_callback(lambda _: self._forget_write(chat_id, write))
+
+        # Shielded so a cancelled response still gets its content saved
+        await asyncio.shield(write)
+
+    def _forget_write(self, chat_id: str, write: asyncio.Future):
+        if self._writes.get(chat_id) is write:
+            del self._writes[chat_id]
+
+    def _invalidate(self, chat_id: str):
+        self._stored.pop(chat_id, None)
+
+    async def _load(self, chat_id: str, message_id: str) -> Optional[dict]:
+        for _ in range(3):
+            stored = self._stored.setdefault(chat_id, {})
+            if message_id in stored:
+                return stored[message_id]
+
+            write = self._writes.get(chat_id)
+            if write is not None:
+                try:
+                    await asyncio.shield(write)
+                except Exception:
+                    pass
+                continue
+
+            message = await asyncio.to_thread(
+                Chats.get_message_by_id_and_message_id, chat_id, message_id
+            )
+            message = message or None
+
+            # A write started (or a direct save landed) while loading, so the
+            # result may predate it; load again rather than cache it.
+            if self._stored.get(chat_id) is stored:
+                stored[message_id] = message
+                return message
+
+        # Still racing writes; use a fresh load without caching it
+        message = await asyncio.to_thread(
+            Chats.get_message_by_id_and_message_id, chat_id, message_id
+        )
+        return message or None
+
+    async def get_message(self, chat_id: str, message_id: str) -> Optional[dict]:
+        """The stored message with its buffered fields applied, or None."""
+        stored = await self._load(chat_id, message_id)
+        pending = self._pending.get(chat_id, {}).get(message_id)
+        if stored is None and pending is None:
+            return None
+        return {**(stored or {}), **(pending or {})}
+
+    async def update(
+        self,
+        chat_id: str,
+        message_id: str,
+        updater: Callable[[Optional[dict]], Optional[dict]],
+    ):
+        """
+        Buffer the fields `updater` returns for the current message.
+
+        `updater` must build new values instead of mutating the ones it is
+        given, which are shared with the buffer.
+        """
+        message = await self.get_message(chat_id, message_id)
+        fields = updater(message)
+        if fields:
+            self.add(chat_id, message_id, fields)
+
+    async def write_through(self, chat_id: str, write: Callable, *args, **kwargs):
+        """
+        Run a direct database write for a chat after its buffered updates.
+
+        Every direct message write for a chat goes through here (final
+        message saves, file appends, errors, follow-ups, user edits) so it
+        sees, and is not later overwritten by, buffered fields.
+        """
+        await self.flush(chat_id)
+        try:
+            return write(*args, **kwargs)
+        finally:
+            self._invalidate(chat_id)
+
+    async def close(self, chat_id: str, message_id: str):
+        """Flush a chat once its message finished streaming (or was cancelled)."""
+        self._content_lengths.pop((chat_id, message_id), None)
+        await self.flush(chat_id)
+
+    async def flush_all(self):
+        chat_ids = set(self._pending) | set(self._timers)
+        results = await asyncio.gather(
+            *(self.flush(chat_id) for chat_id in chat_ids), return_exceptions=True
+        )
+        for chat_id, result in zip(chat_ids, results):
+            if isinstance(result, Exception):
+                log.warning(
+                    f"Failed to flush realtime save for chat {chat_id}: {result}"
+                )
+
+
+CHAT_SAVE_BUFFER = ChatSaveBuffer(
+    flush_interval=REALTIME_CHAT_SAVE_FLUSH_INTERVAL,
+    flush_threshold=REALTIME_CHAT_SAVE_FLUSH_THRESHOLD,
+)
@@ -59,10 +59,14 @@ def get_sorted_filter_ids(request, model: dict, enabled_filter_ids: list = None)
     return filter_ids
 
 
-async def process_filter_functions(
-    request, filter_functions, filter_type, form_data, extra_params
-):
-    skip_files = None
+def prepare_filter_functions(request, filter_functions, filter_type, extra_params):
+    """
+    Resolve filter modules, valves, user valves and handler parameters once.
+
+    The result is passed to `run_filter_functions` for every payload, so a
+    stream filter costs no database lookups or signature inspection per chunk.
+    """
+    filters = []
 
     for function in filter_functions:
         filter = function
@@ -78,10 +82,6 @@ async def process_filter_functions(
         if not handler:
             continue
 
-        # Check if the function has a file_handler variable
-        if filter_type == "inlet" and hasattr(function_module, "file_handler"):
-            skip_files = function_module.file_handler
-
         # Apply valves to the function
         if hasattr(function_module, "valves") and hasattr(function_module, "Valves"):
             valves = Functions.get_function_valves_by_id(filter_id)
@@ -93,11 +93,7 @@ async def process_filter_functions(
             # Prepare parameters
             sig = inspect.signature(handler)
 
-            params = {"body": form_data}
-            if filter_type == "stream":
-                params = {"event": form_data}
-
-            params = params | {
+            params = {
                 k: v
                 for k, v in {
                     **extra_params,
@@ -110,24 +106,69 @@ async def process_filter_functions(
             if "__user__" in sig.parameters:
                 if hasattr(function_module, "UserValves"):
                     try:
-                        params["__user__"]["valves"] = function_module.UserValves(
-                            **Functions.get_user_valves_by_id_and_user_id(
-                                filter_id, params["__user__"]["id"]
-                            )
-                        )
+                        params["__user__"] = {
+                            **params["__user__"],
+                            "valves": function_module.UserValves(
+                                **Functions.get_user_valves_by_id_and_user_id(
+                                    filter_id, params["__user__"]["id"]
+                                )
+                            ),
+                        }
                     except Exception as e:
                         log.exception(f"Failed to get user values: {e}")
+        except Exception as e:
+            log.debug(f"Error in {filter_type} handler {filter_id}: {e}")
+            raise e
+
+        filters.append(
+            {
+                "id": filter_id,
+                "module": function_module,
+                "handler": handler,
+                "params": params,
+                "is_coroutine": inspect.iscoroutinefunction(handler),
+            }
+        )
+
+    return filters
+
+
+async def run_filter_functions(filters, filter_type, form_data):
+    """Pass `form_data` through filters prepared by `prepare_filter_functions`."""
+    key = "event" if filter_type == "stream" else "body"
+
+    for filter in filters:
+        try:
+            params = {key: form_data, **filter["params"]}
 
             # Execute handler
-            if inspect.iscoroutinefunction(handler):
-                form_data = await handler(**params)
+            if filter["is_coroutine"]:
+                form_data = await filter["handler"](**params)
             else:
-                form_data = handler(**params)
+                form_data = filter["handler"](**params)
 
         except Exception as e:
-            log.debug(f"Error in {filter_type} handler {filter_id}: {e}")
+            log.debug(f"Error in {filter_type} handler {filter['id']}: {e}")
             raise e
 
+    return form_data
+
+
+async def process_filter_functions(
+    request, filter_functions, filter_type, form_data, extra_params
+):
+    filters = prepare_filter_functions(
+        request, filter_functions, filter_type, extra_params
+    )
+    form_data = await run_filter_functions(filters, filter_type, form_data)
+
+    # Check if a function has a file_handler variable
+    skip_files = None
+    if filter_type == "inlet":
+        for filter in filters:
+            if hasattr(filter["module"], "file_handler"):
+                skip_files = filter["module"].file_handler
+
     # Handle file cleanup for inlet
     if skip_files:
         if "files" in form_data.get("metadata", {}):
@@ -0,0 +1,378 @@
+import asyncio
+import json
+import logging
+import os
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Optional
+
+from fastapi import Request
+
+from open_webui.config import KNOWLEDGE_REINDEX_CONCURRENCY
+from open_webui.env import DATA_DIR
+from open_webui.internal.db import get_db
+from open_webui.models.knowledge import Knowledges
+from open_webui.models.users import Users
+from open_webui.retrieval.vector.factory import VECTOR_DB_CLIENT
+from open_webui.routers.retrieval import ProcessFileForm, process_file
+from open_webui.socket.main import emit_to_users
+
+log = logging.getLogger(__name__)
+
+
+# A running job refreshes its heartbeat at least this often; one that stopped
+# refreshing for HEARTBEAT_TIMEOUT seconds is considered dead and resumable.
+HEARTBEAT_INTERVAL = 30
+HEARTBEAT_TIMEOUT = 120
+
+# The state file lock is only held to read and replace the file; one older
+# than this was left behind by a crashed process.
+STATE_LOCK_TIMEOUT = 10
+
+
+class ReindexJobLost(Exception):
+    """The persisted job was claimed by another process."""
+
+
+class KnowledgeReindexJob:
+    """
+    Background re-indexing of every knowledge base.
+
+    Knowledge bases are processed one after another, the files of each one
+    with up to `concurrency` running in parallel. Progress (a cursor over the
+    knowledge bases plus the files already done in the current one) is
+    persisted to `path` after every file, so a job interrupted by a crash or
+    restart resumes where it stopped instead of dropping every collection
+    again. Progress is also pushed to the admin who started the job as
+    `knowledge:reindex` socket events.
+    """
+
+    def __init__(self, path: Path, concurrency: int):
+        self.path = Path(path)
+        self.concurrency = max(concurrency, 1)
+        self.owner = uuid.uuid4().hex
+        self._task: Optional[asyncio.Task] = None
+        self._start_lock = asyncio.Lock()
+
+    def load_state(self) -> Optional[dict]:
+        try:
+            return json.loads(self.path.read_text())
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            log.warning(f"Ignoring unreadable reindex state {self.path}: {e}")
+            return None
+
+    def _write_state(self, data: str):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(f"{self.path.name}.{uuid.uuid4().hex}.tmp")
+        tmp_path.write_text(data)
+        os.replace(tmp_path, self.path)
+
+    @contextmanager
+    def _state_lock(self):
+        # Workers share the state file, so its read-modify-write is guarded
+        # by a lock file that only one process can create
+        lock_path = self.path.with_name(f"{self.path.name}.lock")
+        lock_path.parent.mkdir(parents=True, exist_ok=True)
+        deadline = time.time() + 2 * STATE_LOCK_TIMEOUT
+        while True:
+            try:
+                os.close(os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+                break
+            except FileExistsError:
+                try:
+                    if time.time() - lock_path.stat().st_mtime > STATE_LOCK_TIMEOUT:
+                        lock_path.unlink(missing_ok=True)
+                        continue
+                except FileNotFoundError:
+                    continue
+                if time.time() > deadline:
+                    raise TimeoutError(f"Timed out waiting for {lock_path}")
+                time.sleep(0.05)
+        try:
+            yield
+        finally:
+            lock_path.unlink(missing_ok=True)
+
+    def _compare_and_write(
+        self, expected: Callable[[Optional[dict]], bool], data: str
+    ) -> tuple[bool, Optional[dict]]:
+        """
+        Replace the persisted state with `data` if `expected(current state)`
+        holds, atomically across processes. Returns whether it was written
+        and the state that was found.
+        """
+        with self._state_lock():
+            current = self.load_state()
+            if not expected(current):
+                return False, current
+            self._write_state(data)
+            return True, current
+
+    def _owns(self, state: dict, current: Optional[dict]) -> bool:
+        return bool(
+            current
+            and current.get("id") == state["id"]
+            and current.get("owner") == self.owner
+        )
+
+    async def _save(self, state: dict, emit: bool = True):
+        state["owner"] = self.owner
+        state["heartbeat_at"] = int(time.time())
+        # Serialized on the loop so the snapshot is consistent
+        written, _ = await asyncio.to_thread(
+            self._compare_and_write,
+            lambda current: self._owns(state, current),
+            json.dumps(state),
+        )
+        if not written:
+            raise ReindexJobLost(f"Knowledge reindex {state['id']} was taken over")
+
+        if emit:
+            await emit_to_users(
+                "knowledge:reindex", get_status(state), [state["user_id"]]
+            )
+
+    def is_running(self, state: Optional[dict] = None) -> bool:
+        state = state if state is not None else self.load_state()
+        return bool(
+            state
+            and state.get("status") == "running"
+            and time.time() - state.get("heartbeat_at", 0) < HEARTBEAT_TIMEOUT
+        )
+
+    async def start(self, request: Request, user) -> dict:
+        async with self._start_lock:
+            if self._task is not None and not self._task.done():
+                return get_status(self.load_state())
+
+            # Claim the job before listing files, so concurrent requests (here
+            # or in other workers) see it running and don't start their own
+            state = {
+                "id": str(uuid.uuid4()),
+                "status": "running",
+                "user_id": user.id,
+                "knowledge_base_ids": [],
+                "cursor": 0,
+                "current": None,
+                "total_files": 0,
+                "processed_files": 0,
+                "failed_files": [],
+                "started_at": int(time.time()),
+                "completed_at": None,
+                "owner": self.owner,
+                "heartbeat_at": int(time.time()),
+            }
+            claimed, current = await asyncio.to_thread(
+                self._compare_and_write,
+                lambda current: not self.is_running(current),
+                json.dumps(state),
+            )
+            if not claimed:
+                log.info(f"Knowledge reindex {current['id']} is already running")
+                return get_status(current)
+
+            try:
+                knowledge_bases = await asyncio.to_thread(
+                    Knowledges.get_knowledge_bases
+                )
+                for knowledge_base in knowledge_bases:
+                    state["total_files"] += len(
+                        await asyncio.to_thread(
+                            Knowledges.get_files_by_id, knowledge_base.id
+                        )
+                    )
+                state["knowledge_base_ids"] = [kb.id for kb in knowledge_bases]
+                await self._save(state)
+            except Exception as e:
+                state["status"] = "failed"
+                state["error"] = str(e)
+                state["completed_at"] = int(time.time())
+                await self._save(state, emit=False)
+                raise
+
+            log.info(
+                f"Starting reindexing for {len(knowledge_bases)} knowledge bases "
+                f"({state['total_files']} files)"
+            )
+            self._task = asyncio.create_task(self._run(request, state))
+            return get_status(state)
+
+    async def resume(self, request: Request):
+        """Pick up a job left running by a stopped process, once it stops heartbeating."""
+        while True:
+            state = self.load_state()
+            if not state or state.get("status") != "running":
+                return
+            if state.get("owner") == self.owner and self._task is not None:
+                return
+
+            stale_in = state.get("heartbeat_at", 0) + HEARTBEAT_TIMEOUT - time.time()
+            if stale_in <= 0:
+                break
+            await asyncio.sleep(stale_in + 1)
+
+        # Claim the job unless another process claimed or refreshed it first
+        stale = state
+        state = {**stale, "owner": self.owner, "heartbeat_at": int(time.time())}
+        claimed, _ = await asyncio.to_thread(
+            self._compare_and_write,
+            lambda current: bool(current)
+            and all(
+                current.get(key) == stale.get(key)
+                for key in ("id", "owner", "heartbeat_at")
+            ),
+            json.dumps(state),
+        )
+        if not claimed:
+            return
+
+        log.info(
+            f"Resuming knowledge reindex {state['id']} at knowledge base "
+            f"{state['cursor'] + 1}/{len(state['knowledge_base_ids'])}"
+        )
+        self._task = asyncio.create_task(self._run(request, state))
+
+    async def _heartbeat(self, state: dict):
+        while True:
+            await asyncio.sleep(HEARTBEAT_INTERVAL)
+            try:
+                await self._save(state, emit=False)
+            except ReindexJobLost:
+                return
+
+    async def _run(self, request: Request, state: dict):
+        heartbeat = asyncio.create_task(self._heartbeat(state))
+        try:
+            user = await asyncio.to_thread(Users.get_user_by_id, state["user_id"])
+            if user is None:
+                raise ValueError(f"User {state['user_id']} not found")
+
+            knowledge_base_ids = state["knowledge_base_ids"]
+            while state["cursor"] < len(knowledge_base_ids):
+                await self._reindex_knowledge_base(
+                    request, user, state, knowledge_base_ids[state["cursor"]]
+                )
+                state["cursor"] += 1
+                state["current"] = None
+                await self._save(state)
+
+            state["status"] = "completed"
+            log.info(
+                f"Reindexing completed: {state['processed_files']} files, "
+                f"{len(state['failed_files'])} failed"
+            )
+        except asyncio.CancelledError:
+            # Shutdown; leave the job running so it resumes on the next start
+            raise
+        except ReindexJobLost as e:
+            # Stalled long enough for another process to resume it
+            log.warning(str(e))
+            return
+        except Exception as e:
+            log.exception(f"Knowledge reindex {state['id']} failed: {e}")
+            state["status"] = "failed"
+            state["error"] = str(e)
+        finally:
+            heartbeat.cancel()
+
+        state["completed_at"] = int(time.time())
+        try:
+            await self._save(state)
+        except ReindexJobLost as e:
+            log.warning(str(e))
+
+    async def _reindex_knowledge_base(
+        self, request: Request, user, state: dict, knowledge_base_id: str
+    ):
+        current = state.get("current")
+        if not current or current.get("id") != knowledge_base_id:
+            # First visit: start from an empty collection. On resume the
+            # collection already holds the files listed as done.
+            try:
+                await asyncio.to_thread(self._drop_collection, knowledge_base_id)
+            except Exception as e:
+                log.error(f"Error deleting collection {knowledge_base_id}: {e}")
+                return  # Skip, don't raise
+
+            current = {"id": knowledge_base_id, "done_file_ids": []}
+            state["current"] = current
+            await self._save(state)
+
+        done_file_ids = set(current["done_file_ids"])
+        files = await asyncio.to_thread(Knowledges.get_files_by_id, knowledge_base_id)
+        pending = [file for file in files if file.id not in done_file_ids]
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def reindex_file(file):
+            async with semaphore:
+                try:
+                    await asyncio.to_thread(
+                        self._process_file, request, user, knowledge_base_id, file.id
+                    )
+                except Exception as e:
+                    log.error(
+                        f"Error processing file {file.filename} (ID: {file.id}): {e}"
+                    )
+                    state["failed_files"].append(
+                        {
+                            "knowledge_base_id": knowledge_base_id,
+                            "file_id": file.id,
+                            "error": str(e),
+                        }
+                    )
+
+                current["done_file_ids"].append(file.id)
+                state["processed_files"] += 1
+                await self._save(state)
+
+        await asyncio.gather(*(reindex_file(file) for file in pending))
+
+    @staticmethod
+    def _drop_collection(collection_name: str):
+        if VECTOR_DB_CLIENT.has_collection(collection_name=collection_name):
+            VECTOR_DB_CLIENT.delete_collection(collection_name=collection_name)
+
+    @staticmethod
+    def _process_file(request: Request, user, knowledge_base_id: str, file_id: str):
+        # A short-lived session per file instead of one held for the whole job
+        with get_db() as db:
+            process_file(
+                request,
+                ProcessFileForm(file_id=file_id, collection_name=knowledge_base_id),
+                user=user,
+                db=db,
+            )
+
+
+def get_status(state: Optional[dict]) -> dict:
+    if not state:
+        return {"status": "idle"}
+
+    return {
+        key: state.get(key)
+        for key in [
+            "id",
+            "status",
+            "total_files",
+            "processed_files",
+            "failed_files",
+            "started_at",
+            "completed_at",
+            "error",
+        ]
+    } | {
+        "knowledge_bases": len(state.get("knowledge_base_ids", [])),
+        "processed_knowledge_bases": state.get("cursor", 0),
+        "current_knowledge_base_id": (state.get("current") or {}).get("id"),
+    }
+
+
+KNOWLEDGE_REINDEX_JOB = KnowledgeReindexJob(
+    Path(DATA_DIR) / "knowledge_reindex.json",
+    concurrency=KNOWLEDGE_REINDEX_CONCURRENCY,
+)
@@ -0,0 +1,60 @@
+import asyncio
+import logging
+import time
+from typing import Optional
+
+from open_webui.env import USER_LAST_ACTIVE_FLUSH_INTERVAL
+from open_webui.models.users import Users
+
+log = logging.getLogger(__name__)
+
+
+class LastActiveBuffer:
+    """
+    Batches `last_active_at` updates of authenticated users.
+
+    Users seen during `flush_interval` seconds are written with a single
+    bulk UPDATE instead of one per request.
+    """
+
+    def __init__(self, flush_interval: float):
+        self.flush_interval = flush_interval
+
+        self._pending: set[str] = set()
+        self._timer: Optional[asyncio.Task] = None
+
+    def touch(self, user_id: str):
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            # Outside the event loop there is nothing to flush the buffer
+            Users.update_last_active_by_id(user_id)
+            return
+
+        self._pending.add(user_id)
+        if self._timer is None:
+            self._timer = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.flush_interval)
+        self._timer = None
+        try:
+            await self.flush()
+        except Exception as e:
+            log.warning(f"Failed to update last active timestamps: {e}")
+
+    async def flush(self):
+        user_ids, self._pending = list(self._pending), set()
+        if user_ids:
+            await asyncio.to_thread(
+                Users.update_last_active_by_ids, user_ids, int(time.time())
+            )
+
+    async def close(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        await self.flush()
+
+
+LAST_ACTIVE_BUFFER = LastActiveBuffer(flush_interval=USER_LAST_ACTIVE_FLUSH_INTERVAL)
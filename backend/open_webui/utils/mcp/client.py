@@ -1,5 +1,5 @@
 import asyncio
-from typing import Optional
+from typing import Callable, Optional
 from contextlib import AsyncExitStack
 
 import anyio
@@ -37,7 +37,12 @@ class MCPClient:
         self.session: Optional[ClientSession] = None
         self.exit_stack = None
 
-    async def connect(self, url: str, headers: Optional[dict] = None):
+    async def connect(
+        self,
+        url: str,
+        headers: Optional[dict] = None,
+        message_handler: Optional[Callable] = None,
+    ):
         async with AsyncExitStack() as exit_stack:
             try:
                 if AIOHTTP_CLIENT_SESSION_TOOL_SERVER_SSL:
@@ -53,7 +58,7 @@ class MCPClient:
                 read_stream, write_stream, _ = transport
 
                 self._session_context = ClientSession(
-                    read_stream, write_stream
+                    read_stream, write_stream, message_handler=message_handler
                 )  # pylint: disable=W0201
 
                 self.session = await exit_stack.enter_async_context(
@@ -133,7 +138,10 @@ class MCPClient:
 
     async def disconnect(self):
         # Clean up and close the session
-        await self.exit_stack.aclose()
+        if self.exit_stack is not None:
+            exit_stack, self.exit_stack = self.exit_stack, None
+            self.session = None
+            await exit_stack.aclose()
 
     async def __aenter__(self):
         await self.exit_stack.__aenter__()
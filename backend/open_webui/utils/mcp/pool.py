@@ -0,0 +1,400 @@
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from typing import Optional
+
+from mcp import types
+
+from open_webui.env import (
+    MCP_SESSION_POOL_HEALTH_CHECK_INTERVAL,
+    MCP_SESSION_POOL_IDLE_TIMEOUT,
+    MCP_TOOL_SPECS_CACHE_TTL,
+)
+from open_webui.utils.mcp.client import MCPClient
+
+log = logging.getLogger(__name__)
+
+
+# Seconds to wait for a ping before a pooled session is considered broken
+HEALTH_CHECK_TIMEOUT = 5
+# Seconds to wait for a session's transport to shut down
+CLOSE_TIMEOUT = 5
+
+
+class MCPSession:
+    """
+    One MCP connection shared by every chat with the same server and auth.
+
+    The connection is opened and closed by a dedicated task, because the
+    transport's task groups must be exited by the task that entered them;
+    requests from chat tasks go through the session concurrently.
+    """
+
+    def __init__(
+        self,
+        key: tuple,
+        url: str,
+        headers: Optional[dict],
+        tool_specs_ttl: float,
+        pooled: bool = True,
+    ):
+        self.key = key
+        self.url = url
+        self.headers = headers
+        self.tool_specs_ttl = tool_specs_ttl
+        self.pooled = pooled
+
+        self.client = MCPClient()
+        self.leases = 0
+        self.last_used = time.monotonic()
+        self.last_checked = time.monotonic()
+
+        self._tool_specs: Optional[list] = None
+        self._tool_specs_expires_at = 0.0
+        self._tool_specs_lock = asyncio.Lock()
+
+        self._connected = False
+        self._closed = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def server_id(self) -> str:
+        return self.key[0]
+
+    async def start(self):
+        ready = asyncio.get_running_loop().create_future()
+        self._task = asyncio.create_task(self._run(ready))
+        try:
+            await ready
+        except asyncio.CancelledError:
+            # Nobody will lease the session; close it once it connects
+            self._closed.set()
+            raise
+
+    async def _run(self, ready: asyncio.Future):
+        try:
+            await self.client.connect(
+                url=self.url,
+                headers=self.headers,
+                message_handler=self._handle_message,
+            )
+        except Exception as e:
+            if not ready.done():
+                ready.set_exception(e)
+            return
+
+        try:
+            self._connected = True
+            # Cancelled along with the task awaiting start()
+            if not ready.done():
+                ready.set_result(None)
+            await self._closed.wait()
+        finally:
+            self._connected = False
+            try:
+                await self.client.disconnect()
+            except Exception as e:
+                log.debug(f"Error closing MCP session {self.server_id}: {e}")
+
+    async def _handle_message(self, message):
+        if isinstance(message, types.ServerNotification) and isinstance(
+            message.root, types.ToolListChangedNotification
+        ):
+            self._tool_specs = None
+        elif isinstance(message, Exception):
+            log.debug(f"MCP session {self.server_id} error: {message}")
+
+    @property
+    def connected(self) -> bool:
+        return self._connected and self._task is not None and not self._task.done()
+
+    async def check(self, force: bool = False) -> bool:
+        """Ping the server if the session sat idle past the health check interval."""
+        if not self.connected:
+            return False
+
+        now = time.monotonic()
+        if (
+            not force
+            and now - self.last_checked < MCP_SESSION_POOL_HEALTH_CHECK_INTERVAL
+        ):
+            return True
+
+        try:
+            await asyncio.wait_for(
+                self.client.session.send_ping(), timeout=HEALTH_CHECK_TIMEOUT
+            )
+        except Exception as e:
+            log.debug(f"MCP session {self.server_id} failed health check: {e}")
+            return False
+
+        self.last_checked = time.monotonic()
+        return True
+
+    async def list_tool_specs(self) -> tuple[list, bool]:
+        """Tool specs and whether they were served from the cache."""
+        if (
+            self._tool_specs is not None
+            and time.monotonic() < self._tool_specs_expires_at
+        ):
+            return self._tool_specs, True
+
+        async with self._tool_specs_lock:
+            if (
+                self._tool_specs is not None
+                and time.monotonic() < self._tool_specs_expires_at
+            ):
+                return self._tool_specs, True
+
+            tool_specs = await self.client.list_tool_specs()
+            self._tool_specs = tool_specs
+            self._tool_specs_expires_at = time.monotonic() + self.tool_specs_ttl
+            return tool_specs, False
+
+    async def close(self):
+        self._closed.set()
+        if self._task is not None and not self._task.done():
+            try:
+                await asyncio.wait_for(asyncio.shield(self._task), CLOSE_TIMEOUT)
+            except Exception as e:
+                log.debug(f"Timed out closing MCP session {self.server_id}: {e}")
+
+
+class MCPSessionLease:
+    """
+    A chat's handle on a pooled session, with the `MCPClient` interface the
+    tool callables use. `disconnect` returns the session to the pool.
+    """
+
+    def __init__(self, pool: "MCPSessionPool", session: MCPSession):
+        self.pool = pool
+        self.session = session
+        self._released = False
+
+    async def list_tool_specs(self) -> list:
+        return await self.pool.list_tool_specs(self.session)
+
+    async def _call(self, method: str, *args):
+        try:
+            return await getattr(self.session.client, method)(*args)
+        except Exception:
+            # Errors reported by a healthy server (e.g. a failing tool) are final
+            if await self.session.check(force=True):
+                raise
+
+        # The connection broke, e.g. the server restarted or expired the
+        # session; requests on a dead session never reach the server, so
+        # retry once on a fresh one
+        self.session = await self.pool.reconnect(self.session)
+        return await getattr(self.session.client, method)(*args)
+
+    async def call_tool(self, function_name: str, function_args: dict):
+        return await self._call("call_tool", function_name, function_args)
+
+    async def list_resources(self, cursor: Optional[str] = None):
+        return await self._call("list_resources", cursor)
+
+    async def read_resource(self, uri: str):
+        return await self._call("read_resource", uri)
+
+    async def disconnect(self):
+        if self._released:
+            return
+        self._released = True
+        await self.pool.release(self.session)
+
+
+class MCPSessionPool:
+    """
+    Keeps MCP sessions open across chat requests.
+
+    Sessions are keyed by server id, URL and request headers (which carry the
+    auth token and forwarded user info), so a session is only shared by chats
+    that would have connected with the same identity. Unused sessions close
+    after `idle_timeout` seconds; sessions idle past the health check interval
+    are pinged before reuse and replaced if the ping fails.
+    """
+
+    def __init__(
+        self,
+        idle_timeout: float,
+        tool_specs_ttl: float,
+    ):
+        self.idle_timeout = idle_timeout
+        self.tool_specs_ttl = tool_specs_ttl
+
+        self._sessions: dict[tuple, MCPSession] = {}
+        self._locks: dict[tuple, asyncio.Lock] = {}
+        self._sweeper: Optional[asyncio.Task] = None
+        self._stats = {
+            "connects": 0,
+            "reuses": 0,
+            "reconnects": 0,
+            "tool_specs_hits": 0,
+            "tool_specs_misses": 0,
+        }
+
+    @staticmethod
+    def get_key(server_id: str, url: str, headers: Optional[dict]) -> tuple:
+        identity = hashlib.sha256(
+            json.dumps(headers or {}, sort_keys=True).encode()
+        ).hexdigest()
+        return (server_id, url, identity)
+
+    async def _connect(
+        self, key: tuple, url: str, headers: Optional[dict], pooled: bool = True
+    ):
+        session = MCPSession(
+            key,
+            url,
+            headers,
+            tool_specs_ttl=self.tool_specs_ttl,
+            pooled=pooled,
+        )
+        await session.start()
+        self._stats["connects"] += 1
+        return session
+
+    async def acquire(
+        self,
+        server_id: str,
+        url: str,
+        headers: Optional[dict] = None,
+        pooled: bool = True,
+    ) -> MCPSessionLease:
+        """
+        Lease a session for one chat. Pass `pooled=False` when the headers are
+        specific to this request (e.g. forwarded chat and message ids).
+        """
+        key = self.get_key(server_id, url, headers)
+
+        if self.idle_timeout <= 0 or not pooled:
+            session = await self._connect(key, url, headers, pooled=False)
+            session.leases += 1
+            return MCPSessionLease(self, session)
+
+        async with self._locks.setdefault(key, asyncio.Lock()):
+            session = self._sessions.get(key)
+            if session is not None and not await session.check():
+                self._stats["reconnects"] += 1
+                self._discard(session)
+                session = None
+
+            if session is None:
+                session = await self._connect(key, url, headers)
+                self._sessions[key] = session
+            else:
+                self._stats["reuses"] += 1
+
+            session.leases += 1
+            session.last_used = time.monotonic()
+
+        if self._sweeper is None or self._sweeper.done():
+            self._sweeper = asyncio.create_task(self._sweep())
+
+        return MCPSessionLease(self, session)
+
+    async def reconnect(self, session: MCPSession) -> MCPSession:
+        """Move a lease off a broken session onto a new one for the same key."""
+        self._stats["reconnects"] += 1
+
+        if not session.pooled:
+            current = await self._connect(
+                session.key, session.url, session.headers, pooled=False
+            )
+            current.leases += 1
+            await self.release(session)
+            return current
+
+        async with self._locks.setdefault(session.key, asyncio.Lock()):
+            current = self._sessions.get(session.key)
+            if current is session or current is None or not current.connected:
+                if current is not None:
+                    self._discard(current)
+                current = await self._connect(session.key, session.url, session.headers)
+                self._sessions[session.key] = current
+
+            current.leases += 1
+            current.last_used = time.monotonic()
+
+        await self.release(session)
+        return current
+
+    async def release(self, session: MCPSession):
+        session.leases -= 1
+        session.last_used = time.monotonic()
+
+        # Sessions no longer in the pool (replaced, cleared or unpooled) close
+        # with their last lease
+        if session.leases <= 0 and self._sessions.get(session.key) is not session:
+            await session.close()
+
+    def _discard(self, session: MCPSession):
+        if self._sessions.get(session.key) is session:
+            self._sessions.pop(session.key, None)
+        if session.leases <= 0:
+            asyncio.create_task(session.close())
+
+    async def list_tool_specs(self, session: MCPSession) -> list:
+        tool_specs, cached = await session.list_tool_specs()
+        self._stats["tool_specs_hits" if cached else "tool_specs_misses"] += 1
+        return tool_specs
+
+    async def _sweep(self):
+        interval = min(self.idle_timeout, 60)
+        while self._sessions:
+            await asyncio.sleep(interval)
+
+            now = time.monotonic()
+            for key, session in list(self._sessions.items()):
+                if session.leases <= 0 and (
+                    now - session.last_used > self.idle_timeout or not session.connected
+                ):
+                    self._sessions.pop(key, None)
+                    lock = self._locks.get(key)
+                    if lock is not None and not lock.locked():
+                        self._locks.pop(key, None)
+                    await session.close()
+
+    async def clear(self):
+        """Close idle sessions; sessions in use close when released."""
+        sessions, self._sessions = list(self._sessions.values()), {}
+        for session in sessions:
+            if session.leases <= 0:
+                await session.close()
+
+    async def close(self):
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+            self._sweeper = None
+        await self.clear()
+
+    def get_stats(self) -> dict:
+        sessions = list(self._sessions.values())
+        return {
+            "sessions": len(sessions),
+            "in_use": sum(1 for session in sessions if session.leases > 0),
+            "leases": sum(max(session.leases, 0) for session in sessions),
+            **self._stats,
+            "servers": [
+                {
+                    "id": session.server_id,
+                    "leases": max(session.leases, 0),
+                    "connected": session.connected,
+                    "idle_seconds": (
+                        round(time.monotonic() - session.last_used, 1)
+                        if session.leases <= 0
+                        else 0
+                    ),
+                }
+                for session in sessions
+            ],
+        }
+
+
+MCP_SESSION_POOL = MCPSessionPool(
+    idle_timeout=MCP_SESSION_POOL_IDLE_TIMEOUT,
+    tool_specs_ttl=MCP_TOOL_SPECS_CACHE_TTL,
+)
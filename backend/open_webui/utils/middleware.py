@@ -11,7 +11,6 @@ from aiocache import cached
 from typing import Any, Optional
 import random
 import json
-import html
 import inspect
 import re
 import ast
@@ -23,6 +22,7 @@ from concurrent.futures import ThreadPoolExecutor
 from fastapi import Request, HTTPException
 from fastapi.responses import HTMLResponse
 from starlette.responses import Response, StreamingResponse, JSONResponse
+from opentelemetry import trace
 
 
 from open_webui.utils.misc import is_string_allowed
@@ -72,6 +72,7 @@ from open_webui.models.functions import Functions
 from open_webui.models.models import Models
 
 from open_webui.retrieval.utils import get_sources_from_items
+from open_webui.retrieval.embedding_cache import start_query_embedding_memo
 
 
 from open_webui.utils.sanitize import sanitize_code
@@ -107,12 +108,16 @@ from open_webui.utils.access_control import has_connection_access
 from open_webui.utils.plugin import load_function_module_by_id
 from open_webui.utils.filter import (
     get_sorted_filter_ids,
+    prepare_filter_functions,
     process_filter_functions,
+    run_filter_functions,
 )
 from open_webui.utils.code_interpreter import execute_code_jupyter
 from open_webui.utils.payload import apply_system_prompt_to_body
 from open_webui.utils.response import normalize_usage
-from open_webui.utils.mcp.client import MCPClient
+from open_webui.utils.output import OutputSerializer, serialize_output
+from open_webui.utils.chat_save import CHAT_SAVE_BUFFER
+from open_webui.utils.mcp.pool import MCP_SESSION_POOL
 
 
 from open_webui.config import (
@@ -141,6 +146,7 @@ from open_webui.constants import TASKS
 
 logging.basicConfig(stream=sys.stdout, level=GLOBAL_LOG_LEVEL)
 log = logging.getLogger(__name__)
+tracer = trace.get_tracer(__name__)
 
 
 DEFAULT_REASONING_TAGS = [
@@ -386,154 +392,6 @@ def get_citation_source_from_tool_result(
         ]
 
 
-def split_content_and_whitespace(content):
-    content_stripped = content.rstrip()
-    original_whitespace = (
-        content[len(content_stripped) :] if len(content) > len(content_stripped) else ""
-    )
-    return content_stripped, original_whitespace
-
-
-def is_opening_code_block(content):
-    backtick_segments = content.split("```")
-    # Even number of segments means the last backticks are opening a new block
-    return len(backtick_segments) > 1 and len(backtick_segments) % 2 == 0
-
-
-def serialize_output(output: list) -> str:
-    """
-    Convert OR-aligned output items to HTML for display.
-    For LLM consumption, use convert_output_to_messages() instead.
-    """
-    content = ""
-
-    # First pass: collect function_call_output items by call_id for lookup
-    tool_outputs = {}
-    for item in output:
-        if item.get("type") == "function_call_output":
-            tool_outputs[item.get("call_id")] = item
-
-    # Second pass: render items in order
-    for idx, item in enumerate(output):
-        item_type = item.get("type", "")
-
-        if item_type == "message":
-            for content_part in item.get("content", []):
-                if "text" in content_part:
-                    text = content_part.get("text", "").strip()
-                    if text:
-                        content = f"{content}{text}\n"
-
-        elif item_type == "function_call":
-            # Render tool call inline with its result (if available)
-            if content and not content.endswith("\n"):
-                content += "\n"
-
-            call_id = item.get("call_id", "")
-            name = item.get("name", "")
-            arguments = item.get("arguments", "")
-
-            result_item = tool_outputs.get(call_id)
-            if result_item:
-                result_text = ""
-                for result_output in result_item.get("output", []):
-                    if "text" in result_output:
-                        output_text = result_output.get("text", "")
-                        result_text += (
-                            str(output_text)
-                            if not isinstance(output_text, str)
-                            else output_text
-                        )
-                files = result_item.get("files")
-                embeds = result_item.get("embeds", "")
-
-                content += f'<details type="tool_calls" done="true" id="{call_id}" name="{name}" arguments="{html.escape(json.dumps(arguments))}" result="{html.escape(json.dumps(result_text, ensure_ascii=False))}" files="{html.escape(json.dumps(files)) if files else ""}" embeds="{html.escape(json.dumps(embeds))}">\n<summary>Tool Executed</summary>\n</details>\n'
-            else:
-                content += f'<details type="tool_calls" done="false" id="{call_id}" name="{name}" arguments="{html.escape(json.dumps(arguments))}">\n<summary>Executing...</summary>\n</details>\n'
-
-        elif item_type == "function_call_output":
-            # Already handled inline with function_call above
-            pass
-
-        elif item_type == "reasoning":
-            reasoning_content = ""
-            # Check for 'summary' (new structure) or 'content' (legacy/fallback)
-            source_list = item.get("summary", []) or item.get("content", [])
-            for content_part in source_list:
-                if "text" in content_part:
-                    reasoning_content += content_part.get("text", "")
-                elif "summary" in content_part:  # Handle potential nested logic if any
-                    pass
-
-            reasoning_content = reasoning_content.strip()
-
-            duration = item.get("duration")
-            status = item.get("status", "in_progress")
-
-            # Infer completion: if this reasoning item is NOT the last item,
-            # render as done (a subsequent item means reasoning is complete)
-            is_last_item = idx == len(output) - 1
-
-            if content and not content.endswith("\n"):
-                content += "\n"
-
-            display = html.escape(
-                "\n".join(
-                    (f"> {line}" if not line.startswith(">") else line)
-                    for line in reasoning_content.splitlines()
-                )
-            )
-
-            if status == "completed" or duration is not None or not is_last_item:
-                content = f'{content}<details type="reasoning" done="true" duration="{duration or 0}">\n<summary>Thought for {duration or 0} seconds</summary>\n{display}\n</details>\n'
-            else:
-                content = f'{content}<details type="reasoning" done="false">\n<summary>Thinking…</summary>\n{display}\n</details>\n'
-
-        elif item_type == "open_webui:code_interpreter":
-            content_stripped, original_whitespace = split_content_and_whitespace(
-                content
-            )
-            if is_opening_code_block(content_stripped):
-                content = content_stripped.rstrip("`").rstrip() + original_whitespace
-            else:
-                content = content_stripped + original_whitespace
-
-            if content and not content.endswith("\n"):
-                content += "\n"
-
-            # Render the code_interpreter item as a <details> block
-            # so the frontend Collapsible renders "Analyzing..."/"Analyzed".
-            code = item.get("code", "").strip()
-            lang = item.get("lang", "python")
-            status = item.get("status", "in_progress")
-            duration = item.get("duration")
-            is_last_item = idx == len(output) - 1
-
-            # Build inner content: code block
-            display = ""
-            if code:
-                display = f"```{lang}\n{code}\n```"
-
-            # Build output attribute as HTML-escaped JSON for CodeBlock.svelte
-            ci_output = item.get("output")
-            output_attr = ""
-            if ci_output:
-                if isinstance(ci_output, dict):
-                    output_json = json.dumps(ci_output, ensure_ascii=False)
-                else:
-                    output_json = json.dumps(
-                        {"result": str(ci_output)}, ensure_ascii=False
-                    )
-                output_attr = f' output="{html.escape(output_json)}"'
-
-            if status == "completed" or duration is not None or not is_last_item:
-                content += f'<details type="code_interpreter" done="true" duration="{duration or 0}"{output_attr}>\n<summary>Analyzed</summary>\n{display}\n</details>\n'
-            else:
-                content += f'<details type="code_interpreter" done="false"{output_attr}>\n<summary>Analyzing…</summary>\n{display}\n</details>\n'
-
-    return content.strip()
-
-
 def deep_merge(target, source):
     """
     Merge source into target recursively (returning new structure).
@@ -1403,15 +1261,13 @@ async def chat_completion_tools_handler(
     return body, {"sources": sources}
 
 
-async def chat_memory_handler(
-    request: Request, form_data: dict, extra_params: dict, user
-):
+async def get_memory_context(request: Request, user_message: str, user) -> str:
     try:
         results = await query_memory(
             request,
             QueryMemoryForm(
                 **{
-                    "content": get_last_user_message(form_data["messages"]) or "",
+                    "content": user_message or "",
                     "k": 3,
                 }
             ),
@@ -1435,6 +1291,21 @@ async def chat_memory_handler(
 
                 user_context += f"{doc_idx + 1}. [{created_at_date}] {doc}\n"
 
+    return user_context
+
+
+async def chat_memory_handler(
+    request: Request,
+    form_data: dict,
+    extra_params: dict,
+    user,
+    user_context: Optional[str] = None,
+):
+    if user_context is None:
+        user_context = await get_memory_context(
+            request, get_last_user_message(form_data["messages"]), user
+        )
+
     form_data["messages"] = add_or_update_system_message(
         f"User Context:\n{user_context}\n", form_data["messages"], append=True
     )
@@ -1692,15 +1563,16 @@ def add_file_context(messages: list, chat_id: str, user) -> list:
     return messages
 
 
-async def chat_image_generation_handler(
+async def get_image_generation_context(
     request: Request, form_data: dict, extra_params: dict, user
-):
+) -> str:
+    """Generate the requested images; returns the system context to add."""
     metadata = extra_params.get("__metadata__", {})
     chat_id = metadata.get("chat_id", None)
     __event_emitter__ = extra_params.get("__event_emitter__", None)
 
     if not chat_id or not isinstance(chat_id, str) or not __event_emitter__:
-        return form_data
+        return ""
 
     if chat_id.startswith("local:"):
         message_list = form_data.get("messages", [])
@@ -1880,6 +1752,21 @@ async def chat_image_generation_handler(
 
             system_message_content = f"<context>Image generation was attempted but failed because of an error. The system is currently unable to generate the image. Tell the user that the following error occurred: {error_message}</context>"
 
+    return system_message_content
+
+
+async def chat_image_generation_handler(
+    request: Request,
+    form_data: dict,
+    extra_params: dict,
+    user,
+    system_message_content: Optional[str] = None,
+):
+    if system_message_content is None:
+        system_message_content = await get_image_generation_context(
+            request, form_data, extra_params, user
+        )
+
     if system_message_content:
         form_data["messages"] = add_or_update_system_message(
             system_message_content, form_data["messages"]
@@ -2103,11 +1990,7 @@ def load_messages_from_db(chat_id: str, message_id: str) -> Optional[list[dict]]
     Load the message chain from DB up to message_id,
     keeping only LLM-relevant fields (role, content, output).
     """
-    messages_map = Chats.get_messages_map_by_chat_id(chat_id)
-    if not messages_map:
-        return None
-
-    db_messages = get_message_list(messages_map, message_id)
+    db_messages = Chats.get_message_list_by_id_and_message_id(chat_id, message_id)
     if not db_messages:
         return None
 
@@ -2141,6 +2024,216 @@ def process_messages_with_output(messages: list[dict]) -> list[dict]:
     return processed
 
 
+async def get_mcp_tools(
+    request: Request, tool_ids: list[str], user, metadata: dict, extra_params: dict
+) -> tuple[dict, dict]:
+    """Lease sessions for the chat's MCP servers and build their tools."""
+    event_emitter = extra_params.get("__event_emitter__")
+
+    mcp_clients = {}
+    mcp_tools_dict = {}
+
+    try:
+        for tool_id in tool_ids:
+            if tool_id.startswith("server:mcp:"):
+                try:
+                    server_id = tool_id[len("server:mcp:") :]
+
+                    mcp_server_connection = None
+                    for (
+                        server_connection
+                    ) in request.app.state.config.TOOL_SERVER_CONNECTIONS:
+                        if (
+                            server_connection.get("type", "") == "mcp"
+                            and server_connection.get("info", {}).get("id") == server_id
+                        ):
+                            mcp_server_connection = server_connection
+                            break
+
+                    if not mcp_server_connection:
+                        log.error(f"MCP server with id {server_id} not found")
+                        continue
+
+                    # Check access control for MCP server
+                    if not has_connection_access(user, mcp_server_connection):
+                        log.warning(
+                            f"Access denied to MCP server {server_id} for user {user.id}"
+                        )
+                        continue
+
+                    auth_type = mcp_server_connection.get("auth_type", "")
+                    headers = {}
+                    if auth_type == "bearer":
+                        headers["Authorization"] = (
+                            f"Bearer {mcp_server_connection.get('key', '')}"
+                        )
+                    elif auth_type == "none":
+                        # No authentication
+                        pass
+                    elif auth_type == "session":
+                        headers["Authorization"] = (
+                            f"Bearer {request.state.token.credentials}"
+                        )
+                    elif auth_type == "system_oauth":
+                        oauth_token = extra_params.get("__oauth_token__", None)
+                        if oauth_token:
+                            headers["Authorization"] = (
+                                f"Bearer {oauth_token.get('access_token', '')}"
+                            )
+                    elif auth_type == "oauth_2.1":
+                        try:
+                            splits = server_id.split(":")
+                            server_id = splits[-1] if len(splits) > 1 else server_id
+
+                            oauth_token = await request.app.state.oauth_client_manager.get_oauth_token(
+                                user.id, f"mcp:{server_id}"
+                            )
+
+                            if oauth_token:
+                                headers["Authorization"] = (
+                                    f"Bearer {oauth_token.get('access_token', '')}"
+                                )
+                        except Exception as e:
+                            log.error(f"Error getting OAuth token: {e}")
+                            oauth_token = None
+
+                    connection_headers = mcp_server_connection.get("headers", None)
+                    if connection_headers and isinstance(connection_headers, dict):
+                        for key, value in connection_headers.items():
+                            headers[key] = value
+
+                    # Add user info headers if enabled
+                    pooled = True
+                    if ENABLE_FORWARD_USER_INFO_HEADERS and user:
+                        headers = include_user_info_headers(headers, user)
+                        # Per-message headers can't be shared across chats
+                        pooled = not (
+                            metadata
+                            and (metadata.get("chat_id") or metadata.get("message_id"))
+                        )
+                        if metadata and metadata.get("chat_id"):
+                            headers[FORWARD_SESSION_INFO_HEADER_CHAT_ID] = metadata.get(
+                                "chat_id"
+                            )
+                        if metadata and metadata.get("message_id"):
+                            headers[FORWARD_SESSION_INFO_HEADER_MESSAGE_ID] = (
+                                metadata.get("message_id")
+                            )
+
+                    mcp_clients[server_id] = await MCP_SESSION_POOL.acquire(
+                        server_id,
+                        url=mcp_server_connection.get("url", ""),
+                        headers=headers if headers else None,
+                        pooled=pooled,
+                    )
+
+                    function_name_filter_list = mcp_server_connection.get(
+                        "config", {}
+                    ).get("function_name_filter_list", "")
+
+                    if isinstance(function_name_filter_list, str):
+                        function_name_filter_list = function_name_filter_list.split(",")
+
+                    tool_specs = await mcp_clients[server_id].list_tool_specs()
+                    for tool_spec in tool_specs:
+
+                        def make_tool_function(client, function_name):
+                            async def tool_function(**kwargs):
+                                return await client.call_tool(
+                                    function_name,
+                                    function_args=kwargs,
+                                )
+
+                            return tool_function
+
+                        if function_name_filter_list:
+                            if not is_string_allowed(
+                                tool_spec["name"], function_name_filter_list
+                            ):
+                                # Skip this function
+                                continue
+
+                        tool_function = make_tool_function(
+                            mcp_clients[server_id], tool_spec["name"]
+                        )
+
+                        mcp_tools_dict[f"{server_id}_{tool_spec['name']}"] = {
+                            "spec": {
+                                **tool_spec,
+                                "name": f"{server_id}_{tool_spec['name']}",
+                            },
+                            "callable": tool_function,
+                            "type": "mcp",
+                            "client": mcp_clients[server_id],
+                            "direct": False,
+                        }
+                except Exception as e:
+                    log.debug(e)
+                    if event_emitter:
+                        await event_emitter(
+                            {
+                                "type": "chat:message:error",
+                                "data": {
+                                    "error": {
+                                        "content": f"Failed to connect to MCP server '{server_id}'"
+                                    }
+                                },
+                            }
+                        )
+                    continue
+    except asyncio.CancelledError:
+        # Cancelled with the rest of the payload; return the leases taken so far
+        for client in reversed(mcp_clients.values()):
+            await client.disconnect()
+        raise
+
+    return mcp_clients, mcp_tools_dict
+
+
+async def run_payload_stage(stage: str, coroutine):
+    """Await one stage of `process_chat_payload` in a trace span, timing it."""
+    with tracer.start_as_current_span(f"chat_payload.{stage}") as span:
+        start = time.perf_counter()
+        try:
+            return await coroutine
+        finally:
+            duration = time.perf_counter() - start
+            span.set_attribute("chat_payload.stage", stage)
+            span.set_attribute("chat_payload.duration_ms", duration * 1000)
+            log.debug(f"chat payload stage {stage} took {duration * 1000:.1f}ms")
+
+
+def get_buffered_event_emitter():
+    """An event emitter that holds events back until they are replayed."""
+    events = []
+
+    async def event_emitter(event):
+        events.append(event)
+
+    return event_emitter, events
+
+
+async def cancel_payload_stages(tasks: list, mcp_task=None):
+    """Cancel stages started ahead of time when the payload fails."""
+    for task in tasks:
+        if task is not None and not task.done():
+            task.cancel()
+
+    await asyncio.gather(
+        *[task for task in tasks if task is not None], return_exceptions=True
+    )
+
+    # Leases taken by an MCP prefetch that finished before the failure
+    if mcp_task is not None and mcp_task.done() and not mcp_task.cancelled():
+        if mcp_task.exception() is None:
+            mcp_clients, _ = mcp_task.result()
+            for client in reversed(mcp_clients.values()):
+                try:
+                    await client.disconnect()
+                except Exception as e:
+                    log.debug(f"Error releasing MCP session: {e}")
+
+
 async def process_chat_payload(request, form_data, user, metadata, model):
     # Pipeline Inlet -> Filter Inlet -> Chat Memory -> Chat Web Search -> Chat Image Generation
     # -> Chat Code Interpreter (Form Data Update) -> (Default) Chat Tools Function Calling
@@ -2149,6 +2242,9 @@ async def process_chat_payload(request, form_data, user, metadata, model):
     form_data = apply_params_to_form_data(form_data, model)
     log.debug(f"form_data: {form_data}")
 
+    # Memory, web search and file retrieval share query embeddings this turn
+    start_query_embedding_memo()
+
     # Load messages from DB when available — DB preserves structured 'output' items
     # which the frontend strips, causing tool calls to be merged into content.
     chat_id = metadata.get("chat_id")
@@ -2332,418 +2428,406 @@ async def process_chat_payload(request, form_data, user, metadata, model):
 
     features = form_data.pop("features", None) or {}
     extra_params["__features__"] = features
-    if features:
-        if "voice" in features and features["voice"]:
-            if request.app.state.config.VOICE_MODE_PROMPT_TEMPLATE != None:
-                if request.app.state.config.VOICE_MODE_PROMPT_TEMPLATE != "":
-                    template = request.app.state.config.VOICE_MODE_PROMPT_TEMPLATE
-                else:
-                    template = DEFAULT_VOICE_MODE_PROMPT_TEMPLATE
 
-                form_data["messages"] = add_or_update_system_message(
-                    template,
-                    form_data["messages"],
-                )
+    # The stages below form a dependency graph. Stages that only read the
+    # request (memory lookup, MCP and terminal tool resolution) start now and
+    # overlap with the rest; results are applied to form_data in the same
+    # order as a sequential run.
+    native_function_calling = (
+        metadata.get("params", {}).get("function_calling") == "native"
+    )
+    prefetch_tool_ids = form_data.get("tool_ids", None) or []
+    prefetch_terminal_id = form_data.get("terminal_id", None)
+    prefetch_tools = not form_data.get("tools", None)
+
+    stage_tasks = []
+    memory_task = None
+    mcp_task = None
+    terminal_task = None
+    files_task = None
+
+    if features.get("memory") and not native_function_calling:
+        memory_task = asyncio.create_task(
+            run_payload_stage(
+                "memory",
+                get_memory_context(
+                    request, get_last_user_message(form_data["messages"]), user
+                ),
+            )
+        )
+        stage_tasks.append(memory_task)
+
+    if prefetch_tools and any(
+        tool_id.startswith("server:mcp:") for tool_id in prefetch_tool_ids
+    ):
+        mcp_task = asyncio.create_task(
+            run_payload_stage(
+                "mcp_tools",
+                get_mcp_tools(request, prefetch_tool_ids, user, metadata, extra_params),
+            )
+        )
+        stage_tasks.append(mcp_task)
+
+    if prefetch_tools and prefetch_terminal_id:
+        terminal_task = asyncio.create_task(
+            run_payload_stage(
+                "terminal_tools",
+                get_terminal_tools(request, prefetch_terminal_id, user, extra_params),
+            )
+        )
+        stage_tasks.append(terminal_task)
+
+    try:
+        if features:
+            if "voice" in features and features["voice"]:
+                if request.app.state.config.VOICE_MODE_PROMPT_TEMPLATE != None:
+                    if request.app.state.config.VOICE_MODE_PROMPT_TEMPLATE != "":
+                        template = request.app.state.config.VOICE_MODE_PROMPT_TEMPLATE
+                    else:
+                        template = DEFAULT_VOICE_MODE_PROMPT_TEMPLATE
+
+                    form_data["messages"] = add_or_update_system_message(
+                        template,
+                        form_data["messages"],
+                    )
 
-        if "memory" in features and features["memory"]:
             # Skip forced memory injection when native FC is enabled - model can use memory tools
-            if metadata.get("params", {}).get("function_calling") != "native":
+            if memory_task is not None:
                 form_data = await chat_memory_handler(
-                    request, form_data, extra_params, user
+                    request,
+                    form_data,
+                    extra_params,
+                    user,
+                    user_context=await memory_task,
                 )
 
-        if "web_search" in features and features["web_search"]:
-            # Skip forced RAG web search when native FC is enabled - model can use web_search tool
-            if metadata.get("params", {}).get("function_calling") != "native":
-                form_data = await chat_web_search_handler(
-                    request, form_data, extra_params, user
-                )
+            # Web search only adds files and image generation only reads the
+            # messages until its context is added, so the two run side by side
+            web_search_task = None
+            image_generation_task = None
+
+            if "web_search" in features and features["web_search"]:
+                # Skip forced RAG web search when native FC is enabled - model can use web_search tool
+                if not native_function_calling:
+                    web_search_task = asyncio.create_task(
+                        run_payload_stage(
+                            "web_search",
+                            chat_web_search_handler(
+                                request, form_data, extra_params, user
+                            ),
+                        )
+                    )
+                    stage_tasks.append(web_search_task)
+
+            if "image_generation" in features and features["image_generation"]:
+                # Skip forced image generation when native FC is enabled - model can use generate_image tool
+                if not native_function_calling:
+                    image_generation_task = asyncio.create_task(
+                        run_payload_stage(
+                            "image_generation",
+                            get_image_generation_context(
+                                request, form_data, extra_params, user
+                            ),
+                        )
+                    )
+                    stage_tasks.append(image_generation_task)
+
+            if web_search_task is not None:
+                form_data = await web_search_task
 
-        if "image_generation" in features and features["image_generation"]:
-            # Skip forced image generation when native FC is enabled - model can use generate_image tool
-            if metadata.get("params", {}).get("function_calling") != "native":
+            if image_generation_task is not None:
                 form_data = await chat_image_generation_handler(
-                    request, form_data, extra_params, user
+                    request,
+                    form_data,
+                    extra_params,
+                    user,
+                    system_message_content=await image_generation_task,
                 )
 
-        if "code_interpreter" in features and features["code_interpreter"]:
-            engine = getattr(
-                request.app.state.config, "CODE_INTERPRETER_ENGINE", "pyodide"
-            )
-
-            # Skip XML-tag prompt injection when native FC is enabled —
-            # execute_code will be injected as a builtin tool instead
-            if metadata.get("params", {}).get("function_calling") != "native":
-                prompt = (
-                    request.app.state.config.CODE_INTERPRETER_PROMPT_TEMPLATE
-                    if request.app.state.config.CODE_INTERPRETER_PROMPT_TEMPLATE != ""
-                    else DEFAULT_CODE_INTERPRETER_PROMPT
+            if "code_interpreter" in features and features["code_interpreter"]:
+                engine = getattr(
+                    request.app.state.config, "CODE_INTERPRETER_ENGINE", "pyodide"
                 )
 
-                # Append filesystem awareness only for pyodide engine
-                if engine != "jupyter":
-                    prompt += CODE_INTERPRETER_PYODIDE_PROMPT
+                # Skip XML-tag prompt injection when native FC is enabled —
+                # execute_code will be injected as a builtin tool instead
+                if metadata.get("params", {}).get("function_calling") != "native":
+                    prompt = (
+                        request.app.state.config.CODE_INTERPRETER_PROMPT_TEMPLATE
+                        if request.app.state.config.CODE_INTERPRETER_PROMPT_TEMPLATE
+                        != ""
+                        else DEFAULT_CODE_INTERPRETER_PROMPT
+                    )
+
+                    # Append filesystem awareness only for pyodide engine
+                    if engine != "jupyter":
+                        prompt += CODE_INTERPRETER_PYODIDE_PROMPT
 
-                form_data["messages"] = add_or_update_user_message(
-                    prompt,
-                    form_data["messages"],
-                )
-            else:
-                # Native FC: tool docstring can't be dynamic, so inject
-                # filesystem context into messages for pyodide engine
-                if engine != "jupyter":
                     form_data["messages"] = add_or_update_user_message(
-                        CODE_INTERPRETER_PYODIDE_PROMPT,
+                        prompt,
                         form_data["messages"],
                     )
+                else:
+                    # Native FC: tool docstring can't be dynamic, so inject
+                    # filesystem context into messages for pyodide engine
+                    if engine != "jupyter":
+                        form_data["messages"] = add_or_update_user_message(
+                            CODE_INTERPRETER_PYODIDE_PROMPT,
+                            form_data["messages"],
+                        )
 
-    tool_ids = form_data.pop("tool_ids", None)
-    terminal_id = form_data.pop("terminal_id", None)
-    files = form_data.pop("files", None)
+        tool_ids = form_data.pop("tool_ids", None)
+        terminal_id = form_data.pop("terminal_id", None)
+        files = form_data.pop("files", None)
 
-    # Caller-provided OpenAI-style tools take precedence over server-side
-    # tool resolution (tool_ids, MCP servers, builtin tools).
-    payload_tools = form_data.get("tools", None)
+        # Caller-provided OpenAI-style tools take precedence over server-side
+        # tool resolution (tool_ids, MCP servers, builtin tools).
+        payload_tools = form_data.get("tools", None)
 
-    # Skills
-    user_skill_ids = set(form_data.pop("skill_ids", None) or [])
-    model_skill_ids = set(model.get("info", {}).get("meta", {}).get("skillIds", []))
+        # Skills
+        user_skill_ids = set(form_data.pop("skill_ids", None) or [])
+        model_skill_ids = set(model.get("info", {}).get("meta", {}).get("skillIds", []))
 
-    all_skill_ids = user_skill_ids | model_skill_ids
-    available_skills = []
-    if all_skill_ids:
-        from open_webui.models.skills import Skills as SkillsModel
+        all_skill_ids = user_skill_ids | model_skill_ids
+        available_skills = []
+        if all_skill_ids:
+            from open_webui.models.skills import Skills as SkillsModel
 
-        accessible_skill_ids = {
-            s.id for s in SkillsModel.get_skills_by_user_id(user.id, "read")
-        }
-        available_skills = [
-            s
-            for sid in all_skill_ids
-            if sid in accessible_skill_ids
-            and (s := SkillsModel.get_skill_by_id(sid))
-            and s.is_active
-        ]
+            accessible_skill_ids = {
+                s.id for s in SkillsModel.get_skills_by_user_id(user.id, "read")
+            }
+            available_skills = [
+                s
+                for sid in all_skill_ids
+                if sid in accessible_skill_ids
+                and (s := SkillsModel.get_skill_by_id(sid))
+                and s.is_active
+            ]
+
+            skill_descriptions = ""
+            for skill in available_skills:
+                if skill.id in user_skill_ids:
+                    # User-selected: inject full content
+                    form_data["messages"] = add_or_update_system_message(
+                        f'<skill name="{skill.name}">\n{skill.content}\n</skill>',
+                        form_data["messages"],
+                        append=True,
+                    )
+                else:
+                    # Model-attached: name+description only
+                    skill_descriptions += f"<skill>\n<name>{skill.name}</name>\n<description>{skill.description or ''}</description>\n</skill>\n"
 
-        skill_descriptions = ""
-        for skill in available_skills:
-            if skill.id in user_skill_ids:
-                # User-selected: inject full content
+            if skill_descriptions:
                 form_data["messages"] = add_or_update_system_message(
-                    f'<skill name="{skill.name}">\n{skill.content}\n</skill>',
+                    f"<available_skills>\n{skill_descriptions}</available_skills>",
                     form_data["messages"],
                     append=True,
                 )
-            else:
-                # Model-attached: name+description only
-                skill_descriptions += f"<skill>\n<name>{skill.name}</name>\n<description>{skill.description or ''}</description>\n</skill>\n"
-
-        if skill_descriptions:
-            form_data["messages"] = add_or_update_system_message(
-                f"<available_skills>\n{skill_descriptions}</available_skills>",
-                form_data["messages"],
-                append=True,
-            )
-
-    prompt = get_last_user_message(form_data["messages"])
-    # TODO: re-enable URL extraction from prompt
-    # urls = []
-    # if prompt and len(prompt or "") < 500 and (not files or len(files) == 0):
-    #     urls = extract_urls(prompt)
-
-    if files:
-        if not files:
-            files = []
-
-        for file_item in files:
-            if file_item.get("type", "file") == "folder":
-                # Get folder files
-                folder_id = file_item.get("id", None)
-                if folder_id:
-                    folder = Folders.get_folder_by_id_and_user_id(folder_id, user.id)
-                    if folder and folder.data and "files" in folder.data:
-                        files = [f for f in files if f.get("id", None) != folder_id]
-                        files = [*files, *folder.data["files"]]
-
-        # files = [*files, *[{"type": "url", "url": url, "name": url} for url in urls]]
-        # Remove duplicate files based on their content
-        files = list({json.dumps(f, sort_keys=True): f for f in files}.values())
-
-    metadata = {
-        **metadata,
-        "tool_ids": tool_ids,
-        "terminal_id": terminal_id,
-        "files": files,
-    }
-    form_data["metadata"] = metadata
 
-    # When the caller provides an explicit OpenAI-style `tools` array in the
-    # request body, skip all server-side tool resolution and pass the caller's
-    # tools through to the model unchanged.
-    if not payload_tools:
-        # Server side tools
-        tool_ids = metadata.get("tool_ids", None)
-        # Client side tools
-        direct_tool_servers = metadata.get("tool_servers", None)
-
-        log.debug(f"{tool_ids=}")
-        log.debug(f"{direct_tool_servers=}")
-
-        tools_dict = {}
-
-        mcp_clients = {}
-        mcp_tools_dict = {}
-
-        if tool_ids:
-            for tool_id in tool_ids:
-                if tool_id.startswith("server:mcp:"):
-                    try:
-                        server_id = tool_id[len("server:mcp:") :]
-
-                        mcp_server_connection = None
-                        for (
-                            server_connection
-                        ) in request.app.state.config.TOOL_SERVER_CONNECTIONS:
-                            if (
-                                server_connection.get("type", "") == "mcp"
-                                and server_connection.get("info", {}).get("id")
-                                == server_id
-                            ):
-                                mcp_server_connection = server_connection
-                                break
-
-                        if not mcp_server_connection:
-                            log.error(f"MCP server with id {server_id} not found")
-                            continue
-
-                        # Check access control for MCP server
-                        if not has_connection_access(user, mcp_server_connection):
-                            log.warning(
-                                f"Access denied to MCP server {server_id} for user {user.id}"
-                            )
-                            continue
+        prompt = get_last_user_message(form_data["messages"])
+        # TODO: re-enable URL extraction from prompt
+        # urls = []
+        # if prompt and len(prompt or "") < 500 and (not files or len(files) == 0):
+        #     urls = extract_urls(prompt)
+
+        if files:
+            if not files:
+                files = []
+
+            for file_item in files:
+                if file_item.get("type", "file") == "folder":
+                    # Get folder files
+                    folder_id = file_item.get("id", None)
+                    if folder_id:
+                        folder = Folders.get_folder_by_id_and_user_id(
+                            folder_id, user.id
+                        )
+                        if folder and folder.data and "files" in folder.data:
+                            files = [f for f in files if f.get("id", None) != folder_id]
+                            files = [*files, *folder.data["files"]]
+
+            # files = [*files, *[{"type": "url", "url": url, "name": url} for url in urls]]
+            # Remove duplicate files based on their content
+            files = list({json.dumps(f, sort_keys=True): f for f in files}.values())
+
+        metadata = {
+            **metadata,
+            "tool_ids": tool_ids,
+            "terminal_id": terminal_id,
+            "files": files,
+        }
+        form_data["metadata"] = metadata
 
-                        auth_type = mcp_server_connection.get("auth_type", "")
-                        headers = {}
-                        if auth_type == "bearer":
-                            headers["Authorization"] = (
-                                f"Bearer {mcp_server_connection.get('key', '')}"
-                            )
-                        elif auth_type == "none":
-                            # No authentication
-                            pass
-                        elif auth_type == "session":
-                            headers["Authorization"] = (
-                                f"Bearer {request.state.token.credentials}"
-                            )
-                        elif auth_type == "system_oauth":
-                            oauth_token = extra_params.get("__oauth_token__", None)
-                            if oauth_token:
-                                headers["Authorization"] = (
-                                    f"Bearer {oauth_token.get('access_token', '')}"
-                                )
-                        elif auth_type == "oauth_2.1":
-                            try:
-                                splits = server_id.split(":")
-                                server_id = splits[-1] if len(splits) > 1 else server_id
+        # Check if file context extraction is enabled for this model (default True)
+        file_context_enabled = (
+            model.get("info", {}).get("meta", {}).get("capabilities") or {}
+        ).get("file_context", True)
 
-                                oauth_token = await request.app.state.oauth_client_manager.get_oauth_token(
-                                    user.id, f"mcp:{server_id}"
-                                )
+        # Without native function calling, tool calls don't touch the messages
+        # that retrieval reads, so retrieval overlaps with tool resolution. Its
+        # events are held back until the tool stages are done, and it is dropped
+        # if a tool's result stands in for the files.
+        if (
+            file_context_enabled
+            and metadata.get("files")
+            and not native_function_calling
+        ):
+            files_event_emitter, files_events = get_buffered_event_emitter()
+            files_task = asyncio.create_task(
+                run_payload_stage(
+                    "files",
+                    chat_completion_files_handler(
+                        request,
+                        form_data,
+                        {**extra_params, "__event_emitter__": files_event_emitter},
+                        user,
+                    ),
+                )
+            )
+            stage_tasks.append(files_task)
 
-                                if oauth_token:
-                                    headers["Authorization"] = (
-                                        f"Bearer {oauth_token.get('access_token', '')}"
-                                    )
-                            except Exception as e:
-                                log.error(f"Error getting OAuth token: {e}")
-                                oauth_token = None
-
-                        connection_headers = mcp_server_connection.get("headers", None)
-                        if connection_headers and isinstance(connection_headers, dict):
-                            for key, value in connection_headers.items():
-                                headers[key] = value
-
-                        # Add user info headers if enabled
-                        if ENABLE_FORWARD_USER_INFO_HEADERS and user:
-                            headers = include_user_info_headers(headers, user)
-                            if metadata and metadata.get("chat_id"):
-                                headers[FORWARD_SESSION_INFO_HEADER_CHAT_ID] = (
-                                    metadata.get("chat_id")
-                                )
-                            if metadata and metadata.get("message_id"):
-                                headers[FORWARD_SESSION_INFO_HEADER_MESSAGE_ID] = (
-                                    metadata.get("message_id")
-                                )
+        # When the caller provides an explicit OpenAI-style `tools` array in the
+        # request body, skip all server-side tool resolution and pass the caller's
+        # tools through to the model unchanged.
+        if not payload_tools:
+            # Server side tools
+            tool_ids = metadata.get("tool_ids", None)
+            # Client side tools
+            direct_tool_servers = metadata.get("tool_servers", None)
 
-                        mcp_clients[server_id] = MCPClient()
-                        await mcp_clients[server_id].connect(
-                            url=mcp_server_connection.get("url", ""),
-                            headers=headers if headers else None,
-                        )
+            log.debug(f"{tool_ids=}")
+            log.debug(f"{direct_tool_servers=}")
 
-                        function_name_filter_list = mcp_server_connection.get(
-                            "config", {}
-                        ).get("function_name_filter_list", "")
+            tools_dict = {}
 
-                        if isinstance(function_name_filter_list, str):
-                            function_name_filter_list = function_name_filter_list.split(
-                                ","
-                            )
+            mcp_clients = {}
+            mcp_tools_dict = {}
 
-                        tool_specs = await mcp_clients[server_id].list_tool_specs()
-                        for tool_spec in tool_specs:
+            if tool_ids:
+                if mcp_task is not None:
+                    mcp_clients, mcp_tools_dict = await mcp_task
 
-                            def make_tool_function(client, function_name):
-                                async def tool_function(**kwargs):
-                                    return await client.call_tool(
-                                        function_name,
-                                        function_args=kwargs,
-                                    )
+                tools_dict = await run_payload_stage(
+                    "tools",
+                    get_tools(
+                        request,
+                        tool_ids,
+                        user,
+                        {
+                            **extra_params,
+                            "__model__": models[task_model_id],
+                            "__messages__": form_data["messages"],
+                            "__files__": metadata.get("files", []),
+                        },
+                    ),
+                )
 
-                                return tool_function
+                if mcp_tools_dict:
+                    tools_dict = {**tools_dict, **mcp_tools_dict}
 
-                            if function_name_filter_list:
-                                if not is_string_allowed(
-                                    tool_spec["name"], function_name_filter_list
-                                ):
-                                    # Skip this function
-                                    continue
+            # Resolve terminal tools if terminal_id is set (outside tool_ids check
+            # so system terminals work even when no other tools are selected)
+            if terminal_id:
+                try:
+                    terminal_tools = await terminal_task
+                    if terminal_tools:
+                        tools_dict = {**tools_dict, **terminal_tools}
+                except Exception as e:
+                    log.exception(e)
 
-                            tool_function = make_tool_function(
-                                mcp_clients[server_id], tool_spec["name"]
-                            )
+            if direct_tool_servers:
+                for tool_server in direct_tool_servers:
+                    tool_specs = tool_server.pop("specs", [])
 
-                            mcp_tools_dict[f"{server_id}_{tool_spec['name']}"] = {
-                                "spec": {
-                                    **tool_spec,
-                                    "name": f"{server_id}_{tool_spec['name']}",
-                                },
-                                "callable": tool_function,
-                                "type": "mcp",
-                                "client": mcp_clients[server_id],
-                                "direct": False,
-                            }
-                    except Exception as e:
-                        log.debug(e)
-                        if event_emitter:
-                            await event_emitter(
-                                {
-                                    "type": "chat:message:error",
-                                    "data": {
-                                        "error": {
-                                            "content": f"Failed to connect to MCP server '{server_id}'"
-                                        }
-                                    },
-                                }
-                            )
-                        continue
-
-            tools_dict = await get_tools(
-                request,
-                tool_ids,
-                user,
-                {
-                    **extra_params,
-                    "__model__": models[task_model_id],
-                    "__messages__": form_data["messages"],
-                    "__files__": metadata.get("files", []),
-                },
-            )
+                    for tool in tool_specs:
+                        tools_dict[tool["name"]] = {
+                            "spec": tool,
+                            "direct": True,
+                            "server": tool_server,
+                        }
 
-            if mcp_tools_dict:
-                tools_dict = {**tools_dict, **mcp_tools_dict}
+            if mcp_clients:
+                metadata["mcp_clients"] = mcp_clients
 
-        # Resolve terminal tools if terminal_id is set (outside tool_ids check
-        # so system terminals work even when no other tools are selected)
-        if terminal_id:
-            try:
-                terminal_tools = await get_terminal_tools(
+            # Inject builtin tools for native function calling based on enabled features and model capability
+            # Check if builtin_tools capability is enabled for this model (defaults to True if not specified)
+            builtin_tools_enabled = (
+                model.get("info", {}).get("meta", {}).get("capabilities") or {}
+            ).get("builtin_tools", True)
+            if (
+                metadata.get("params", {}).get("function_calling") == "native"
+                and builtin_tools_enabled
+            ):
+                # Add file context to user messages
+                chat_id = metadata.get("chat_id")
+                form_data["messages"] = add_file_context(
+                    form_data.get("messages", []), chat_id, user
+                )
+                builtin_tools = get_builtin_tools(
                     request,
-                    terminal_id,
-                    user,
-                    extra_params,
+                    {
+                        **extra_params,
+                        "__event_emitter__": event_emitter,
+                        "__skill_ids__": [
+                            s.id for s in available_skills if s.id not in user_skill_ids
+                        ],
+                    },
+                    features,
+                    model,
                 )
-                if terminal_tools:
-                    tools_dict = {**tools_dict, **terminal_tools}
-            except Exception as e:
-                log.exception(e)
-
-        if direct_tool_servers:
-            for tool_server in direct_tool_servers:
-                tool_specs = tool_server.pop("specs", [])
-
-                for tool in tool_specs:
-                    tools_dict[tool["name"]] = {
-                        "spec": tool,
-                        "direct": True,
-                        "server": tool_server,
-                    }
-
-        if mcp_clients:
-            metadata["mcp_clients"] = mcp_clients
+                for name, tool_dict in builtin_tools.items():
+                    if name not in tools_dict:
+                        tools_dict[name] = tool_dict
+
+            if tools_dict:
+                if metadata.get("params", {}).get("function_calling") == "native":
+                    # If the function calling is native, then call the tools function calling handler
+                    metadata["tools"] = tools_dict
+                    form_data["tools"] = [
+                        {"type": "function", "function": tool.get("spec", {})}
+                        for tool in tools_dict.values()
+                    ]
+                else:
+                    # If the function calling is not native, then call the tools function calling handler
+                    try:
+                        form_data, flags = await run_payload_stage(
+                            "tools_handler",
+                            chat_completion_tools_handler(
+                                request,
+                                form_data,
+                                extra_params,
+                                user,
+                                models,
+                                tools_dict,
+                            ),
+                        )
+                        sources.extend(flags.get("sources", []))
+                    except Exception as e:
+                        log.exception(e)
 
-        # Inject builtin tools for native function calling based on enabled features and model capability
-        # Check if builtin_tools capability is enabled for this model (defaults to True if not specified)
-        builtin_tools_enabled = (
-            model.get("info", {}).get("meta", {}).get("capabilities") or {}
-        ).get("builtin_tools", True)
-        if (
-            metadata.get("params", {}).get("function_calling") == "native"
-            and builtin_tools_enabled
-        ):
-            # Add file context to user messages
-            chat_id = metadata.get("chat_id")
-            form_data["messages"] = add_file_context(
-                form_data.get("messages", []), chat_id, user
-            )
-            builtin_tools = get_builtin_tools(
-                request,
-                {
-                    **extra_params,
-                    "__event_emitter__": event_emitter,
-                    "__skill_ids__": [
-                        s.id for s in available_skills if s.id not in user_skill_ids
-                    ],
-                },
-                features,
-                model,
-            )
-            for name, tool_dict in builtin_tools.items():
-                if name not in tools_dict:
-                    tools_dict[name] = tool_dict
-
-        if tools_dict:
-            if metadata.get("params", {}).get("function_calling") == "native":
-                # If the function calling is native, then call the tools function calling handler
-                metadata["tools"] = tools_dict
-                form_data["tools"] = [
-                    {"type": "function", "function": tool.get("spec", {})}
-                    for tool in tools_dict.values()
-                ]
-            else:
-                # If the function calling is not native, then call the tools function calling handler
-                try:
-                    form_data, flags = await chat_completion_tools_handler(
-                        request, form_data, extra_params, user, models, tools_dict
+        if file_context_enabled:
+            try:
+                if files_task is not None:
+                    _, flags = await files_task
+
+                    # Tools that cite the files themselves drop them
+                    if "files" in form_data["metadata"]:
+                        for event in files_events:
+                            await event_emitter(event)
+                        sources.extend(flags.get("sources", []))
+                else:
+                    form_data, flags = await run_payload_stage(
+                        "files",
+                        chat_completion_files_handler(
+                            request, form_data, extra_params, user
+                        ),
                     )
                     sources.extend(flags.get("sources", []))
-                except Exception as e:
-                    log.exception(e)
-
-    # Check if file context extraction is enabled for this model (default True)
-    file_context_enabled = (
-        model.get("info", {}).get("meta", {}).get("capabilities") or {}
-    ).get("file_context", True)
-
-    if file_context_enabled:
-        try:
-            form_data, flags = await chat_completion_files_handler(
-                request, form_data, extra_params, user
-            )
-            sources.extend(flags.get("sources", []))
-        except Exception as e:
-            log.exception(e)
+            except Exception as e:
+                log.exception(e)
+    except BaseException:
+        await cancel_payload_stages(stage_tasks, mcp_task)
+        raise
 
     # Save the pre-RAG message state so the native tool call loop can
     # restore to the true original (before file-source injection) rather
@@ -2895,10 +2979,10 @@ async def background_tasks_handler(ctx):
     messages = []
 
     if "chat_id" in metadata and not metadata["chat_id"].startswith("local:"):
-        messages_map = Chats.get_messages_map_by_chat_id(metadata["chat_id"])
-        message = messages_map.get(metadata["message_id"]) if messages_map else None
-
-        message_list = get_message_list(messages_map, metadata["message_id"])
+        message_list = Chats.get_message_list_by_id_and_message_id(
+            metadata["chat_id"], metadata["message_id"]
+        )
+        message = message_list[-1] if message_list else None
 
         # Remove details tags and files from the messages.
         # as get_message_list creates a new list, it does not affect
@@ -2980,7 +3064,9 @@ async def background_tasks_handler(ctx):
                         )
 
                         if not metadata.get("chat_id", "").startswith("local:"):
-                            Chats.upsert_message_to_chat_by_id_and_message_id(
+                            await CHAT_SAVE_BUFFER.write_through(
+                                metadata["chat_id"],
+                                Chats.upsert_message_to_chat_by_id_and_message_id,
                                 metadata["chat_id"],
                                 metadata["message_id"],
                                 {
@@ -3128,7 +3214,9 @@ async def non_streaming_chat_response_handler(response, ctx):
                 else:
                     error = str(error)
 
-                Chats.upsert_message_to_chat_by_id_and_message_id(
+                await CHAT_SAVE_BUFFER.write_through(
+                    metadata["chat_id"],
+                    Chats.upsert_message_to_chat_by_id_and_message_id,
                     metadata["chat_id"],
                     metadata["message_id"],
                     {
@@ -3144,7 +3232,9 @@ async def non_streaming_chat_response_handler(response, ctx):
                     )
 
             if "selected_model_id" in response_data:
-                Chats.upsert_message_to_chat_by_id_and_message_id(
+                await CHAT_SAVE_BUFFER.write_through(
+                    metadata["chat_id"],
+                    Chats.upsert_message_to_chat_by_id_and_message_id,
                     metadata["chat_id"],
                     metadata["message_id"],
                     {
@@ -3195,7 +3285,9 @@ async def non_streaming_chat_response_handler(response, ctx):
                     # Save message in the database
                     usage = normalize_usage(response_data.get("usage", {}) or {})
 
-                    Chats.upsert_message_to_chat_by_id_and_message_id(
+                    await CHAT_SAVE_BUFFER.write_through(
+                        metadata["chat_id"],
+                        Chats.upsert_message_to_chat_by_id_and_message_id,
                         metadata["chat_id"],
                         metadata["message_id"],
                         {
@@ -3529,7 +3621,8 @@ async def streaming_chat_response_handler(response, ctx):
 
                 return output, end_flag
 
-            message = Chats.get_message_by_id_and_message_id(
+            # Includes fields still buffered from events emitted so far
+            message = await CHAT_SAVE_BUFFER.get_message(
                 metadata["chat_id"], metadata["message_id"]
             )
 
@@ -3569,6 +3662,9 @@ async def streaming_chat_response_handler(response, ctx):
                 else:
                     output = []
 
+            # Streamed deltas only re-render the output items they touch
+            output_serializer = OutputSerializer()
+
             usage = None
 
             reasoning_tags_param = metadata.get("params", {}).get("reasoning_tags")
@@ -3599,7 +3695,9 @@ async def streaming_chat_response_handler(response, ctx):
                     )
 
                     # Save message in the database
-                    Chats.upsert_message_to_chat_by_id_and_message_id(
+                    await CHAT_SAVE_BUFFER.write_through(
+                        metadata["chat_id"],
+                        Chats.upsert_message_to_chat_by_id_and_message_id,
                         metadata["chat_id"],
                         metadata["message_id"],
                         {
@@ -3638,6 +3736,14 @@ async def streaming_chat_response_handler(response, ctx):
                             delta_count = 0
                             last_delta_data = None
 
+                    # Resolved once so stream filters cost no lookups per chunk
+                    stream_filters = prepare_filter_functions(
+                        request=request,
+                        filter_functions=filter_functions,
+                        filter_type="stream",
+                        extra_params={"__body__": form_data, **extra_params},
+                    )
+
                     async for line in response.body_iterator:
                         line = (
                             line.decode("utf-8", "replace")
@@ -3660,12 +3766,8 @@ async def streaming_chat_response_handler(response, ctx):
                         try:
                             data = json.loads(data)
 
-                            data, _ = await process_filter_functions(
-                                request=request,
-                                filter_functions=filter_functions,
-                                filter_type="stream",
-                                form_data=data,
-                                extra_params={"__body__": form_data, **extra_params},
+                            data = await run_filter_functions(
+                                stream_filters, "stream", data
                             )
 
                             if data:
@@ -3676,7 +3778,9 @@ async def streaming_chat_response_handler(response, ctx):
 
                                 if "selected_model_id" in data:
                                     model_id = data["selected_model_id"]
-                                    Chats.upsert_message_to_chat_by_id_and_message_id(
+                                    await CHAT_SAVE_BUFFER.write_through(
+                                        metadata["chat_id"],
+                                        Chats.upsert_message_to_chat_by_id_and_message_id,
                                         metadata["chat_id"],
                                         metadata["message_id"],
                                         {
@@ -3697,7 +3801,7 @@ async def streaming_chat_response_handler(response, ctx):
 
                                     processed_data = {
                                         "output": output,
-                                        "content": serialize_output(output),
+                                        "content": output_serializer.serialize(output),
                                     }
 
                                     # print(data)
@@ -3869,7 +3973,7 @@ async def streaming_chat_response_handler(response, ctx):
                                                 {
                                                     "type": "chat:completion",
                                                     "data": {
-                                                        "content": serialize_output(
+                                                        "content": output_serializer.serialize(
                                                             pending_output
                                                         ),
                                                     },
@@ -3884,7 +3988,9 @@ async def streaming_chat_response_handler(response, ctx):
                                             {"type": "image", "url": url}
                                             for url in image_urls
                                         ]
-                                        message_files = Chats.add_message_files_by_id_and_message_id(
+                                        message_files = await CHAT_SAVE_BUFFER.write_through(
+                                            metadata["chat_id"],
+                                            Chats.add_message_files_by_id_and_message_id,
                                             metadata["chat_id"],
                                             metadata["message_id"],
                                             image_file_list,
@@ -3943,7 +4049,11 @@ async def streaming_chat_response_handler(response, ctx):
                                                 }
                                             ]
 
-                                        data = {"content": serialize_output(output)}
+                                        data = {
+                                            "content": output_serializer.serialize(
+                                                output
+                                            )
+                                        }
 
                                     if value:
                                         if (
@@ -4126,18 +4236,22 @@ async def streaming_chat_response_handler(response, ctx):
                                                 break
 
                                         if ENABLE_REALTIME_CHAT_SAVE:
-                                            # Save message in the database
-                                            Chats.upsert_message_to_chat_by_id_and_message_id(
+                                            # Buffer the save; written in batches off the loop
+                                            CHAT_SAVE_BUFFER.add(
                                                 metadata["chat_id"],
                                                 metadata["message_id"],
                                                 {
-                                                    "content": serialize_output(output),
+                                                    "content": output_serializer.serialize(
+                                                        output
+                                                    ),
                                                     "output": output,
                                                 },
                                             )
                                         else:
                                             data = {
-                                                "content": serialize_output(output),
+                                                "content": output_serializer.serialize(
+                                                    output
+                                                ),
                                             }
 
                                 if delta:
@@ -4252,7 +4366,7 @@ async def streaming_chat_response_handler(response, ctx):
                         {
                             "type": "chat:completion",
                             "data": {
-                                "content": serialize_output(output),
+                                "content": output_serializer.serialize(output),
                                 "output": output,
                             },
                         }
@@ -4531,7 +4645,7 @@ async def streaming_chat_response_handler(response, ctx):
                         {
                             "type": "chat:completion",
                             "data": {
-                                "content": serialize_output(output),
+                                "content": output_serializer.serialize(output),
                                 "output": output,
                             },
                         }
@@ -4577,7 +4691,7 @@ async def streaming_chat_response_handler(response, ctx):
                             {
                                 "type": "chat:completion",
                                 "data": {
-                                    "content": serialize_output(output),
+                                    "content": output_serializer.serialize(output),
                                     "output": output,
                                 },
                             }
@@ -4716,7 +4830,7 @@ async def streaming_chat_response_handler(response, ctx):
                             {
                                 "type": "chat:completion",
                                 "data": {
-                                    "content": serialize_output(output),
+                                    "content": output_serializer.serialize(output),
                                     "output": output,
                                 },
                             }
@@ -4756,27 +4870,36 @@ async def streaming_chat_response_handler(response, ctx):
                 title = Chats.get_chat_title_by_id(metadata["chat_id"])
                 data = {
                     "done": True,
-                    "content": serialize_output(output),
+                    "content": output_serializer.serialize(output),
                     "output": output,
                     "title": title,
                 }
 
                 if not ENABLE_REALTIME_CHAT_SAVE:
                     # Save message in the database
-                    Chats.upsert_message_to_chat_by_id_and_message_id(
+                    await CHAT_SAVE_BUFFER.write_through(
+                        metadata["chat_id"],
+                        Chats.upsert_message_to_chat_by_id_and_message_id,
                         metadata["chat_id"],
                         metadata["message_id"],
                         {
-                            "content": serialize_output(output),
+                            "content": output_serializer.serialize(output),
                             "output": output,
                             **({"usage": usage} if usage else {}),
                         },
                     )
-                elif usage:
-                    Chats.upsert_message_to_chat_by_id_and_message_id(
+                else:
+                    CHAT_SAVE_BUFFER.add(
                         metadata["chat_id"],
                         metadata["message_id"],
-                        {"usage": usage},
+                        {
+                            "content": data["content"],
+                            "output": output,
+                            **({"usage": usage} if usage else {}),
+                        },
+                    )
+                    await CHAT_SAVE_BUFFER.close(
+                        metadata["chat_id"], metadata["message_id"]
                     )
 
                 # Send a webhook notification if the user is not active
@@ -4809,14 +4932,20 @@ async def streaming_chat_response_handler(response, ctx):
 
                 if not ENABLE_REALTIME_CHAT_SAVE:
                     # Save message in the database
-                    Chats.upsert_message_to_chat_by_id_and_message_id(
+                    await CHAT_SAVE_BUFFER.write_through(
+                        metadata["chat_id"],
+                        Chats.upsert_message_to_chat_by_id_and_message_id,
                         metadata["chat_id"],
                         metadata["message_id"],
                         {
-                            "content": serialize_output(output),
+                            "content": output_serializer.serialize(output),
                             "output": output,
                         },
                     )
+                else:
+                    await CHAT_SAVE_BUFFER.close(
+                        metadata["chat_id"], metadata["message_id"]
+                    )
 
             if response.background is not None:
                 await response.background()
@@ -4829,26 +4958,21 @@ async def streaming_chat_response_handler(response, ctx):
             def wrap_item(item):
                 return f"data: {item}\n\n"
 
+            stream_filters = prepare_filter_functions(
+                request=request,
+                filter_functions=filter_functions,
+                filter_type="stream",
+                extra_params=extra_params,
+            )
+
             for event in events:
-                event, _ = await process_filter_functions(
-                    request=request,
-                    filter_functions=filter_functions,
-                    filter_type="stream",
-                    form_data=event,
-                    extra_params=extra_params,
-                )
+                event = await run_filter_functions(stream_filters, "stream", event)
 
                 if event:
                     yield wrap_item(json.dumps(event))
 
             async for data in original_generator:
-                data, _ = await process_filter_functions(
-                    request=request,
-                    filter_functions=filter_functions,
-                    filter_type="stream",
-                    form_data=data,
-                    extra_params=extra_params,
-                )
+                data = await run_filter_functions(stream_filters, "stream", data)
 
                 if data:
                     yield data
@@ -864,26 +864,34 @@ def extract_urls(text: str) -> list[str]:
 
 async def cleanup_response(
     response: Optional[aiohttp.ClientResponse],
-    session: Optional[aiohttp.ClientSession],
+    session: Optional[aiohttp.ClientSession] = None,
 ):
     if response:
-        response.close()
+        # Hands a fully read connection back to the session's pool; one with
+        # unread data is closed
+        response.release()
     if session:
         await session.close()
 
 
-async def stream_wrapper(response, session, content_handler=None):
+async def stream_wrapper(response, session=None, content_handler=None, upstream=None):
     """
     Wrap a stream to ensure cleanup happens even if streaming is interrupted.
     This is more reliable than BackgroundTask which may not run if client disconnects.
     """
+    error = False
     try:
         stream = (
             content_handler(response.content) if content_handler else response.content
         )
         async for chunk in stream:
             yield chunk
+    except Exception:
+        error = True
+        raise
     finally:
+        if upstream:
+            upstream.finish(error=error)
         await cleanup_response(response, session)
 
 
@@ -1,8 +1,11 @@
 import copy
+import hashlib
+import json
 import time
 import logging
 import asyncio
 import sys
+from typing import Optional
 
 from aiocache import cached
 from fastapi import Request
@@ -79,7 +82,219 @@ async def get_all_base_models(request: Request, user: UserModel = None):
     return function_models + openai_models + ollama_models
 
 
+def get_action_items_from_module(function, module):
+    actions = []
+    if hasattr(module, "actions"):
+        actions = module.actions
+        return [
+            {
+                "id": f"{function.id}.{action['id']}",
+                "name": action.get("name", f"{function.name} ({action['id']})"),
+                "description": function.meta.description,
+                "icon": action.get(
+                    "icon_url",
+                    function.meta.manifest.get("icon_url", None)
+                    or getattr(module, "icon_url", None)
+                    or getattr(module, "icon", None),
+                ),
+            }
+            for action in actions
+        ]
+    else:
+        return [
+            {
+                "id": function.id,
+                "name": function.name,
+                "description": function.meta.description,
+                "icon": function.meta.manifest.get("icon_url", None)
+                or getattr(module, "icon_url", None)
+                or getattr(module, "icon", None),
+            }
+        ]
+
+
+def get_filter_items_from_module(function, module):
+    return [
+        {
+            "id": function.id,
+            "name": function.name,
+            "description": function.meta.description,
+            "icon": function.meta.manifest.get("icon_url", None)
+            or getattr(module, "icon_url", None)
+            or getattr(module, "icon", None),
+            "has_user_valves": hasattr(module, "UserValves"),
+        }
+    ]
+
+
+def get_fingerprint(value) -> str:
+    return hashlib.sha1(
+        json.dumps(value, sort_keys=True, default=str).encode()
+    ).hexdigest()
+
+
+class ModelEntryCache:
+    """
+    Merged model entries of the last `get_all_models` run, keyed by model id.
+
+    Each entry is stored with a fingerprint of everything it was built from
+    (base model, custom model versions, default metadata, action and filter
+    function versions), so a rebuild only recomputes entries whose inputs
+    changed.
+    """
+
+    def __init__(self):
+        self.entries: dict[str, tuple[tuple, dict]] = {}
+        self.functions_fingerprint = None
+
+        self._base_models = None
+        self._base_fingerprints: list[str] = []
+
+    def get_base_fingerprints(self, base_models: list[dict]) -> list[str]:
+        # Unchanged while the base model list is served from cache
+        if base_models is not self._base_models:
+            self._base_models = base_models
+            self._base_fingerprints = [
+                # "created" is set to the fetch time for some providers
+                get_fingerprint({k: v for k, v in model.items() if k != "created"})
+                for model in base_models
+            ]
+        return self._base_fingerprints
+
+
+MODEL_ENTRY_CACHE = ModelEntryCache()
+
+
+def get_custom_model_fingerprint(custom_model) -> tuple:
+    return (
+        custom_model.id,
+        custom_model.base_model_id,
+        custom_model.is_active,
+        custom_model.updated_at,
+        # Grants change without bumping updated_at (access updates, group
+        # and user deletion) but are part of the entry's info
+        tuple(
+            (grant.principal_type, grant.principal_id, grant.permission)
+            for grant in custom_model.access_grants
+        ),
+    )
+
+
+def apply_custom_model_overrides(model: dict, custom_models: list) -> Optional[dict]:
+    """Apply custom models sharing a base model's id; None if one disables it."""
+    for custom_model in custom_models:
+        if not custom_model.is_active:
+            return None
+
+        model["name"] = custom_model.name
+        model["info"] = custom_model.model_dump()
+
+        action_ids = []
+        filter_ids = []
+
+        if "info" in model:
+            if "meta" in model["info"]:
+                action_ids.extend(model["info"]["meta"].get("actionIds", []))
+                filter_ids.extend(model["info"]["meta"].get("filterIds", []))
+
+            if "params" in model["info"]:
+                del model["info"]["params"]
+
+        model["action_ids"] = action_ids
+        model["filter_ids"] = filter_ids
+
+    return model
+
+
+def get_preset_model(custom_model, base_model: Optional[dict]) -> dict:
+    owned_by = "openai"
+    connection_type = None
+    pipe = None
+
+    if base_model:
+        owned_by = base_model.get("owned_by", "unknown")
+        if "pipe" in base_model:
+            pipe = base_model["pipe"]
+        connection_type = base_model.get("connection_type", None)
+
+    model = {
+        "id": f"{custom_model.id}",
+        "name": custom_model.name,
+        "object": "model",
+        "created": custom_model.created_at,
+        "owned_by": owned_by,
+        "connection_type": connection_type,
+        "preset": True,
+        **({"pipe": pipe} if pipe is not None else {}),
+    }
+
+    info = custom_model.model_dump()
+    if "params" in info:
+        # Remove params to avoid exposing sensitive info
+        del info["params"]
+
+    model["info"] = info
+
+    action_ids = []
+    filter_ids = []
+
+    if custom_model.meta:
+        meta = custom_model.meta.model_dump()
+
+        if "actionIds" in meta:
+            action_ids.extend(meta["actionIds"])
+
+        if "filterIds" in meta:
+            filter_ids.extend(meta["filterIds"])
+
+    model["action_ids"] = action_ids
+    model["filter_ids"] = filter_ids
+
+    return model
+
+
+def apply_default_metadata(model: dict, default_metadata: dict):
+    # Per-model overrides take precedence over global defaults
+    info = model.get("info")
+
+    if info is None:
+        model["info"] = {"meta": copy.deepcopy(default_metadata)}
+        return
+
+    meta = info.setdefault("meta", {})
+    for key, value in default_metadata.items():
+        if key == "capabilities":
+            # Merge capabilities: defaults as base, per-model overrides win
+            existing = meta.get("capabilities") or {}
+            meta["capabilities"] = {**value, **existing}
+        elif meta.get(key) is None:
+            meta[key] = copy.deepcopy(value)
+
+
+def copy_model(model: dict) -> dict:
+    """
+    Copy a model entry so that its fields, `info` and `info.meta` can be
+    changed without changing the entry it was copied from. Deeper values
+    are shared.
+    """
+    model = {**model}
+    if isinstance(model.get("info"), dict):
+        model["info"] = {**model["info"]}
+        if isinstance(model["info"].get("meta"), dict):
+            model["info"]["meta"] = {**model["info"]["meta"]}
+    return model
+
+
 async def get_all_models(request, refresh: bool = False, user: UserModel = None):
+    timings = {}
+    stage_start = time.perf_counter()
+
+    def end_stage(name):
+        nonlocal stage_start
+        now = time.perf_counter()
+        timings[name] = now - stage_start
+        stage_start = now
+
     if (
         request.app.state.MODELS
         and request.app.state.BASE_MODELS
@@ -89,14 +304,17 @@ async def get_all_models(request, refresh: bool = False, user: UserModel = None)
     else:
         base_models = await get_all_base_models(request, user=user)
         request.app.state.BASE_MODELS = base_models
-
-    # deep copy the base models to avoid modifying the original list
-    models = [model.copy() for model in base_models]
+    end_stage("base_models")
 
     # If there are no models, return an empty list
-    if len(models) == 0:
+    if len(base_models) == 0:
         return []
 
+    cache = MODEL_ENTRY_CACHE
+
+    # (model, fingerprint) for every base model, followed by the arena models
+    sources = list(zip(base_models, cache.get_base_fingerprints(base_models)))
+
     # Add arena models
     if request.app.state.config.ENABLE_EVALUATION_ARENA_MODELS:
         arena_models = []
@@ -130,275 +348,229 @@ async def get_all_models(request, refresh: bool = False, user: UserModel = None)
                     "arena": True,
                 }
             ]
-        models = models + arena_models
+        sources.extend(
+            (
+                model,
+                get_fingerprint({k: v for k, v in model.items() if k != "created"}),
+            )
+            for model in arena_models
+        )
+
+    # One query per function type; global and enabled ids are derived from it
+    functions = Functions.get_functions_by_type(
+        "action"
+    ) + Functions.get_functions_by_type("filter")
+    functions_by_id = {function.id: function for function in functions}
 
     global_action_ids = [
-        function.id for function in Functions.get_global_action_functions()
+        f.id for f in functions if f.type == "action" and f.is_active and f.is_global
     ]
-    enabled_action_ids = [
-        function.id
-        for function in Functions.get_functions_by_type("action", active_only=True)
-    ]
-
+    enabled_action_ids = {f.id for f in functions if f.type == "action" and f.is_active}
     global_filter_ids = [
-        function.id for function in Functions.get_global_filter_functions()
-    ]
-    enabled_filter_ids = [
-        function.id
-        for function in Functions.get_functions_by_type("filter", active_only=True)
+        f.id for f in functions if f.type == "filter" and f.is_active and f.is_global
     ]
+    enabled_filter_ids = {f.id for f in functions if f.type == "filter" and f.is_active}
+
+    functions_fingerprint = tuple(
+        sorted((f.id, f.updated_at, f.is_active, f.is_global) for f in functions)
+    )
+    functions_changed = functions_fingerprint != cache.functions_fingerprint
 
     custom_models = Models.get_all_models()
 
+    default_metadata = (
+        getattr(request.app.state.config, "DEFAULT_MODEL_METADATA", None) or {}
+    )
+    # Inputs shared by every entry
+    shared_fingerprint = (functions_fingerprint, get_fingerprint(default_metadata))
+    end_stage("load")
+
     # Single O(1) lookup: Ollama base names first, then exact IDs (exact wins).
     base_model_lookup = {}
-    for model in models:
+    for model, fingerprint in sources:
         if model.get("owned_by") == "ollama":
-            base_model_lookup.setdefault(model["id"].split(":")[0], model)
-        base_model_lookup[model["id"]] = model
+            base_model_lookup.setdefault(
+                model["id"].split(":")[0], (model, fingerprint)
+            )
+        base_model_lookup[model["id"]] = (model, fingerprint)
 
-    existing_ids = {m["id"] for m in models}
+    existing_ids = {model["id"] for model, _ in sources}
 
+    # Custom models overriding a base model (sharing its id), by base model id
+    overrides = {}
+    presets = []
     for custom_model in custom_models:
         if custom_model.base_model_id is None:
             # Override applied directly to a base model (shares the same ID)
-            model = base_model_lookup.get(custom_model.id)
-
-            if model:
-                if custom_model.is_active:
-                    model["name"] = custom_model.name
-                    model["info"] = custom_model.model_dump()
-
-                    action_ids = []
-                    filter_ids = []
-
-                    if "info" in model:
-                        if "meta" in model["info"]:
-                            action_ids.extend(
-                                model["info"]["meta"].get("actionIds", [])
-                            )
-                            filter_ids.extend(
-                                model["info"]["meta"].get("filterIds", [])
-                            )
-
-                        if "params" in model["info"]:
-                            del model["info"]["params"]
-
-                    model["action_ids"] = action_ids
-                    model["filter_ids"] = filter_ids
-                else:
-                    models.remove(model)
-
-        elif custom_model.is_active:
-            if custom_model.id in existing_ids:
-                continue
-
-            owned_by = "openai"
-            connection_type = None
-            pipe = None
-
-            base_model = base_model_lookup.get(custom_model.base_model_id)
-            if base_model is None:
-                base_model = base_model_lookup.get(
-                    custom_model.base_model_id.split(":")[0]
-                )
-            if base_model:
-                owned_by = base_model.get("owned_by", "unknown")
-                if "pipe" in base_model:
-                    pipe = base_model["pipe"]
-                connection_type = base_model.get("connection_type", None)
-
-            model = {
-                "id": f"{custom_model.id}",
-                "name": custom_model.name,
-                "object": "model",
-                "created": custom_model.created_at,
-                "owned_by": owned_by,
-                "connection_type": connection_type,
-                "preset": True,
-                **({"pipe": pipe} if pipe is not None else {}),
-            }
-
-            info = custom_model.model_dump()
-            if "params" in info:
-                # Remove params to avoid exposing sensitive info
-                del info["params"]
-
-            model["info"] = info
-
-            action_ids = []
-            filter_ids = []
-
-            if custom_model.meta:
-                meta = custom_model.meta.model_dump()
-
-                if "actionIds" in meta:
-                    action_ids.extend(meta["actionIds"])
+            match = base_model_lookup.get(custom_model.id)
+            if match:
+                overrides.setdefault(match[0]["id"], []).append(custom_model)
+        elif custom_model.is_active and custom_model.id not in existing_ids:
+            presets.append(custom_model)
+
+    # (model id, fingerprint, build) per entry, in the order models are listed
+    candidates = []
+    for model, fingerprint in sources:
+        model_overrides = overrides.get(model["id"], [])
+        candidates.append(
+            (
+                model["id"],
+                (
+                    fingerprint,
+                    tuple(get_custom_model_fingerprint(cm) for cm in model_overrides),
+                    *shared_fingerprint,
+                ),
+                lambda model=model, model_overrides=model_overrides: (
+                    apply_custom_model_overrides(model.copy(), model_overrides)
+                ),
+            )
+        )
 
-                if "filterIds" in meta:
-                    filter_ids.extend(meta["filterIds"])
+    for custom_model in presets:
+        match = base_model_lookup.get(custom_model.base_model_id)
+        if match is None:
+            match = base_model_lookup.get(custom_model.base_model_id.split(":")[0])
+        base_model, base_fingerprint = match if match else (None, None)
+
+        candidates.append(
+            (
+                custom_model.id,
+                (
+                    base_fingerprint,
+                    get_custom_model_fingerprint(custom_model),
+                    *shared_fingerprint,
+                ),
+                lambda custom_model=custom_model, base_model=base_model: (
+                    get_preset_model(custom_model, base_model)
+                ),
+            )
+        )
 
-            model["action_ids"] = action_ids
-            model["filter_ids"] = filter_ids
+    models = []
+    rebuilt = []
+    entries = {}
+    for model_id, fingerprint, build in candidates:
+        cached = cache.entries.get(model_id)
+        if cached is not None and cached[0] == fingerprint:
+            model = cached[1]
+        else:
+            # None when a custom model disables the base model
+            model = build()
+            if model is not None:
+                rebuilt.append(model)
 
+        entries[model_id] = (fingerprint, model)
+        if model is not None:
             models.append(model)
-
-    # Process action_ids to get the actions
-    def get_action_items_from_module(function, module):
-        actions = []
-        if hasattr(module, "actions"):
-            actions = module.actions
-            return [
-                {
-                    "id": f"{function.id}.{action['id']}",
-                    "name": action.get("name", f"{function.name} ({action['id']})"),
-                    "description": function.meta.description,
-                    "icon": action.get(
-                        "icon_url",
-                        function.meta.manifest.get("icon_url", None)
-                        or getattr(module, "icon_url", None)
-                        or getattr(module, "icon", None),
-                    ),
-                }
-                for action in actions
+    end_stage("merge")
+
+    if rebuilt:
+        if default_metadata:
+            for model in rebuilt:
+                apply_default_metadata(model, default_metadata)
+
+        for model in rebuilt:
+            model["action_ids"] = [
+                action_id
+                for action_id in set(model.pop("action_ids", []) + global_action_ids)
+                if action_id in enabled_action_ids
             ]
-        else:
-            return [
-                {
-                    "id": function.id,
-                    "name": function.name,
-                    "description": function.meta.description,
-                    "icon": function.meta.manifest.get("icon_url", None)
-                    or getattr(module, "icon_url", None)
-                    or getattr(module, "icon", None),
-                }
+            model["filter_ids"] = [
+                filter_id
+                for filter_id in set(model.pop("filter_ids", []) + global_filter_ids)
+                if filter_id in enabled_filter_ids
             ]
 
-    # Process filter_ids to get the filters
-    def get_filter_items_from_module(function, module):
-        return [
-            {
-                "id": function.id,
-                "name": function.name,
-                "description": function.meta.description,
-                "icon": function.meta.manifest.get("icon_url", None)
-                or getattr(module, "icon_url", None)
-                or getattr(module, "icon", None),
-                "has_user_valves": hasattr(module, "UserValves"),
-            }
-        ]
-
-    # Batch-prefetch all needed function records to avoid N+1 queries
-    all_function_ids = set()
-    for model in models:
-        all_function_ids.update(model.get("action_ids", []))
-        all_function_ids.update(model.get("filter_ids", []))
-    all_function_ids.update(global_action_ids)
-    all_function_ids.update(global_filter_ids)
-
-    functions_by_id = {
-        f.id: f for f in Functions.get_functions_by_ids(list(all_function_ids))
-    }
-
-    # Pre-warm the function module cache once per unique function ID.
-    # This ensures each function's DB freshness check runs exactly once,
-    # not once per (model × function) pair.
-    for function_id in all_function_ids:
-        try:
-            get_function_module_from_cache(request, function_id)
-        except Exception as e:
-            log.info(f"Failed to load function module for {function_id}: {e}")
-
-    # Apply global model defaults to all models
-    # Per-model overrides take precedence over global defaults
-    default_metadata = (
-        getattr(request.app.state.config, "DEFAULT_MODEL_METADATA", None) or {}
-    )
-
-    if default_metadata:
-        for model in models:
-            info = model.get("info")
-
-            if info is None:
-                model["info"] = {"meta": copy.deepcopy(default_metadata)}
-                continue
-
-            meta = info.setdefault("meta", {})
-            for key, value in default_metadata.items():
-                if key == "capabilities":
-                    # Merge capabilities: defaults as base, per-model overrides win
-                    existing = meta.get("capabilities") or {}
-                    meta["capabilities"] = {**value, **existing}
-                elif meta.get(key) is None:
-                    meta[key] = copy.deepcopy(value)
-
-    # Batch-fetch all function valves in one query to avoid N+1 DB hits
-    # inside get_action_priority (previously called per action × per model).
-    all_function_valves = Functions.get_function_valves_by_ids(list(all_function_ids))
-
-    def get_action_priority(action_id):
-        try:
-            function_module = request.app.state.FUNCTIONS.get(action_id)
-            if function_module and hasattr(function_module, "Valves"):
-                valves_db = all_function_valves.get(action_id)
-                valves = function_module.Valves(**(valves_db if valves_db else {}))
-                return getattr(valves, "priority", 0)
-        except Exception:
-            pass
-        return 0
-
-    for model in models:
-        action_ids = [
-            action_id
-            for action_id in list(set(model.pop("action_ids", []) + global_action_ids))
-            if action_id in enabled_action_ids
-        ]
-        action_ids.sort(key=lambda aid: (get_action_priority(aid), aid))
-
-        filter_ids = [
-            filter_id
-            for filter_id in list(set(model.pop("filter_ids", []) + global_filter_ids))
-            if filter_id in enabled_filter_ids
-        ]
-
-        model["actions"] = []
-        for action_id in action_ids:
-            action_function = functions_by_id.get(action_id)
-            if action_function is None:
-                log.info(f"Action not found: {action_id}")
-                continue
-
-            function_module = request.app.state.FUNCTIONS.get(action_id)
-            if function_module is None:
-                log.info(f"Failed to load action module: {action_id}")
-                continue
-            model["actions"].extend(
-                get_action_items_from_module(action_function, function_module)
-            )
-
-        model["filters"] = []
-        for filter_id in filter_ids:
-            filter_function = functions_by_id.get(filter_id)
-            if filter_function is None:
-                log.info(f"Filter not found: {filter_id}")
-                continue
-
-            function_module = request.app.state.FUNCTIONS.get(filter_id)
-            if function_module is None:
-                log.info(f"Failed to load filter module: {filter_id}")
-                continue
-            if getattr(function_module, "toggle", None):
-                model["filters"].extend(
-                    get_filter_items_from_module(filter_function, function_module)
+        function_ids = set()
+        for model in rebuilt:
+            function_ids.update(model["action_ids"])
+            function_ids.update(model["filter_ids"])
+
+        # Load each function module once, not once per (model × function)
+        # pair, and only when a function changed or isn't loaded yet.
+        functions_cache = getattr(request.app.state, "FUNCTIONS", {})
+        for function_id in function_ids:
+            if functions_changed or function_id not in functions_cache:
+                try:
+                    get_function_module_from_cache(request, function_id)
+                except Exception as e:
+                    log.info(f"Failed to load function module for {function_id}: {e}")
+
+        # Batch-fetch all function valves in one query to avoid N+1 DB hits
+        # inside get_action_priority (previously called per action × per model).
+        all_function_valves = Functions.get_function_valves_by_ids(list(function_ids))
+
+        def get_action_priority(action_id):
+            try:
+                function_module = request.app.state.FUNCTIONS.get(action_id)
+                if function_module and hasattr(function_module, "Valves"):
+                    valves_db = all_function_valves.get(action_id)
+                    valves = function_module.Valves(**(valves_db if valves_db else {}))
+                    return getattr(valves, "priority", 0)
+            except Exception:
+                pass
+            return 0
+
+        for model in rebuilt:
+            action_ids = model.pop("action_ids")
+            action_ids.sort(key=lambda aid: (get_action_priority(aid), aid))
+            filter_ids = model.pop("filter_ids")
+
+            model["actions"] = []
+            for action_id in action_ids:
+                action_function = functions_by_id.get(action_id)
+                if action_function is None:
+                    log.info(f"Action not found: {action_id}")
+                    continue
+
+                function_module = request.app.state.FUNCTIONS.get(action_id)
+                if function_module is None:
+                    log.info(f"Failed to load action module: {action_id}")
+                    continue
+                model["actions"].extend(
+                    get_action_items_from_module(action_function, function_module)
                 )
 
-    log.debug(f"get_all_models() returned {len(models)} models")
+            model["filters"] = []
+            for filter_id in filter_ids:
+                filter_function = functions_by_id.get(filter_id)
+                if filter_function is None:
+                    log.info(f"Filter not found: {filter_id}")
+                    continue
+
+                function_module = request.app.state.FUNCTIONS.get(filter_id)
+                if function_module is None:
+                    log.info(f"Failed to load filter module: {filter_id}")
+                    continue
+                if getattr(function_module, "toggle", None):
+                    model["filters"].extend(
+                        get_filter_items_from_module(filter_function, function_module)
+                    )
+    end_stage("functions")
+
+    changed = bool(rebuilt) or list(entries) != list(cache.entries)
+    cache.entries = entries
+    cache.functions_fingerprint = functions_fingerprint
+
+    # Copies, so callers changing a model don't change the cache
+    models = [copy_model(model) for model in models]
+
+    # Skip rewriting the shared registry when no entry changed
+    if changed or not request.app.state.MODELS:
+        models_dict = {model["id"]: model for model in models}
+        if isinstance(request.app.state.MODELS, RedisDict):
+            request.app.state.MODELS.set(models_dict)
+        else:
+            request.app.state.MODELS = models_dict
+    end_stage("store")
 
-    models_dict = {model["id"]: model for model in models}
-    if isinstance(request.app.state.MODELS, RedisDict):
-        request.app.state.MODELS.set(models_dict)
-    else:
-        request.app.state.MODELS = models_dict
+    log.debug(f"get_all_models() returned {len(models)} models")
+    (log.info if rebuilt else log.debug)(
+        f"get_all_models(): rebuilt {len(rebuilt)}/{len(models)} models in "
+        + ", ".join(
+            f"{name} {seconds * 1000:.1f}ms" for name, seconds in timings.items()
+        )
+    )
 
     return models
 
@@ -0,0 +1,307 @@
+import copy
+import html
+import json
+
+
+def split_content_and_whitespace(content):
+    content_stripped = content.rstrip()
+    original_whitespace = (
+        content[len(content_stripped) :] if len(content) > len(content_stripped) else ""
+    )
+    return content_stripped, original_whitespace
+
+
+def is_opening_code_block(content):
+    backtick_segments = content.split("```")
+    # Even number of segments means the last backticks are opening a new block
+    return len(backtick_segments) > 1 and len(backtick_segments) % 2 == 0
+
+
+def quote_reasoning_content(reasoning_content: str) -> str:
+    """Render reasoning text as an HTML-escaped markdown blockquote."""
+    return html.escape(
+        "\n".join(
+            (f"> {line}" if not line.startswith(">") else line)
+            for line in reasoning_content.splitlines()
+        )
+    )
+
+
+def get_tool_outputs(output: list) -> dict:
+    """Collect function_call_output items by call_id for lookup."""
+    tool_outputs = {}
+    for item in output:
+        if item.get("type") == "function_call_output":
+            tool_outputs[item.get("call_id")] = item
+    return tool_outputs
+
+
+def render_output_item(
+    content: str,
+    item: dict,
+    is_last_item: bool,
+    tool_outputs: dict,
+    quote_reasoning=quote_reasoning_content,
+) -> str:
+    """
+    Append the HTML rendering of a single output item to `content`.
+
+    Rendering depends on the content rendered so far (newline handling and
+    code block trimming), so items must be rendered in order.
+    """
+    item_type = item.get("type", "")
+
+    if item_type == "message":
+        for content_part in item.get("content", []):
+            if "text" in content_part:
+                text = content_part.get("text", "").strip()
+                if text:
+                    content = f"{content}{text}\n"
+
+    elif item_type == "function_call":
+        # Render tool call inline with its result (if available)
+        if content and not content.endswith("\n"):
+            content += "\n"
+
+        call_id = item.get("call_id", "")
+        name = item.get("name", "")
+        arguments = item.get("arguments", "")
+
+        result_item = tool_outputs.get(call_id)
+        if result_item:
+            result_text = ""
+            for result_output in result_item.get("output", []):
+                if "text" in result_output:
+                    output_text = result_output.get("text", "")
+                    result_text += (
+                        str(output_text)
+                        if not isinstance(output_text, str)
+                        else output_text
+                    )
+            files = result_item.get("files")
+            embeds = result_item.get("embeds", "")
+
+            content += f'<details type="tool_calls" done="true" id="{call_id}" name="{name}" arguments="{html.escape(json.dumps(arguments))}" result="{html.escape(json.dumps(result_text, ensure_ascii=False))}" files="{html.escape(json.dumps(files)) if files else ""}" embeds="{html.escape(json.dumps(embeds))}">\n<summary>Tool Executed</summary>\n</details>\n'
+        else:
+            content += f'<details type="tool_calls" done="false" id="{call_id}" name="{name}" arguments="{html.escape(json.dumps(arguments))}">\n<summary>Executing...</summary>\n</details>\n'
+
+    elif item_type == "function_call_output":
+        # Already handled inline with function_call above
+        pass
+
+    elif item_type == "reasoning":
+        reasoning_content = ""
+        # Check for 'summary' (new structure) or 'content' (legacy/fallback)
+        source_list = item.get("summary", []) or item.get("content", [])
+        for content_part in source_list:
+            if "text" in content_part:
+                reasoning_content += content_part.get("text", "")
+            elif "summary" in content_part:  # Handle potential nested logic if any
+                pass
+
+        reasoning_content = reasoning_content.strip()
+
+        duration = item.get("duration")
+        status = item.get("status", "in_progress")
+
+        if content and not content.endswith("\n"):
+            content += "\n"
+
+        display = quote_reasoning(reasoning_content)
+
+        # Infer completion: if this reasoning item is NOT the last item,
+        # render as done (a subsequent item means reasoning is complete)
+        if status == "completed" or duration is not None or not is_last_item:
+            content = f'{content}<details type="reasoning" done="true" duration="{duration or 0}">\n<summary>Thought for {duration or 0} seconds</summary>\n{display}\n</details>\n'
+        else:
+            content = f'{content}<details type="reasoning" done="false">\n<summary>Thinking…</summary>\n{display}\n</details>\n'
+
+    elif item_type == "open_webui:code_interpreter":
+        content_stripped, original_whitespace = split_content_and_whitespace(content)
+        if is_opening_code_block(content_stripped):
+            content = content_stripped.rstrip("`").rstrip() + original_whitespace
+        else:
+            content = content_stripped + original_whitespace
+
+        if content and not content.endswith("\n"):
+            content += "\n"
+
+        # Render the code_interpreter item as a <details> block
+        # so the frontend Collapsible renders "Analyzing..."/"Analyzed".
+        code = item.get("code", "").strip()
+        lang = item.get("lang", "python")
+        status = item.get("status", "in_progress")
+        duration = item.get("duration")
+
+        # Build inner content: code block
+        display = ""
+        if code:
+            display = f"```{lang}\n{code}\n```"
+
+        # Build output attribute as HTML-escaped JSON for CodeBlock.svelte
+        ci_output = item.get("output")
+        output_attr = ""
+        if ci_output:
+            if isinstance(ci_output, dict):
+                output_json = json.dumps(ci_output, ensure_ascii=False)
+            else:
+                output_json = json.dumps({"result": str(ci_output)}, ensure_ascii=False)
+            output_attr = f' output="{html.escape(output_json)}"'
+
+        if status == "completed" or duration is not None or not is_last_item:
+            content += f'<details type="code_interpreter" done="true" duration="{duration or 0}"{output_attr}>\n<summary>Analyzed</summary>\n{display}\n</details>\n'
+        else:
+            content += f'<details type="code_interpreter" done="false"{output_attr}>\n<summary>Analyzing…</summary>\n{display}\n</details>\n'
+
+    return content
+
+
+def serialize_output(output: list) -> str:
+    """
+    Convert OR-aligned output items to HTML for display.
+    For LLM consumption, use convert_output_to_messages() instead.
+    """
+    content = ""
+
+    tool_outputs = get_tool_outputs(output)
+    for idx, item in enumerate(output):
+        content = render_output_item(
+            content, item, idx == len(output) - 1, tool_outputs
+        )
+
+    return content.strip()
+
+
+def _freeze(value):
+    # Strings and scalars are immutable and compare by identity first, so
+    # they can be kept by reference. Containers may be mutated in place and
+    # have to be snapshotted.
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    return copy.deepcopy(value)
+
+
+def _text_parts(parts) -> tuple:
+    return tuple(part.get("text") for part in parts or [] if "text" in part)
+
+
+def get_output_item_signature(item: dict, is_last_item: bool, tool_outputs: dict):
+    """
+    Return a value that compares equal whenever `render_output_item` would
+    produce the same fragment for `item`, given the same preceding content.
+    """
+    item_type = item.get("type", "")
+
+    if item_type == "message":
+        return (item_type, _text_parts(item.get("content", [])))
+
+    if item_type == "function_call":
+        result_item = tool_outputs.get(item.get("call_id", ""))
+        result = None
+        if result_item:
+            result = (
+                _text_parts(result_item.get("output", [])),
+                _freeze(result_item.get("files")),
+                _freeze(result_item.get("embeds", "")),
+            )
+        return (
+            item_type,
+            item.get("call_id", ""),
+            item.get("name", ""),
+            _freeze(item.get("arguments", "")),
+            result,
+        )
+
+    if item_type == "reasoning":
+        return (
+            item_type,
+            _text_parts(item.get("summary", []) or item.get("content", [])),
+            item.get("status", "in_progress"),
+            item.get("duration"),
+            is_last_item,
+        )
+
+    if item_type == "open_webui:code_interpreter":
+        return (
+            item_type,
+            item.get("code", ""),
+            item.get("lang", "python"),
+            item.get("status", "in_progress"),
+            item.get("duration"),
+            _freeze(item.get("output")),
+            is_last_item,
+        )
+
+    return (item_type,)
+
+
+class OutputSerializer:
+    """
+    Incremental variant of `serialize_output` for streamed responses.
+
+    Keeps the rendered prefix of every output item whose inputs did not change
+    since the previous call, so each delta only re-renders the items that
+    were touched (normally just the last one). Results are identical to
+    `serialize_output(output)`.
+    """
+
+    def __init__(self):
+        # One (signature, content rendered up to and including the item)
+        # entry per output item, in order.
+        self._rendered: list[tuple] = []
+        # (source, quoted) for the longest newline-terminated prefix of the
+        # reasoning text rendered last, so streamed reasoning is only quoted
+        # and escaped once per line.
+        self._reasoning_prefix: tuple[str, str] = ("", "")
+
+    def _quote_reasoning(self, reasoning_content: str) -> str:
+        source, quoted = self._reasoning_prefix
+        if not (source and reasoning_content.startswith(source)):
+            source, quoted = "", ""
+
+        # Lines terminated by "\n" can't be merged with anything appended
+        # later, so splitlines() of the prefix is stable.
+        boundary = reasoning_content.rfind("\n") + 1
+        if boundary > len(source):
+            chunk = quote_reasoning_content(reasoning_content[len(source) : boundary])
+            quoted = f"{quoted}\n{chunk}" if source else chunk
+            source = reasoning_content[:boundary]
+            self._reasoning_prefix = (source, quoted)
+
+        tail = quote_reasoning_content(reasoning_content[len(source) :])
+        # reasoning_content is stripped, so a non-empty prefix always leaves
+        # a non-empty tail.
+        return f"{quoted}\n{tail}" if source else tail
+
+    def serialize(self, output: list) -> str:
+        content = ""
+
+        tool_outputs = get_tool_outputs(output)
+        rendered = self._rendered
+        reusable = True
+
+        for idx, item in enumerate(output):
+            is_last_item = idx == len(output) - 1
+            signature = get_output_item_signature(item, is_last_item, tool_outputs)
+
+            if reusable and idx < len(rendered) and rendered[idx][0] == signature:
+                content = rendered[idx][1]
+                continue
+
+            if reusable:
+                del rendered[idx:]
+                reusable = False
+
+            content = render_output_item(
+                content,
+                item,
+                is_last_item,
+                tool_outputs,
+                quote_reasoning=self._quote_reasoning,
+            )
+            rendered.append((signature, content))
+
+        if reusable:
+            del rendered[len(output) :]
+
+        return content.strip()
@@ -2,6 +2,7 @@ import os
 import re
 import subprocess
 import sys
+import time
 from importlib import util
 import types
 import tempfile
@@ -307,9 +308,46 @@ def load_function_module_by_id(function_id: str, content: str | None = None):
         os.unlink(temp_file.name)
 
 
+# Module cache counters per plugin kind: hits (version unchanged), misses
+# (version changed, content fetched) and loads (content changed, module exec'd)
+PLUGIN_CACHE_STATS = {
+    kind: {"hits": 0, "misses": 0, "loads": 0, "load_time": 0.0}
+    for kind in ["functions", "tools"]
+}
+
+
+def get_plugin_cache_stats(kind: str) -> dict:
+    stats = PLUGIN_CACHE_STATS[kind]
+    lookups = stats["hits"] + stats["misses"]
+    return {
+        **stats,
+        "hit_ratio": stats["hits"] / lookups if lookups else 0.0,
+        "avg_load_time": stats["load_time"] / stats["loads"] if stats["loads"] else 0.0,
+    }
+
+
 def get_tool_module_from_cache(request, tool_id, load_from_db=True):
+    stats = PLUGIN_CACHE_STATS["tools"]
+
+    if not hasattr(request.app.state, "TOOL_VERSIONS"):
+        request.app.state.TOOL_VERSIONS = {}
+
     if load_from_db:
-        # Always load from the database by default
+        # Always check the database by default, but only fetch the version;
+        # the content is loaded only when the version changed
+        version = Tools.get_tool_version_by_id(tool_id)
+        if version is None:
+            raise Exception(f"Tool not found: {tool_id}")
+
+        if (
+            hasattr(request.app.state, "TOOLS")
+            and tool_id in request.app.state.TOOLS
+            and request.app.state.TOOL_VERSIONS.get(tool_id) == version
+        ):
+            stats["hits"] += 1
+            return request.app.state.TOOLS[tool_id], None
+
+        stats["misses"] += 1
         tool = Tools.get_tool_by_id(tool_id)
         if not tool:
             raise Exception(f"Tool not found: {tool_id}")
@@ -328,13 +366,20 @@ def get_tool_module_from_cache(request, tool_id, load_from_db=True):
             hasattr(request.app.state, "TOOLS") and tool_id in request.app.state.TOOLS
         ):
             if request.app.state.TOOL_CONTENTS[tool_id] == content:
+                # e.g. only the valves changed
+                request.app.state.TOOL_VERSIONS[tool_id] = version
                 return request.app.state.TOOLS[tool_id], None
 
+        start = time.perf_counter()
         tool_module, frontmatter = load_tool_module_by_id(tool_id, content)
+        stats["loads"] += 1
+        stats["load_time"] += time.perf_counter() - start
     else:
         if hasattr(request.app.state, "TOOLS") and tool_id in request.app.state.TOOLS:
             return request.app.state.TOOLS[tool_id], None
 
+        # Version unknown; the next database check reloads the content
+        version = None
         tool_module, frontmatter = load_tool_module_by_id(tool_id)
 
     if not hasattr(request.app.state, "TOOLS"):
@@ -345,16 +390,36 @@ def get_tool_module_from_cache(request, tool_id, load_from_db=True):
 
     request.app.state.TOOLS[tool_id] = tool_module
     request.app.state.TOOL_CONTENTS[tool_id] = content
+    request.app.state.TOOL_VERSIONS[tool_id] = version
 
     return tool_module, frontmatter
 
 
 def get_function_module_from_cache(request, function_id, load_from_db=True):
+    stats = PLUGIN_CACHE_STATS["functions"]
+
+    if not hasattr(request.app.state, "FUNCTION_VERSIONS"):
+        request.app.state.FUNCTION_VERSIONS = {}
+
     if load_from_db:
-        # Always load from the database by default
+        # Always check the database by default
         # This is useful for hooks like "inlet" or "outlet" where the content might change
-        # and we want to ensure the latest content is used.
+        # and we want to ensure the latest content is used. Only the version is
+        # fetched; the content is loaded only when the version changed.
+
+        version = Functions.get_function_version_by_id(function_id)
+        if version is None:
+            raise Exception(f"Function not found: {function_id}")
+
+        if (
+            hasattr(request.app.state, "FUNCTIONS")
+            and function_id in request.app.state.FUNCTIONS
+            and request.app.state.FUNCTION_VERSIONS.get(function_id) == version
+        ):
+            stats["hits"] += 1
+            return request.app.state.FUNCTIONS[function_id], None, None
 
+        stats["misses"] += 1
         function = Functions.get_function_by_id(function_id)
         if not function:
             raise Exception(f"Function not found: {function_id}")
@@ -374,11 +439,16 @@ def get_function_module_from_cache(request, function_id, load_from_db=True):
             and function_id in request.app.state.FUNCTIONS
         ):
             if request.app.state.FUNCTION_CONTENTS[function_id] == content:
+                # e.g. only the valves changed
+                request.app.state.FUNCTION_VERSIONS[function_id] = version
                 return request.app.state.FUNCTIONS[function_id], None, None
 
+        start = time.perf_counter()
         function_module, function_type, frontmatter = load_function_module_by_id(
             function_id, content
         )
+        stats["loads"] += 1
+        stats["load_time"] += time.perf_counter() - start
     else:
         # Load from cache (e.g. "stream" hook)
         # This is useful for performance reasons
@@ -389,6 +459,8 @@ def get_function_module_from_cache(request, function_id, load_from_db=True):
         ):
             return request.app.state.FUNCTIONS[function_id], None, None
 
+        # Version unknown; the next database check reloads the content
+        version = None
         function_module, function_type, frontmatter = load_function_module_by_id(
             function_id
         )
@@ -401,6 +473,7 @@ def get_function_module_from_cache(request, function_id, load_from_db=True):
 
     request.app.state.FUNCTIONS[function_id] = function_module
     request.app.state.FUNCTION_CONTENTS[function_id] = content
+    request.app.state.FUNCTION_VERSIONS[function_id] = version
 
     return function_module, function_type, frontmatter
 
@@ -0,0 +1,215 @@
+import asyncio
+import logging
+import random
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Optional, Union
+from urllib.parse import urlsplit
+
+import aiohttp
+
+from open_webui.env import (
+    AIOHTTP_CLIENT_POOL_DNS_CACHE_TTL,
+    AIOHTTP_CLIENT_LLM_POOL_LIMIT,
+    AIOHTTP_CLIENT_POOL_KEEPALIVE_TIMEOUT,
+    AIOHTTP_CLIENT_POOL_LIMIT,
+    AIOHTTP_CLIENT_POOL_LIMIT_PER_HOST,
+    AIOHTTP_CLIENT_TIMEOUT,
+)
+
+log = logging.getLogger(__name__)
+
+
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+MAX_RETRY_DELAY = 60.0
+
+
+def get_origin(url: str) -> str:
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+def get_retry_delay(retry_after: Optional[str], attempt: int) -> float:
+    """Delay before the next attempt: Retry-After if given, else exponential backoff."""
+    if retry_after:
+        try:
+            return min(max(float(retry_after), 0.0), MAX_RETRY_DELAY)
+        except ValueError:
+            try:
+                delay = parsedate_to_datetime(retry_after).timestamp() - time.time()
+                return min(max(delay, 0.0), MAX_RETRY_DELAY)
+            except (TypeError, ValueError):
+                pass
+
+    return min(0.5 * 2**attempt, MAX_RETRY_DELAY) * random.uniform(0.5, 1.0)
+
+
+class SessionPool:
+    """
+    App-lifetime aiohttp sessions, one per upstream origin.
+
+    Each origin gets its own keep-alive connector, so connections (and their
+    TLS handshakes) are reused across requests instead of being torn down
+    with a per-request ClientSession. Per-origin request, connection and
+    retry counters are kept for tuning.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        limit: int = AIOHTTP_CLIENT_POOL_LIMIT,
+        limit_per_host: int = AIOHTTP_CLIENT_POOL_LIMIT_PER_HOST,
+        keepalive_timeout: float = AIOHTTP_CLIENT_POOL_KEEPALIVE_TIMEOUT,
+        ttl_dns_cache: int = AIOHTTP_CLIENT_POOL_DNS_CACHE_TTL,
+        timeout: Optional[Union[int, float]] = AIOHTTP_CLIENT_TIMEOUT,
+    ):
+        self.name = name
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.ttl_dns_cache = ttl_dns_cache
+        self.timeout = timeout
+
+        # Sessions are bound to the loop they were created on
+        self._sessions: dict[tuple[asyncio.AbstractEventLoop, str], Any] = {}
+        self._stats: dict[str, dict[str, int]] = {}
+
+    def _get_stats(self, origin: str) -> dict[str, int]:
+        return self._stats.setdefault(
+            origin,
+            {
+                "requests": 0,
+                "connections_created": 0,
+                "connections_reused": 0,
+                "retries": 0,
+                "errors": 0,
+            },
+        )
+
+    def _create_session(self, origin: str) -> aiohttp.ClientSession:
+        stats = self._get_stats(origin)
+
+        def count(key):
+            async def handler(session, context, params):
+                stats[key] += 1
+
+            return handler
+
+        trace_config = aiohttp.TraceConfig()
+        trace_config.on_request_start.append(count("requests"))
+        trace_config.on_request_exception.append(count("errors"))
+        trace_config.on_connection_create_end.append(count("connections_created"))
+        trace_config.on_connection_reuseconn.append(count("connections_reused"))
+
+        return aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                keepalive_timeout=self.keepalive_timeout,
+                ttl_dns_cache=self.ttl_dns_cache,
+            ),
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+            trust_env=True,
+            # Sessions are shared by every user; never carry cookies over
+            cookie_jar=aiohttp.DummyCookieJar(),
+            trace_configs=[trace_config],
+        )
+
+    def get_session(self, url: str) -> aiohttp.ClientSession:
+        """Return the pooled session for the origin of `url`."""
+        key = (asyncio.get_running_loop(), get_origin(url))
+        session = self._sessions.get(key)
+        if session is None or session.closed:
+            session = self._create_session(key[1])
+            self._sessions[key] = session
+        return session
+
+    async def request_json(
+        self,
+        method: str,
+        url: str,
+        max_retries: int = 0,
+        **kwargs,
+    ) -> Any:
+        """
+        Send a request through the pool and return the decoded JSON body.
+
+        429 and 5xx responses, connection errors and timeouts are retried up
+        to `max_retries` times, honoring Retry-After when the upstream sends it.
+        """
+        session = self.get_session(url)
+        stats = self._get_stats(get_origin(url))
+
+        for attempt in range(max_retries + 1):
+            try:
+                async with session.request(method, url, **kwargs) as r:
+                    if r.status not in RETRY_STATUS_CODES or attempt >= max_retries:
+                        r.raise_for_status()
+                        return await r.json()
+
+                    delay = get_retry_delay(r.headers.get("Retry-After"), attempt)
+                    log.warning(
+                        f"{self.name}: {r.status} from {get_origin(url)}, "
+                        f"retrying in {delay:.2f}s ({attempt + 1}/{max_retries})"
+                    )
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                if attempt >= max_retries:
+                    raise
+
+                delay = get_retry_delay(None, attempt)
+                log.warning(
+                    f"{self.name}: {type(e).__name__} from {get_origin(url)}, "
+                    f"retrying in {delay:.2f}s ({attempt + 1}/{max_retries})"
+                )
+
+            stats["retries"] += 1
+            await asyncio.sleep(delay)
+
+    def get_stats(self) -> dict:
+        origins = {}
+        for (_, origin), session in self._sessions.items():
+            if session.closed:
+                continue
+
+            connector = session.connector
+            entry = origins.setdefault(
+                origin, {**self._get_stats(origin), "open_connections": 0}
+            )
+            # Idle keep-alive connections plus those currently checked out
+            entry["open_connections"] += sum(
+                len(conns) for conns in getattr(connector, "_conns", {}).values()
+            ) + len(getattr(connector, "_acquired", ()))
+
+        for origin, stats in self._stats.items():
+            origins.setdefault(origin, {**stats, "open_connections": 0})
+
+        for stats in origins.values():
+            connections = stats["connections_created"] + stats["connections_reused"]
+            stats["reuse_ratio"] = (
+                stats["connections_reused"] / connections if connections else 0.0
+            )
+
+        return {
+            "name": self.name,
+            "limit": self.limit,
+            "limit_per_host": self.limit_per_host,
+            "origins": origins,
+        }
+
+    async def close(self):
+        sessions = list(self._sessions.values())
+        self._sessions.clear()
+        for session in sessions:
+            if not session.closed:
+                try:
+                    await session.close()
+                except Exception as e:
+                    log.debug(f"{self.name}: failed to close session: {e}")
+
+
+EMBEDDING_SESSION_POOL = SessionPool("embedding")
+# Chat completion, embedding and proxy requests to Ollama/OpenAI connections;
+# uncapped by default since every streaming chat holds a connection
+LLM_SESSION_POOL = SessionPool("llm", limit=AIOHTTP_CLIENT_LLM_POOL_LIMIT)
+
+SESSION_POOLS = [EMBEDDING_SESSION_POOL, LLM_SESSION_POOL]
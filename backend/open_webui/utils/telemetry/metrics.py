@@ -8,6 +8,7 @@ Metrics collected:
 
 * http.server.requests (counter)
 * http.server.duration (histogram, milliseconds)
+* webui.http_client.* (connection pool usage per pool and upstream origin)
 
 Attributes used: http.method, http.route, http.status_code
 
@@ -18,7 +19,7 @@ high-cardinality label sets.
 from __future__ import annotations
 
 import time
-from typing import Dict, List, Sequence, Any
+from typing import Any, Callable, Dict, List, Sequence
 from base64 import b64encode
 
 from fastapi import FastAPI, Request
@@ -46,6 +47,7 @@ from open_webui.env import (
     OTEL_METRICS_EXPORTER_OTLP_INSECURE,
 )
 from open_webui.models.users import Users
+from open_webui.utils.session_pool import SESSION_POOLS
 
 _EXPORT_INTERVAL_MILLIS = 10_000  # 10 seconds
 
@@ -101,6 +103,10 @@ def _build_meter_provider(resource: Resource) -> MeterProvider:
         View(
             instrument_name="webui.users.active.today",
         ),
+        View(
+            instrument_name="webui.http_client.*",
+            attribute_keys=["pool", "origin"],
+        ),
     ]
 
     provider = MeterProvider(
@@ -176,6 +182,51 @@ def setup_metrics(app: FastAPI, resource: Resource) -> None:
         callbacks=[observe_users_active_today],
     )
 
+    def observe_session_pools(
+        key: str,
+    ) -> Callable[[metrics.CallbackOptions], Sequence[metrics.Observation]]:
+        def observe(
+            options: metrics.CallbackOptions,
+        ) -> Sequence[metrics.Observation]:
+            return [
+                metrics.Observation(
+                    value=stats[key],
+                    attributes={"pool": pool.name, "origin": origin},
+                )
+                for pool in SESSION_POOLS
+                for origin, stats in pool.get_stats()["origins"].items()
+            ]
+
+        return observe
+
+    meter.create_observable_gauge(
+        name="webui.http_client.connections.open",
+        description="Open upstream connections of the pooled HTTP sessions",
+        unit="connections",
+        callbacks=[observe_session_pools("open_connections")],
+    )
+
+    meter.create_observable_counter(
+        name="webui.http_client.requests",
+        description="Requests sent through the pooled HTTP sessions",
+        unit="1",
+        callbacks=[observe_session_pools("requests")],
+    )
+
+    meter.create_observable_counter(
+        name="webui.http_client.connections.created",
+        description="Upstream connections opened by the pooled HTTP sessions",
+        unit="connections",
+        callbacks=[observe_session_pools("connections_created")],
+    )
+
+    meter.create_observable_counter(
+        name="webui.http_client.connections.reused",
+        description="Requests served on a kept-alive upstream connection",
+        unit="connections",
+        callbacks=[observe_session_pools("connections_reused")],
+    )
+
     # FastAPI middleware
     @app.middleware("http")
     async def _metrics_middleware(request: Request, call_next):
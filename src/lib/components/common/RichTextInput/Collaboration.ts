@@ -200,7 +200,7 @@ export class SocketIOCollaborationProvider {
 					document_id: this.documentId,
 					user_id: this.user?.id,
 					socket_id: this.socket.id,
-					update: Array.from(update),
+					update,
 					data: {
 						content: this.editorContentGetter?.() ?? {
 							md: '',
@@ -225,7 +225,7 @@ export class SocketIOCollaborationProvider {
 					this.socket.emit('ydoc:awareness:update', {
 						document_id: this.documentId,
 						user_id: this.socket.id,
-						update: Array.from(awarenessUpdate)
+						update: awarenessUpdate
 					});
 				}
 			}